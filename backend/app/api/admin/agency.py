@@ -1,5 +1,4 @@
 """Admin agency endpoints."""
-import json
 from uuid import UUID
 
 import asyncpg
@@ -160,12 +159,12 @@ async def create_agency_org(
     industry_id = tmpl["industry_id"] if tmpl else None
     avg_deal = float(tmpl["default_avg_deal_value"]) if tmpl and tmpl["default_avg_deal_value"] else 5000
     close_rate = float(tmpl["default_close_rate_percent"]) if tmpl and tmpl["default_close_rate_percent"] else 10
-    scoring_config = json.dumps(tmpl["default_scoring_json"]) if tmpl and tmpl["default_scoring_json"] else None
+    scoring_config = tmpl["default_scoring_json"] if tmpl and tmpl["default_scoring_json"] else None
 
     row = await conn.fetchrow(
         """INSERT INTO orgs (name, slug, agency_id, display_name, logo_url, primary_color,
                              support_email, industry_id, avg_deal_value, close_rate_percent, scoring_config)
-           VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11::jsonb)
+           VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11)
            RETURNING id, name, slug, display_name, logo_url, primary_color, support_email""",
         body.name,
         body.slug,
@@ -230,13 +229,13 @@ async def create_org_funnel(
     else:
         schema = {**_DEFAULT_SCHEMA, "slug": body.slug}
 
-    routing = json.dumps(_DEFAULT_ROUTING)
+    routing = _DEFAULT_ROUTING
 
     if body.enable_sequences:
         if industry_tmpl and industry_tmpl["default_sequence_json"]:
-            seq_config = json.dumps(dict(industry_tmpl["default_sequence_json"]))
+            seq_config = dict(industry_tmpl["default_sequence_json"])
         else:
-            seq_config = json.dumps(_DEFAULT_SEQUENCE)
+            seq_config = _DEFAULT_SEQUENCE
     else:
         seq_config = None
 
@@ -252,7 +251,7 @@ async def create_org_funnel(
         org_id,
         body.slug,
         body.name,
-        json.dumps(schema),
+        schema,
         languages,
         routing,
         body.enable_sequences,
@@ -1,6 +1,5 @@
 """Admin endpoint for AI-powered ad campaign strategy generation."""
 
-import json
 
 import asyncpg
 from fastapi import APIRouter, Depends
@@ -48,8 +47,7 @@ async def create_ad_strategy(
     }
 
     if row and row["scoring_config"]:
-        sc = row["scoring_config"]
-        org_data["scoring_config"] = json.loads(sc) if isinstance(sc, str) else sc
+        org_data["scoring_config"] = row["scoring_config"]
 
     result = await generate_ad_strategy(
         org_data=org_data,
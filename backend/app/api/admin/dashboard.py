@@ -11,6 +11,7 @@ from app.core.auth import resolve_active_org_id
 from app.database import get_db
 from app.models.schemas import OrgInsightsResponse, PipelineMetricsResponse
 from app.services.analytics_service import get_org_dashboard_metrics, get_pipeline_metrics
+from app.services.metrics_cache import metrics_cache
 
 router = APIRouter()
 
@@ -20,7 +21,7 @@ async def dashboard(
     org_id: str = Depends(resolve_active_org_id),
     conn: asyncpg.Connection = Depends(get_db),
 ):
-    metrics = await get_org_dashboard_metrics(conn, org_id)
+    metrics = await _dashboard_metrics(conn, org_id)
     return {"metrics": metrics}
 
 
@@ -30,7 +31,7 @@ async def dashboard_metrics(
     conn: asyncpg.Connection = Depends(get_db),
 ):
     """Pipeline metrics for the org dashboard (Sprint 7)."""
-    data = await get_pipeline_metrics(conn, org_id)
+    data = await _pipeline_metrics(conn, org_id)
     return data
 
 
@@ -40,8 +41,8 @@ async def dashboard_insights(
     conn: asyncpg.Connection = Depends(get_db),
 ):
     """AI-powered strategic insights for the org dashboard (Sprint 8)."""
-    pipeline = await get_pipeline_metrics(conn, org_id)
-    dash = await get_org_dashboard_metrics(conn, org_id)
+    pipeline = await _pipeline_metrics(conn, org_id)
+    dash = await _dashboard_metrics(conn, org_id)
 
     # Build context for insights
     context = {
@@ -69,6 +70,18 @@ async def dashboard_insights(
     return _generate_stub_insights(context)
 
 
+async def _dashboard_metrics(conn: asyncpg.Connection, org_id: str) -> dict:
+    return await metrics_cache.get_or_compute(
+        org_id, "dashboard", lambda: get_org_dashboard_metrics(conn, org_id)
+    )
+
+
+async def _pipeline_metrics(conn: asyncpg.Connection, org_id: str) -> dict:
+    return await metrics_cache.get_or_compute(
+        org_id, "pipeline", lambda: get_pipeline_metrics(conn, org_id)
+    )
+
+
 def _generate_stub_insights(ctx: dict) -> OrgInsightsResponse:
     """Deterministic insights from pipeline data."""
     highlights = []
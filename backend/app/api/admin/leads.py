@@ -21,12 +21,14 @@ async def list_leads(
     funnel_id: UUID | None = Query(None),
     language: str | None = Query(None),
     search: str | None = Query(None),
+    cursor: str | None = Query(None, description="next_cursor from the previous response; overrides page"),
+    count: str = Query("exact", pattern="^(exact|estimated|none)$"),
     org_id: str = Depends(resolve_active_org_id),
     conn: asyncpg.Connection = Depends(get_db),
 ):
     funnel_id_str = str(funnel_id) if funnel_id else None
 
-    items, total = await get_leads(
+    items, total, next_cursor = await get_leads(
         conn=conn,
         org_id=org_id,
         page=page,
@@ -34,13 +36,17 @@ async def list_leads(
         funnel_id=funnel_id_str,
         language=language,
         search=search,
+        cursor=cursor,
+        count=count,
     )
 
     return LeadListResponse(
         leads=[LeadListItem(**item) for item in items],
         total=total,
+        total_is_estimate=count == "estimated",
         page=page,
         per_page=per_page,
+        next_cursor=next_cursor,
     )
 
 
@@ -187,8 +193,6 @@ async def lead_conversion_assist(
     conn: asyncpg.Connection = Depends(get_db),
 ):
     """Generate AI conversion assist (next action, scripts) for a lead."""
-    import json as _json
-
     # Load lead
     lead_row = await conn.fetchrow(
         """SELECT id, answers_json, stage, ai_score, ai_summary
@@ -198,7 +202,7 @@ async def lead_conversion_assist(
     if not lead_row:
         raise HTTPException(status_code=404, detail="Lead not found")
 
-    answers = _json.loads(lead_row["answers_json"]) if isinstance(lead_row["answers_json"], str) else lead_row["answers_json"]
+    answers = lead_row["answers_json"]
 
     # Load org context
     org_row = await conn.fetchrow(
@@ -214,11 +218,7 @@ async def lead_conversion_assist(
         "industry_name": org_row["industry_name"] if org_row and org_row["industry_name"] else "general business",
         "avg_deal_value": float(org_row["avg_deal_value"] or 5000) if org_row else 5000,
         "close_rate_percent": float(org_row["close_rate_percent"] or 10) if org_row else 10,
-        "scoring_config": (
-            _json.loads(org_row["scoring_config"])
-            if org_row and org_row["scoring_config"] and isinstance(org_row["scoring_config"], str)
-            else (org_row["scoring_config"] if org_row else None)
-        ),
+        "scoring_config": org_row["scoring_config"] if org_row else None,
     }
 
     # Compute intelligence for enriched assist
@@ -293,7 +293,6 @@ async def get_lead_engagement(
     Returns {plan: null, steps: [], events: []} when no plan exists.
     Never returns 500 — all errors degrade gracefully.
     """
-    import json as _json
     import logging as _logging
     _log = _logging.getLogger(__name__)
 
@@ -334,15 +333,7 @@ async def get_lead_engagement(
             )
             for r in step_rows:
                 try:
-                    d = dict(r)
-                    gcj = d.get("generated_content_json")
-                    if isinstance(gcj, str):
-                        try:
-                            gcj = _json.loads(gcj)
-                        except Exception:
-                            gcj = None
-                    d["generated_content_json"] = gcj
-                    steps.append(EngagementStepItem(**d))
+                    steps.append(EngagementStepItem(**dict(r)))
                 except Exception as step_exc:
                     _log.warning("Skipping malformed engagement step: %s", step_exc)
 
@@ -356,15 +347,7 @@ async def get_lead_engagement(
         )
         for r in event_rows:
             try:
-                d = dict(r)
-                mj = d.get("metadata_json")
-                if isinstance(mj, str):
-                    try:
-                        mj = _json.loads(mj)
-                    except Exception:
-                        mj = None
-                d["metadata_json"] = mj
-                events.append(EngagementEventItem(**d))
+                events.append(EngagementEventItem(**dict(r)))
             except Exception as ev_exc:
                 _log.warning("Skipping malformed engagement event: %s", ev_exc)
 
@@ -378,15 +361,7 @@ async def get_lead_engagement(
         )
         for r in inbound_rows:
             try:
-                d = dict(r)
-                mj = d.get("metadata_json")
-                if isinstance(mj, str):
-                    try:
-                        mj = _json.loads(mj)
-                    except Exception:
-                        mj = None
-                d["metadata_json"] = mj
-                inbound_messages.append(InboundMessageItem(**d))
+                inbound_messages.append(InboundMessageItem(**dict(r)))
             except Exception as im_exc:
                 _log.warning("Skipping malformed inbound message: %s", im_exc)
 
@@ -433,7 +408,6 @@ async def resolve_handoff(
     - Logs handoff_resolved engagement event
     Idempotent: if lead.needs_human is already false, returns ok.
     """
-    import json as _json
     from app.services.engagement_service import log_engagement_event
 
     row = await conn.fetchrow(
@@ -476,6 +450,7 @@ async def resolve_handoff(
         direction="system",
         content=None,
         metadata={"resolved_by": current_user.get("email") or current_user.get("user_id")},
+        sync=True,  # the timeline is re-fetched right after this returns
     )
 
     return {"status": "ok"}
@@ -496,7 +471,6 @@ async def get_lead_events(
     if not lead:
         raise HTTPException(status_code=404, detail="Lead not found")
 
-    import json
     rows = await conn.fetch(
         """SELECT event_type, status, detail_json, created_at
            FROM automation_events
@@ -506,13 +480,10 @@ async def get_lead_events(
     )
     events = []
     for r in rows:
-        detail = r["detail_json"]
-        if isinstance(detail, str):
-            detail = json.loads(detail)
         events.append({
             "event_type": r["event_type"],
             "status": r["status"],
-            "detail_json": detail,
+            "detail_json": r["detail_json"],
             "created_at": r["created_at"].isoformat() if r["created_at"] else None,
         })
     return {"events": events}
@@ -3,16 +3,21 @@ Admin Ops API: operational triggers for testing and manual worker execution.
 Not public — requires org-scoped admin auth.
 """
 
-import json
 import logging
+from uuid import UUID
 
 import asyncpg
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Query
 
 from app.core.auth import resolve_active_org_id
-from app.database import get_db, pool as db_pool
+from app.database import get_db, pool as db_pool, pool_stats
 from app.models.schemas import HandoffQueueItem, HandoffQueueResponse
-from app.services.engagement_worker import process_due_engagement_steps
+from app.services import call_service, delivery_governor, job_queue, outbox
+from app.services.engagement_scheduler import engagement_scheduler
+from app.services.engagement_service import create_engagement_plans
+from app.services.engagement_worker import dispatch_stats, process_due_engagement_steps
+from app.services.event_sink import event_sink
+from app.services.metrics_cache import metrics_cache
 
 logger = logging.getLogger(__name__)
 
@@ -34,6 +39,116 @@ async def run_engagement_worker(
     return {"status": "ok", **summary}
 
 
+@router.post("/ops/engagement/backfill")
+async def backfill_engagement_plans(
+    limit: int = Query(500, ge=1, le=5000),
+    org_id: str = Depends(resolve_active_org_id),
+    conn: asyncpg.Connection = Depends(get_db),
+):
+    """
+    Create default engagement plans for this org's leads that never had one
+    (imported or pre-engagement leads), newest first, in one transaction.
+    """
+    leads = await conn.fetch(
+        """
+        SELECT l.id, l.org_id, l.funnel_id, l.answers_json
+          FROM leads l
+         WHERE l.org_id = $1
+           AND NOT EXISTS (SELECT 1 FROM engagement_plans ep WHERE ep.lead_id = l.id)
+         ORDER BY l.created_at DESC
+         LIMIT $2
+        """,
+        org_id,
+        limit,
+    )
+    plans = await create_engagement_plans(conn, [dict(r) for r in leads])
+    logger.info("Engagement backfill by org=%s: %d plan(s) created", org_id, len(plans))
+    return {"status": "ok", "candidates": len(leads), "created": len(plans)}
+
+
+@router.get("/ops/engagement")
+async def get_engagement_dispatch_stats(
+    org_id: str = Depends(resolve_active_org_id),
+):
+    """
+    Engagement dispatch counters (this process): due-queue scans versus
+    first touches sent by the speed-to-lead fast path, plus scheduler state.
+    """
+    return {"dispatch": dict(dispatch_stats), "scheduler": engagement_scheduler.stats()}
+
+
+@router.get("/ops/metrics-cache")
+async def get_metrics_cache_stats(
+    org_id: str = Depends(resolve_active_org_id),
+):
+    """Hit/miss/coalesced counters for the dashboard metrics cache (this process)."""
+    return metrics_cache.stats()
+
+
+@router.get("/ops/delivery")
+async def get_delivery_governor_state(
+    org_id: str = Depends(resolve_active_org_id),
+):
+    """
+    Provider rate-limit buckets and circuit breakers (shared by all processes),
+    redacted for this org, plus this org's outbox counts.
+    """
+    return {
+        "providers": await delivery_governor.provider_states(org_id),
+        "outbox": await outbox.outbox_stats(org_id),
+    }
+
+
+@router.get("/ops/calls")
+async def get_call_placement_stats(
+    org_id: str = Depends(resolve_active_org_id),
+):
+    """Bridge call placement counters and latency (this process)."""
+    return call_service.placement_stats()
+
+
+@router.get("/ops/event-sink")
+async def get_event_sink_stats(
+    org_id: str = Depends(resolve_active_org_id),
+):
+    """Buffered event writer counters (this process)."""
+    return event_sink.stats()
+
+
+@router.get("/ops/db-pool")
+async def get_db_pool_stats(
+    org_id: str = Depends(resolve_active_org_id),
+):
+    """
+    Pool occupancy and per-route connection wait/hold times (this process).
+    Routes are ordered by total hold time, so whatever is starving the pool
+    sorts first.
+    """
+    return pool_stats()
+
+
+@router.get("/ops/jobs")
+async def get_job_queue_stats(
+    org_id: str = Depends(resolve_active_org_id),
+):
+    """This org's job counts by kind and status, plus its oldest due job's lag."""
+    import app.database as _db_mod
+    return await job_queue.queue_stats(_db_mod.pool, org_id)
+
+
+@router.post("/ops/jobs/{job_id}/requeue")
+async def requeue_dead_job(
+    job_id: UUID,
+    org_id: str = Depends(resolve_active_org_id),
+):
+    """Return one of this org's dead-lettered jobs to the queue with a fresh attempt budget."""
+    import app.database as _db_mod
+    if not await job_queue.requeue(_db_mod.pool, job_id, org_id):
+        raise HTTPException(status_code=404, detail="Dead job not found")
+    logger.info("Job %s requeued by org=%s", job_id, org_id)
+    return {"status": "ok", "job_id": str(job_id)}
+
+
 @router.get("/ops/handoffs", response_model=HandoffQueueResponse)
 async def get_handoff_queue(
     org_id: str = Depends(resolve_active_org_id),
@@ -61,7 +176,7 @@ async def get_handoff_queue(
 
     items = []
     for r in rows:
-        answers = json.loads(r["answers_json"]) if isinstance(r["answers_json"], str) else r["answers_json"]
+        answers = r["answers_json"]
         items.append(HandoffQueueItem(
             id=r["id"],
             name=answers.get("name"),
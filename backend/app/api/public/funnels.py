@@ -1,5 +1,3 @@
-import json
-
 import asyncpg
 from fastapi import APIRouter, Depends, HTTPException
 
@@ -16,15 +14,10 @@ async def get_funnel(slug: str, conn: asyncpg.Connection = Depends(get_db)):
     if not row:
         raise HTTPException(status_code=404, detail="Funnel not found")
 
-    schema_raw = row["schema_json"]
-    schema_data = json.loads(schema_raw) if isinstance(schema_raw, str) else schema_raw
-    branding_raw = row["branding"]
-    branding = json.loads(branding_raw) if isinstance(branding_raw, str) else (branding_raw or {})
-
     return FunnelPublicResponse(
         slug=row["slug"],
         name=row["name"],
-        schema_json=FunnelSchema(**schema_data),
-        branding=branding,
+        schema_json=FunnelSchema(**row["schema_json"]),
+        branding=row["branding"] or {},
         languages=row["languages"],
     )
@@ -1,11 +1,12 @@
-import json
-
 import asyncpg
-from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Request
+from fastapi import APIRouter, Depends, HTTPException, Request
 
+from app.core.phone import normalize_phone
 from app.database import get_db
 from app.models.schemas import LeadSubmitRequest, LeadSubmitResponse
+from app.services import job_queue
 from app.services.lead_service import submit_lead
+from app.services.metrics_cache import invalidate_org_metrics
 
 router = APIRouter()
 
@@ -13,14 +14,14 @@ router = APIRouter()
 @router.post("/leads/submit", response_model=LeadSubmitResponse)
 async def submit(
     payload: LeadSubmitRequest,
-    background_tasks: BackgroundTasks,
     conn: asyncpg.Connection = Depends(get_db),
 ):
     # Honeypot check: silently reject if honeypot field is filled
     if payload.honeypot:
         return LeadSubmitResponse(success=True, message="Thank you for your submission!")
 
-    lead_id = await submit_lead(
+    # Inserts the lead and enqueues its automation job in one transaction
+    await submit_lead(
         conn=conn,
         funnel_slug=payload.funnel_slug,
         answers=payload.answers,
@@ -28,18 +29,12 @@ async def submit(
         source=payload.source,
     )
 
-    # Enqueue automation processing as a background task
-    from app.services.automation_service import process_automation
-    import app.database as database_module
-    background_tasks.add_task(process_automation, str(lead_id), database_module.pool)
-
     return LeadSubmitResponse(success=True, message="Thank you for your submission!")
 
 
 @router.post("/leads/basin")
 async def basin_webhook(
     request: Request,
-    background_tasks: BackgroundTasks,
     conn: asyncpg.Connection = Depends(get_db),
 ):
     """Receive Basin form submissions from warderai.com and create leads in Warder pipeline."""
@@ -109,22 +104,23 @@ async def basin_webhook(
         "timestamp": timestamp,
     }
 
-    lead_id = await conn.fetchval(
-        """
-        INSERT INTO leads (org_id, funnel_id, language, answers_json, source_json)
-        VALUES ($1, $2, $3, $4::jsonb, $5::jsonb)
-        RETURNING id
-        """,
-        org["id"],
-        funnel["id"],
-        lang,
-        json.dumps(answers),
-        json.dumps(source),
-    )
-
-    from app.services.automation_service import process_automation
-    import app.database as database_module
-    background_tasks.add_task(process_automation, str(lead_id), database_module.pool)
+    # Lead + automation job in one transaction (see lead_service.submit_lead)
+    async with conn.transaction():
+        lead_id = await conn.fetchval(
+            """
+            INSERT INTO leads (org_id, funnel_id, language, answers_json, source_json, phone_e164)
+            VALUES ($1, $2, $3, $4, $5, $6)
+            RETURNING id
+            """,
+            org["id"],
+            funnel["id"],
+            lang,
+            answers,
+            source,
+            normalize_phone(phone),
+        )
+        await job_queue.enqueue(conn, "lead_automation", {"lead_id": str(lead_id)})
+    invalidate_org_metrics(org["id"])
 
     return {
         "status": "ok",
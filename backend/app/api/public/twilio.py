@@ -1,6 +1,4 @@
 """Twilio webhook endpoints for bridge call flow."""
-import asyncio
-import json
 import logging
 import os
 from datetime import datetime
@@ -8,6 +6,11 @@ from datetime import datetime
 from fastapi import APIRouter, HTTPException, Query, Request
 from fastapi.responses import Response
 
+from app.services import job_queue
+from app.services.call_service import CALL_RETRY_DELAY_SECONDS, MAX_CALL_ATTEMPTS
+from app.services.lead_service import LEAD_BY_ID_SQL
+from app.services.metrics_cache import invalidate_org_metrics
+
 router = APIRouter(tags=["twilio"])
 logger = logging.getLogger(__name__)
 
@@ -58,7 +61,7 @@ async def rep_gather(
         # Look up lead phone from DB
         async with pool.acquire() as conn:
             row = await conn.fetchrow(
-                "SELECT answers_json FROM leads WHERE id = $1", lead_id
+                "SELECT org_id, answers_json, phone_e164 FROM leads WHERE id = $1", lead_id
             )
             if not row:
                 twiml = """<?xml version="1.0" encoding="UTF-8"?>
@@ -66,9 +69,7 @@ async def rep_gather(
                 return Response(content=twiml, media_type="application/xml")
 
             answers = row["answers_json"]
-            if isinstance(answers, str):
-                answers = json.loads(answers)
-            lead_phone = answers.get("phone", "")
+            lead_phone = row["phone_e164"] or answers.get("phone", "")
 
             if not lead_phone:
                 twiml = """<?xml version="1.0" encoding="UTF-8"?>
@@ -81,6 +82,7 @@ async def rep_gather(
                 lead_id,
                 datetime.utcnow(),
             )
+        invalidate_org_metrics(row["org_id"])
 
         twiml = f"""<?xml version="1.0" encoding="UTF-8"?>
 <Response>
@@ -91,10 +93,11 @@ async def rep_gather(
     else:
         # Rep declined
         async with pool.acquire() as conn:
-            await conn.execute(
-                "UPDATE leads SET call_status = 'rep_declined' WHERE id = $1",
+            org_id = await conn.fetchval(
+                "UPDATE leads SET call_status = 'rep_declined' WHERE id = $1 RETURNING org_id",
                 lead_id,
             )
+        invalidate_org_metrics(org_id)
 
         twiml = """<?xml version="1.0" encoding="UTF-8"?>
 <Response><Say voice="alice">Goodbye.</Say><Hangup/></Response>"""
@@ -128,49 +131,33 @@ async def status_callback(
         mapped_status = status_map.get(call_status, call_status)
 
         async with pool.acquire() as conn:
-            await conn.execute(
-                "UPDATE leads SET call_status = $2 WHERE id = $1",
+            org_id = await conn.fetchval(
+                "UPDATE leads SET call_status = $2 WHERE id = $1 RETURNING org_id",
                 lead_id,
                 mapped_status,
             )
+            invalidate_org_metrics(org_id)
 
             # Retry on failure statuses
             if mapped_status in ("failed", "no-answer", "busy"):
-                row = await conn.fetchrow(
-                    "SELECT * FROM leads WHERE id = $1", lead_id
-                )
-                if row and (row["call_attempts"] or 0) < 2:
-                    lead_dict = dict(row)
-                    answers = row["answers_json"]
-                    if isinstance(answers, str):
-                        lead_dict["answers_json"] = json.loads(answers)
-
-                    # Get funnel for retry
-                    funnel_row = await conn.fetchrow(
-                        "SELECT * FROM funnels WHERE id = $1",
-                        row["funnel_id"],
+                row = await conn.fetchrow(LEAD_BY_ID_SQL, lead_id)
+                if row and (row["call_attempts"] or 0) < MAX_CALL_ATTEMPTS:
+                    # Durable: survives a restart during the retry delay
+                    await job_queue.enqueue(
+                        conn, "call_retry", {"lead_id": lead_id},
+                        delay_seconds=CALL_RETRY_DELAY_SECONDS,
                     )
-                    if funnel_row:
-                        from app.services.call_service import retry_call
-
-                        funnel_dict = dict(funnel_row)
-                        asyncio.create_task(
-                            retry_call(lead_id, lead_dict, funnel_dict, pool)
-                        )
 
             # Auto text-back for missed calls
             if mapped_status in ("no-answer", "busy"):
                 try:
                     from app.services.sequence_worker import _send_sequence_sms
                     lead_row = await conn.fetchrow(
-                        "SELECT answers_json, funnel_id FROM leads WHERE id = $1", lead_id
+                        "SELECT answers_json, phone_e164, funnel_id FROM leads WHERE id = $1", lead_id
                     )
                     if lead_row:
                         answers = lead_row["answers_json"]
-                        if isinstance(answers, str):
-                            import json as json_mod
-                            answers = json_mod.loads(answers)
-                        phone = answers.get("phone", "")
+                        phone = lead_row["phone_e164"] or answers.get("phone", "")
                         funnel_row = await conn.fetchrow(
                             "SELECT twilio_from_number FROM funnels WHERE id = $1", lead_row["funnel_id"]
                         )
@@ -0,0 +1,196 @@
+"""
+Background work: the engagement scheduler, the job queue consumer and
+their recovery/maintenance cadences.
+
+Shared by the API process (when RUN_BACKGROUND_WORKERS is on) and the
+standalone worker (`python -m app.worker`). Ticks are tracked so shutdown
+can stop claiming new work and wait for in-flight ticks to finish.
+
+Singletons (the event-driven engagement scheduler, maintenance, outbox
+reconcile, the working-hours release of held work) run only in the process
+holding the scheduler leader lease (services/leader_election.py); the
+claim-based job consumer runs in every process.
+"""
+
+import asyncio
+import logging
+import os
+import socket
+
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+
+import app.database as _db_mod
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+_inflight: set[asyncio.Task] = set()
+_draining = False
+
+
+def draining() -> bool:
+    """True once shutdown has begun; tick loops stop claiming new batches."""
+    return _draining
+
+
+def set_worker_id() -> str:
+    """Identify this process in locked_by columns so workers can be told apart."""
+    from app.services import engagement_worker, job_queue
+
+    worker_id = f"{socket.gethostname()}-{os.getpid()}"
+    engagement_worker.WORKER_ID = job_queue.WORKER_ID = worker_id
+    return worker_id
+
+
+async def recover_stuck_work() -> None:
+    """Return rows left 'in_progress' by a crashed process to the queue."""
+    from app.services import engagement_worker, job_queue
+
+    try:
+        await engagement_worker.recover_stuck_steps(_db_mod.pool)
+        await job_queue.recover_stuck(_db_mod.pool)
+    except Exception as exc:
+        logger.error("Background recovery failed: %s", exc)
+
+
+def _leader_only(fn):
+    from app.services.leader_election import scheduler_lease
+
+    async def run():
+        if scheduler_lease.is_leader:
+            await fn()
+
+    run.__name__ = fn.__name__
+    return run
+
+
+async def _renew_lease():
+    from app.services.leader_election import scheduler_lease
+    await scheduler_lease.renew()
+
+
+def _tracked(fn):
+    async def run():
+        task = asyncio.current_task()
+        _inflight.add(task)
+        try:
+            await fn()
+        finally:
+            _inflight.discard(task)
+
+    run.__name__ = fn.__name__
+    return run
+
+
+async def _run_job_worker():
+    try:
+        from app.services.job_queue import run_due_jobs
+        result = await run_due_jobs(_db_mod.pool)
+        if result.get("processed", 0) > 0:
+            logger.info("Job worker: %s", result)
+    except Exception as exc:
+        logger.error("Job worker error: %s", exc)
+
+
+async def _run_maintenance():
+    from app.services import job_queue, outbox
+
+    await recover_stuck_work()
+    try:
+        await job_queue.purge_finished(_db_mod.pool)
+        await outbox.purge_completed(_db_mod.pool)
+    except Exception as exc:
+        logger.error("Job maintenance error: %s", exc)
+
+
+async def _run_held_release():
+    from app.services import working_hours
+
+    try:
+        await working_hours.release_held_work(_db_mod.pool)
+    except Exception as exc:
+        logger.error("Held work release error: %s", exc)
+
+
+async def _run_outbox_reconcile():
+    from app.services import outbox
+
+    try:
+        await outbox.reconcile_in_flight(_db_mod.pool)
+    except Exception as exc:
+        logger.error("Outbox reconcile error: %s", exc)
+
+
+def build_scheduler() -> AsyncIOScheduler:
+    from app.services import working_hours
+
+    scheduler = AsyncIOScheduler()
+    scheduler.add_job(_renew_lease, "interval", seconds=settings.LEADER_RENEW_SECONDS, id="leader_lease")
+    # Singleton: one process cluster-wide. Engagement steps are not polled
+    # here; services/engagement_scheduler.py wakes on NOTIFY and due times.
+    scheduler.add_job(_tracked(_leader_only(_run_maintenance)), "interval", seconds=300, id="maintenance")
+    scheduler.add_job(
+        _tracked(_leader_only(_run_outbox_reconcile)), "interval",
+        seconds=settings.OUTBOX_RECONCILE_INTERVAL_SECONDS, id="outbox_reconcile",
+    )
+    scheduler.add_job(
+        _tracked(_leader_only(_run_held_release)), "interval",
+        seconds=working_hours.RELEASE_INTERVAL_SECONDS, id="held_release",
+    )
+    # Claim-based: every process
+    scheduler.add_job(
+        _tracked(_run_job_worker), "interval",
+        seconds=settings.JOBS_POLL_INTERVAL_SECONDS, id="job_worker",
+    )
+    return scheduler
+
+
+async def start() -> AsyncIOScheduler:
+    """Recover stuck work, then start the schedulers. Returns the running scheduler."""
+    from app.services.engagement_scheduler import engagement_scheduler
+    from app.services.leader_election import scheduler_lease
+
+    global _draining
+    _draining = False
+    set_worker_id()
+    if await scheduler_lease.renew():
+        await recover_stuck_work()
+    scheduler = build_scheduler()
+    scheduler.start()
+    asyncio.create_task(_tracked(engagement_scheduler.run)())
+    logger.info(
+        "Background schedulers started: engagement=event-driven (reload %ss), jobs=%ss, "
+        "maintenance=300s (leader=%s)",
+        settings.ENGAGEMENT_SCHEDULER_WINDOW_SECONDS, settings.JOBS_POLL_INTERVAL_SECONDS,
+        scheduler_lease.is_leader,
+    )
+    return scheduler
+
+
+async def drain(scheduler: AsyncIOScheduler, timeout: float | None = None) -> None:
+    """
+    Stop scheduling ticks and wait up to `timeout` seconds for running ones.
+    In-flight ticks finish their current batch and stop claiming; anything
+    cut off at the deadline stays 'in_progress' and is recovered later.
+    """
+    from app.services.engagement_scheduler import engagement_scheduler
+    from app.services.engagement_worker import cancel_first_touches
+    from app.services.leader_election import scheduler_lease
+
+    global _draining
+    _draining = True
+    scheduler.shutdown(wait=False)
+    engagement_scheduler.stop()
+    await cancel_first_touches(_db_mod.pool)
+    if timeout is None:
+        timeout = settings.WORKER_DRAIN_TIMEOUT_SECONDS
+    pending = {t for t in _inflight if not t.done()}
+    if pending:
+        logger.info("Draining %d background tick(s), up to %ss", len(pending), timeout)
+        _, still_running = await asyncio.wait(pending, timeout=timeout)
+        for task in still_running:
+            task.cancel()
+        if still_running:
+            logger.warning("Cancelled %d background tick(s) at drain deadline", len(still_running))
+    # Hand the lease over only once our singleton ticks have stopped
+    await scheduler_lease.release()
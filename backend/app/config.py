@@ -17,12 +17,104 @@ class Settings(BaseSettings):
     SMTP_USER: str = ""
     SMTP_PASS: str = ""
     SMTP_FROM: str = ""
+    SMTP_POOL_SIZE: int = 3
 
     # Twilio
     TWILIO_ACCOUNT_SID: str = ""
     TWILIO_AUTH_TOKEN: str = ""
     TWILIO_WEBHOOK_SECRET: str = "dev-webhook-secret"
 
+    # Engagement worker concurrency
+    ENGAGEMENT_MAX_CONCURRENCY: int = 20
+    ENGAGEMENT_SMS_CONCURRENCY: int = 10
+    ENGAGEMENT_EMAIL_CONCURRENCY: int = 5
+    ENGAGEMENT_CALL_CONCURRENCY: int = 2
+    ENGAGEMENT_PROVIDER_CONCURRENCY: int = 10
+    ENGAGEMENT_TICK_BUDGET_SECONDS: int = 50
+    # The scheduler holds due times this far ahead in memory and reloads them
+    # this often as a safety net behind LISTEN/NOTIFY wakeups.
+    ENGAGEMENT_SCHEDULER_WINDOW_SECONDS: int = 300
+    # A new lead's step 1 is left to the first-touch fast path for this long
+    # past its due time before the scheduler may claim it.
+    ENGAGEMENT_FIRST_TOUCH_GRACE_SECONDS: int = 60
+
+    # Bridge call placement (services/call_service.py): concurrent Twilio
+    # Calls API requests per process, and the timeout for each.
+    CALL_PLACEMENT_CONCURRENCY: int = 5
+    CALL_PLACEMENT_TIMEOUT_SECONDS: float = 10.0
+
+    # Background work. API replicas can set RUN_BACKGROUND_WORKERS=false and
+    # leave engagement ticks and job consumption to `python -m app.worker`,
+    # which opens its own pool sized by WORKER_DB_POOL_*.
+    RUN_BACKGROUND_WORKERS: bool = True
+    WORKER_DB_POOL_MIN_SIZE: int = 2
+    WORKER_DB_POOL_MAX_SIZE: int = 20
+    WORKER_DRAIN_TIMEOUT_SECONDS: int = 30
+    # Singleton ticks run only on the advisory-lock leader; followers retry
+    # the lock (and the leader pings it) this often.
+    LEADER_RENEW_SECONDS: int = 10
+
+    # Durable job queue (lead automation, call retries)
+    JOBS_CONCURRENCY: int = 10
+    JOBS_POLL_INTERVAL_SECONDS: int = 2
+    JOBS_TICK_BUDGET_SECONDS: int = 50
+    JOBS_STUCK_AFTER_SECONDS: int = 600
+    JOBS_RETENTION_DAYS: int = 7
+
+    # Delivery governor (services/delivery_governor.py): Postgres-backed token
+    # buckets shared by every process, in sends per second, with bursts of
+    # GOVERNOR_BURST_SECONDS worth of tokens. The breaker opens after
+    # GOVERNOR_BREAKER_FAILURES consecutive provider failures.
+    GOVERNOR_ENABLED: bool = True
+    GOVERNOR_TWILIO_ACCOUNT_RATE: float = 25.0
+    GOVERNOR_TWILIO_NUMBER_RATE: float = 1.0
+    GOVERNOR_TWILIO_CALL_RATE: float = 1.0
+    GOVERNOR_SMTP_RATE: float = 10.0
+    GOVERNOR_BURST_SECONDS: float = 2.0
+    GOVERNOR_BREAKER_FAILURES: int = 5
+    GOVERNOR_BREAKER_COOLDOWN_SECONDS: int = 30
+    GOVERNOR_MAX_INLINE_WAIT_SECONDS: float = 5.0
+    # Engagement steps hitting 429/5xx/timeouts are deferred with exponential
+    # backoff, then failed after this many attempts.
+    GOVERNOR_MAX_SEND_ATTEMPTS: int = 5
+    GOVERNOR_RETRY_BASE_SECONDS: int = 30
+
+    # Working hours (services/working_hours.py): funnels without a timezone
+    # use this one. Out-of-hours SMS steps and calls are held and released
+    # after the window opens at most this many per minute.
+    WORKING_HOURS_DEFAULT_TIMEZONE: str = "UTC"
+    WORKING_HOURS_RELEASE_STEPS_PER_MINUTE: int = 300
+    WORKING_HOURS_RELEASE_JOBS_PER_MINUTE: int = 60
+
+    # Outbox (services/outbox.py): sends still in flight this long are
+    # reconciled against the provider by a leader-only sweep every
+    # OUTBOX_RECONCILE_INTERVAL_SECONDS; settled rows are kept for dedupe
+    # and audit for OUTBOX_RETENTION_DAYS.
+    OUTBOX_RECONCILE_AFTER_SECONDS: int = 120
+    OUTBOX_RECONCILE_INTERVAL_SECONDS: int = 60
+    OUTBOX_RETENTION_DAYS: int = 30
+
+    # Buffered event writer (services/event_sink.py): automation/engagement
+    # events are COPYed in batches of EVENT_SINK_BATCH_SIZE or every
+    # EVENT_SINK_FLUSH_INTERVAL_SECONDS; emitters wait once MAX_BUFFER rows queue.
+    EVENT_SINK_ENABLED: bool = True
+    EVENT_SINK_BATCH_SIZE: int = 200
+    EVENT_SINK_FLUSH_INTERVAL_SECONDS: float = 0.5
+    EVENT_SINK_MAX_BUFFER: int = 5000
+
+    # asyncpg pool. DB_COMMAND_TIMEOUT <= 0 disables the per-query timeout;
+    # DB_STATEMENT_CACHE_SIZE=0 is required behind pgbouncer transaction pooling.
+    DB_POOL_MIN_SIZE: int = 2
+    DB_POOL_MAX_SIZE: int = 10
+    DB_MAX_INACTIVE_CONNECTION_LIFETIME: float = 300.0
+    DB_STATEMENT_CACHE_SIZE: int = 100
+    DB_COMMAND_TIMEOUT: float = 30.0
+    # Requests holding a pooled connection longer than this are logged
+    DB_HOLD_WARN_SECONDS: float = 5.0
+
+    # Dashboard analytics cache (0 disables caching; coalescing still applies)
+    DASHBOARD_CACHE_TTL_SECONDS: int = 30
+
     # App
     BASE_URL: str = "http://localhost:8000"
 
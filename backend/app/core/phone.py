@@ -0,0 +1,34 @@
+"""Phone number normalisation shared by lead intake, inbound SMS and Twilio sends.
+
+The rules here MUST stay in sync with the backfill in
+migrations/018_lead_phone_e164.sql so that rows written by the app and rows
+written by the migration produce the same key.
+"""
+
+import re
+
+_NON_DIGITS = re.compile(r"\D")
+
+
+def normalize_phone(raw: str | None) -> str | None:
+    """
+    Normalise a free-form phone number to E.164 (e.g. "+13105551234").
+
+    - Explicit "+" prefix with 8-15 digits → kept as international
+    - 10 digits                            → assumed US/CA, "+1" prepended
+    - 11 digits starting with "1"          → "+" prepended
+
+    Returns None when the input cannot be normalised.
+    """
+    if not raw:
+        return None
+    raw = raw.strip()
+    digits = _NON_DIGITS.sub("", raw)
+
+    if raw.startswith("+") and 8 <= len(digits) <= 15:
+        return f"+{digits}"
+    if len(digits) == 10:
+        return f"+1{digits}"
+    if len(digits) == 11 and digits.startswith("1"):
+        return f"+{digits}"
+    return None
@@ -1,12 +1,97 @@
+import logging
+import time
+from decimal import Decimal
+
 import asyncpg
+import orjson
+from fastapi import Request
+
 from app.config import settings
 
+logger = logging.getLogger(__name__)
+
 pool: asyncpg.Pool | None = None
 
 
-async def create_pool():
+def _orjson_default(obj):
+    if isinstance(obj, Decimal):
+        return float(obj)
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+def _dumps(value) -> bytes:
+    return orjson.dumps(value, default=_orjson_default)
+
+
+def _warmup_statements() -> list[tuple[str, tuple]]:
+    """Hot statements and inert arguments that match no rows."""
+    # Imported lazily: the services import this module's pool.
+    from app.services.engagement_worker import CLAIM_DUE_STEPS_SQL
+    from app.services.lead_service import FUNNEL_BY_SLUG_SQL, LEAD_BY_ID_SQL
+
+    return [
+        (FUNNEL_BY_SLUG_SQL, ("",)),
+        (LEAD_BY_ID_SQL, (None,)),
+        (CLAIM_DUE_STEPS_SQL, ("warmup", 0)),
+    ]
+
+
+async def _warm_statement_cache(conn: asyncpg.Connection) -> None:
+    """
+    Run each hot statement once so it lands in the connection's statement
+    cache. asyncpg only caches statements prepared through fetch()/execute()
+    — conn.prepare() bypasses the cache — so the first real request on a
+    fresh connection would otherwise pay the extra Parse/Describe round trip.
+    """
+    for sql, args in _warmup_statements():
+        try:
+            await conn.fetch(sql, *args)
+        except asyncpg.PostgresError as exc:
+            # Missing tables on a fresh database must not stop the pool opening.
+            logger.warning("Statement warmup skipped: %s", exc)
+
+
+async def init_connection(conn: asyncpg.Connection) -> None:
+    """
+    Register orjson-backed codecs so json/jsonb columns arrive as Python
+    objects and parameters are encoded natively — pass dicts/lists, not
+    json.dumps() strings. Binary format: jsonb is a version byte followed
+    by the JSON text.
+    """
+    await conn.set_type_codec(
+        "jsonb",
+        schema="pg_catalog",
+        encoder=lambda v: b"\x01" + _dumps(v),
+        decoder=lambda b: orjson.loads(b[1:]),
+        format="binary",
+    )
+    await conn.set_type_codec(
+        "json",
+        schema="pg_catalog",
+        encoder=_dumps,
+        decoder=orjson.loads,
+        format="binary",
+    )
+    if settings.DB_STATEMENT_CACHE_SIZE > 0:
+        await _warm_statement_cache(conn)
+
+
+def pool_options() -> dict:
+    return {
+        "min_size": settings.DB_POOL_MIN_SIZE,
+        "max_size": settings.DB_POOL_MAX_SIZE,
+        "max_inactive_connection_lifetime": settings.DB_MAX_INACTIVE_CONNECTION_LIFETIME,
+        "statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+        "command_timeout": settings.DB_COMMAND_TIMEOUT if settings.DB_COMMAND_TIMEOUT > 0 else None,
+    }
+
+
+async def create_pool(**overrides):
+    """Open the global pool. `overrides` replace pool_options() keys (the worker sizes its own pool)."""
     global pool
-    pool = await asyncpg.create_pool(settings.asyncpg_url, min_size=2, max_size=10)
+    pool = await asyncpg.create_pool(
+        settings.asyncpg_url, init=init_connection, **{**pool_options(), **overrides}
+    )
 
 
 async def close_pool():
@@ -16,7 +101,112 @@ async def close_pool():
         pool = None
 
 
-async def get_db():
+class PoolUsage:
+    """
+    Per-route connection accounting for requests served through get_db.
+
+    `wait` is time spent in pool.acquire() — it grows when the pool is
+    exhausted. `hold` is how long the request kept the connection, which
+    includes any provider I/O done while holding it. `in_use` counts
+    connections each route holds right now.
+    """
+
+    def __init__(self):
+        self._routes: dict[str, dict] = {}
+
+    def _route(self, route: str) -> dict:
+        stats = self._routes.get(route)
+        if stats is None:
+            stats = self._routes[route] = {
+                "requests": 0,
+                "in_use": 0,
+                "wait_total": 0.0,
+                "wait_max": 0.0,
+                "hold_total": 0.0,
+                "hold_max": 0.0,
+            }
+        return stats
+
+    def checkout(self, route: str, wait: float) -> None:
+        stats = self._route(route)
+        stats["in_use"] += 1
+        stats["wait_total"] += wait
+        stats["wait_max"] = max(stats["wait_max"], wait)
+
+    def checkin(self, route: str, hold: float) -> None:
+        stats = self._route(route)
+        stats["in_use"] -= 1
+        stats["requests"] += 1
+        stats["hold_total"] += hold
+        stats["hold_max"] = max(stats["hold_max"], hold)
+
+    def reset(self) -> None:
+        self._routes.clear()
+
+    def snapshot(self) -> list[dict]:
+        """Routes ordered by total hold time, worst first. Times in ms."""
+        out = []
+        for route, s in self._routes.items():
+            n = s["requests"] or 1
+            out.append({
+                "route": route,
+                "requests": s["requests"],
+                "in_use": s["in_use"],
+                "wait_avg_ms": round(s["wait_total"] / n * 1000, 1),
+                "wait_max_ms": round(s["wait_max"] * 1000, 1),
+                "hold_avg_ms": round(s["hold_total"] / n * 1000, 1),
+                "hold_max_ms": round(s["hold_max"] * 1000, 1),
+                "hold_total_ms": round(s["hold_total"] * 1000, 1),
+            })
+        out.sort(key=lambda r: r["hold_total_ms"], reverse=True)
+        return out
+
+
+pool_usage = PoolUsage()
+
+
+def pool_stats() -> dict:
+    """Pool occupancy plus per-route usage, for /admin/ops/db-pool."""
+    sizes = None
+    if pool is not None:
+        sizes = {
+            "size": pool.get_size(),
+            "idle": pool.get_idle_size(),
+            "min_size": pool.get_min_size(),
+            "max_size": pool.get_max_size(),
+        }
+    return {"pool": sizes, "routes": pool_usage.snapshot()}
+
+
+def get_pool() -> asyncpg.Pool:
+    """
+    FastAPI dependency for handlers that call providers (Twilio, SMTP,
+    Claude): acquire around the queries instead of holding get_db's
+    connection for the whole request.
+    """
+    return pool
+
+
+def _route_label(request: Request) -> str:
+    route = request.scope.get("route")
+    path = getattr(route, "path", None) or request.url.path
+    return f"{request.method} {path}"
+
+
+async def get_db(request: Request):
     """FastAPI dependency that yields an asyncpg connection from the pool."""
+    route = _route_label(request)
+    started = time.perf_counter()
     async with pool.acquire() as conn:
-        yield conn
+        acquired = time.perf_counter()
+        pool_usage.checkout(route, acquired - started)
+        try:
+            yield conn
+        finally:
+            held = time.perf_counter() - acquired
+            pool_usage.checkin(route, held)
+            if held > settings.DB_HOLD_WARN_SECONDS:
+                logger.warning(
+                    "%s held a DB connection for %.1fs (waited %.3fs to acquire)",
+                    route, held, acquired - started,
+                )
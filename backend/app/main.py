@@ -1,13 +1,15 @@
 import logging
 from contextlib import asynccontextmanager
 
-from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
+from app import background
 from app.config import settings
 from app.database import close_pool, create_pool, pool as _pool_ref
 import app.database as _db_mod
+from app.services import email_transport, twilio_transport
+from app.services.event_sink import event_sink
 
 logger = logging.getLogger("signalforge")
 
@@ -51,6 +53,9 @@ def _log_env_summary(db_ok: bool):
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     await create_pool()
+    await twilio_transport.init_transport()
+    await email_transport.init_transport()
+    event_sink.start(_db_mod.pool)
     # Verify DB connectivity and log environment
     db_ok = False
     try:
@@ -61,24 +66,22 @@ async def lifespan(app: FastAPI):
         logger.error(f"Database connectivity check failed: {exc}")
     _log_env_summary(db_ok)
 
-    # Start persistent engagement scheduler (runs every 60 seconds)
-    async def _run_engagement_worker():
-        try:
-            from app.services.engagement_worker import process_due_engagement_steps
-            result = await process_due_engagement_steps(_db_mod.pool)
-            if result.get("processed", 0) > 0:
-                logger.info("Engagement worker: %s", result)
-        except Exception as exc:
-            logger.error("Engagement scheduler error: %s", exc)
-
-    scheduler = AsyncIOScheduler()
-    scheduler.add_job(_run_engagement_worker, "interval", seconds=60, id="engagement_worker")
-    scheduler.start()
-    logger.info("Engagement scheduler started (interval: 60s)")
+    # Engagement ticks and the job consumer. Turn off with
+    # RUN_BACKGROUND_WORKERS=false when `python -m app.worker` runs them.
+    scheduler = None
+    if settings.RUN_BACKGROUND_WORKERS:
+        scheduler = await background.start()
+    else:
+        logger.info("Background workers disabled in this process (RUN_BACKGROUND_WORKERS=false)")
 
     yield
 
-    scheduler.shutdown(wait=False)
+    if scheduler is not None:
+        await background.drain(scheduler)
+    # After the drain, so events from the last ticks are written too
+    await event_sink.stop()
+    await twilio_transport.close_transport()
+    await email_transport.close_transport()
     await close_pool()
 
 
@@ -1,8 +1,9 @@
 from datetime import datetime
 from typing import Optional
 from uuid import UUID
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator
 
 
 # --- Funnel Schema (describes the schema_json structure) ---
@@ -209,6 +210,7 @@ class FunnelDetail(BaseModel):
     twilio_from_number: str | None = None
     working_hours_start: int = 9
     working_hours_end: int = 19
+    timezone: str | None = None
     sequence_enabled: bool = False
     sequence_config: dict | None = None
 
@@ -224,18 +226,31 @@ class FunnelUpdateRequest(BaseModel):
     twilio_from_number: str | None = None
     working_hours_start: int | None = None
     working_hours_end: int | None = None
+    timezone: str | None = None
     sequence_enabled: bool | None = None
     sequence_config: dict | None = None
 
+    @field_validator("timezone")
+    @classmethod
+    def _iana_timezone(cls, value: str | None) -> str | None:
+        if value is not None:
+            try:
+                ZoneInfo(value)
+            except (ZoneInfoNotFoundError, ValueError):
+                raise ValueError(f"unknown IANA timezone: {value}")
+        return value
+
 
 # --- Paginated response ---
 
 
 class LeadListResponse(BaseModel):
     leads: list[LeadListItem]
-    total: int
+    total: int | None = None
+    total_is_estimate: bool = False
     page: int
     per_page: int
+    next_cursor: str | None = None
 
 
 # --- Admin: Agency ---
@@ -6,112 +6,87 @@ import asyncpg
 
 
 async def get_org_dashboard_metrics(conn: asyncpg.Connection, org_id: str) -> dict:
-    """Return dashboard metrics for a single org."""
+    """Return dashboard metrics for a single org.
 
-    # Org-level revenue settings
-    org_row = await conn.fetchrow(
-        "SELECT avg_deal_value, close_rate_percent FROM orgs WHERE id = $1",
+    Counts and sums come from the org_daily_metrics rollup (maintained by
+    triggers on leads), so cost scales with the number of days an org has
+    leads rather than the number of leads. The rolling 7-day count is read
+    from leads via idx_leads_org_created_id, and the org's revenue settings
+    ride along on the same row — a single round trip.
+    """
+    row = await conn.fetchrow(
+        """
+        SELECT
+            m.*,
+            (SELECT COUNT(*) FROM leads
+              WHERE org_id = $1 AND created_at >= NOW() - INTERVAL '7 days') AS leads_7d,
+            o.avg_deal_value,
+            o.close_rate_percent
+        FROM (
+            SELECT
+                COALESCE(SUM(leads), 0)           AS total_leads,
+                COALESCE(SUM(contacted), 0)       AS contacted,
+                COALESCE(SUM(ai_hot), 0)          AS ai_hot,
+                COALESCE(SUM(ai_warm), 0)         AS ai_warm,
+                COALESCE(SUM(ai_cold), 0)         AS ai_cold,
+                SUM(response_seconds_sum) / NULLIF(SUM(responded), 0) AS avg_resp,
+                COALESCE(SUM(calls), 0)           AS total_calls,
+                COALESCE(SUM(calls_connected), 0) AS connected_calls,
+                COALESCE(SUM(won_value), 0)       AS actual_revenue,
+                COALESCE(SUM(stage_won), 0)       AS won_deals,
+                COALESCE(SUM(stage_lost), 0)      AS lost_deals,
+                COALESCE(SUM(qualified_value + proposal_value), 0) AS pipeline_value
+            FROM org_daily_metrics
+            WHERE org_id = $1
+        ) m
+        LEFT JOIN orgs o ON o.id = $1
+        """,
         org_id,
     )
-    avg_deal_value = float(org_row["avg_deal_value"] or 0) if org_row else 0
-    close_rate = float(org_row["close_rate_percent"] or 0) if org_row else 0
+    return _dashboard_metrics_from_row(row)
 
-    # Lead counts
-    total_leads = await conn.fetchval(
-        "SELECT COUNT(*) FROM leads WHERE org_id = $1", org_id
-    )
 
-    leads_7d = await conn.fetchval(
-        "SELECT COUNT(*) FROM leads WHERE org_id = $1 AND created_at >= NOW() - INTERVAL '7 days'",
-        org_id,
-    )
+def _dashboard_metrics_from_row(row) -> dict:
+    """Derive the dashboard response from the aggregated rollup row."""
+    avg_deal_value = float(row["avg_deal_value"] or 0)
+    close_rate = float(row["close_rate_percent"] or 0)
 
-    # Contacted %
-    contacted = await conn.fetchval(
-        "SELECT COUNT(*) FROM leads WHERE org_id = $1 AND contact_status IS NOT NULL AND contact_status != ''",
-        org_id,
-    )
+    total_leads = row["total_leads"]
+    contacted = row["contacted"]
     contacted_percent = round((contacted / total_leads * 100), 1) if total_leads else 0
 
-    # AI score distribution
-    ai_hot = await conn.fetchval(
-        "SELECT COUNT(*) FROM leads WHERE org_id = $1 AND ai_score >= 70", org_id
-    )
-    ai_warm = await conn.fetchval(
-        "SELECT COUNT(*) FROM leads WHERE org_id = $1 AND ai_score >= 40 AND ai_score < 70",
-        org_id,
-    )
-    ai_cold = await conn.fetchval(
-        "SELECT COUNT(*) FROM leads WHERE org_id = $1 AND ai_score IS NOT NULL AND ai_score < 40",
-        org_id,
-    )
-
-    # Average response time (seconds between lead created and first contact)
-    avg_resp = await conn.fetchval(
-        """SELECT AVG(EXTRACT(EPOCH FROM (last_contacted_at - created_at)))
-           FROM leads
-           WHERE org_id = $1 AND last_contacted_at IS NOT NULL""",
-        org_id,
-    )
+    avg_resp = row["avg_resp"]
     avg_response_seconds = round(float(avg_resp), 1) if avg_resp else None
 
-    # Call connect rate
-    total_calls = await conn.fetchval(
-        "SELECT COUNT(*) FROM leads WHERE org_id = $1 AND call_status IS NOT NULL AND call_status != ''",
-        org_id,
-    )
-    connected_calls = await conn.fetchval(
-        "SELECT COUNT(*) FROM leads WHERE org_id = $1 AND call_status = 'completed'",
-        org_id,
-    )
+    total_calls = row["total_calls"]
+    connected_calls = row["connected_calls"]
     call_connect_rate = round((connected_calls / total_calls * 100), 1) if total_calls else 0
 
     # Estimated revenue
     estimated_revenue = round(total_leads * (close_rate / 100) * avg_deal_value, 2)
 
-    # Pipeline metrics (actual revenue tracking)
-    actual_revenue_raw = await conn.fetchval(
-        "SELECT COALESCE(SUM(deal_amount), 0) FROM leads WHERE org_id = $1 AND stage = 'won'",
-        org_id,
-    )
-    actual_revenue = round(float(actual_revenue_raw), 2)
-
-    won_deals = await conn.fetchval(
-        "SELECT COUNT(*) FROM leads WHERE org_id = $1 AND stage = 'won'",
-        org_id,
-    )
-
-    lost_deals = await conn.fetchval(
-        "SELECT COUNT(*) FROM leads WHERE org_id = $1 AND stage = 'lost'",
-        org_id,
-    )
-
+    won_deals = row["won_deals"]
+    lost_deals = row["lost_deals"]
     closed_total = won_deals + lost_deals
     actual_close_rate = round((won_deals / closed_total * 100), 1) if closed_total > 0 else 0
 
-    pipeline_value_raw = await conn.fetchval(
-        "SELECT COALESCE(SUM(deal_amount), 0) FROM leads WHERE org_id = $1 AND stage IN ('qualified', 'proposal')",
-        org_id,
-    )
-    pipeline_value = round(float(pipeline_value_raw), 2)
-
     return {
         "total_leads": total_leads,
-        "leads_last_7_days": leads_7d,
+        "leads_last_7_days": row["leads_7d"],
         "avg_response_seconds": avg_response_seconds,
         "contacted_percent": contacted_percent,
-        "ai_hot_count": ai_hot,
-        "ai_warm_count": ai_warm,
-        "ai_cold_count": ai_cold,
+        "ai_hot_count": row["ai_hot"],
+        "ai_warm_count": row["ai_warm"],
+        "ai_cold_count": row["ai_cold"],
         "call_connect_rate": call_connect_rate,
         "estimated_revenue": estimated_revenue,
         "avg_deal_value": avg_deal_value,
         "close_rate_percent": close_rate,
-        "actual_revenue": actual_revenue,
+        "actual_revenue": round(float(row["actual_revenue"]), 2),
         "actual_close_rate": actual_close_rate,
         "won_deals": won_deals,
         "lost_deals": lost_deals,
-        "pipeline_value": pipeline_value,
+        "pipeline_value": round(float(row["pipeline_value"]), 2),
     }
 
 
@@ -119,36 +94,39 @@ async def get_pipeline_metrics(conn: asyncpg.Connection, org_id: str) -> dict:
     """Return structured pipeline metrics for the Sprint 7 dashboard.
 
     Uses 5 queries:
-      1. Stage counts + totals + pipeline values (single aggregation query)
+      1. Stage counts + totals + pipeline values (org_daily_metrics rollup)
       2. Avg days to close (from lead_stage_history)
       3. Avg days in stage (window function over stage history)
       4. Overdue next-action count
       5. Stale leads count (no contact in 7 days)
+
+    Queries 2-5 depend on NOW() or on per-lead history and stay on the
+    live tables; each is bounded by an org-leading index.
     """
 
     STAGES = ["new", "contacted", "qualified", "proposal", "won", "lost"]
     STALE_DAYS = 7
 
-    # --- Query 1: stage counts + values in one pass ---
-    rows = await conn.fetch(
+    # --- Query 1: stage counts + values from the rollup ---
+    r = await conn.fetchrow(
         """
         SELECT
-            COALESCE(stage, 'new') AS stage,
-            COUNT(*)               AS cnt,
-            COALESCE(SUM(deal_amount), 0) AS stage_value
-        FROM leads
+            COALESCE(SUM(stage_new), 0)        AS stage_new,
+            COALESCE(SUM(stage_contacted), 0)  AS stage_contacted,
+            COALESCE(SUM(stage_qualified), 0)  AS stage_qualified,
+            COALESCE(SUM(stage_proposal), 0)   AS stage_proposal,
+            COALESCE(SUM(stage_won), 0)        AS stage_won,
+            COALESCE(SUM(stage_lost), 0)       AS stage_lost,
+            COALESCE(SUM(qualified_value), 0)  AS qualified_value,
+            COALESCE(SUM(proposal_value), 0)   AS proposal_value,
+            COALESCE(SUM(won_value), 0)        AS won_value,
+            COALESCE(SUM(won_with_amount), 0)  AS won_with_amount
+        FROM org_daily_metrics
         WHERE org_id = $1
-        GROUP BY COALESCE(stage, 'new')
         """,
         org_id,
     )
-    stage_counts: dict[str, int] = {s: 0 for s in STAGES}
-    stage_values: dict[str, float] = {s: 0.0 for s in STAGES}
-    for r in rows:
-        s = r["stage"]
-        if s in stage_counts:
-            stage_counts[s] = int(r["cnt"])
-            stage_values[s] = float(r["stage_value"])
+    stage_counts: dict[str, int] = {s: int(r[f"stage_{s}"]) for s in STAGES}
 
     total = sum(stage_counts.values())
     won = stage_counts["won"]
@@ -156,15 +134,12 @@ async def get_pipeline_metrics(conn: asyncpg.Connection, org_id: str) -> dict:
     conversion_rate = round(won / total * 100, 1) if total > 0 else 0.0
 
     # pipeline_value = qualified + proposal (active pipeline, excludes won)
-    pipeline_total = stage_values["qualified"] + stage_values["proposal"]
-    won_value = stage_values["won"]
+    pipeline_total = float(r["qualified_value"]) + float(r["proposal_value"])
+    won_value = float(r["won_value"])
 
     # avg_deal_value: average across won deals only (most meaningful)
-    avg_deal_raw = await conn.fetchval(
-        "SELECT AVG(deal_amount) FROM leads WHERE org_id = $1 AND stage = 'won' AND deal_amount IS NOT NULL",
-        org_id,
-    )
-    avg_deal = round(float(avg_deal_raw), 2) if avg_deal_raw else 0.0
+    won_with_amount = int(r["won_with_amount"])
+    avg_deal = round(won_value / won_with_amount, 2) if won_with_amount else 0.0
 
     # --- Query 2: avg days to close ---
     # For each won lead, find the earliest history row where to_stage='won',
@@ -267,7 +242,11 @@ async def get_pipeline_metrics(conn: asyncpg.Connection, org_id: str) -> dict:
 
 
 async def get_campaign_metrics(conn: asyncpg.Connection, org_id: str) -> dict:
-    """Return per-campaign attribution metrics for an org."""
+    """Return per-campaign attribution metrics for an org.
+
+    Lead counts and revenue are summed from org_daily_metrics, which buckets
+    leads by their utm_campaign.
+    """
 
     # Org-level revenue settings
     org_row = await conn.fetchrow(
@@ -285,14 +264,14 @@ async def get_campaign_metrics(conn: asyncpg.Connection, org_id: str) -> dict:
             c.source,
             c.utm_campaign,
             c.ad_spend,
-            COUNT(l.id)                                             AS leads,
-            COALESCE(AVG(l.ai_score), 0)                            AS avg_ai_score,
-            COUNT(l.id) FILTER (WHERE l.stage = 'won')              AS won_deals,
-            COALESCE(SUM(l.deal_amount) FILTER (WHERE l.stage = 'won'), 0) AS actual_revenue
+            COALESCE(SUM(m.leads), 0)                               AS leads,
+            COALESCE(SUM(m.ai_score_sum)::float / NULLIF(SUM(m.ai_scored), 0), 0) AS avg_ai_score,
+            COALESCE(SUM(m.stage_won), 0)                           AS won_deals,
+            COALESCE(SUM(m.won_value), 0)                           AS actual_revenue
         FROM campaigns c
-        LEFT JOIN leads l
-            ON l.org_id = c.org_id
-           AND l.source_json->>'utm_campaign' = c.utm_campaign
+        LEFT JOIN org_daily_metrics m
+            ON m.org_id = c.org_id
+           AND m.utm_campaign = c.utm_campaign
         WHERE c.org_id = $1
         GROUP BY c.id, c.campaign_name, c.source, c.utm_campaign, c.ad_spend
         ORDER BY c.created_at DESC
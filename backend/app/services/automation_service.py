@@ -2,20 +2,42 @@
 Automation orchestration: processes routing, AI scoring, and notifications for new leads.
 """
 
-import json
 import logging
 import os
 
 import asyncpg
 
+from app.services import delivery_governor, job_queue, outbox
+from app.services.delivery_governor import DeliveryDeferred
 from app.services.ai_service import generate_ai_summary
 from app.services.event_service import log_event
+from app.services.lead_service import LEAD_BY_ID_SQL
+from app.services.metrics_cache import invalidate_org_metrics
 from app.services.notification_service import send_email, send_sms
 from app.services.routing_service import apply_routing_rules
 
 logger = logging.getLogger(__name__)
 
 
+async def _record_status(
+    pool: asyncpg.Pool,
+    org_id,
+    lead_id: str,
+    column: str,
+    status: str,
+    event_type: str,
+    metadata: dict | None = None,
+) -> None:
+    """Persist a delivery status and its event on a short-lived connection."""
+    async with pool.acquire() as conn:
+        await conn.execute(
+            f"UPDATE leads SET {column} = $1 WHERE id = $2",
+            status,
+            lead_id,
+        )
+        await log_event(conn, org_id, lead_id, event_type, status, metadata)
+
+
 async def process_automation(lead_id: str, pool: asyncpg.Pool):
     """
     Full automation pipeline for a newly submitted lead:
@@ -25,13 +47,29 @@ async def process_automation(lead_id: str, pool: asyncpg.Pool):
     d) If funnel.auto_email_enabled -> send_email -> update email_status
     e) If funnel.auto_sms_enabled -> send_sms -> update sms_status
     f) If funnel.auto_call_enabled -> start call -> update call_status
+       (outside working hours: a held rep_call job, call_status 'scheduled')
+
+    A pooled connection is held only around queries. It goes back to the
+    pool before the Claude call and every provider send, so slow providers
+    cannot starve request handlers.
+
+    Runs as a `lead_automation` job and raises on failure so the queue
+    retries it. Steps that already recorded a result (ai_score, *_status)
+    are skipped on a retry, so a lead is never scored or notified twice.
+    Sends the delivery governor holds back are left unrecorded and the job
+    raises DeliveryDeferred at the end, so the job runs again — without using
+    an attempt — once the governor will admit them, and sends just those. Email
+    and SMS go through the outbox under lead:<id>:auto_email / auto_sms, so a
+    retry after a crash between send and record replays the earlier result
+    instead of notifying again; one whose outcome is still being reconciled
+    ("in_flight") is deferred like a governor hold.
     """
+    deferred: list[str] = []
+    wait = 0.0  # outbox recheck delay; governor holds add denied_wait()
     try:
         async with pool.acquire() as conn:
             # a) Load lead + funnel
-            lead = await conn.fetchrow(
-                "SELECT * FROM leads WHERE id = $1", lead_id
-            )
+            lead = await conn.fetchrow(LEAD_BY_ID_SQL, lead_id)
             if not lead:
                 logger.error(f"Automation: lead {lead_id} not found")
                 return
@@ -45,16 +83,8 @@ async def process_automation(lead_id: str, pool: asyncpg.Pool):
 
             org_id = lead["org_id"]
 
-            answers = (
-                json.loads(lead["answers_json"])
-                if isinstance(lead["answers_json"], str)
-                else lead["answers_json"]
-            )
-            routing_rules = (
-                json.loads(funnel["routing_rules"])
-                if isinstance(funnel["routing_rules"], str)
-                else funnel["routing_rules"]
-            ) if funnel["routing_rules"] else None
+            answers = lead["answers_json"]
+            routing_rules = funnel["routing_rules"] or None
 
             # b) Routing
             tags, priority = apply_routing_rules(routing_rules, answers)
@@ -67,126 +97,171 @@ async def process_automation(lead_id: str, pool: asyncpg.Pool):
             await log_event(conn, org_id, lead_id, "routed", "success",
                             {"tags": tags, "priority": priority})
 
-            # c) AI scoring (falls back to deterministic stub if Claude not configured)
-            scoring_mode = "claude" if os.getenv("CLAUDE_API_KEY", "") else "deterministic"
-            if scoring_mode == "deterministic":
-                logger.info("Claude API not configured — using deterministic scoring for lead %s", lead_id)
-
             # Load org-level scoring_config (from industry template) if present
             scoring_config = await conn.fetchval(
                 "SELECT scoring_config FROM orgs WHERE id = $1", org_id
             )
-            if isinstance(scoring_config, str):
-                scoring_config = json.loads(scoring_config)
 
+        # c) AI scoring (falls back to deterministic stub if Claude not configured)
+        scoring_mode = "claude" if os.getenv("CLAUDE_API_KEY", "") else "deterministic"
+        if scoring_mode == "deterministic":
+            logger.info("Claude API not configured — using deterministic scoring for lead %s", lead_id)
+
+        if lead["ai_score"] is not None:
+            # Scored by an earlier attempt of this job
+            ai_score, ai_summary = lead["ai_score"], lead["ai_summary"]
+        else:
             ai_score, ai_summary = await generate_ai_summary(answers, scoring_config)
-            await conn.execute(
-                "UPDATE leads SET ai_score = $1, ai_summary = $2 WHERE id = $3",
-                ai_score,
-                ai_summary,
-                lead_id,
-            )
-            await log_event(conn, org_id, lead_id, "ai_scored", "success",
-                            {"score": ai_score, "mode": scoring_mode})
-
-            # Build dicts for notification services
-            lead_dict = dict(lead)
-            lead_dict["answers_json"] = answers
-            lead_dict["tags"] = tags
-            lead_dict["priority"] = priority
-            lead_dict["ai_score"] = ai_score
-            lead_dict["ai_summary"] = ai_summary
-
-            funnel_dict = dict(funnel)
-
-            # d) Email notification
-            if funnel["auto_email_enabled"]:
-                email_status = await send_email(lead_dict, funnel_dict)
-                if email_status == "skipped_missing_config":
-                    logger.warning("SMTP not configured — skipping email for lead %s", lead_id)
+            async with pool.acquire() as conn:
                 await conn.execute(
-                    "UPDATE leads SET email_status = $1 WHERE id = $2",
-                    email_status,
+                    "UPDATE leads SET ai_score = $1, ai_summary = $2 WHERE id = $3",
+                    ai_score,
+                    ai_summary,
                     lead_id,
                 )
-                await log_event(conn, org_id, lead_id, "email_sent", email_status)
+                await log_event(conn, org_id, lead_id, "ai_scored", "success",
+                                {"score": ai_score, "mode": scoring_mode})
+            invalidate_org_metrics(org_id)
 
-            # e) SMS notification
-            if funnel["auto_sms_enabled"]:
-                sms_status = await send_sms(lead_dict, funnel_dict)
-                if sms_status == "skipped_missing_config":
-                    logger.warning("Twilio not configured — skipping SMS for lead %s", lead_id)
-                await conn.execute(
-                    "UPDATE leads SET sms_status = $1 WHERE id = $2",
-                    sms_status,
-                    lead_id,
-                )
-                await log_event(conn, org_id, lead_id, "sms_sent", sms_status)
-
-            # f) Auto-call (call_service is created by Agent B)
-            if funnel["auto_call_enabled"]:
-                try:
-                    from app.services.call_service import start_rep_call
-
-                    call_status = await start_rep_call(lead_dict, funnel_dict, pool)
-                    await conn.execute(
-                        "UPDATE leads SET call_status = $1 WHERE id = $2",
-                        call_status,
-                        lead_id,
-                    )
-                    await log_event(conn, org_id, lead_id, "call_started", call_status)
-                except ImportError:
-                    logger.warning("Twilio call_service not available — skipping auto-call for lead %s", lead_id)
-                    await log_event(conn, org_id, lead_id, "call_started", "skipped_missing_config")
-                except Exception as e:
-                    logger.error(f"Auto-call failed: {e}")
-                    await conn.execute(
-                        "UPDATE leads SET call_status = 'failed' WHERE id = $1",
-                        lead_id,
-                    )
-                    await log_event(conn, org_id, lead_id, "call_started", "failed",
-                                    {"error": str(e)})
-
-            # g) [DEPRECATED v5] schedule_sequences — disabled; engagement engine is now
-            #    the single source of truth for follow-up delivery. Leaving import commented
-            #    so the sequence_service module is not deleted accidentally.
-            # try:
-            #     from app.services.sequence_service import schedule_sequences
-            #     await schedule_sequences(lead_id, funnel_dict, conn)
-            #     if funnel_dict.get("sequence_enabled"):
-            #         await log_event(conn, org_id, lead_id, "sequence_scheduled", "success")
-            # except Exception as e:
-            #     logger.error(f"Sequence scheduling failed: {e}")
-            #     await log_event(conn, org_id, lead_id, "sequence_scheduled", "failed",
-            #                     {"error": str(e)})
-
-            # h) Create engagement plan
+        # Build dicts for notification services
+        lead_dict = dict(lead)
+        lead_dict["tags"] = tags
+        lead_dict["priority"] = priority
+        lead_dict["ai_score"] = ai_score
+        lead_dict["ai_summary"] = ai_summary
+
+        funnel_dict = dict(funnel)
+
+        # d) Email notification
+        if funnel["auto_email_enabled"] and not lead["email_status"]:
+            email_status = await send_email(
+                lead_dict, funnel_dict, outbox_key=outbox.lead_key(lead_id, "auto_email"), pool=pool,
+            )
+            if email_status == "skipped_missing_config":
+                logger.warning("SMTP not configured — skipping email for lead %s", lead_id)
+            if email_status in ("deferred", "in_flight"):
+                deferred.append("email")
+                if email_status == "in_flight":
+                    wait = max(wait, outbox.recheck_delay())
+            else:
+                await _record_status(pool, org_id, lead_id, "email_status", email_status, "email_sent")
+
+        # e) SMS notification
+        if funnel["auto_sms_enabled"] and not lead["sms_status"]:
+            sms_status = await send_sms(
+                lead_dict, funnel_dict, outbox_key=outbox.lead_key(lead_id, "auto_sms"), pool=pool,
+            )
+            if sms_status == "skipped_missing_config":
+                logger.warning("Twilio not configured — skipping SMS for lead %s", lead_id)
+            if sms_status in ("deferred", "in_flight"):
+                deferred.append("sms")
+                if sms_status == "in_flight":
+                    wait = max(wait, outbox.recheck_delay())
+            else:
+                await _record_status(pool, org_id, lead_id, "sms_status", sms_status, "sms_sent")
+
+        # f) Auto-call (call_service is created by Agent B)
+        if funnel["auto_call_enabled"] and not lead["call_status"]:
             try:
-                from app.services.engagement_service import create_engagement_plan
-                await create_engagement_plan(
+                from app.services.call_service import start_rep_call
+
+                call_status = await start_rep_call(lead_dict, funnel_dict, pool)
+                if call_status == "outside_hours":
+                    from app.services.call_service import hold_call
+
+                    opens_at = await hold_call(pool, "rep_call", {"lead_id": lead_id}, funnel_dict)
+                    await _record_status(pool, org_id, lead_id, "call_status", "scheduled", "call_started",
+                                         {"scheduled_for": opens_at.isoformat()})
+                elif call_status == "deferred":
+                    deferred.append("call")
+                else:
+                    await _record_status(pool, org_id, lead_id, "call_status", call_status, "call_started")
+            except ImportError:
+                logger.warning("Twilio call_service not available — skipping auto-call for lead %s", lead_id)
+                async with pool.acquire() as conn:
+                    await log_event(conn, org_id, lead_id, "call_started", "skipped_missing_config")
+            except Exception as e:
+                logger.error(f"Auto-call failed: {e}")
+                await _record_status(pool, org_id, lead_id, "call_status", "failed", "call_started",
+                                     {"error": str(e)})
+
+        # g) [DEPRECATED v5] schedule_sequences — disabled; engagement engine is now
+        #    the single source of truth for follow-up delivery. Leaving import commented
+        #    so the sequence_service module is not deleted accidentally.
+        # try:
+        #     from app.services.sequence_service import schedule_sequences
+        #     await schedule_sequences(lead_id, funnel_dict, conn)
+        #     if funnel_dict.get("sequence_enabled"):
+        #         await log_event(conn, org_id, lead_id, "sequence_scheduled", "success")
+        # except Exception as e:
+        #     logger.error(f"Sequence scheduling failed: {e}")
+        #     await log_event(conn, org_id, lead_id, "sequence_scheduled", "failed",
+        #                     {"error": str(e)})
+
+        # h) Create engagement plan
+        try:
+            from app.services.engagement_service import create_engagement_plan
+            async with pool.acquire() as conn:
+                plan = await create_engagement_plan(
                     conn,
                     lead_id=lead_id,
                     org_id=org_id,
                     funnel_id=str(lead["funnel_id"]) if lead.get("funnel_id") else None,
                     lead_data=lead_dict,
+                    first_touch=True,
                 )
-            except Exception as e:
-                logger.error(f"Engagement plan creation failed: {e}")
+        except Exception as e:
+            logger.error(f"Engagement plan creation failed: {e}")
+            plan = None
 
-        # i) [DEPRECATED v5] process_due_sequences — disabled; APScheduler now runs
-        #    process_due_engagement_steps every 60 s from main.py lifespan.
+        # i) [DEPRECATED v5] process_due_sequences — disabled; the engagement
+        #    scheduler (services/engagement_scheduler.py) sends follow-ups.
         # try:
         #     from app.services.sequence_worker import process_due_sequences
         #     await process_due_sequences(pool)
         # except Exception as e:
         #     logger.error(f"Sequence processing failed: {e}")
 
-        # j) Process due engagement steps (outside conn block)
-        try:
-            from app.services.engagement_worker import process_due_engagement_steps
-            await process_due_engagement_steps(pool)
-        except Exception as e:
-            logger.error(f"Engagement worker failed: {e}")
+        # j) Speed-to-lead: hand this plan's step 1 straight to the dispatcher
+        #    when it falls due, instead of scanning the whole due queue here.
+        if plan and not plan["existing"]:
+            from app.services.engagement_worker import schedule_first_touch
+            schedule_first_touch(pool, plan["id"], plan["first_step_at"])
+
+        if deferred:
+            raise DeliveryDeferred(
+                f"lead {lead_id}: {', '.join(deferred)} deferred",
+                wait_seconds=max(wait, delivery_governor.denied_wait()),
+            )
 
     except Exception as e:
         logger.error(f"Automation failed for lead {lead_id}: {e}")
+        raise
+
+
+@job_queue.handler("rep_call")
+async def run_rep_call_job(pool: asyncpg.Pool, payload: dict) -> None:
+    """Place a lead's first bridge call once its funnel's working hours open (step f, held)."""
+    from app.services.call_service import hold_call, start_rep_call
+
+    lead_id = payload["lead_id"]
+    async with pool.acquire() as conn:
+        lead = await conn.fetchrow(LEAD_BY_ID_SQL, lead_id)
+        if not lead or lead["call_status"] != "scheduled":
+            return  # lead gone, or the call was placed or cancelled meanwhile
+        funnel = await conn.fetchrow("SELECT * FROM funnels WHERE id = $1", lead["funnel_id"])
+        if not funnel:
+            return
+
+    call_status = await start_rep_call(dict(lead), dict(funnel), pool)
+    if call_status == "outside_hours":
+        await hold_call(pool, "rep_call", payload, dict(funnel))
+    elif call_status == "deferred":
+        raise DeliveryDeferred(f"lead {lead_id}: call deferred", wait_seconds=delivery_governor.denied_wait())
+    else:
+        await _record_status(pool, lead["org_id"], lead_id, "call_status", call_status, "call_started")
+
+
+@job_queue.handler("lead_automation")
+async def run_lead_automation_job(pool: asyncpg.Pool, payload: dict) -> None:
+    await process_automation(payload["lead_id"], pool)
@@ -1,32 +1,93 @@
-"""Twilio bridge call service - connects rep to lead via phone bridge."""
+"""Twilio bridge call service - connects rep to lead via phone bridge.
+
+Calls are placed through the shared async Twilio transport
+(services/twilio_transport.py), so dialling never blocks the event loop.
+At most CALL_PLACEMENT_CONCURRENCY placements are in flight per process,
+each bounded by CALL_PLACEMENT_TIMEOUT_SECONDS; placement counts and
+latency are kept in call_stats for /admin/ops/calls.
+"""
 import asyncio
-import json
 import logging
 import os
-from datetime import datetime
+import time
+from collections import deque
+from datetime import datetime, timezone
+
+from app.config import settings
+from app.services import delivery_governor, job_queue, twilio_transport, working_hours
+from app.services.lead_service import LEAD_BY_ID_SQL
 
 logger = logging.getLogger(__name__)
 
+MAX_CALL_ATTEMPTS = 2
+CALL_RETRY_DELAY_SECONDS = 120
+
+CALL_STATUS_EVENTS = ["completed", "busy", "no-answer", "failed"]
+
+# Per-process placement counters. `waiting` is queued for a placement slot,
+# `in_flight` is waiting on Twilio.
+call_stats = {"initiated": 0, "failed": 0, "deferred": 0, "waiting": 0, "in_flight": 0}
+_latencies_ms: deque[float] = deque(maxlen=500)
+_placement_slots: asyncio.Semaphore | None = None
+
+
+def _placement_semaphore() -> asyncio.Semaphore:
+    global _placement_slots
+    if _placement_slots is None:
+        _placement_slots = asyncio.Semaphore(max(1, settings.CALL_PLACEMENT_CONCURRENCY))
+    return _placement_slots
+
+
+def placement_stats() -> dict:
+    """call_stats plus placement latency over the last 500 calls, for /admin/ops/calls."""
+    latencies = sorted(_latencies_ms)
+    latency = None
+    if latencies:
+        latency = {
+            "samples": len(latencies),
+            "p50": round(latencies[len(latencies) // 2], 1),
+            "p95": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 1),
+            "max": round(latencies[-1], 1),
+        }
+    return {**call_stats, "latency_ms": latency}
+
+
+async def _place_call(transport, **kwargs) -> twilio_transport.CallResult:
+    call_stats["waiting"] += 1
+    acquired = False
+    try:
+        async with _placement_semaphore():
+            acquired = True
+            call_stats["waiting"] -= 1
+            call_stats["in_flight"] += 1
+            started = time.monotonic()
+            try:
+                return await transport.place_call(timeout=settings.CALL_PLACEMENT_TIMEOUT_SECONDS, **kwargs)
+            finally:
+                _latencies_ms.append((time.monotonic() - started) * 1000)
+                call_stats["in_flight"] -= 1
+    finally:
+        if not acquired:
+            call_stats["waiting"] -= 1
+
 
 async def start_rep_call(lead: dict, funnel: dict, pool) -> str:
     """
     Initiate a bridge call: call the rep first, then bridge to lead.
 
-    Returns: "initiated", "skipped_missing_config", "skipped_outside_hours", or "failed"
+    Returns: "initiated", "skipped_missing_config", "outside_hours" (not
+    dialled; the caller holds the call with hold_call), "deferred" (held
+    back by the delivery governor) or "failed"
     """
-    # 1. Check working hours (server time)
-    current_hour = datetime.now().hour
-    start_hour = funnel.get("working_hours_start")
-    end_hour = funnel.get("working_hours_end")
-    if start_hour is not None and end_hour is not None:
-        if not (start_hour <= current_hour < end_hour):
-            logger.info("Outside working hours (%s-%s), current=%s", start_hour, end_hour, current_hour)
-            return "skipped_outside_hours"
+    # 1. Check working hours (funnel timezone)
+    opens_at = working_hours.next_open(funnel)
+    if opens_at is not None:
+        logger.info("Outside working hours for lead %s, next window opens %s", lead["id"], opens_at.isoformat())
+        return "outside_hours"
 
     # 2. Check Twilio credentials
-    account_sid = os.getenv("TWILIO_ACCOUNT_SID")
-    auth_token = os.getenv("TWILIO_AUTH_TOKEN")
-    if not account_sid or not auth_token:
+    transport = twilio_transport.get_transport()
+    if transport is None:
         logger.warning("Twilio credentials not configured")
         return "skipped_missing_config"
 
@@ -51,51 +112,91 @@ async def start_rep_call(lead: dict, funnel: dict, pool) -> str:
         f"?lead_id={lead_id}&type=call&secret={webhook_secret}"
     )
 
-    try:
-        from twilio.rest import Client
-
-        client = Client(account_sid, auth_token)
-        call = client.calls.create(
-            to=rep_phone,
-            from_=from_number,
-            url=webhook_url,
-            status_callback=status_url,
-            status_callback_event=["completed", "busy", "no-answer", "failed"],
-        )
-        logger.info("Twilio call initiated: sid=%s lead_id=%s", call.sid, lead_id)
-        return "initiated"
-    except Exception:
-        logger.exception("Failed to initiate Twilio call for lead %s", lead_id)
+    admission = await delivery_governor.admit_inline(delivery_governor.call_buckets(), pool)
+    if not admission.admitted:
+        logger.warning("Call for lead %s deferred by delivery governor (%s)", lead_id, admission.reason)
+        call_stats["deferred"] += 1
+        return "deferred"
+
+    result = await _place_call(
+        transport,
+        to=rep_phone,
+        from_number=from_number,
+        url=webhook_url,
+        status_callback=status_url,
+        status_callback_events=CALL_STATUS_EVENTS,
+    )
+    await delivery_governor.record(
+        delivery_governor.twilio_provider_key(), delivery_governor.classify(result),
+        admission, result.error, pool,
+    )
+    if not result.ok:
+        logger.error("Failed to initiate Twilio call for lead %s: %s", lead_id, result.error)
+        call_stats["failed"] += 1
         return "failed"
+    logger.info("Twilio call initiated: sid=%s lead_id=%s", result.sid, lead_id)
+    call_stats["initiated"] += 1
+    return "initiated"
 
 
-async def retry_call(lead_id: str, lead: dict, funnel: dict, pool):
-    """
-    If call_attempts < 2, wait 2 minutes then retry.
-    Updates call_attempts and call_status in DB.
-    """
-    attempts = lead.get("call_attempts", 0)
-    if attempts >= 2:
-        logger.info("Max retry attempts reached for lead %s", lead_id)
-        return
+async def hold_call(pool, kind: str, payload: dict, funnel: dict) -> datetime:
+    """Hold a `kind` job until the funnel's next working-hours window. Returns when that is."""
+    opens_at = working_hours.next_open(funnel) or datetime.now(timezone.utc)
+    async with pool.acquire() as conn:
+        await job_queue.hold(conn, kind, payload, opens_at)
+    return opens_at
 
-    logger.info("Scheduling retry for lead %s in 120s (attempt %s)", lead_id, attempts + 1)
-    await asyncio.sleep(120)
 
+@job_queue.handler("call_retry")
+async def run_call_retry_job(pool, payload: dict) -> None:
+    """
+    Retry a failed bridge call. Enqueued by the Twilio status callback with a
+    CALL_RETRY_DELAY_SECONDS delay; re-dials the rep and bumps call_attempts
+    once the call is actually dialled. Outside working hours the retry is
+    held for the next window instead; a governor hold defers this same job.
+    A placement Twilio rejects gets no status callback, so the next attempt
+    is enqueued here while call_attempts < MAX_CALL_ATTEMPTS.
+    """
+    lead_id = payload["lead_id"]
     async with pool.acquire() as conn:
-        await conn.execute(
-            "UPDATE leads SET call_attempts = call_attempts + 1, call_status = 'retrying' WHERE id = $1",
-            lead_id,
-        )
+        row = await conn.fetchrow(LEAD_BY_ID_SQL, lead_id)
+        if not row or (row["call_attempts"] or 0) >= MAX_CALL_ATTEMPTS:
+            logger.info("Max retry attempts reached for lead %s", lead_id)
+            return
+        funnel = await conn.fetchrow("SELECT * FROM funnels WHERE id = $1", row["funnel_id"])
+        if not funnel:
+            return
 
-        # Re-fetch lead with updated attempts
-        row = await conn.fetchrow("SELECT * FROM leads WHERE id = $1", lead_id)
-        if not row:
+        opens_at = working_hours.next_open(dict(funnel))
+        if opens_at is not None:
+            await job_queue.hold(conn, "call_retry", payload, opens_at)
+            logger.info("Retry call for lead %s held until %s", lead_id, opens_at.isoformat())
             return
-        updated_lead = dict(row)
-        answers = row["answers_json"]
-        if isinstance(answers, str):
-            updated_lead["answers_json"] = json.loads(answers)
 
-    status = await start_rep_call(updated_lead, funnel, pool)
+    status = await start_rep_call(dict(row), dict(funnel), pool)
     logger.info("Retry call result for lead %s: %s", lead_id, status)
+    if status == "outside_hours":
+        # The window closed since the check above
+        await hold_call(pool, "call_retry", payload, dict(funnel))
+    elif status == "deferred":
+        # Not dialled: run this job again once the governor will admit it
+        raise delivery_governor.DeliveryDeferred(
+            f"lead {lead_id}: retry call deferred", wait_seconds=delivery_governor.denied_wait()
+        )
+    elif status == "failed":
+        # Never placed, so no status callback will schedule the next attempt
+        async with pool.acquire() as conn:
+            async with conn.transaction():
+                attempts = await conn.fetchval(
+                    "UPDATE leads SET call_attempts = call_attempts + 1, call_status = 'failed' "
+                    "WHERE id = $1 RETURNING call_attempts",
+                    lead_id,
+                )
+                if (attempts or 0) < MAX_CALL_ATTEMPTS:
+                    await job_queue.enqueue(conn, "call_retry", payload, delay_seconds=CALL_RETRY_DELAY_SECONDS)
+    else:
+        async with pool.acquire() as conn:
+            await conn.execute(
+                "UPDATE leads SET call_attempts = call_attempts + 1, call_status = 'retrying' WHERE id = $1",
+                lead_id,
+            )
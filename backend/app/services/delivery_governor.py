@@ -0,0 +1,335 @@
+"""
+Delivery governor: shared rate limits and circuit breaking for outbound
+Twilio and SMTP sends.
+
+Every send first asks admit() for a token from each bucket it draws on:
+
+  twilio:<account sid>              account-wide SMS ceiling
+  twilio:<account sid>:<from>       per from-number ceiling (carrier limits)
+  twilio-calls:<account sid>        outbound call placement (calls per second)
+  smtp:<host>                       SMTP relay ceiling
+
+Buckets live in Postgres (provider_limits, migrations/025_delivery_governor.sql)
+so every replica and worker draws from the same budget, and one
+governor_admit() call checks and charges all of a send's buckets at once.
+
+The provider key (twilio:<sid>, smtp:<host>) also carries a circuit breaker.
+After GOVERNOR_BREAKER_FAILURES consecutive provider failures (timeouts,
+5xx) it opens for GOVERNOR_BREAKER_COOLDOWN_SECONDS and admit() defers
+sends instead of letting each one wait out a timeout. After the cooldown a
+single probe send goes through; its outcome closes or re-opens the breaker.
+
+A denied admission is a deferral, not a failure: the engagement worker puts
+the step back to 'pending' with scheduled_for pushed out; interactive paths
+wait briefly inline (GOVERNOR_MAX_INLINE_WAIT_SECONDS) or report 'deferred'.
+"""
+
+import asyncio
+import logging
+import os
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+import asyncpg
+
+from app.config import settings
+from app.services.job_queue import JobDeferred
+
+logger = logging.getLogger(__name__)
+
+ADMIT_SQL = "SELECT wait_seconds, reason, probing FROM governor_admit($1::text[], $2::float8[], $3::float8[], $4)"
+
+RECORD_SUCCESS_SQL = """
+    UPDATE provider_limits
+       SET consecutive_failures = 0, open_until = NULL, last_error = NULL, updated_at = now()
+     WHERE key = $1
+"""
+
+RECORD_FAILURE_SQL = """
+    UPDATE provider_limits
+       SET consecutive_failures = consecutive_failures + 1,
+           last_error = $2,
+           open_until = CASE WHEN consecutive_failures + 1 >= $3
+                             THEN now() + make_interval(secs => $4)
+                             ELSE open_until END,
+           updated_at = now()
+     WHERE key = $1
+"""
+
+# The provider said slow down: empty the bucket so admissions back off too.
+RECORD_THROTTLED_SQL = """
+    UPDATE provider_limits
+       SET tokens = LEAST(tokens, 0), refilled_at = now(), updated_at = now()
+     WHERE key = $1
+"""
+
+
+class DeliveryDeferred(JobDeferred):
+    """A send was held back by the governor; the caller's job runs again after
+    `wait_seconds` without using up an attempt."""
+
+
+# Longest wait admit_inline() has denied in the current task, so a job that
+# raises DeliveryDeferred can ask to run again when the governor will admit it.
+_denied_wait: ContextVar[float] = ContextVar("governor_denied_wait", default=0.0)
+
+
+def denied_wait() -> float:
+    return _denied_wait.get()
+
+
+@dataclass(frozen=True)
+class Bucket:
+    key: str
+    rate_per_sec: float
+    capacity: float
+
+
+@dataclass
+class Admission:
+    """admit() result: wait_seconds == 0 means the send may go ahead."""
+    wait_seconds: float = 0.0
+    reason: str | None = None  # "rate_limited" | "circuit_open"
+    probing: bool = False
+
+    @property
+    def admitted(self) -> bool:
+        return self.wait_seconds <= 0
+
+
+# -- bucket keys --------------------------------------------------------------
+
+def _twilio_sid() -> str:
+    return os.getenv("TWILIO_ACCOUNT_SID", "")
+
+
+def twilio_provider_key() -> str:
+    return f"twilio:{_twilio_sid()}"
+
+
+def smtp_provider_key() -> str:
+    return f"smtp:{os.getenv('SMTP_HOST', '')}"
+
+
+def sms_buckets(from_number: str | None) -> list[Bucket]:
+    account = Bucket(
+        twilio_provider_key(),
+        settings.GOVERNOR_TWILIO_ACCOUNT_RATE,
+        settings.GOVERNOR_TWILIO_ACCOUNT_RATE * settings.GOVERNOR_BURST_SECONDS,
+    )
+    if not from_number:
+        return [account]
+    number = Bucket(
+        f"{account.key}:{from_number}",
+        settings.GOVERNOR_TWILIO_NUMBER_RATE,
+        max(1.0, settings.GOVERNOR_TWILIO_NUMBER_RATE * settings.GOVERNOR_BURST_SECONDS),
+    )
+    return [account, number]
+
+
+def call_buckets() -> list[Bucket]:
+    # Placement has its own ceiling, but shares the account's breaker.
+    return [
+        Bucket(f"twilio-calls:{_twilio_sid()}", settings.GOVERNOR_TWILIO_CALL_RATE,
+               max(1.0, settings.GOVERNOR_TWILIO_CALL_RATE * settings.GOVERNOR_BURST_SECONDS)),
+        Bucket(twilio_provider_key(), settings.GOVERNOR_TWILIO_ACCOUNT_RATE,
+               settings.GOVERNOR_TWILIO_ACCOUNT_RATE * settings.GOVERNOR_BURST_SECONDS),
+    ]
+
+
+def email_buckets() -> list[Bucket]:
+    return [
+        Bucket(smtp_provider_key(), settings.GOVERNOR_SMTP_RATE,
+               max(1.0, settings.GOVERNOR_SMTP_RATE * settings.GOVERNOR_BURST_SECONDS)),
+    ]
+
+
+# -- admission and outcomes ---------------------------------------------------
+
+def _pool(pool: asyncpg.Pool | None) -> asyncpg.Pool:
+    if pool is not None:
+        return pool
+    import app.database as _db_mod
+    return _db_mod.pool
+
+
+async def admit(buckets: list[Bucket], pool: asyncpg.Pool | None = None) -> Admission:
+    """
+    Take one token from every bucket, or none if any is empty or a breaker
+    is open. Fails open: if the governor's own query fails, the send is
+    admitted rather than stalling delivery on a bookkeeping error.
+    """
+    if not settings.GOVERNOR_ENABLED or not buckets:
+        return Admission()
+    try:
+        async with _pool(pool).acquire() as conn:
+            row = await conn.fetchrow(
+                ADMIT_SQL,
+                [b.key for b in buckets],
+                [b.capacity for b in buckets],
+                [b.rate_per_sec for b in buckets],
+                float(settings.GOVERNOR_BREAKER_COOLDOWN_SECONDS),
+            )
+        return Admission(float(row["wait_seconds"] or 0), row["reason"], bool(row["probing"]))
+    except Exception as exc:
+        logger.warning("Delivery governor admit failed, sending ungoverned: %s", exc)
+        return Admission()
+
+
+def classify(result) -> str:
+    """
+    Map a transport result to an outcome:
+      "ok"         delivered (or, for a call, placed)
+      "throttled"  provider rate limit (HTTP 429) — retry later
+      "unavailable" timeout, connection error or 5xx — retry later, counts
+                   toward the breaker
+      "rejected"   the provider refused this message (bad number, refused
+                   recipient) — retrying will not help
+      "skipped"    nothing was attempted
+    """
+    if result.ok:
+        return "ok"
+    if result.status != "failed":
+        return "skipped"
+    http_status = getattr(result, "http_status", None)
+    if http_status == 429:
+        return "throttled"
+    if http_status is None:
+        # Twilio: no response at all. SMTP: refused recipients are per-message.
+        return "rejected" if getattr(result, "refused", None) else "unavailable"
+    return "unavailable" if http_status >= 500 else "rejected"
+
+
+async def record(
+    provider_key: str,
+    outcome: str,
+    admission: Admission | None = None,
+    error: str | None = None,
+    pool: asyncpg.Pool | None = None,
+) -> None:
+    """Feed a send's outcome back into the breaker (and bucket, on 429)."""
+    if not settings.GOVERNOR_ENABLED:
+        return
+    try:
+        if outcome == "unavailable":
+            async with _pool(pool).acquire() as conn:
+                await conn.execute(
+                    RECORD_FAILURE_SQL, provider_key, (error or "")[:500],
+                    settings.GOVERNOR_BREAKER_FAILURES,
+                    float(settings.GOVERNOR_BREAKER_COOLDOWN_SECONDS),
+                )
+        elif outcome == "throttled":
+            async with _pool(pool).acquire() as conn:
+                await conn.execute(RECORD_THROTTLED_SQL, provider_key)
+        elif outcome in ("ok", "rejected") and admission is not None and admission.probing:
+            # The provider answered: whatever failures were counted are over
+            async with _pool(pool).acquire() as conn:
+                await conn.execute(RECORD_SUCCESS_SQL, provider_key)
+    except Exception as exc:
+        logger.warning("Delivery governor could not record %s for %s: %s", outcome, provider_key, exc)
+
+
+async def admit_inline(buckets: list[Bucket], pool: asyncpg.Pool | None = None) -> Admission:
+    """
+    For request/notification paths that cannot reschedule: wait for a token
+    as long as the wait stays under GOVERNOR_MAX_INLINE_WAIT_SECONDS. Returns
+    the last (denied) admission if it does not, and records its wait for
+    denied_wait().
+    """
+    waited = 0.0
+    while True:
+        admission = await admit(buckets, pool)
+        if admission.admitted:
+            return admission
+        if waited + admission.wait_seconds > settings.GOVERNOR_MAX_INLINE_WAIT_SECONDS:
+            _denied_wait.set(max(_denied_wait.get(), admission.wait_seconds))
+            return admission
+        await asyncio.sleep(admission.wait_seconds)
+        waited += admission.wait_seconds
+
+
+async def send_sms(to: str, body: str, from_number: str | None, pool: asyncpg.Pool | None = None):
+    """
+    Governed twilio_transport.send_sms for paths without a retry queue.
+    Returns the transport's SmsResult, or one with status "deferred" when the
+    governor would not admit the send within the inline wait.
+    """
+    from app.services import twilio_transport
+
+    if twilio_transport.get_transport() is None or not from_number:
+        return await twilio_transport.send_sms(to, body, from_number)
+    admission = await admit_inline(sms_buckets(from_number), pool)
+    if not admission.admitted:
+        logger.warning("SMS to %s deferred by delivery governor (%s)", to, admission.reason)
+        return twilio_transport.SmsResult(status="deferred", to=to, error=admission.reason)
+    result = await twilio_transport.send_sms(to, body, from_number)
+    await record(twilio_provider_key(), classify(result), admission, result.error, pool)
+    return result
+
+
+async def send_email(recipients: list[str], subject: str, body: str, pool: asyncpg.Pool | None = None):
+    """Governed email_transport.send_email; see send_sms."""
+    from app.services import email_transport
+
+    if email_transport.get_transport() is None:
+        return await email_transport.send_email(recipients, subject, body)
+    admission = await admit_inline(email_buckets(), pool)
+    if not admission.admitted:
+        logger.warning("Email to %s deferred by delivery governor (%s)", recipients, admission.reason)
+        return email_transport.EmailResult(status="deferred", recipients=recipients, error=admission.reason)
+    result = await email_transport.send_email(recipients, subject, body)
+    await record(smtp_provider_key(), classify(result), admission, result.error, pool)
+    return result
+
+
+def _tenant_key(key: str, from_numbers: set[str]) -> str | None:
+    """
+    A provider_limits key as an org admin may see it, or None to hide it.
+    Account SIDs and SMTP hosts are platform config, so only the provider
+    name is kept; per-number buckets are shown for the org's own numbers.
+    """
+    provider, _, rest = key.partition(":")
+    _, _, number = rest.partition(":")
+    if not number:
+        return provider
+    return f"{provider}:{number}" if number in from_numbers else None
+
+
+async def provider_states(org_id: str, pool: asyncpg.Pool | None = None) -> list[dict]:
+    """
+    Bucket and breaker state as `org_id`'s admins may see it, for
+    /admin/ops/delivery: shared provider buckets plus the org's sender
+    numbers, without account identifiers or provider error text.
+    """
+    async with _pool(pool).acquire() as conn:
+        numbers = await conn.fetch(
+            "SELECT DISTINCT twilio_from_number FROM funnels"
+            " WHERE org_id = $1 AND twilio_from_number IS NOT NULL",
+            org_id,
+        )
+        rows = await conn.fetch(
+            """
+            SELECT key, tokens, refilled_at, consecutive_failures, open_until,
+                   CASE WHEN open_until > now()            THEN 'open'
+                        WHEN consecutive_failures >= $1    THEN 'half_open'
+                        WHEN consecutive_failures > 0      THEN 'degraded'
+                        ELSE 'closed' END AS breaker
+              FROM provider_limits
+             ORDER BY key
+            """,
+            settings.GOVERNOR_BREAKER_FAILURES,
+        )
+    from_numbers = {r["twilio_from_number"] for r in numbers}
+    states = []
+    for r in rows:
+        key = _tenant_key(r["key"], from_numbers)
+        if key is None:
+            continue
+        states.append({
+            "key": key,
+            "breaker": r["breaker"],
+            "tokens_at_last_refill": round(r["tokens"], 2),
+            "consecutive_failures": r["consecutive_failures"],
+            "open_until": r["open_until"].isoformat() if r["open_until"] else None,
+        })
+    return states
@@ -0,0 +1,244 @@
+"""
+Shared SMTP transport with a small pool of authenticated sessions.
+
+Every send used to open a fresh smtplib.SMTP connection (connect + STARTTLS +
+login) directly inside a coroutine, blocking the event loop for the whole
+exchange. This module keeps up to SMTP_POOL_SIZE logged-in sessions alive and
+reuses them for consecutive messages. It runs MIME building and the SMTP
+conversation on a dedicated thread pool, so the loop never blocks and the
+default executor is not starved.
+
+Lifecycle mirrors twilio_transport: `init_transport()` in lifespan startup,
+`close_transport()` on shutdown, `get_transport()` lazily creates one and
+returns None when SMTP is not configured.
+"""
+
+import asyncio
+import logging
+import os
+import smtplib
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Sessions idle longer than this are probed with NOOP before reuse; most
+# providers drop idle SMTP connections after a few minutes.
+IDLE_PROBE_SECONDS = 30
+
+
+@dataclass
+class EmailResult:
+    """Outcome of a single message. `status` is "sent" | "failed" | "skipped_missing_config"."""
+    status: str
+    recipients: list[str] = field(default_factory=list)
+    refused: dict = field(default_factory=dict)
+    error: str | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.status == "sent"
+
+
+@dataclass
+class _Session:
+    smtp: smtplib.SMTP
+    last_used: float
+
+
+class SmtpTransport:
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        user: str,
+        password: str,
+        from_addr: str,
+        pool_size: int = 3,
+        timeout: float = 15.0,
+    ):
+        self.host = host
+        self.port = port
+        self.user = user
+        self.password = password
+        self.from_addr = from_addr
+        self.timeout = timeout
+        self._idle: list[_Session] = []
+        self._slots = asyncio.Semaphore(max(1, pool_size))
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(1, pool_size), thread_name_prefix="smtp"
+        )
+
+    # -- blocking helpers (run on self._executor) ----------------------------
+
+    def _connect(self) -> smtplib.SMTP:
+        smtp = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        if self.user and self.password:
+            smtp.starttls()
+            smtp.login(self.user, self.password)
+        return smtp
+
+    def _deliver(
+        self,
+        session: _Session | None,
+        recipients: list[str],
+        subject: str,
+        body: str,
+        from_addr: str,
+    ) -> tuple[_Session, dict]:
+        msg = MIMEMultipart()
+        msg["From"] = from_addr
+        msg["To"] = ", ".join(recipients)
+        msg["Subject"] = subject
+        msg.attach(MIMEText(body, "plain"))
+        payload = msg.as_string()
+
+        if session is not None and time.monotonic() - session.last_used > IDLE_PROBE_SECONDS:
+            try:
+                if session.smtp.noop()[0] != 250:
+                    raise smtplib.SMTPServerDisconnected("noop failed")
+            except (smtplib.SMTPException, OSError):
+                _quietly_close(session.smtp)
+                session = None
+
+        if session is None:
+            session = _Session(smtp=self._connect(), last_used=time.monotonic())
+
+        try:
+            refused = session.smtp.sendmail(from_addr, recipients, payload)
+        except smtplib.SMTPServerDisconnected:
+            # Server dropped a pooled session between probe and send — retry once fresh.
+            _quietly_close(session.smtp)
+            session = _Session(smtp=self._connect(), last_used=time.monotonic())
+            try:
+                refused = session.smtp.sendmail(from_addr, recipients, payload)
+            except Exception:
+                _quietly_close(session.smtp)
+                raise
+        except Exception:
+            _quietly_close(session.smtp)
+            raise
+
+        session.last_used = time.monotonic()
+        return session, refused
+
+    # -- async API -----------------------------------------------------------
+
+    async def send(
+        self,
+        recipients: list[str],
+        subject: str,
+        body: str,
+        from_addr: str | None = None,
+    ) -> EmailResult:
+        """Send one plain-text message. Never throws."""
+        recipients = [r for r in recipients if r]
+        sender = from_addr or self.from_addr
+        if not recipients or not sender:
+            return EmailResult(status="skipped_missing_config", recipients=recipients)
+
+        loop = asyncio.get_running_loop()
+        async with self._slots:
+            session = self._idle.pop() if self._idle else None
+            try:
+                session, refused = await loop.run_in_executor(
+                    self._executor, self._deliver, session, recipients, subject, body, sender
+                )
+            except Exception as exc:
+                if session is not None:
+                    _quietly_close(session.smtp)
+                logger.warning("SMTP send to %s failed: %s", recipients, exc)
+                return EmailResult(status="failed", recipients=recipients, error=str(exc))
+            self._idle.append(session)
+
+        if refused:
+            logger.warning("SMTP refused recipients: %s", refused)
+        return EmailResult(status="sent", recipients=recipients, refused=refused)
+
+    async def send_many(self, messages: list[dict]) -> list[EmailResult]:
+        """
+        Send a batch of {"recipients", "subject", "body"} dicts concurrently.
+        Results are returned in input order; the pool bounds how many
+        sessions are in use at once, and each session carries many messages.
+        """
+        return await asyncio.gather(
+            *(
+                self.send(m["recipients"], m["subject"], m["body"], m.get("from_addr"))
+                for m in messages
+            )
+        )
+
+    async def aclose(self) -> None:
+        idle, self._idle = self._idle, []
+        for session in idle:
+            _quietly_quit(session.smtp)
+        self._executor.shutdown(wait=False)
+
+
+def _quietly_quit(smtp: smtplib.SMTP) -> None:
+    try:
+        smtp.quit()
+    except Exception:
+        _quietly_close(smtp)
+
+
+def _quietly_close(smtp: smtplib.SMTP) -> None:
+    try:
+        smtp.close()
+    except Exception:
+        pass
+
+
+_transport: SmtpTransport | None = None
+
+
+def _build() -> SmtpTransport | None:
+    host = os.getenv("SMTP_HOST", "")
+    from_addr = os.getenv("SMTP_FROM", "")
+    if not host or not from_addr:
+        return None
+    return SmtpTransport(
+        host=host,
+        port=int(os.getenv("SMTP_PORT", "587")),
+        user=os.getenv("SMTP_USER", ""),
+        password=os.getenv("SMTP_PASSWORD") or os.getenv("SMTP_PASS", ""),
+        from_addr=from_addr,
+        pool_size=settings.SMTP_POOL_SIZE,
+    )
+
+
+async def init_transport() -> SmtpTransport | None:
+    global _transport
+    if _transport is None:
+        _transport = _build()
+        if _transport:
+            logger.info("SMTP transport ready (pool_size=%s)", settings.SMTP_POOL_SIZE)
+    return _transport
+
+
+async def close_transport() -> None:
+    global _transport
+    if _transport:
+        await _transport.aclose()
+        _transport = None
+
+
+def get_transport() -> SmtpTransport | None:
+    """Return the shared transport, or None if SMTP is not configured."""
+    global _transport
+    if _transport is None:
+        _transport = _build()
+    return _transport
+
+
+async def send_email(recipients: list[str], subject: str, body: str) -> EmailResult:
+    """Convenience wrapper: send via the shared transport, or skip if unconfigured."""
+    transport = get_transport()
+    if transport is None:
+        return EmailResult(status="skipped_missing_config", recipients=recipients)
+    return await transport.send(recipients, subject, body)
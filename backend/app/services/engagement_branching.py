@@ -22,7 +22,7 @@ async def apply_reply_branching(
     org_id: str,
     classification: str,
     inbound_message_id: str | None = None,
-) -> None:
+) -> dict | None:
     """
     Apply branching rules based on reply classification.
 
@@ -34,6 +34,10 @@ async def apply_reply_branching(
       not_interested — pause plan, cancel pending steps, log branch_not_interested
       human_needed   — pause plan, cancel pending steps, mark lead needs_human, log handoff_required
       unknown        — same as human_needed
+
+    For handoffs, returns the keyword arguments for notify_handoff_required.
+    The caller sends that notification after releasing `conn`, so the
+    connection is not held during SMTP/Twilio calls. Returns None otherwise.
     """
     metadata: dict = {
         "classification": classification,
@@ -119,16 +123,14 @@ async def apply_reply_branching(
                     inbound_message_id,
                 ) or ""
 
-            from app.services.notification_service import notify_handoff_required
-            await notify_handoff_required(
-                conn,
-                lead_id=lead_id,
-                org_id=org_id,
-                owner_email=owner_email,
-                reason="reply_requires_human",
-                classification=classification,
-                message_body=inbound_body,
-            )
+            return {
+                "lead_id": lead_id,
+                "org_id": org_id,
+                "owner_email": owner_email,
+                "reason": "reply_requires_human",
+                "classification": classification,
+                "message_body": inbound_body,
+            }
 
         else:
             logger.warning(
@@ -141,6 +143,7 @@ async def apply_reply_branching(
             "Branching failed for lead %s (classification=%s): %s",
             lead_id, classification, exc,
         )
+    return None
 
 
 async def _pause_and_cancel(conn: asyncpg.Connection, lead_id: str) -> None:
@@ -164,7 +167,7 @@ async def _pause_and_cancel(conn: asyncpg.Connection, lead_id: str) -> None:
                 SELECT id FROM engagement_plans
                 WHERE lead_id = $1 AND status = 'active'
             )
-            AND status = 'pending'
+            AND status IN ('pending', 'held')
             """,
             lead_id,
         )
@@ -0,0 +1,198 @@
+"""
+Event-driven engagement scheduler: fires the engagement worker when steps
+fall due instead of polling every 60 s.
+
+Due times for the next ENGAGEMENT_SCHEDULER_WINDOW_SECONDS are loaded into
+an in-memory min-heap. The loop sleeps until the earliest one, then runs
+process_due_engagement_steps, which claims everything due. New or
+rescheduled steps arrive via LISTEN engagement_steps_due (see
+migrations/023_engagement_step_notify.sql) and are pushed onto the heap, so
+a step 30 s out fires within milliseconds of its scheduled time.
+
+A step 1 reserved for the first-touch fast path (migration 028) is loaded at
+the end of its grace period, not at its due time, so the leader only scans
+for it if the fast path didn't send it.
+
+The window is reloaded once per window as a safety net — for notifications
+missed while the listener was reconnecting, and for steps scheduled beyond
+the window. When idle, that reload is the only query this loop makes.
+
+Runs only on the scheduler leader (services/leader_election.py); followers
+hold no listener and make no queries.
+"""
+
+import asyncio
+import heapq
+import logging
+import time
+
+import asyncpg
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "engagement_steps_due"
+
+# Cap on due times loaded per window; past it the next reload moves earlier.
+WINDOW_LIMIT = 1000
+
+WINDOW_SQL = """
+    SELECT DISTINCT EXTRACT(EPOCH FROM COALESCE(es.first_touch_until, es.scheduled_for))::float8 AS due
+      FROM engagement_steps es
+      JOIN engagement_plans ep ON ep.id = es.plan_id
+     WHERE es.status = 'pending'
+       AND es.scheduled_for <= now() + make_interval(secs => $1)
+       AND ep.status = 'active'
+       AND ep.paused = false
+     ORDER BY due
+     LIMIT $2
+"""
+
+
+class EngagementScheduler:
+    def __init__(self):
+        self._heap: list[float] = []
+        self._wake = asyncio.Event()
+        self._listener: asyncpg.Connection | None = None
+        self._next_reload = 0.0
+        self._stopping = False
+        self.ticks = 0
+        self.notifications = 0
+
+    # -- wiring -------------------------------------------------------------
+
+    def _pool(self) -> asyncpg.Pool:
+        import app.database as _db_mod
+        return _db_mod.pool
+
+    def _is_leader(self) -> bool:
+        from app.services.leader_election import scheduler_lease
+        return scheduler_lease.is_leader
+
+    async def _tick(self) -> dict:
+        from app.services.engagement_worker import process_due_engagement_steps
+        return await process_due_engagement_steps(self._pool())
+
+    async def _connect(self) -> asyncpg.Connection:
+        return await asyncpg.connect(settings.asyncpg_url)
+
+    # -- heap ---------------------------------------------------------------
+
+    def push(self, due: float) -> None:
+        """Track a due time if it falls before the next reload (which would load it anyway)."""
+        if due <= self._next_reload:
+            heapq.heappush(self._heap, due)
+            self._wake.set()
+
+    def _on_notify(self, conn, pid, channel, payload) -> None:
+        self.notifications += 1
+        try:
+            self.push(float(payload))
+        except ValueError:
+            logger.warning("Ignoring malformed %s payload: %r", CHANNEL, payload)
+
+    def _on_listener_lost(self, conn) -> None:
+        logger.warning("Engagement scheduler listener connection lost; reattaching")
+        self._listener = None
+        self._wake.set()
+
+    async def _load_window(self) -> None:
+        window = settings.ENGAGEMENT_SCHEDULER_WINDOW_SECONDS
+        now = time.time()
+        async with self._pool().acquire() as conn:
+            rows = await conn.fetch(WINDOW_SQL, float(window), WINDOW_LIMIT)
+        self._heap = [r["due"] for r in rows]
+        heapq.heapify(self._heap)
+        self._next_reload = now + window
+        if len(rows) == WINDOW_LIMIT:
+            # Truncated: reload once we reach the last loaded due time.
+            self._next_reload = min(self._next_reload, rows[-1]["due"])
+
+    # -- listener -----------------------------------------------------------
+
+    async def _attach(self) -> None:
+        conn = await self._connect()
+        await conn.add_listener(CHANNEL, self._on_notify)
+        conn.add_termination_listener(self._on_listener_lost)
+        self._listener = conn
+        # Anything that changed while detached is picked up by a fresh load.
+        self._next_reload = 0.0
+
+    async def _detach(self) -> None:
+        conn, self._listener = self._listener, None
+        self._heap.clear()
+        self._next_reload = 0.0
+        if conn is not None and not conn.is_closed():
+            try:
+                await conn.close()
+            except Exception:
+                conn.terminate()
+
+    # -- loop ---------------------------------------------------------------
+
+    async def _sleep(self, seconds: float) -> None:
+        self._wake.clear()
+        try:
+            await asyncio.wait_for(self._wake.wait(), timeout=max(seconds, 0))
+        except asyncio.TimeoutError:
+            pass
+
+    async def step(self) -> None:
+        """One scheduling decision: reload, fire, or sleep until the next event."""
+        if not self._is_leader():
+            if self._listener is not None:
+                await self._detach()
+            await self._sleep(settings.LEADER_RENEW_SECONDS)
+            return
+
+        if self._listener is None:
+            await self._attach()
+
+        now = time.time()
+        if now >= self._next_reload:
+            await self._load_window()
+
+        if self._heap and self._heap[0] <= now:
+            while self._heap and self._heap[0] <= now:
+                heapq.heappop(self._heap)
+            result = await self._tick()
+            self.ticks += 1
+            if result.get("processed", 0) > 0:
+                logger.info("Engagement worker: %s", result)
+            if result.get("more_due"):
+                # Stopped on the tick budget with work left: go again now.
+                heapq.heappush(self._heap, now)
+            return
+
+        until_next = (self._heap[0] if self._heap else self._next_reload) - now
+        await self._sleep(min(until_next, self._next_reload - now))
+
+    async def run(self) -> None:
+        self._stopping = False
+        while not self._stopping:
+            try:
+                await self.step()
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                logger.error("Engagement scheduler error: %s", exc)
+                await self._detach()
+                await self._sleep(settings.LEADER_RENEW_SECONDS)
+        await self._detach()
+
+    def stop(self) -> None:
+        self._stopping = True
+        self._wake.set()
+
+    def stats(self) -> dict:
+        return {
+            "listening": self._listener is not None,
+            "pending_due_times": len(self._heap),
+            "next_due_in_seconds": round(self._heap[0] - time.time(), 1) if self._heap else None,
+            "ticks": self.ticks,
+            "notifications": self.notifications,
+        }
+
+
+engagement_scheduler = EngagementScheduler()
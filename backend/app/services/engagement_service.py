@@ -3,10 +3,12 @@ Engagement Engine V1: creates follow-up plans and logs engagement events.
 No AI calls in this version — deterministic templates only.
 """
 
-import json
 import logging
 from datetime import datetime, timedelta, timezone
 
+from app.config import settings
+from app.services.event_sink import event_sink
+
 logger = logging.getLogger(__name__)
 
 
@@ -16,11 +18,6 @@ def _build_default_step_content(lead_data: dict) -> dict:
     Returns dict with sms_body, email_subject, email_body keyed per step.
     """
     answers = lead_data.get("answers_json") or {}
-    if isinstance(answers, str):
-        try:
-            answers = json.loads(answers)
-        except Exception:
-            answers = {}
 
     name = answers.get("name") or "there"
     service = answers.get("service") or "your inquiry"
@@ -67,6 +64,38 @@ def _build_default_step_content(lead_data: dict) -> dict:
     }
 
 
+ENGAGEMENT_EVENT_INSERT_SQL = """
+    INSERT INTO engagement_events
+        (lead_id, org_id, channel, event_type, direction, content, metadata_json)
+    VALUES ($1, $2, $3, $4, $5, $6, $7)
+"""
+
+# Default V1 step schedule: (step_order, channel, delay after plan creation)
+DEFAULT_STEP_SCHEDULE = [
+    (1, "sms",   timedelta(seconds=30)),
+    (2, "email", timedelta(minutes=2)),
+    (3, "sms",   timedelta(hours=1)),
+    (4, "email", timedelta(hours=24)),
+]
+
+STEP_COLUMNS = (
+    "plan_id", "step_order", "channel", "action_type",
+    "scheduled_for", "status", "template_key", "generated_content_json",
+    "first_touch_until",
+)
+
+# One statement for any number of leads. The partial unique index from
+# migrations/024_engagement_plan_unique_active.sql turns a lead that already
+# has an active plan into a skipped row rather than a duplicate.
+INSERT_PLANS_SQL = """
+    INSERT INTO engagement_plans (lead_id, org_id, funnel_id, status)
+    SELECT lead_id, org_id, funnel_id, 'active'
+      FROM unnest($1::uuid[], $2::uuid[], $3::uuid[]) AS t(lead_id, org_id, funnel_id)
+    ON CONFLICT (lead_id) WHERE status = 'active' DO NOTHING
+    RETURNING id, lead_id
+"""
+
+
 async def log_engagement_event(
     conn,
     lead_id: str,
@@ -76,22 +105,28 @@ async def log_engagement_event(
     direction: str,
     content: str | None = None,
     metadata: dict | None = None,
+    sync: bool = False,
 ) -> None:
-    """Insert an engagement event. Never throws."""
+    """
+    Record an engagement event. Never throws. Buffered through the event
+    sink when it is running; sync=True writes on `conn` immediately.
+    """
     try:
+        if event_sink.running and not sync:
+            await event_sink.emit(
+                "engagement_events", lead_id, org_id, channel, event_type, direction,
+                content, metadata or None,
+            )
+            return
         await conn.execute(
-            """
-            INSERT INTO engagement_events
-                (lead_id, org_id, channel, event_type, direction, content, metadata_json)
-            VALUES ($1, $2, $3, $4, $5, $6, $7)
-            """,
+            ENGAGEMENT_EVENT_INSERT_SQL,
             lead_id,
             org_id,
             channel,
             event_type,
             direction,
             content,
-            json.dumps(metadata) if metadata else None,
+            metadata or None,
         )
     except Exception as exc:
         logger.warning(
@@ -99,85 +134,102 @@ async def log_engagement_event(
         )
 
 
+async def create_engagement_plans(
+    conn, leads: list[dict], first_touch: bool = False
+) -> dict[str, dict]:
+    """
+    Create engagement plans + default V1 steps for many leads in one
+    transaction: one INSERT for the plans, one COPY for the steps and one
+    batched INSERT for the plan_created events, however many leads.
+
+    Each lead dict needs id, org_id, funnel_id and answers_json. Leads that
+    already have an active plan are left alone. Any failure rolls the whole
+    batch back, so no plan is ever left without its steps.
+
+    With first_touch=True, step 1 is reserved for the first-touch fast path
+    (engagement_worker.schedule_first_touch): the scheduler neither hears of
+    it nor claims it until ENGAGEMENT_FIRST_TOUCH_GRACE_SECONDS after it is
+    due (migrations/028_engagement_first_touch.sql).
+
+    Returns {lead_id: {"id", "existing": False, "first_step_at"}} for the
+    plans created.
+    """
+    if not leads:
+        return {}
+    by_id = {str(lead["id"]): lead for lead in leads}
+    now = datetime.now(timezone.utc)
+    grace = timedelta(seconds=settings.ENGAGEMENT_FIRST_TOUCH_GRACE_SECONDS)
+
+    async with conn.transaction():
+        created = await conn.fetch(
+            INSERT_PLANS_SQL,
+            list(by_id),
+            [lead["org_id"] for lead in by_id.values()],
+            [lead.get("funnel_id") for lead in by_id.values()],
+        )
+
+        steps, events, plans = [], [], {}
+        for row in created:
+            lead_id = str(row["lead_id"])
+            lead = by_id[lead_id]
+            content_map = _build_default_step_content(lead)
+            for step_order, channel, delay in DEFAULT_STEP_SCHEDULE:
+                content = content_map.get(step_order, {})
+                reserved_until = now + delay + grace if first_touch and step_order == 1 else None
+                steps.append((
+                    row["id"], step_order, channel, "send",
+                    now + delay, "pending", content.get("template_key"), content,
+                    reserved_until,
+                ))
+            events.append((
+                row["lead_id"], lead["org_id"], "system", "plan_created", "system", None,
+                {"plan_id": str(row["id"]), "steps": len(DEFAULT_STEP_SCHEDULE)},
+            ))
+            plans[lead_id] = {
+                "id": str(row["id"]),
+                "existing": False,
+                "first_step_at": now + DEFAULT_STEP_SCHEDULE[0][2],
+            }
+
+        if steps:
+            await conn.copy_records_to_table(
+                "engagement_steps", records=steps, columns=STEP_COLUMNS
+            )
+            await conn.executemany(ENGAGEMENT_EVENT_INSERT_SQL, events)
+
+    logger.info(
+        "Created %d engagement plan(s) for %d lead(s) (%d already had one)",
+        len(plans), len(by_id), len(by_id) - len(plans),
+    )
+    return plans
+
+
 async def create_engagement_plan(
     conn,
     lead_id: str,
     org_id: str,
     funnel_id: str | None,
     lead_data: dict,
+    first_touch: bool = False,
 ) -> dict | None:
     """
     Create an engagement plan + default V1 steps for a lead.
     If an active plan already exists, return it without creating a duplicate.
-    Returns the plan row as a dict, or None on error.
+    Returns {"id", "existing"} (plus "first_step_at" for a new plan), or None
+    on error.
     """
     try:
-        # Check for existing active plan
-        existing = await conn.fetchrow(
+        lead = {**lead_data, "id": lead_id, "org_id": org_id, "funnel_id": funnel_id}
+        plans = await create_engagement_plans(conn, [lead], first_touch=first_touch)
+        if str(lead_id) in plans:
+            return plans[str(lead_id)]
+
+        existing = await conn.fetchval(
             "SELECT id FROM engagement_plans WHERE lead_id = $1 AND status = 'active'",
             lead_id,
         )
-        if existing:
-            logger.info("Engagement plan already exists for lead %s", lead_id)
-            return {"id": str(existing["id"]), "existing": True}
-
-        # Create plan
-        plan_id = await conn.fetchval(
-            """
-            INSERT INTO engagement_plans (lead_id, org_id, funnel_id, status)
-            VALUES ($1, $2, $3, 'active')
-            RETURNING id
-            """,
-            lead_id,
-            org_id,
-            funnel_id,
-        )
-
-        now = datetime.now(timezone.utc)
-
-        # Default V1 step schedule
-        step_schedule = [
-            (1, "sms",   now + timedelta(seconds=30)),
-            (2, "email", now + timedelta(minutes=2)),
-            (3, "sms",   now + timedelta(hours=1)),
-            (4, "email", now + timedelta(hours=24)),
-        ]
-
-        content_map = _build_default_step_content(lead_data)
-
-        for step_order, channel, scheduled_for in step_schedule:
-            content = content_map.get(step_order, {})
-            await conn.execute(
-                """
-                INSERT INTO engagement_steps
-                    (plan_id, step_order, channel, action_type,
-                     scheduled_for, status, template_key, generated_content_json)
-                VALUES ($1, $2, $3, 'send', $4, 'pending', $5, $6)
-                """,
-                str(plan_id),
-                step_order,
-                channel,
-                scheduled_for,
-                content.get("template_key"),
-                json.dumps(content),
-            )
-
-        logger.info(
-            "Created engagement plan %s with %d steps for lead %s",
-            plan_id, len(step_schedule), lead_id,
-        )
-
-        await log_engagement_event(
-            conn,
-            lead_id=lead_id,
-            org_id=org_id,
-            channel="system",
-            event_type="plan_created",
-            direction="system",
-            metadata={"plan_id": str(plan_id), "steps": len(step_schedule)},
-        )
-
-        return {"id": str(plan_id), "existing": False}
+        logger.info("Engagement plan already exists for lead %s", lead_id)
+        return {"id": str(existing), "existing": True}
 
     except Exception as exc:
         logger.error("Failed to create engagement plan for lead %s: %s", lead_id, exc)
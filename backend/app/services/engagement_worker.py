@@ -1,78 +1,394 @@
 """
 Engagement Worker V1.1: processes due engagement steps and fires delivery hooks.
 Returns a summary dict of processed / sent / skipped / failed counts.
+
+Steps are claimed atomically (FOR UPDATE SKIP LOCKED, status -> 'in_progress')
+so any number of processes can run the worker concurrently without two of
+them sending the same step. See migrations/019_engagement_step_claiming.sql.
 """
 
-import json
+import asyncio
 import logging
+import os
+import time
 from datetime import datetime, timezone
+from typing import Optional
 
 import asyncpg
 
+from app import background
+from app.config import settings
+from app.core.phone import normalize_phone
+from app.services import delivery_governor, email_transport, outbox, twilio_transport, working_hours
 from app.services.engagement_service import log_engagement_event
+from app.services.lead_service import LEAD_BY_ID_SQL
 
 logger = logging.getLogger(__name__)
 
+# Identifies this process in engagement_steps.locked_by. Set by
+# background.set_worker_id() at startup of the API process and of app.worker.
+WORKER_ID: str = "worker-unset"
+
+CLAIM_BATCH_SIZE = 100
+
+# A step is a single SMS/email send bounded by a 15 s provider timeout, so a
+# row 'in_progress' for 10 minutes belongs to a dead process.
+STUCK_AFTER_SECONDS = 600
+
+# Lazily-created concurrency limits, shared by every tick in this process.
+_global_limit: asyncio.Semaphore | None = None
+_channel_limits: dict[str, asyncio.Semaphore] = {}
+_provider_limits: dict[str, asyncio.Semaphore] = {}
+
+
+# Columns every claim returns; _execute_step reads these.
+_CLAIMED_STEP_COLUMNS = """
+ RETURNING
+        es.id            AS step_id,
+        es.plan_id,
+        es.step_order,
+        es.channel,
+        es.action_type,
+        es.scheduled_for,
+        es.generated_content_json,
+        es.send_attempts,
+        ep.lead_id,
+        ep.org_id,
+        ep.funnel_id,
+        ep.paused,
+        ep.status        AS plan_status
+"""
+
+# Shared with app.database, which prepares it on every new pooled connection.
+CLAIM_DUE_STEPS_SQL = """
+    WITH claimed AS (
+        SELECT es.id
+          FROM engagement_steps es
+          JOIN engagement_plans ep ON ep.id = es.plan_id
+         WHERE es.status = 'pending'
+           AND es.scheduled_for <= now()
+           AND (es.first_touch_until IS NULL OR es.first_touch_until <= now())
+           AND ep.status = 'active'
+           AND ep.paused = false
+         ORDER BY es.scheduled_for ASC
+         LIMIT $2
+         FOR UPDATE OF es SKIP LOCKED
+    )
+    UPDATE engagement_steps AS es
+       SET status    = 'in_progress',
+           locked_by = $1,
+           locked_at = now()
+      FROM claimed, engagement_plans ep
+     WHERE es.id = claimed.id
+       AND ep.id = es.plan_id
+""" + _CLAIMED_STEP_COLUMNS
+
+# First-touch fast path: claim one plan's step 1 by key, no queue scan. The
+# step is reserved (first_touch_until, migration 028), so the scheduler's
+# claim doesn't race this one during the grace period. Claiming drops the
+# reservation, so a deferred or recovered step is scheduled like any other.
+CLAIM_FIRST_STEP_SQL = """
+    UPDATE engagement_steps AS es
+       SET status            = 'in_progress',
+           locked_by         = $1,
+           locked_at         = now(),
+           first_touch_until = NULL
+      FROM engagement_plans ep
+     WHERE es.plan_id = $2
+       AND es.step_order = 1
+       AND es.status = 'pending'
+       AND es.scheduled_for <= now()
+       AND ep.id = es.plan_id
+       AND ep.status = 'active'
+       AND ep.paused = false
+""" + _CLAIMED_STEP_COLUMNS
+
+# Hand reserved step 1s back to the scheduler; the NOTIFY trigger fires.
+RELEASE_FIRST_STEPS_SQL = """
+    UPDATE engagement_steps
+       SET first_touch_until = NULL
+     WHERE plan_id = ANY($1::uuid[])
+       AND step_order = 1
+       AND status = 'pending'
+       AND first_touch_until IS NOT NULL
+"""
+
+# Process-local dispatch counters, served by /admin/ops/engagement.
+# queue_scans counts claim_due_steps calls; first-touch claims are keyed
+# lookups and never count as scans. The scheduler is never woken for a
+# reserved step, so each first_touch_dispatched is a due time it didn't scan
+# for.
+dispatch_stats = {
+    "queue_scans": 0,
+    "first_touch_scheduled": 0,
+    "first_touch_dispatched": 0,
+    "first_touch_preempted": 0,
+}
+
+# Strong references to running first-touch tasks, and the ones still
+# sleeping until their step is due (task -> plan id).
+_first_touch_tasks: set[asyncio.Task] = set()
+_first_touch_waiting: dict[asyncio.Task, str] = {}
+
+
+async def claim_due_steps(
+    pool: asyncpg.Pool,
+    worker_id: Optional[str] = None,
+    limit: int = CLAIM_BATCH_SIZE,
+) -> list:
+    """Claim up to `limit` due steps atomically.
+
+    Uses SELECT ... FOR UPDATE SKIP LOCKED inside a CTE so concurrent workers
+    never grab the same row. Claimed rows come back 'in_progress' and the
+    caller is responsible for moving them to a final status.
+    """
+    wid = worker_id or WORKER_ID
+    dispatch_stats["queue_scans"] += 1
+    async with pool.acquire() as conn:
+        rows = await conn.fetch(CLAIM_DUE_STEPS_SQL, wid, limit)
+    return sorted(rows, key=lambda r: r["scheduled_for"])
+
+
+def schedule_first_touch(pool: asyncpg.Pool, plan_id: str, due_at: datetime) -> None:
+    """Dispatch a new plan's step 1 at `due_at` without scanning the due queue.
+
+    The plan must have been created with first_touch=True, so the scheduler
+    leaves step 1 alone for ENGAGEMENT_FIRST_TOUCH_GRACE_SECONDS. Best
+    effort: if this process exits first, the scheduler sends the step once
+    the grace period has passed.
+    """
+    delay = max(0.0, (due_at - datetime.now(timezone.utc)).total_seconds())
+    task = asyncio.create_task(_dispatch_first_touch(pool, plan_id, delay))
+    _first_touch_tasks.add(task)
+    _first_touch_waiting[task] = plan_id
+    task.add_done_callback(_first_touch_tasks.discard)
+    task.add_done_callback(lambda t: _first_touch_waiting.pop(t, None))
+    dispatch_stats["first_touch_scheduled"] += 1
+
+
+async def _dispatch_first_touch(pool: asyncpg.Pool, plan_id: str, delay: float) -> None:
+    await asyncio.sleep(delay)
+    _first_touch_waiting.pop(asyncio.current_task(), None)
+    if background.draining():
+        return
+    try:
+        async with pool.acquire() as conn:
+            step = await conn.fetchrow(CLAIM_FIRST_STEP_SQL, WORKER_ID, plan_id)
+            if step is None:
+                # Plan paused or cancelled, or the step rescheduled: the
+                # scheduler owns it from here.
+                await conn.execute(RELEASE_FIRST_STEPS_SQL, [plan_id])
+        if step is None:
+            dispatch_stats["first_touch_preempted"] += 1
+            return
+        dispatch_stats["first_touch_dispatched"] += 1
+        await _run_limited(pool, step)
+    except Exception as exc:
+        logger.error("First-touch dispatch failed for plan %s: %s", plan_id, exc)
+
+
+async def cancel_first_touches(pool: asyncpg.Pool | None) -> int:
+    """Cancel first touches still waiting on their due time (shutdown).
+
+    Their steps are released to the scheduler, which is notified at once
+    rather than at the end of the grace period. A touch already sending is
+    left to finish.
+    """
+    waiting = dict(_first_touch_waiting)
+    for task in waiting:
+        task.cancel()
+    if waiting and pool is not None:
+        try:
+            async with pool.acquire() as conn:
+                await conn.execute(RELEASE_FIRST_STEPS_SQL, list(waiting.values()))
+        except Exception as exc:
+            logger.warning("Could not release %d first touch(es): %s", len(waiting), exc)
+    return len(waiting)
+
+
+async def recover_stuck_steps(
+    pool: asyncpg.Pool, older_than_seconds: int = STUCK_AFTER_SECONDS
+) -> int:
+    """Reset steps left 'in_progress' by a crashed worker back to 'pending'.
+
+    Called on startup and on a slow scheduler cadence, never per tick.
+    """
+    async with pool.acquire() as conn:
+        result = await conn.execute(
+            """
+            UPDATE engagement_steps
+               SET status    = 'pending',
+                   locked_by = NULL,
+                   locked_at = NULL
+             WHERE status    = 'in_progress'
+               AND locked_at < now() - make_interval(secs => $1)
+            """,
+            older_than_seconds,
+        )
+    # asyncpg returns "UPDATE N"
+    try:
+        count = int(result.split()[-1])
+    except (ValueError, IndexError):
+        count = 0
+    if count:
+        logger.warning("Engagement worker recovered %s stuck step(s)", count)
+    return count
+
+
+async def release_held_steps(pool: asyncpg.Pool, limit: int) -> int:
+    """
+    Return up to `limit` steps held for working hours, whose window has
+    opened, to 'pending' — oldest hold first. The NOTIFY trigger wakes the
+    scheduler for them.
+    """
+    async with pool.acquire() as conn:
+        result = await conn.execute(
+            """
+            UPDATE engagement_steps
+               SET status = 'pending', scheduled_for = now()
+             WHERE id IN (
+                   SELECT id FROM engagement_steps
+                    WHERE status = 'held' AND scheduled_for <= now()
+                    ORDER BY scheduled_for
+                    LIMIT $1
+                      FOR UPDATE SKIP LOCKED
+             )
+            """,
+            limit,
+        )
+    try:
+        return int(result.split()[-1])
+    except (ValueError, IndexError):
+        return 0
+
+
+def _channel_semaphore(channel: str) -> asyncio.Semaphore:
+    sem = _channel_limits.get(channel)
+    if sem is None:
+        limit = {
+            "sms":   settings.ENGAGEMENT_SMS_CONCURRENCY,
+            "email": settings.ENGAGEMENT_EMAIL_CONCURRENCY,
+            "call":  settings.ENGAGEMENT_CALL_CONCURRENCY,
+        }.get(channel, 1)
+        sem = _channel_limits[channel] = asyncio.Semaphore(max(1, limit))
+    return sem
+
+
+def _provider_semaphore(channel: str) -> asyncio.Semaphore:
+    """One semaphore per provider account (Twilio SID / SMTP host)."""
+    if channel in ("sms", "call"):
+        key = f"twilio:{os.getenv('TWILIO_ACCOUNT_SID', '')}"
+    elif channel == "email":
+        key = f"smtp:{os.getenv('SMTP_HOST', '')}"
+    else:
+        key = channel
+    sem = _provider_limits.get(key)
+    if sem is None:
+        sem = _provider_limits[key] = asyncio.Semaphore(
+            max(1, settings.ENGAGEMENT_PROVIDER_CONCURRENCY)
+        )
+    return sem
+
+
+def _global_semaphore() -> asyncio.Semaphore:
+    global _global_limit
+    if _global_limit is None:
+        _global_limit = asyncio.Semaphore(max(1, settings.ENGAGEMENT_MAX_CONCURRENCY))
+    return _global_limit
+
+
+async def _run_limited(pool: asyncpg.Pool, step) -> str:
+    channel = step["channel"]
+    async with _global_semaphore(), _channel_semaphore(channel), _provider_semaphore(channel):
+        return await _execute_step(pool, step)
+
 
 async def process_due_engagement_steps(pool: asyncpg.Pool) -> dict:
     """
-    Fetch and execute pending engagement steps whose scheduled_for <= now().
+    Claim and execute pending engagement steps whose scheduled_for <= now().
+    Safe to run from several processes at once — each step is claimed by
+    exactly one caller.
+    Claimed steps run concurrently, bounded by global, per-channel and
+    per-provider-account semaphores. Keeps claiming batches until the due
+    queue is drained, the tick budget is spent or shutdown begins.
+    `more_due` is True only when the tick budget ran out right after a full
+    batch, i.e. the queue was not drained; a short or empty claim means
+    nothing else was claimable.
     Safe if Twilio / SMTP are not configured — marks as skipped_missing_config.
     Never crashes the caller if an individual step fails.
 
     Returns:
-        {"processed": int, "sent": int, "skipped_missing_config": int, "failed": int}
+        {"processed": int, "sent": int, "skipped_missing_config": int, "failed": int,
+         "deferred": int, "unconfirmed": int, "held": int, "more_due": bool, "batches": int,
+         "duration_ms": int, "steps_per_sec": float,
+         "avg_lag_seconds": float | None, "max_lag_seconds": float | None}
     """
-    summary = {"processed": 0, "sent": 0, "skipped_missing_config": 0, "failed": 0}
+    summary = {"processed": 0, "sent": 0, "skipped_missing_config": 0, "failed": 0, "deferred": 0,
+               "unconfirmed": 0, "held": 0, "more_due": False}
+    started = time.monotonic()
+    lags: list[float] = []
+    batches = 0
 
     try:
-        async with pool.acquire() as conn:
-            due_steps = await conn.fetch(
-                """
-                SELECT
-                    es.id            AS step_id,
-                    es.plan_id,
-                    es.step_order,
-                    es.channel,
-                    es.action_type,
-                    es.generated_content_json,
-                    ep.lead_id,
-                    ep.org_id,
-                    ep.funnel_id,
-                    ep.paused,
-                    ep.status        AS plan_status
-                FROM engagement_steps es
-                JOIN engagement_plans ep ON ep.id = es.plan_id
-                WHERE es.status = 'pending'
-                  AND es.scheduled_for <= now()
-                  AND ep.status = 'active'
-                  AND ep.paused = false
-                ORDER BY es.scheduled_for ASC
-                LIMIT 100
-                """
-            )
-
+        while not background.draining():
+            due_steps = await claim_due_steps(pool)
             if not due_steps:
-                return summary
-
+                break
+            batches += 1
+
+            now = datetime.now(timezone.utc)
+            lags.extend(
+                (now - step["scheduled_for"]).total_seconds()
+                for step in due_steps
+                if step.get("scheduled_for")
+            )
             logger.info("Processing %d due engagement steps", len(due_steps))
 
-            for step in due_steps:
-                step_status = await _execute_step(conn, step)
+            results = await asyncio.gather(
+                *(_run_limited(pool, step) for step in due_steps),
+                return_exceptions=True,
+            )
+            for step_status in results:
                 summary["processed"] += 1
+                if isinstance(step_status, BaseException):
+                    step_status = "failed"
                 if step_status in summary:
                     summary[step_status] += 1
 
+            if len(due_steps) < CLAIM_BATCH_SIZE:
+                break
+            if time.monotonic() - started >= settings.ENGAGEMENT_TICK_BUDGET_SECONDS:
+                summary["more_due"] = True
+                break
+
     except Exception as exc:
         logger.error("Engagement worker error: %s", exc)
 
+    if summary["processed"]:
+        elapsed = time.monotonic() - started
+        summary.update({
+            "batches":         batches,
+            "duration_ms":     int(elapsed * 1000),
+            "steps_per_sec":   round(summary["processed"] / elapsed, 1) if elapsed > 0 else None,
+            "avg_lag_seconds": round(sum(lags) / len(lags), 1) if lags else None,
+            "max_lag_seconds": round(max(lags), 1) if lags else None,
+        })
+
     return summary
 
 
-async def _execute_step(conn, step) -> str:
+async def _execute_step(pool: asyncpg.Pool, step) -> str:
     """
     Execute a single engagement step. Catches all errors internally.
-    Returns the final status string: 'sent' | 'skipped_missing_config' | 'failed'.
+    A pooled connection is held only around the reads before delivery and the
+    writes after it — never across the provider call.
+    Returns the final status string: 'sent' | 'skipped_missing_config' | 'failed',
+    'unconfirmed' when the outbox could not verify an earlier attempt (it is
+    not resent), or 'deferred' when the delivery governor held the send back
+    (rate limit, open breaker), the provider failed transiently, or an earlier
+    attempt's outcome is still being reconciled — the step is then back to
+    'pending' with a later scheduled_for. SMS steps outside the funnel's
+    working hours return 'held' (see services/working_hours.py).
     """
     step_id  = str(step["step_id"])
     lead_id  = str(step["lead_id"])
@@ -81,69 +397,106 @@ async def _execute_step(conn, step) -> str:
     channel  = step["channel"]
 
     try:
-        content = step["generated_content_json"]
-        if isinstance(content, str):
-            try:
-                content = json.loads(content)
-            except Exception:
-                content = {}
-        content = content or {}
-
-        # Load funnel for delivery config
-        funnel = None
-        if step["funnel_id"]:
-            funnel = await conn.fetchrow(
-                "SELECT * FROM funnels WHERE id = $1", str(step["funnel_id"])
-            )
+        content = step["generated_content_json"] or {}
 
-        # Load lead for delivery context
-        lead = await conn.fetchrow(
-            "SELECT * FROM leads WHERE id = $1", lead_id
-        )
-        if not lead:
-            await _mark_step(conn, step_id, "failed")
-            return "failed"
+        async with pool.acquire() as conn:
+            # Load funnel for delivery config
+            funnel = None
+            if step["funnel_id"]:
+                funnel = await conn.fetchrow(
+                    "SELECT * FROM funnels WHERE id = $1", str(step["funnel_id"])
+                )
+
+            # Load lead for delivery context
+            lead = await conn.fetchrow(LEAD_BY_ID_SQL, lead_id)
+            if not lead:
+                await _mark_step(conn, step_id, "failed")
+                return "failed"
 
         lead_dict   = dict(lead)
         funnel_dict = dict(funnel) if funnel else {}
 
-        # Attempt delivery
+        # Working hours: SMS waits for the funnel's next open window
         if channel == "sms":
-            status = await _send_sms(lead_dict, funnel_dict, content)
+            opens_at = working_hours.next_open(funnel_dict)
+            if opens_at is not None:
+                await _hold_step(pool, step_id, opens_at)
+                logger.info("Step %s held until %s (outside working hours)", step_id, opens_at.isoformat())
+                return "held"
+
+        # Delivery governor: shared provider rate limits and circuit breaker
+        governed = (
+            (channel == "sms" and twilio_transport.get_transport() is not None)
+            or (channel == "email" and email_transport.get_transport() is not None)
+        )
+        if governed:
+            if channel == "sms":
+                buckets = delivery_governor.sms_buckets(funnel_dict.get("twilio_from_number"))
+                provider_key = delivery_governor.twilio_provider_key()
+            else:
+                buckets = delivery_governor.email_buckets()
+                provider_key = delivery_governor.smtp_provider_key()
+            admission = await delivery_governor.admit(buckets, pool)
+            if not admission.admitted:
+                await _defer_step(pool, step_id, admission.wait_seconds)
+                logger.info("Step %s deferred %.1fs: %s", step_id, admission.wait_seconds, admission.reason)
+                return "deferred"
+
+        # Attempt delivery, at most once per (step, attempt) — see services/outbox.py
+        key = outbox.step_key(step_id, step.get("send_attempts") or 0)
+        delivery = None
+        if channel == "sms" and governed:
+            to_phone, from_number, sms_body = _sms_envelope(lead_dict, funnel_dict, content)
+            delivery = await outbox.deliver_once(
+                key, lambda: _send_sms(lead_dict, funnel_dict, content),
+                channel="sms", purpose="engagement_step", org_id=org_id, lead_id=lead_id,
+                step_id=step_id, recipient=to_phone, sender=from_number, body=sms_body, pool=pool,
+            )
+        elif channel == "email" and governed:
+            delivery = await outbox.deliver_once(
+                key, lambda: _send_email(lead_dict, funnel_dict, content),
+                channel="email", purpose="engagement_step", org_id=org_id, lead_id=lead_id,
+                step_id=step_id, pool=pool,
+            )
+        elif channel == "sms":
+            result = await _send_sms(lead_dict, funnel_dict, content)
         elif channel == "email":
-            status = await _send_email(lead_dict, funnel_dict, content)
+            result = await _send_email(lead_dict, funnel_dict, content)
         elif channel == "call":
             # Calls are not supported in V1 — explicitly skip
             logger.info(
                 "Step %s (lead=%s, channel=call) skipped: call_not_supported_v1",
                 step_id, lead_id,
             )
-            status = "skipped_missing_config"
+            result = twilio_transport.SmsResult(status="skipped_missing_config")
         else:
-            status = "skipped_missing_config"
-
-        now = datetime.now(timezone.utc)
-        await conn.execute(
-            """
-            UPDATE engagement_steps
-            SET status = $1, executed_at = $2
-            WHERE id = $3
-            """,
-            status,
-            now,
-            step_id,
-        )
-
-        # Advance plan current_step
-        await conn.execute(
-            """
-            UPDATE engagement_plans
-            SET current_step = GREATEST(current_step, $1), updated_at = now()
-            WHERE id = $2
-            """,
-            step["step_order"],
-            plan_id,
-        )
+            result = twilio_transport.SmsResult(status="skipped_missing_config")
+        if delivery is not None:
+            result = delivery.result
+            status = delivery.status
+        else:
+            status = result.status
+
+        if governed and result is not None:
+            outcome = delivery_governor.classify(result)
+            await delivery_governor.record(provider_key, outcome, admission, result.error, pool)
+            attempts = (step.get("send_attempts") or 0) + 1
+            if (
+                status != "in_flight"
+                and outcome in ("throttled", "unavailable")
+                and attempts < settings.GOVERNOR_MAX_SEND_ATTEMPTS
+            ):
+                delay = settings.GOVERNOR_RETRY_BASE_SECONDS * 2 ** (attempts - 1)
+                await _defer_step(pool, step_id, delay, count_attempt=True)
+                logger.info("Step %s deferred %ss after %s (attempt %s)", step_id, delay, outcome, attempts)
+                return "deferred"
+
+        if status == "in_flight":
+            # Twilio may have this message already; retry under the same key
+            # once reconcile has settled it, never as a fresh attempt.
+            await _defer_step(pool, step_id, outbox.recheck_delay())
+            logger.info("Step %s awaiting outbox reconcile for %s", step_id, key)
+            return "deferred"
 
         # Log engagement event with enriched metadata
         event_type = f"{channel}_{'sent' if status == 'sent' else status}"
@@ -153,21 +506,45 @@ async def _execute_step(conn, step) -> str:
         elif channel == "email":
             snippet = content.get("email_subject") or ""
 
-        await log_engagement_event(
-            conn,
-            lead_id=lead_id,
-            org_id=org_id,
-            channel=channel,
-            event_type=event_type,
-            direction="outbound",
-            content=snippet,
-            metadata={
-                "step_id":    step_id,
-                "step_order": step["step_order"],
-                "plan_id":    plan_id,
-                "status":     status,
-            },
-        )
+        now = datetime.now(timezone.utc)
+        async with pool.acquire() as conn:
+            await conn.execute(
+                """
+                UPDATE engagement_steps
+                SET status = $1, executed_at = $2, locked_by = NULL, locked_at = NULL
+                WHERE id = $3
+                """,
+                status,
+                now,
+                step_id,
+            )
+
+            # Advance plan current_step
+            await conn.execute(
+                """
+                UPDATE engagement_plans
+                SET current_step = GREATEST(current_step, $1), updated_at = now()
+                WHERE id = $2
+                """,
+                step["step_order"],
+                plan_id,
+            )
+
+            await log_engagement_event(
+                conn,
+                lead_id=lead_id,
+                org_id=org_id,
+                channel=channel,
+                event_type=event_type,
+                direction="outbound",
+                content=snippet,
+                metadata={
+                    "step_id":    step_id,
+                    "step_order": step["step_order"],
+                    "plan_id":    plan_id,
+                    "status":     status,
+                },
+            )
 
         logger.info(
             "Step %s (lead=%s, channel=%s) -> %s", step_id, lead_id, channel, status
@@ -177,113 +554,106 @@ async def _execute_step(conn, step) -> str:
     except Exception as exc:
         logger.error("Failed to execute step %s: %s", step_id, exc)
         try:
-            await conn.execute(
-                "UPDATE engagement_steps SET status = 'failed' WHERE id = $1", step_id
-            )
+            async with pool.acquire() as conn:
+                await conn.execute(
+                    "UPDATE engagement_steps SET status = 'failed', locked_by = NULL, locked_at = NULL "
+                    "WHERE id = $1",
+                    step_id,
+                )
         except Exception:
             pass
         return "failed"
 
 
-async def _send_sms(lead_dict: dict, funnel_dict: dict, content: dict) -> str:
-    """Send SMS via Twilio. Returns status string."""
-    try:
-        sms_body = content.get("sms_body")
-        if not sms_body:
-            return "skipped_missing_config"
+def _sms_envelope(lead_dict: dict, funnel_dict: dict, content: dict) -> tuple[str, str, str]:
+    """(to, from, body) of a step's SMS, `to` normalised as Twilio records it."""
+    answers = lead_dict.get("answers_json") or {}
+    to_phone = lead_dict.get("phone_e164") or answers.get("phone", "")
+    return (
+        normalize_phone(to_phone) or to_phone,
+        funnel_dict.get("twilio_from_number") or "",
+        content.get("sms_body") or "",
+    )
 
-        import os
-        import httpx
 
-        account_sid = os.getenv("TWILIO_ACCOUNT_SID", "")
-        auth_token  = os.getenv("TWILIO_AUTH_TOKEN", "")
-        from_number = funnel_dict.get("twilio_from_number") or ""
+async def _send_sms(lead_dict: dict, funnel_dict: dict, content: dict) -> twilio_transport.SmsResult:
+    """Send SMS via the shared Twilio transport. Returns the transport result."""
+    try:
+        to_phone, from_number, sms_body = _sms_envelope(lead_dict, funnel_dict, content)
+        if not sms_body:
+            return twilio_transport.SmsResult(status="skipped_missing_config")
 
-        answers = lead_dict.get("answers_json") or {}
-        if isinstance(answers, str):
-            try:
-                answers = json.loads(answers)
-            except Exception:
-                answers = {}
-
-        to_phone = answers.get("phone", "")
-
-        if not account_sid or not auth_token or not from_number or not to_phone:
-            return "skipped_missing_config"
-
-        if to_phone.isdigit() and len(to_phone) == 10:
-            to_phone = f"+1{to_phone}"
-        elif not to_phone.startswith("+"):
-            to_phone = f"+{to_phone}"
-
-        async with httpx.AsyncClient(timeout=15.0) as client:
-            resp = await client.post(
-                f"https://api.twilio.com/2010-04-01/Accounts/{account_sid}/Messages.json",
-                auth=(account_sid, auth_token),
-                data={"From": from_number, "To": to_phone, "Body": sms_body},
-            )
-            resp.raise_for_status()
-        return "sent"
+        return await twilio_transport.send_sms(to_phone, sms_body, from_number)
 
     except Exception as exc:
         logger.warning("SMS delivery failed: %s", exc)
-        return "failed"
+        return twilio_transport.SmsResult(status="failed", error=str(exc))
 
 
-async def _send_email(lead_dict: dict, funnel_dict: dict, content: dict) -> str:
-    """Send email via SMTP. Returns status string."""
-    import os
-    import smtplib
-    from email.mime.multipart import MIMEMultipart
-    from email.mime.text import MIMEText
-
+async def _send_email(lead_dict: dict, funnel_dict: dict, content: dict) -> email_transport.EmailResult:
+    """Send email via the shared SMTP transport. Returns the transport result."""
     try:
-        smtp_host = os.getenv("SMTP_HOST", "")
-        smtp_port = int(os.getenv("SMTP_PORT", "587"))
-        smtp_user = os.getenv("SMTP_USER", "")
-        smtp_pass = os.getenv("SMTP_PASS", "")
-        smtp_from = os.getenv("SMTP_FROM", "")
-
         answers = lead_dict.get("answers_json") or {}
-        if isinstance(answers, str):
-            try:
-                answers = json.loads(answers)
-            except Exception:
-                answers = {}
 
         to_email = answers.get("email", "")
         notification_emails = funnel_dict.get("notification_emails") or []
 
-        recipients = [to_email] if to_email else notification_emails
-        if not smtp_host or not smtp_from or not recipients:
-            return "skipped_missing_config"
+        recipients = [to_email] if to_email else list(notification_emails)
+        if not recipients:
+            return email_transport.EmailResult(status="skipped_missing_config")
 
         subject = content.get("email_subject") or "Following up"
         body    = content.get("email_body") or ""
 
-        msg = MIMEMultipart()
-        msg["From"]    = smtp_from
-        msg["To"]      = ", ".join(recipients)
-        msg["Subject"] = subject
-        msg.attach(MIMEText(body, "plain"))
-
-        with smtplib.SMTP(smtp_host, smtp_port) as server:
-            if smtp_user and smtp_pass:
-                server.starttls()
-                server.login(smtp_user, smtp_pass)
-            server.sendmail(smtp_from, recipients, msg.as_string())
-
-        return "sent"
+        return await email_transport.send_email(recipients, subject, body)
 
     except Exception as exc:
         logger.warning("Email delivery failed: %s", exc)
-        return "failed"
+        return email_transport.EmailResult(status="failed", error=str(exc))
+
+
+async def _defer_step(
+    pool: asyncpg.Pool, step_id: str, delay_seconds: float, count_attempt: bool = False
+) -> None:
+    """Return a claimed step to 'pending', due again after `delay_seconds`."""
+    async with pool.acquire() as conn:
+        await conn.execute(
+            """
+            UPDATE engagement_steps
+               SET status        = 'pending',
+                   scheduled_for = now() + make_interval(secs => $2),
+                   send_attempts = send_attempts + $3,
+                   locked_by     = NULL,
+                   locked_at     = NULL
+             WHERE id = $1
+            """,
+            step_id,
+            float(delay_seconds),
+            1 if count_attempt else 0,
+        )
+
+
+async def _hold_step(pool: asyncpg.Pool, step_id: str, until: datetime) -> None:
+    """Park a claimed step as 'held' until its funnel's window opens."""
+    async with pool.acquire() as conn:
+        await conn.execute(
+            """
+            UPDATE engagement_steps
+               SET status = 'held', scheduled_for = $2, locked_by = NULL, locked_at = NULL
+             WHERE id = $1
+            """,
+            step_id,
+            until,
+        )
 
 
 async def _mark_step(conn, step_id: str, status: str) -> None:
     try:
         await conn.execute(
-            "UPDATE engagement_steps SET status = $1 WHERE id = $2", status, step_id
+            "UPDATE engagement_steps SET status = $1, locked_by = NULL, locked_at = NULL "
+            "WHERE id = $2",
+            status,
+            step_id,
         )
     except Exception:
         pass
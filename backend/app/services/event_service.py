@@ -1,14 +1,25 @@
 """Automation event logging."""
 
-import json
 import logging
 
+from app.services.event_sink import event_sink
+
 logger = logging.getLogger(__name__)
 
 
-async def log_event(conn, org_id, lead_id, event_type: str, status: str, detail: dict | None = None):
-    """Insert an automation event. Never throws — logs silently on failure."""
+async def log_event(
+    conn, org_id, lead_id, event_type: str, status: str, detail: dict | None = None,
+    sync: bool = False,
+):
+    """
+    Record an automation event. Never throws — logs silently on failure.
+    Buffered through the event sink when it is running; sync=True writes on
+    `conn` immediately, for callers that read the event back.
+    """
     try:
+        if event_sink.running and not sync:
+            await event_sink.emit("automation_events", org_id, lead_id, event_type, status, detail or None)
+            return
         await conn.execute(
             """INSERT INTO automation_events (org_id, lead_id, event_type, status, detail_json)
                VALUES ($1, $2, $3, $4, $5)""",
@@ -16,7 +27,7 @@ async def log_event(conn, org_id, lead_id, event_type: str, status: str, detail:
             lead_id,
             event_type,
             status,
-            json.dumps(detail) if detail else None,
+            detail or None,
         )
     except Exception as exc:
         logger.warning("Failed to log event %s for lead %s: %s", event_type, lead_id, exc)
@@ -0,0 +1,174 @@
+"""
+Buffered writer for automation_events and engagement_events.
+
+Event rows are write-only from the automation path's point of view, yet a
+lead produces 8-12 of them, each a single-row INSERT round trip. The sink
+buffers rows in memory and writes each table's buffer with one COPY
+(`copy_records_to_table`) when EVENT_SINK_BATCH_SIZE rows are waiting or
+EVENT_SINK_FLUSH_INTERVAL_SECONDS has passed, whichever comes first.
+
+- created_at is stamped when the event is emitted, so timelines keep their
+  order however late the batch lands.
+- Backpressure: once EVENT_SINK_MAX_BUFFER rows are waiting, emit() awaits
+  a flush instead of growing the buffer.
+- If the database is unreachable, a failed COPY puts its rows back (up to
+  the buffer cap) for the next flush; rows past the cap are dropped and
+  counted. If Postgres rejects the batch (e.g. an event for a lead deleted
+  meanwhile), rows are retried one by one so a bad row costs only itself.
+- stop() flushes whatever is left; main.lifespan and app.worker call it
+  before closing the pool.
+
+Callers that must read their own write (or need the row inside their own
+transaction) pass sync=True to log_event / log_engagement_event, which
+insert directly on their connection. When the sink is not running (tests,
+scripts, EVENT_SINK_ENABLED=false) every event is written directly.
+"""
+
+import asyncio
+import logging
+import time
+from datetime import datetime, timezone
+
+import asyncpg
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Errors that mean "this data", not "this connection": retried row by row.
+_ROW_ERRORS = (asyncpg.IntegrityConstraintViolationError, asyncpg.DataError)
+
+TABLE_COLUMNS = {
+    "automation_events": ("org_id", "lead_id", "event_type", "status", "detail_json", "created_at"),
+    "engagement_events": (
+        "lead_id", "org_id", "channel", "event_type", "direction",
+        "content", "metadata_json", "created_at",
+    ),
+}
+
+
+class EventSink:
+    def __init__(self):
+        self._pool: asyncpg.Pool | None = None
+        self._buffers: dict[str, list[tuple]] = {table: [] for table in TABLE_COLUMNS}
+        self._wake = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task: asyncio.Task | None = None
+        self._stopping = False
+        self.flushes = 0
+        self.written = 0
+        self.dropped = 0
+        self.backpressure_waits = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def _buffered(self) -> int:
+        return sum(len(rows) for rows in self._buffers.values())
+
+    async def emit(self, table: str, *values) -> None:
+        """Buffer one row (column order as in TABLE_COLUMNS, minus created_at)."""
+        if self._buffered() >= settings.EVENT_SINK_MAX_BUFFER:
+            self.backpressure_waits += 1
+            await self.flush()
+        self._buffers[table].append((*values, datetime.now(timezone.utc)))
+        if self._buffered() >= settings.EVENT_SINK_BATCH_SIZE:
+            self._wake.set()
+
+    async def flush(self) -> int:
+        """Write every buffered row now. Returns the number of rows written."""
+        async with self._flush_lock:
+            written = 0
+            for table, columns in TABLE_COLUMNS.items():
+                rows, self._buffers[table] = self._buffers[table], []
+                if not rows:
+                    continue
+                try:
+                    async with self._pool.acquire() as conn:
+                        try:
+                            await conn.copy_records_to_table(table, records=rows, columns=columns)
+                            written += len(rows)
+                        except _ROW_ERRORS as exc:
+                            logger.warning("Event sink COPY into %s rejected (%s); writing rows singly", table, exc)
+                            written += await self._write_singly(conn, table, columns, rows)
+                except Exception as exc:
+                    self._requeue(table, rows)
+                    logger.warning("Event sink flush of %d %s row(s) failed: %s", len(rows), table, exc)
+            if written:
+                self.flushes += 1
+                self.written += written
+            return written
+
+    async def _write_singly(self, conn, table: str, columns: tuple, rows: list[tuple]) -> int:
+        sql = "INSERT INTO {} ({}) VALUES ({})".format(
+            table, ", ".join(columns), ", ".join(f"${i}" for i in range(1, len(columns) + 1)),
+        )
+        written = 0
+        for row in rows:
+            try:
+                await conn.execute(sql, *row)
+                written += 1
+            except _ROW_ERRORS as exc:
+                self.dropped += 1
+                logger.warning("Event sink dropped a %s row: %s", table, exc)
+        return written
+
+    def _requeue(self, table: str, rows: list[tuple]) -> None:
+        room = max(0, settings.EVENT_SINK_MAX_BUFFER - self._buffered())
+        kept = rows[:room]
+        self._buffers[table][:0] = kept
+        if len(rows) > len(kept):
+            self.dropped += len(rows) - len(kept)
+            logger.error("Event sink dropped %d %s row(s): buffer full", len(rows) - len(kept), table)
+
+    async def _run(self) -> None:
+        interval = settings.EVENT_SINK_FLUSH_INTERVAL_SECONDS
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            await self.flush()
+
+    def start(self, pool: asyncpg.Pool) -> None:
+        if not settings.EVENT_SINK_ENABLED or self.running:
+            return
+        self._pool = pool
+        self._stopping = False
+        self._wake = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+        logger.info(
+            "Event sink started: batch=%s, interval=%ss",
+            settings.EVENT_SINK_BATCH_SIZE, settings.EVENT_SINK_FLUSH_INTERVAL_SECONDS,
+        )
+
+    async def stop(self) -> None:
+        """Stop the flush loop and write out everything still buffered."""
+        if self._task is None:
+            return
+        task, self._task = self._task, None
+        # Let an in-progress flush finish rather than cancelling it mid-COPY
+        self._stopping = True
+        self._wake.set()
+        await task
+        started = time.monotonic()
+        written = await self.flush()
+        logger.info(
+            "Event sink stopped: flushed %d row(s) in %.0f ms (%d dropped this run)",
+            written, (time.monotonic() - started) * 1000, self.dropped,
+        )
+
+    def stats(self) -> dict:
+        return {
+            "running": self.running,
+            "buffered": self._buffered(),
+            "flushes": self.flushes,
+            "written": self.written,
+            "dropped": self.dropped,
+            "backpressure_waits": self.backpressure_waits,
+        }
+
+
+event_sink = EventSink()
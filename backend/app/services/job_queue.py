@@ -0,0 +1,501 @@
+"""
+Durable job queue backed by the `jobs` table (migrations/022_jobs.sql).
+
+Generalizes the warderai fork's call_retry_queue: rows are typed by `kind`,
+carry a JSONB payload, and are claimed with FOR UPDATE SKIP LOCKED so any
+number of worker processes can drain the queue without double-running a job.
+
+Kinds are declared in KINDS (priority, attempts, backoff). Handlers live
+next to the code they drive and register with @handler("<kind>"); a handler
+receives (pool, payload) and signals failure by raising. Failed jobs are
+retried with exponential backoff until max_attempts, then dead-lettered
+(status 'dead') for inspection and manual requeue. A handler that raises
+JobDeferred (e.g. delivery_governor.DeliveryDeferred) is not failing: the
+job goes back to 'pending' after the wait it asks for, without using an
+attempt, however long the hold lasts.
+
+API:
+    enqueue(conn, kind, payload, delay_seconds=0)   -> job id
+    hold(conn, kind, payload, until)                -> job id
+    release_held(pool, limit)                       -> int
+    claim_due(pool, worker_id, limit)               -> list[dict]
+    mark_done(pool, job_id)
+    mark_failed(pool, job, error)                   -> 'pending' | 'dead'
+    defer(pool, job, wait_seconds, reason)
+    recover_stuck(pool, older_than_seconds)         -> int
+    run_due_jobs(pool)                              -> summary dict
+    requeue(pool, job_id, org_id)                   -> bool
+    queue_stats(pool, org_id)                       -> dict
+
+Jobs belong to the org of the lead in payload.lead_id; requeue and
+queue_stats only see the caller's org.
+
+enqueue takes a connection, not the pool, so callers can enqueue in the same
+transaction as the write that makes the job necessary.
+"""
+
+import asyncio
+import importlib
+import logging
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Awaitable, Callable, Optional
+
+import asyncpg
+
+from app import background
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Identifies this process in jobs.locked_by. Set by background.set_worker_id()
+# at startup of the API process and of app.worker.
+WORKER_ID: str = "worker-unset"
+
+# Default claim size for claim_due. run_due_jobs claims JOBS_CONCURRENCY at a
+# time so idle workers in other processes are not starved by a local backlog.
+CLAIM_BATCH_SIZE = 50
+
+
+class JobDeferred(Exception):
+    """Raised by a handler to run again after `wait_seconds` without using an attempt."""
+
+    def __init__(self, message: str = "", wait_seconds: float = 0.0):
+        super().__init__(message)
+        self.wait_seconds = wait_seconds
+
+
+@dataclass(frozen=True)
+class JobKind:
+    name: str
+    priority: int = 100            # lower runs first
+    max_attempts: int = 5
+    backoff_base_seconds: int = 30
+    backoff_max_seconds: int = 3600
+
+    def backoff_seconds(self, attempts: int) -> int:
+        """Delay before the next try after `attempts` failed claims."""
+        return min(self.backoff_base_seconds * 2 ** max(attempts - 1, 0), self.backoff_max_seconds)
+
+
+KINDS: dict[str, JobKind] = {
+    kind.name: kind
+    for kind in (
+        # Routing, AI scoring, notifications and plan creation for a new lead.
+        JobKind("lead_automation", priority=10, max_attempts=5, backoff_base_seconds=15),
+        # Re-dial the rep after a failed/no-answer bridge call. One attempt:
+        # the caller already caps total call attempts per lead.
+        JobKind("call_retry", priority=20, max_attempts=1),
+        # A lead's first bridge call, held from lead automation until the
+        # funnel's working hours open.
+        JobKind("rep_call", priority=15, max_attempts=5, backoff_base_seconds=30),
+    )
+}
+
+# Modules whose @handler registrations the worker needs loaded.
+HANDLER_MODULES = (
+    "app.services.automation_service",
+    "app.services.call_service",
+)
+
+Handler = Callable[[asyncpg.Pool, dict], Awaitable[None]]
+_handlers: dict[str, Handler] = {}
+
+_worker_limit: asyncio.Semaphore | None = None
+
+
+def handler(kind: str):
+    """Register the coroutine that executes jobs of `kind`."""
+    if kind not in KINDS:
+        raise ValueError(f"Unknown job kind: {kind}")
+
+    def register(fn: Handler) -> Handler:
+        _handlers[kind] = fn
+        return fn
+
+    return register
+
+
+def _load_handlers() -> None:
+    for module in HANDLER_MODULES:
+        importlib.import_module(module)
+
+
+async def enqueue(
+    conn: asyncpg.Connection,
+    kind: str,
+    payload: dict,
+    delay_seconds: float = 0,
+) -> str:
+    """Insert a pending job on `conn` (joins the caller's transaction). Returns the job id."""
+    spec = KINDS.get(kind)
+    if spec is None:
+        raise ValueError(f"Unknown job kind: {kind}")
+    job_id = await conn.fetchval(
+        """
+        INSERT INTO jobs (kind, payload, priority, max_attempts, run_at)
+        VALUES ($1, $2, $3, $4, NOW() + make_interval(secs => $5))
+        RETURNING id
+        """,
+        kind,
+        payload,
+        spec.priority,
+        spec.max_attempts,
+        float(delay_seconds),
+    )
+    logger.debug("job enqueued: id=%s kind=%s delay=%ss", job_id, kind, delay_seconds)
+    return str(job_id)
+
+
+async def hold(
+    conn: asyncpg.Connection,
+    kind: str,
+    payload: dict,
+    until: datetime,
+) -> str:
+    """
+    Insert a job 'held' until `until` (a working-hours window opening).
+    Unlike a delayed enqueue it is not claimable at `until` by itself:
+    release_held() lets held jobs through at a capped rate.
+    """
+    spec = KINDS.get(kind)
+    if spec is None:
+        raise ValueError(f"Unknown job kind: {kind}")
+    job_id = await conn.fetchval(
+        """
+        INSERT INTO jobs (kind, payload, priority, max_attempts, run_at, status)
+        VALUES ($1, $2, $3, $4, $5, 'held')
+        RETURNING id
+        """,
+        kind,
+        payload,
+        spec.priority,
+        spec.max_attempts,
+        until,
+    )
+    logger.debug("job held: id=%s kind=%s until=%s", job_id, kind, until.isoformat())
+    return str(job_id)
+
+
+async def release_held(pool: asyncpg.Pool, limit: int) -> int:
+    """Make up to `limit` held jobs whose time has come pending, oldest hold first."""
+    async with pool.acquire() as conn:
+        result = await conn.execute(
+            """
+            UPDATE jobs
+               SET status = 'pending', run_at = NOW(), updated_at = NOW()
+             WHERE id IN (
+                   SELECT id FROM jobs
+                    WHERE status = 'held' AND run_at <= NOW()
+                    ORDER BY run_at, priority
+                    LIMIT $1
+                      FOR UPDATE SKIP LOCKED
+             )
+            """,
+            limit,
+        )
+    try:
+        return int(result.split()[-1])
+    except (ValueError, IndexError):
+        return 0
+
+
+async def claim_due(
+    pool: asyncpg.Pool,
+    worker_id: Optional[str] = None,
+    limit: int = CLAIM_BATCH_SIZE,
+) -> list[dict]:
+    """Claim up to `limit` due jobs atomically, highest priority first.
+
+    Claimed rows come back 'in_progress' with `attempts` already incremented;
+    the caller must eventually call mark_done or mark_failed.
+    """
+    wid = worker_id or WORKER_ID
+    async with pool.acquire() as conn:
+        rows = await conn.fetch(
+            """
+            WITH claimed AS (
+                SELECT id
+                  FROM jobs
+                 WHERE status = 'pending'
+                   AND run_at <= NOW()
+                 ORDER BY priority, run_at
+                 LIMIT $2
+                 FOR UPDATE SKIP LOCKED
+            )
+            UPDATE jobs AS j
+               SET status     = 'in_progress',
+                   attempts   = j.attempts + 1,
+                   locked_by  = $1,
+                   locked_at  = NOW(),
+                   updated_at = NOW()
+              FROM claimed
+             WHERE j.id = claimed.id
+         RETURNING j.id, j.kind, j.payload, j.attempts, j.max_attempts, j.run_at
+            """,
+            wid,
+            limit,
+        )
+    return [dict(r) for r in rows]
+
+
+async def mark_done(pool: asyncpg.Pool, job_id) -> None:
+    async with pool.acquire() as conn:
+        await conn.execute(
+            """
+            UPDATE jobs
+               SET status     = 'done',
+                   updated_at = NOW(),
+                   locked_by  = NULL,
+                   locked_at  = NULL
+             WHERE id = $1
+            """,
+            job_id,
+        )
+
+
+async def mark_failed(pool: asyncpg.Pool, job: dict, error: str) -> str:
+    """Reschedule with backoff, or dead-letter once attempts are exhausted.
+
+    Returns the job's new status: 'pending' or 'dead'.
+    """
+    spec = KINDS.get(job["kind"]) or JobKind(job["kind"])
+    attempts = job["attempts"]
+    dead = attempts >= job["max_attempts"]
+    status = "dead" if dead else "pending"
+    async with pool.acquire() as conn:
+        await conn.execute(
+            """
+            UPDATE jobs
+               SET status     = $2,
+                   last_error = $3,
+                   run_at     = CASE WHEN $2 = 'pending'
+                                     THEN NOW() + make_interval(secs => $4)
+                                     ELSE run_at END,
+                   updated_at = NOW(),
+                   locked_by  = NULL,
+                   locked_at  = NULL
+             WHERE id = $1
+            """,
+            job["id"],
+            status,
+            error[:2000],
+            float(spec.backoff_seconds(attempts)),
+        )
+    if dead:
+        logger.error("job %s (%s) dead after %s attempt(s): %s", job["id"], job["kind"], attempts, error)
+    else:
+        logger.warning("job %s (%s) attempt %s failed, retrying: %s", job["id"], job["kind"], attempts, error)
+    return status
+
+
+async def defer(pool: asyncpg.Pool, job: dict, wait_seconds: float, reason: str) -> None:
+    """Put a claimed job back to 'pending' after `wait_seconds`, returning the
+    attempt its claim used. A wait of 0 (unknown) falls back to the kind's
+    base backoff."""
+    if wait_seconds <= 0:
+        spec = KINDS.get(job["kind"]) or JobKind(job["kind"])
+        wait_seconds = spec.backoff_base_seconds
+    async with pool.acquire() as conn:
+        await conn.execute(
+            """
+            UPDATE jobs
+               SET status     = 'pending',
+                   attempts   = GREATEST(attempts - 1, 0),
+                   last_error = $2,
+                   run_at     = NOW() + make_interval(secs => $3),
+                   updated_at = NOW(),
+                   locked_by  = NULL,
+                   locked_at  = NULL
+             WHERE id = $1
+            """,
+            job["id"],
+            reason[:2000],
+            float(wait_seconds),
+        )
+    logger.info("job %s (%s) deferred %.0fs: %s", job["id"], job["kind"], wait_seconds, reason)
+
+
+async def recover_stuck(
+    pool: asyncpg.Pool, older_than_seconds: int | None = None
+) -> int:
+    """Reset jobs left 'in_progress' by a crashed worker back to 'pending'.
+
+    A job whose attempts are already spent is dead-lettered instead, so a
+    job that kills its worker cannot crash-loop the fleet.
+    Called on startup and on a slow scheduler cadence, never per tick.
+    """
+    if older_than_seconds is None:
+        older_than_seconds = settings.JOBS_STUCK_AFTER_SECONDS
+    async with pool.acquire() as conn:
+        result = await conn.execute(
+            """
+            UPDATE jobs
+               SET status     = CASE WHEN attempts >= max_attempts
+                                     THEN 'dead' ELSE 'pending' END,
+                   last_error = CASE WHEN attempts >= max_attempts
+                                     THEN 'worker lost while running job'
+                                     ELSE last_error END,
+                   locked_by  = NULL,
+                   locked_at  = NULL,
+                   updated_at = NOW()
+             WHERE status    = 'in_progress'
+               AND locked_at < NOW() - make_interval(secs => $1)
+            """,
+            older_than_seconds,
+        )
+    # asyncpg returns "UPDATE N"
+    try:
+        count = int(result.split()[-1])
+    except (ValueError, IndexError):
+        count = 0
+    if count:
+        logger.warning("job queue recovered %s stuck job(s)", count)
+    return count
+
+
+async def purge_finished(pool: asyncpg.Pool, older_than_days: int | None = None) -> int:
+    """Delete done/cancelled jobs past retention. Dead jobs are kept for inspection."""
+    if older_than_days is None:
+        older_than_days = settings.JOBS_RETENTION_DAYS
+    async with pool.acquire() as conn:
+        result = await conn.execute(
+            """
+            DELETE FROM jobs
+             WHERE status IN ('done', 'cancelled')
+               AND updated_at < NOW() - make_interval(days => $1)
+            """,
+            older_than_days,
+        )
+    try:
+        return int(result.split()[-1])
+    except (ValueError, IndexError):
+        return 0
+
+
+# Every job kind carries its lead in payload.lead_id; the lead's org owns
+# the job. Compared as text so a malformed payload can't fail the query.
+# requeue() uses the same join.
+_ORG_JOBS_SQL = """
+    SELECT j.* FROM jobs j
+      JOIN leads l ON l.id::text = j.payload->>'lead_id'
+     WHERE l.org_id = $1
+"""
+
+
+async def requeue(pool: asyncpg.Pool, job_id, org_id: str) -> bool:
+    """Move one of `org_id`'s dead jobs back to pending with a fresh attempt budget."""
+    async with pool.acquire() as conn:
+        result = await conn.execute(
+            """
+            UPDATE jobs AS j
+               SET status     = 'pending',
+                   attempts   = 0,
+                   run_at     = NOW(),
+                   updated_at = NOW()
+              FROM leads l
+             WHERE j.id = $2 AND j.status = 'dead'
+               AND l.id::text = j.payload->>'lead_id'
+               AND l.org_id = $1
+            """,
+            org_id,
+            job_id,
+        )
+    return result.endswith(" 1")
+
+
+async def queue_stats(pool: asyncpg.Pool, org_id: str) -> dict:
+    """`org_id`'s job counts by kind and status, plus its oldest due pending job's lag."""
+    async with pool.acquire() as conn:
+        rows = await conn.fetch(
+            f"SELECT kind, status, COUNT(*) AS n FROM ({_ORG_JOBS_SQL}) j GROUP BY kind, status",
+            org_id,
+        )
+        lag = await conn.fetchval(
+            f"""
+            SELECT EXTRACT(EPOCH FROM NOW() - MIN(run_at))
+              FROM ({_ORG_JOBS_SQL}) j
+             WHERE status = 'pending' AND run_at <= NOW()
+            """,
+            org_id,
+        )
+    kinds: dict[str, dict[str, int]] = {}
+    for r in rows:
+        kinds.setdefault(r["kind"], {})[r["status"]] = r["n"]
+    return {
+        "kinds": kinds,
+        "oldest_due_lag_seconds": round(float(lag), 1) if lag is not None else None,
+    }
+
+
+def _worker_semaphore() -> asyncio.Semaphore:
+    global _worker_limit
+    if _worker_limit is None:
+        _worker_limit = asyncio.Semaphore(max(1, settings.JOBS_CONCURRENCY))
+    return _worker_limit
+
+
+async def _execute_job(pool: asyncpg.Pool, job: dict) -> str:
+    """Run one claimed job. Returns 'done' | 'deferred' | 'retry' | 'dead'. Never raises."""
+    fn = _handlers.get(job["kind"])
+    try:
+        if fn is None:
+            raise LookupError(f"no handler registered for job kind '{job['kind']}'")
+        async with _worker_semaphore():
+            await fn(pool, job["payload"] or {})
+    except JobDeferred as exc:
+        try:
+            await defer(pool, job, exc.wait_seconds, str(exc) or type(exc).__name__)
+        except Exception as defer_exc:
+            # Row stays in_progress; recover_stuck will return it to the queue.
+            logger.error("job %s: could not defer: %s", job["id"], defer_exc)
+        return "deferred"
+    except Exception as exc:
+        try:
+            status = await mark_failed(pool, job, f"{type(exc).__name__}: {exc}")
+        except Exception as mark_exc:
+            # Row stays in_progress; recover_stuck will return it to the queue.
+            logger.error("job %s: could not record failure: %s", job["id"], mark_exc)
+            return "retry"
+        return "dead" if status == "dead" else "retry"
+
+    try:
+        await mark_done(pool, job["id"])
+    except Exception as exc:
+        logger.error("job %s: could not mark done: %s", job["id"], exc)
+    return "done"
+
+
+async def run_due_jobs(pool: asyncpg.Pool) -> dict:
+    """
+    Claim and execute due jobs until the queue is drained, the tick budget
+    is spent or shutdown begins. Safe to run from several processes at once.
+    Jobs run concurrently, bounded by JOBS_CONCURRENCY per process.
+
+    Returns {"processed", "done", "deferred", "retry", "dead"} (+ "duration_ms" when work was done).
+    """
+    _load_handlers()
+    summary = {"processed": 0, "done": 0, "deferred": 0, "retry": 0, "dead": 0}
+    started = time.monotonic()
+
+    try:
+        batch_size = max(1, settings.JOBS_CONCURRENCY)
+        while time.monotonic() - started < settings.JOBS_TICK_BUDGET_SECONDS:
+            if background.draining():
+                break
+            jobs = await claim_due(pool, limit=batch_size)
+            if not jobs:
+                break
+            results = await asyncio.gather(*(_execute_job(pool, job) for job in jobs))
+            for status in results:
+                summary["processed"] += 1
+                summary[status] += 1
+            if len(jobs) < batch_size:
+                break
+    except Exception as exc:
+        logger.error("Job worker error: %s", exc)
+
+    if summary["processed"]:
+        summary["duration_ms"] = int((time.monotonic() - started) * 1000)
+    return summary
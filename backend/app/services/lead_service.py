@@ -1,22 +1,33 @@
-import json
+import base64
+import logging
 import re
+from datetime import datetime
 from uuid import UUID
 
 import asyncpg
 from fastapi import HTTPException
 
+from app.core.phone import normalize_phone
+from app.services import job_queue
+from app.services.metrics_cache import invalidate_org_metrics, metrics_cache
+
+logger = logging.getLogger(__name__)
+
+# Hot statements, shared as constants so app.database can prepare them when a
+# pooled connection opens (asyncpg's statement cache is keyed on query text).
+FUNNEL_BY_SLUG_SQL = """
+    SELECT f.id, f.org_id, f.slug, f.name, f.schema_json, f.languages, f.is_active,
+           o.branding
+    FROM funnels f
+    JOIN orgs o ON o.id = f.org_id
+    WHERE f.slug = $1 AND f.is_active = true
+"""
+
+LEAD_BY_ID_SQL = "SELECT * FROM leads WHERE id = $1"
+
 
 async def get_funnel_by_slug(conn: asyncpg.Connection, slug: str) -> asyncpg.Record | None:
-    return await conn.fetchrow(
-        """
-        SELECT f.id, f.org_id, f.slug, f.name, f.schema_json, f.languages, f.is_active,
-               o.branding
-        FROM funnels f
-        JOIN orgs o ON o.id = f.org_id
-        WHERE f.slug = $1 AND f.is_active = true
-        """,
-        slug,
-    )
+    return await conn.fetchrow(FUNNEL_BY_SLUG_SQL, slug)
 
 
 def validate_phone(phone: str) -> bool:
@@ -48,9 +59,7 @@ async def submit_lead(
     if not funnel:
         raise HTTPException(status_code=404, detail="Funnel not found")
 
-    schema_json = json.loads(funnel["schema_json"]) if isinstance(funnel["schema_json"], str) else funnel["schema_json"]
-
-    missing = validate_required_fields(schema_json, answers)
+    missing = validate_required_fields(funnel["schema_json"], answers)
     if missing:
         raise HTTPException(
             status_code=422, detail=f"Missing required fields: {', '.join(missing)}"
@@ -60,19 +69,135 @@ async def submit_lead(
     if phone and not validate_phone(phone):
         raise HTTPException(status_code=422, detail="Invalid phone number")
 
-    lead_id = await conn.fetchval(
+    # The automation job commits with the lead, so a restart between the two
+    # can neither lose the automation nor run it for a lead that never landed.
+    async with conn.transaction():
+        lead_id = await conn.fetchval(
+            """
+            INSERT INTO leads (org_id, funnel_id, language, answers_json, source_json, phone_e164)
+            VALUES ($1, $2, $3, $4, $5, $6)
+            RETURNING id
+            """,
+            funnel["org_id"],
+            funnel["id"],
+            language,
+            answers,
+            source,
+            normalize_phone(phone),
+        )
+        await job_queue.enqueue(conn, "lead_automation", {"lead_id": str(lead_id)})
+    invalidate_org_metrics(funnel["org_id"])
+    return lead_id
+
+
+async def find_lead_by_phone(
+    conn: asyncpg.Connection,
+    phone: str,
+    to_number: str | None = None,
+) -> asyncpg.Record | None:
+    """
+    Resolve the most recent lead for a phone number via the phone_e164 index.
+
+    The lookup is scoped to the org(s) whose funnel owns `to_number` (the
+    Twilio destination). If `to_number` is missing or belongs to no funnel,
+    no lead is returned: the same phone may be a lead in several orgs, and
+    guessing would attach the reply to another tenant's lead.
+    Returns a record with id, org_id, funnel_id or None.
+    """
+    phone_e164 = normalize_phone(phone)
+    if not phone_e164:
+        return None
+    if not to_number:
+        logger.warning("Phone lookup for %s without a destination number; not matching", phone_e164)
+        return None
+
+    candidates = list({to_number, normalize_phone(to_number) or to_number})
+    org_ids = await conn.fetchval(
+        "SELECT array_agg(DISTINCT org_id) FROM funnels WHERE twilio_from_number = ANY($1::text[])",
+        candidates,
+    )
+    if not org_ids:
+        logger.warning("Destination number %s belongs to no funnel; not matching %s", to_number, phone_e164)
+        return None
+
+    return await conn.fetchrow(
         """
-        INSERT INTO leads (org_id, funnel_id, language, answers_json, source_json)
-        VALUES ($1, $2, $3, $4::jsonb, $5::jsonb)
-        RETURNING id
+        SELECT l.id, l.org_id, l.funnel_id
+        FROM leads l
+        WHERE l.org_id = ANY($1::uuid[])
+          AND l.phone_e164 = $2
+        ORDER BY l.created_at DESC
+        LIMIT 1
         """,
-        funnel["org_id"],
-        funnel["id"],
-        language,
-        json.dumps(answers),
-        json.dumps(source),
+        org_ids,
+        phone_e164,
+    )
+
+
+COUNT_MODES = ("exact", "estimated", "none")
+
+_PHONE_QUERY = re.compile(r"^[\d\s()+.-]+$")
+
+
+def normalize_search_term(search: str | None) -> str | None:
+    """
+    Map admin search input onto leads.search_text.
+
+    search_text is lowercase and stores phone numbers as bare digits, so a
+    phone-looking query ("(310) 555-12") is reduced to its digits.
+    """
+    term = (search or "").strip().lower()
+    if not term:
+        return None
+    if _PHONE_QUERY.match(term):
+        digits = re.sub(r"\D", "", term)
+        return digits or None
+    return term
+
+
+def _escape_like(term: str) -> str:
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def encode_lead_cursor(created_at: datetime, lead_id) -> str:
+    """Opaque keyset cursor for the (created_at, id) ordering of the lead list."""
+    raw = f"{created_at.isoformat()}|{lead_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_lead_cursor(cursor: str) -> tuple[datetime, UUID]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, lead_id = raw.split("|", 1)
+        return datetime.fromisoformat(created_at), UUID(lead_id)
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+async def _count_leads(
+    conn: asyncpg.Connection,
+    org_id: str,
+    where_clause: str,
+    params: list,
+    count: str,
+    cache_name: str,
+) -> int | None:
+    if count == "none":
+        return None
+
+    if count == "estimated":
+        # Planner row estimate: O(1) regardless of org size
+        plan = await conn.fetchval(
+            f"EXPLAIN (FORMAT JSON) SELECT 1 FROM leads l WHERE {where_clause}", *params
+        )
+        return int(plan[0]["Plan"]["Plan Rows"])
+
+    # Exact counts are cached per filter set and dropped on lead inserts
+    return await metrics_cache.get_or_compute(
+        org_id,
+        cache_name,
+        lambda: conn.fetchval(f"SELECT COUNT(*) FROM leads l WHERE {where_clause}", *params),
     )
-    return lead_id
 
 
 async def get_leads(
@@ -83,7 +208,20 @@ async def get_leads(
     funnel_id: str | None = None,
     language: str | None = None,
     search: str | None = None,
-) -> tuple[list[dict], int]:
+    cursor: str | None = None,
+    count: str = "exact",
+) -> tuple[list[dict], int | None, str | None]:
+    """
+    Return (items, total, next_cursor), newest first.
+
+    With `cursor`, rows strictly after that position in (created_at, id) order
+    are returned via the (org_id, created_at, id) index, so every page costs
+    the same regardless of depth; `page` is ignored. Without it, the
+    page/per_page OFFSET contract is kept. `count` selects how `total` is
+    produced: "exact" (cached per filter set), "estimated" (planner
+    estimate) or "none". With `search`, results are ranked by match quality
+    and paged by offset.
+    """
     conditions = ["l.org_id = $1"]
     params: list = [org_id]
     idx = 2
@@ -98,21 +236,40 @@ async def get_leads(
         params.append(language)
         idx += 1
 
-    if search:
-        conditions.append(
-            f"(l.answers_json->>'name' ILIKE ${idx} OR l.answers_json->>'phone' ILIKE ${idx})"
-        )
-        params.append(f"%{search}%")
+    term = normalize_search_term(search)
+    if term:
+        # Served by the pg_trgm GIN index on leads.search_text
+        conditions.append(f"l.search_text LIKE ${idx}")
+        params.append(f"%{_escape_like(term)}%")
         idx += 1
 
     where_clause = " AND ".join(conditions)
 
-    count = await conn.fetchval(
-        f"SELECT COUNT(*) FROM leads l WHERE {where_clause}", *params
+    total = await _count_leads(
+        conn, org_id, where_clause, list(params), count,
+        cache_name=f"lead_count:{funnel_id}:{language}:{term}",
     )
 
-    offset = (page - 1) * per_page
-    params.extend([per_page, offset])
+    order_by = "l.created_at DESC, l.id DESC"
+    if term:
+        # Search results are ranked, so they page by offset only
+        order_by = f"word_similarity(${idx}, l.search_text) DESC, {order_by}"
+        params.append(term)
+        idx += 1
+        cursor = None
+
+    if cursor:
+        after_created_at, after_id = decode_lead_cursor(cursor)
+        conditions.append(f"(l.created_at, l.id) < (${idx}, ${idx + 1})")
+        params.extend([after_created_at, after_id])
+        idx += 2
+        where_clause = " AND ".join(conditions)
+        offset = 0
+    else:
+        offset = (page - 1) * per_page
+
+    # Fetch one extra row to know whether another page exists
+    params.extend([per_page + 1, offset])
 
     rows = await conn.fetch(
         f"""
@@ -120,15 +277,21 @@ async def get_leads(
                l.tags, l.priority, l.ai_score
         FROM leads l
         WHERE {where_clause}
-        ORDER BY l.created_at DESC
+        ORDER BY {order_by}
         LIMIT ${idx} OFFSET ${idx + 1}
         """,
         *params,
     )
 
+    next_cursor = None
+    if len(rows) > per_page:
+        rows = rows[:per_page]
+        if not term:
+            next_cursor = encode_lead_cursor(rows[-1]["created_at"], rows[-1]["id"])
+
     items = []
     for row in rows:
-        answers = json.loads(row["answers_json"]) if isinstance(row["answers_json"], str) else row["answers_json"]
+        answers = row["answers_json"]
         items.append(
             {
                 "id": row["id"],
@@ -144,7 +307,7 @@ async def get_leads(
             }
         )
 
-    return items, count
+    return items, total, next_cursor
 
 
 async def get_lead_detail(
@@ -170,16 +333,13 @@ async def get_lead_detail(
     if not row:
         return None
 
-    answers = json.loads(row["answers_json"]) if isinstance(row["answers_json"], str) else row["answers_json"]
-    source = json.loads(row["source_json"]) if isinstance(row["source_json"], str) else row["source_json"]
-
     return {
         "id": row["id"],
         "org_id": row["org_id"],
         "funnel_id": row["funnel_id"],
         "language": row["language"],
-        "answers_json": answers,
-        "source_json": source,
+        "answers_json": row["answers_json"],
+        "source_json": row["source_json"],
         "score": float(row["score"]) if row["score"] is not None else None,
         "is_spam": row["is_spam"],
         "created_at": row["created_at"],
@@ -255,17 +415,15 @@ async def update_pipeline_fields(
     )
     if not row:
         return None
-
-    answers = json.loads(row["answers_json"]) if isinstance(row["answers_json"], str) else row["answers_json"]
-    source = json.loads(row["source_json"]) if isinstance(row["source_json"], str) else row["source_json"]
+    invalidate_org_metrics(org_id)
 
     return {
         "id": row["id"],
         "org_id": row["org_id"],
         "funnel_id": row["funnel_id"],
         "language": row["language"],
-        "answers_json": answers,
-        "source_json": source,
+        "answers_json": row["answers_json"],
+        "source_json": row["source_json"],
         "score": float(row["score"]) if row["score"] is not None else None,
         "is_spam": row["is_spam"],
         "created_at": row["created_at"],
@@ -366,7 +524,7 @@ async def get_funnel_detail(
         SELECT id, org_id, slug, name, schema_json, languages, is_active, created_at,
                routing_rules, auto_email_enabled, auto_sms_enabled, auto_call_enabled,
                notification_emails, webhook_url, rep_phone_number, twilio_from_number,
-               working_hours_start, working_hours_end,
+               working_hours_start, working_hours_end, timezone,
                sequence_enabled, sequence_config
         FROM funnels
         WHERE id = $1 AND org_id = $2
@@ -377,23 +535,16 @@ async def get_funnel_detail(
     if not row:
         return None
 
-    schema_json = json.loads(row["schema_json"]) if isinstance(row["schema_json"], str) else row["schema_json"]
-    routing_rules = (
-        json.loads(row["routing_rules"])
-        if isinstance(row["routing_rules"], str)
-        else row["routing_rules"]
-    ) if row["routing_rules"] else None
-
     return {
         "id": row["id"],
         "org_id": row["org_id"],
         "slug": row["slug"],
         "name": row["name"],
-        "schema_json": schema_json,
+        "schema_json": row["schema_json"],
         "languages": list(row["languages"]) if row["languages"] else ["en"],
         "is_active": row["is_active"],
         "created_at": row["created_at"],
-        "routing_rules": routing_rules,
+        "routing_rules": row["routing_rules"] or None,
         "auto_email_enabled": row["auto_email_enabled"] or False,
         "auto_sms_enabled": row["auto_sms_enabled"] or False,
         "auto_call_enabled": row["auto_call_enabled"] or False,
@@ -403,12 +554,9 @@ async def get_funnel_detail(
         "twilio_from_number": row["twilio_from_number"],
         "working_hours_start": row["working_hours_start"] or 9,
         "working_hours_end": row["working_hours_end"] or 19,
+        "timezone": row["timezone"],
         "sequence_enabled": row["sequence_enabled"] or False,
-        "sequence_config": (
-            json.loads(row["sequence_config"])
-            if isinstance(row["sequence_config"], str)
-            else row["sequence_config"]
-        ) if row["sequence_config"] else None,
+        "sequence_config": row["sequence_config"] or None,
     }
 
 
@@ -440,6 +588,7 @@ async def update_funnel_settings(
         "twilio_from_number": "twilio_from_number",
         "working_hours_start": "working_hours_start",
         "working_hours_end": "working_hours_end",
+        "timezone": "timezone",
         "sequence_enabled": "sequence_enabled",
         "sequence_config": "sequence_config",
     }
@@ -447,12 +596,8 @@ async def update_funnel_settings(
     for field, column in column_map.items():
         if field in updates and updates[field] is not None:
             value = updates[field]
-            if field in ("routing_rules", "sequence_config"):
-                set_parts.append(f"{column} = ${idx}::jsonb")
-                params.append(json.dumps(value))
-            else:
-                set_parts.append(f"{column} = ${idx}")
-                params.append(value)
+            set_parts.append(f"{column} = ${idx}")
+            params.append(value)
             idx += 1
 
     if not set_parts:
@@ -0,0 +1,123 @@
+"""
+Per-org cache for dashboard analytics results.
+
+Dashboard endpoints are read-heavy and bursty: at shift start every rep opens
+the same org's dashboard within seconds. Results are cached per (org, name)
+for DASHBOARD_CACHE_TTL_SECONDS, and concurrent misses for the same key are
+coalesced onto one in-flight computation (singleflight).
+
+Lead writes call `invalidate_org_metrics(org_id)` so reps see their own
+changes immediately. A computation that started before an invalidation is
+still returned to its waiters but is not stored.
+
+The cache is per process. With several API processes, another process's
+write is only reflected here once the TTL expires; keep the TTL short.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Expired entries are swept once the cache grows past this many keys.
+MAX_ENTRIES = 2000
+
+
+class MetricsCache:
+    def __init__(self, ttl_seconds: float):
+        self.ttl = ttl_seconds
+        self._entries: dict[tuple[str, str], tuple[float, Any]] = {}
+        self._inflight: dict[tuple[str, str], asyncio.Future] = {}
+        self._generation: dict[str, int] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.invalidations = 0
+
+    async def get_or_compute(
+        self,
+        org_id: str,
+        name: str,
+        compute: Callable[[], Awaitable[Any]],
+    ) -> Any:
+        """Return the cached value for (org_id, name), computing it at most once at a time."""
+        key = (str(org_id), name)
+
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            self.hits += 1
+            return entry[1]
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self.coalesced += 1
+            return await asyncio.shield(inflight)
+
+        self.misses += 1
+        fut = asyncio.get_running_loop().create_future()
+        # Leader errors propagate to waiters; mark them retrieved when no one waits.
+        fut.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self._inflight[key] = fut
+        generation = self._generation.get(key[0], 0)
+        try:
+            value = await compute()
+        except asyncio.CancelledError:
+            fut.cancel()
+            raise
+        except Exception as exc:
+            fut.set_exception(exc)
+            raise
+        finally:
+            if self._inflight.get(key) is fut:
+                del self._inflight[key]
+
+        fut.set_result(value)
+        if self.ttl > 0 and self._generation.get(key[0], 0) == generation:
+            self._store(key, value)
+        return value
+
+    def _store(self, key: tuple[str, str], value: Any) -> None:
+        now = time.monotonic()
+        if len(self._entries) >= MAX_ENTRIES:
+            self._entries = {k: e for k, e in self._entries.items() if e[0] > now}
+        self._entries[key] = (now + self.ttl, value)
+
+    def invalidate(self, org_id) -> None:
+        """Drop every cached result for an org and detach in-flight computations."""
+        org_key = str(org_id)
+        self._generation[org_key] = self._generation.get(org_key, 0) + 1
+        for key in [k for k in self._entries if k[0] == org_key]:
+            del self._entries[key]
+        for key in [k for k in self._inflight if k[0] == org_key]:
+            del self._inflight[key]
+        self.invalidations += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._inflight.clear()
+        self._generation.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "ttl_seconds": self.ttl,
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "invalidations": self.invalidations,
+            "hit_ratio": round((self.hits + self.coalesced) / lookups, 3) if lookups else None,
+        }
+
+
+metrics_cache = MetricsCache(ttl_seconds=settings.DASHBOARD_CACHE_TTL_SECONDS)
+
+
+def invalidate_org_metrics(org_id) -> None:
+    """Called after lead writes that change dashboard numbers."""
+    if org_id:
+        metrics_cache.invalidate(org_id)
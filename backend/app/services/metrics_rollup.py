@@ -0,0 +1,50 @@
+"""
+org_daily_metrics rollup maintenance.
+
+The rollup is kept current by triggers on `leads` (see
+migrations/020_org_daily_metrics.sql), so application code never writes to
+it directly. This module only exposes the rebuild, for backfills or after
+bulk fixes that bypassed triggers:
+
+    python -m app.services.metrics_rollup            # every org
+    python -m app.services.metrics_rollup --org <id> # one org
+"""
+
+import argparse
+import asyncio
+import logging
+
+import asyncpg
+
+logger = logging.getLogger(__name__)
+
+
+async def rebuild_org_daily_metrics(conn: asyncpg.Connection, org_id: str | None = None) -> int:
+    """Recompute rollup rows from leads for one org (or all). Returns rows written."""
+    async with conn.transaction():
+        rows = await conn.fetchval(
+            "SELECT rebuild_org_daily_metrics($1::uuid)",
+            org_id,
+        )
+    logger.info("Rebuilt org_daily_metrics (org=%s): %s rows", org_id or "all", rows)
+    return int(rows or 0)
+
+
+async def _main() -> None:
+    from app.config import settings
+
+    parser = argparse.ArgumentParser(description="Rebuild the org_daily_metrics rollup.")
+    parser.add_argument("--org", help="Only rebuild this org id (default: all orgs)")
+    args = parser.parse_args()
+
+    conn = await asyncpg.connect(settings.asyncpg_url)
+    try:
+        rows = await rebuild_org_daily_metrics(conn, args.org)
+        print(f"org_daily_metrics rebuilt: {rows} rows")
+    finally:
+        await conn.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_main())
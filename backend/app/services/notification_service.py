@@ -3,15 +3,14 @@ Notification service: sends email and SMS notifications for new leads
 and handoff alerts when a lead requires human follow-up.
 """
 
-import json
 import logging
 import os
-import smtplib
-from email.mime.multipart import MIMEMultipart
-from email.mime.text import MIMEText
 
 import asyncpg
 
+from app.core.phone import normalize_phone
+from app.services import delivery_governor, email_transport, outbox, twilio_transport
+
 logger = logging.getLogger(__name__)
 
 FALLBACK_FROM_EMAIL = "hello@warderai.com"
@@ -21,81 +20,58 @@ FALLBACK_FROM_EMAIL = "hello@warderai.com"
 # Low-level send helpers
 # ---------------------------------------------------------------------------
 
-def send_email_notification(to_email: str, subject: str, body: str) -> str:
+async def send_email_notification(to_email: str, subject: str, body: str) -> str:
     """
-    Send a plain-text email via SMTP.
+    Send a plain-text email via the shared SMTP transport.
 
     Reads config from env:
       SMTP_HOST, SMTP_PORT, SMTP_USER, SMTP_PASSWORD (or SMTP_PASS), SMTP_FROM
 
-    Returns "sent" | "skipped" | "failed".
+    Returns "sent" | "skipped" | "deferred" | "failed" ("deferred": held back
+    by the delivery governor).
     Never throws.
     """
-    smtp_host = os.getenv("SMTP_HOST", "")
-    smtp_port = int(os.getenv("SMTP_PORT", "587"))
-    smtp_user = os.getenv("SMTP_USER", "")
-    smtp_pass = os.getenv("SMTP_PASSWORD") or os.getenv("SMTP_PASS", "")
-    smtp_from = os.getenv("SMTP_FROM", "")
-
-    if not smtp_host or not smtp_from:
+    transport = email_transport.get_transport()
+    if transport is None:
         logger.warning(
             "send_email_notification: SMTP not configured (SMTP_HOST/SMTP_FROM missing) — skipping"
         )
         return "skipped"
 
-    try:
-        msg = MIMEMultipart()
-        msg["From"] = smtp_from
-        msg["To"] = to_email
-        msg["Subject"] = subject
-        msg.attach(MIMEText(body, "plain"))
-
-        with smtplib.SMTP(smtp_host, smtp_port) as server:
-            if smtp_user and smtp_pass:
-                server.starttls()
-                server.login(smtp_user, smtp_pass)
-            server.sendmail(smtp_from, [to_email], msg.as_string())
-
+    result = await delivery_governor.send_email([to_email], subject, body)
+    if result.status == "deferred":
+        return "deferred"
+    if result.ok:
         logger.info("send_email_notification: sent to %s", to_email)
         return "sent"
-    except Exception as exc:
-        logger.error("send_email_notification: failed to send to %s — %s", to_email, exc)
-        return "failed"
+    logger.error("send_email_notification: failed to send to %s — %s", to_email, result.error)
+    return "failed"
 
 
-def send_sms_notification(to_number: str, message: str) -> str:
+async def send_sms_notification(to_number: str, message: str) -> str:
     """
-    Send an SMS via Twilio.
+    Send an SMS via the shared Twilio transport.
 
     Reads config from env:
       TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN, TWILIO_FROM_NUMBER
 
-    Returns "sent" | "skipped" | "failed".
+    Returns "sent" | "skipped" | "deferred" | "failed".
     Never throws.
     """
-    account_sid = os.getenv("TWILIO_ACCOUNT_SID", "")
-    auth_token = os.getenv("TWILIO_AUTH_TOKEN", "")
     from_number = os.getenv("TWILIO_FROM_NUMBER", "")
+    transport = twilio_transport.get_transport()
 
-    if not account_sid or not auth_token or not from_number:
+    if transport is None or not from_number:
         return "skipped"
 
-    try:
-        import httpx
-
-        with httpx.Client(timeout=15.0) as client:
-            resp = client.post(
-                f"https://api.twilio.com/2010-04-01/Accounts/{account_sid}/Messages.json",
-                auth=(account_sid, auth_token),
-                data={"From": from_number, "To": to_number, "Body": message},
-            )
-            resp.raise_for_status()
-
-        logger.info("send_sms_notification: sent to %s", to_number)
+    result = await delivery_governor.send_sms(to_number, message, from_number)
+    if result.status == "deferred":
+        return "deferred"
+    if result.ok:
+        logger.info("send_sms_notification: sent to %s", result.to)
         return "sent"
-    except Exception as exc:
-        logger.error("send_sms_notification: failed to send to %s — %s", to_number, exc)
-        return "failed"
+    logger.error("send_sms_notification: failed to send to %s — %s", to_number, result.error)
+    return "failed"
 
 
 # ---------------------------------------------------------------------------
@@ -177,7 +153,7 @@ async def get_rep_contact(
 # ---------------------------------------------------------------------------
 
 async def notify_handoff_required(
-    conn: asyncpg.Connection,
+    pool: asyncpg.Pool,
     lead_id: str,
     org_id: str,
     owner_email: str | None,
@@ -195,6 +171,9 @@ async def notify_handoff_required(
        Never sends to lead phone.
     5. Logs rep_notified engagement event with notification metadata.
 
+    Takes the pool rather than a connection: lookups and the event insert
+    each borrow a connection briefly, and none is held during the sends.
+
     Never throws.
     """
     from app.services.engagement_service import log_engagement_event
@@ -208,18 +187,15 @@ async def notify_handoff_required(
     lead_phone = ""
 
     try:
-        # --- Fetch lead details ---
-        lead_row = await conn.fetchrow(
-            "SELECT answers_json FROM leads WHERE id = $1", lead_id
-        )
+        # --- Fetch lead details and rep contact ---
+        async with pool.acquire() as conn:
+            lead_row = await conn.fetchrow(
+                "SELECT answers_json FROM leads WHERE id = $1", lead_id
+            )
+            rep_contact = await get_rep_contact(conn, org_id, owner_email)
+
         if lead_row:
-            raw_answers = lead_row["answers_json"]
-            if isinstance(raw_answers, str):
-                answers = json.loads(raw_answers)
-            elif raw_answers:
-                answers = dict(raw_answers)
-            else:
-                answers = {}
+            answers = lead_row["answers_json"] or {}
             lead_name = answers.get("name", "")
             lead_phone = answers.get("phone", "")
             lead_email_addr = answers.get("email", "")
@@ -235,16 +211,15 @@ async def notify_handoff_required(
             classification=classification,
             message_body=message_body,
         )
-        email_status = send_email_notification(email_to, subject, body)
+        email_status = await send_email_notification(email_to, subject, body)
 
         # --- Send SMS to rep phone from rep_contacts (never to lead phone) ---
-        rep_contact = await get_rep_contact(conn, org_id, owner_email)
         rep_phone = rep_contact["phone"] if rep_contact else None
 
         if rep_phone:
             sms_to = rep_phone
             sms_msg = "New lead needs attention. Check your Warder dashboard."
-            sms_status = send_sms_notification(rep_phone, sms_msg)
+            sms_status = await send_sms_notification(rep_phone, sms_msg)
         else:
             sms_status = "skipped_no_rep_phone"
             logger.info(
@@ -258,22 +233,23 @@ async def notify_handoff_required(
 
     # --- Log rep_notified event (always, even if sends failed) ---
     try:
-        await log_engagement_event(
-            conn,
-            lead_id=lead_id,
-            org_id=org_id,
-            channel="system",
-            event_type="rep_notified",
-            direction="system",
-            content=None,
-            metadata={
-                "owner_email": owner_email,
-                "reason": reason,
-                "classification": classification,
-                "email": {"to": email_to, "status": email_status},
-                "sms": {"to": sms_to, "status": sms_status},
-            },
-        )
+        async with pool.acquire() as conn:
+            await log_engagement_event(
+                conn,
+                lead_id=lead_id,
+                org_id=org_id,
+                channel="system",
+                event_type="rep_notified",
+                direction="system",
+                content=None,
+                metadata={
+                    "owner_email": owner_email,
+                    "reason": reason,
+                    "classification": classification,
+                    "email": {"to": email_to, "status": email_status},
+                    "sms": {"to": sms_to, "status": sms_status},
+                },
+            )
         logger.info(
             "rep_notified event logged for lead %s — owner=%s email=%s sms=%s",
             lead_id, owner_email, email_status, sms_status,
@@ -288,25 +264,24 @@ async def notify_handoff_required(
 # Lead acquisition notifications (existing — unchanged)
 # ---------------------------------------------------------------------------
 
-async def send_email(lead: dict, funnel: dict) -> str:
+async def send_email(
+    lead: dict, funnel: dict, *, outbox_key: str | None = None, pool: asyncpg.Pool | None = None
+) -> str:
     """
     Send email notification to funnel.notification_emails using SMTP config.
-    Returns status: "sent", "failed", "skipped_missing_config"
-    """
-    smtp_host = os.getenv("SMTP_HOST", "")
-    smtp_port = int(os.getenv("SMTP_PORT", "587"))
-    smtp_user = os.getenv("SMTP_USER", "")
-    smtp_pass = os.getenv("SMTP_PASS", "")
-    smtp_from = os.getenv("SMTP_FROM", "")
+    Returns status: "sent", "failed", "skipped_missing_config", "deferred"
 
+    With `outbox_key` the send goes through the outbox and is made at most
+    once per key; it may then also return "in_flight" or "unconfirmed"
+    (see outbox.Delivery).
+    """
     notification_emails = funnel.get("notification_emails") or []
+    transport = email_transport.get_transport()
 
-    if not smtp_host or not smtp_from or not notification_emails:
+    if transport is None or not notification_emails:
         return "skipped_missing_config"
 
     answers = lead.get("answers_json", {})
-    if isinstance(answers, str):
-        answers = json.loads(answers)
 
     name = answers.get("name", "Unknown")
     phone = answers.get("phone", "N/A")
@@ -324,66 +299,48 @@ async def send_email(lead: dict, funnel: dict) -> str:
         f"AI Score: {lead.get('ai_score', 'N/A')}\n"
     )
 
-    try:
-        msg = MIMEMultipart()
-        msg["From"] = smtp_from
-        msg["To"] = ", ".join(notification_emails)
-        msg["Subject"] = subject
-        msg.attach(MIMEText(body, "plain"))
-
-        with smtplib.SMTP(smtp_host, smtp_port) as server:
-            if smtp_user and smtp_pass:
-                server.starttls()
-                server.login(smtp_user, smtp_pass)
-            server.sendmail(smtp_from, notification_emails, msg.as_string())
-
-        return "sent"
-    except Exception:
-        return "failed"
+    recipients = list(notification_emails)
+    if outbox_key is None:
+        return (await delivery_governor.send_email(recipients, subject, body, pool)).status
+    delivery = await outbox.deliver_once(
+        outbox_key, lambda: delivery_governor.send_email(recipients, subject, body, pool),
+        channel="email", purpose="auto_email", org_id=_str(lead.get("org_id")),
+        lead_id=_str(lead.get("id")), recipient=", ".join(recipients), pool=pool,
+    )
+    return delivery.status
 
 
-async def send_sms(lead: dict, funnel: dict) -> str:
+async def send_sms(
+    lead: dict, funnel: dict, *, outbox_key: str | None = None, pool: asyncpg.Pool | None = None
+) -> str:
     """
     Send SMS notification using Twilio.
-    Returns status: "sent", "failed", "skipped_missing_config"
+    Returns status: "sent", "failed", "skipped_missing_config", "deferred"
+    (or "in_flight" / "unconfirmed" with `outbox_key`; see send_email)
     """
-    account_sid = os.getenv("TWILIO_ACCOUNT_SID", "")
-    auth_token = os.getenv("TWILIO_AUTH_TOKEN", "")
     from_number = funnel.get("twilio_from_number") or ""
 
     answers = lead.get("answers_json", {})
-    if isinstance(answers, str):
-        answers = json.loads(answers)
 
-    to_phone = answers.get("phone", "")
+    to_phone = lead.get("phone_e164") or answers.get("phone", "")
 
-    if not account_sid or not auth_token or not from_number or not to_phone:
+    if not from_number or not to_phone:
         return "skipped_missing_config"
 
-    # Format phone if needed (add +1 if just digits)
-    if to_phone.isdigit() and len(to_phone) == 10:
-        to_phone = f"+1{to_phone}"
-    elif not to_phone.startswith("+"):
-        to_phone = f"+{to_phone}"
-
     name = answers.get("name", "a new lead")
     service = answers.get("service", "your service")
     message_body = f"New lead from {name} interested in {service}. Check your dashboard for details."
 
-    try:
-        import httpx
-
-        async with httpx.AsyncClient(timeout=15.0) as client:
-            resp = await client.post(
-                f"https://api.twilio.com/2010-04-01/Accounts/{account_sid}/Messages.json",
-                auth=(account_sid, auth_token),
-                data={
-                    "From": from_number,
-                    "To": to_phone,
-                    "Body": message_body,
-                },
-            )
-            resp.raise_for_status()
-            return "sent"
-    except Exception:
-        return "failed"
+    if outbox_key is None:
+        return (await delivery_governor.send_sms(to_phone, message_body, from_number, pool)).status
+    delivery = await outbox.deliver_once(
+        outbox_key, lambda: delivery_governor.send_sms(to_phone, message_body, from_number, pool),
+        channel="sms", purpose="auto_sms", org_id=_str(lead.get("org_id")),
+        lead_id=_str(lead.get("id")), recipient=normalize_phone(to_phone) or to_phone,
+        sender=from_number, body=message_body, pool=pool,
+    )
+    return delivery.status
+
+
+def _str(value) -> str | None:
+    return str(value) if value is not None else None
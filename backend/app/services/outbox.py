@@ -0,0 +1,252 @@
+"""
+Outbox for outbound SMS and email: at most one provider call per
+idempotency key, even across retries, crashes and competing workers.
+
+deliver_once() commits an outbound_messages row under a deterministic key
+(migrations/026_outbound_messages.sql) before calling the provider, and
+completes it with the provider's answer right after:
+
+  step_key(step_id, attempt)   engagement step, one key per send attempt
+  lead_key(lead_id, purpose)   lead automation auto_sms / auto_email
+
+If the key already has a row, the send is not repeated; the stored outcome
+is replayed instead. A row still 'sending' is a send whose outcome is not
+known yet — a crash between provider call and completion, or a timeout
+after Twilio may have accepted the message. reconcile_in_flight() settles
+those: SMS against Twilio's message log, email as 'unknown' (SMTP has no
+lookup), and only rows shown never to have been delivered ('unsent') may
+be sent again under the same key.
+"""
+
+import hashlib
+import logging
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Awaitable, Callable
+
+import asyncpg
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Insert the claim, or take back a row reconciled as never delivered.
+CLAIM_SQL = """
+    INSERT INTO outbound_messages
+           (idempotency_key, channel, purpose, org_id, lead_id, step_id,
+            recipient, sender, body_sha256)
+    VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9)
+    ON CONFLICT (idempotency_key) DO UPDATE
+       SET status       = 'sending',
+           recipient    = EXCLUDED.recipient,
+           sender       = EXCLUDED.sender,
+           body_sha256  = EXCLUDED.body_sha256,
+           error        = NULL,
+           started_at   = now(),
+           completed_at = NULL
+     WHERE outbound_messages.status = 'unsent'
+    RETURNING id
+"""
+
+EXISTING_SQL = "SELECT status, provider_ref, error FROM outbound_messages WHERE idempotency_key = $1"
+
+COMPLETE_SQL = """
+    UPDATE outbound_messages
+       SET status = $2, provider_ref = $3, error = $4,
+           completed_at = CASE WHEN $2 = 'sending' THEN NULL ELSE now() END
+     WHERE id = $1
+"""
+
+IN_FLIGHT_SQL = """
+    SELECT id, channel, recipient, sender, body_sha256, started_at
+      FROM outbound_messages
+     WHERE status = 'sending' AND started_at < now() - make_interval(secs => $1)
+     ORDER BY started_at
+     LIMIT $2
+"""
+
+RECONCILE_BATCH_SIZE = 100
+
+_RECONCILED_NOTE = {
+    "unsent": "reconciled: no provider record",
+    "unknown": "reconciled: delivery could not be verified",
+}
+
+# Stored status -> what a replay reports to the caller.
+_REPLAYED = {
+    "sending": "in_flight",
+    "unknown": "unconfirmed",
+}
+
+
+@dataclass
+class Delivery:
+    """
+    deliver_once() result. `status` is the transport's status when this call
+    sent ("sent" | "failed" | "skipped_missing_config" | "deferred"), the
+    stored one on a replay, or:
+      "in_flight"    another attempt's outcome is still unknown — retry later
+      "unconfirmed"  reconcile could not tell whether it was delivered
+    `result` is the transport result, None on a replay.
+    """
+    status: str
+    result: object | None = None
+    provider_ref: str | None = None
+    error: str | None = None
+
+    @property
+    def replayed(self) -> bool:
+        return self.result is None
+
+
+def step_key(step_id: str, attempt: int) -> str:
+    return f"step:{step_id}:{attempt}"
+
+
+def lead_key(lead_id: str, purpose: str) -> str:
+    return f"lead:{lead_id}:{purpose}"
+
+
+def body_hash(body: str | None) -> str | None:
+    return hashlib.sha256(body.encode()).hexdigest() if body else None
+
+
+def recheck_delay() -> float:
+    """How long a caller holding 'in_flight' should wait before trying again."""
+    return float(settings.OUTBOX_RECONCILE_AFTER_SECONDS + settings.OUTBOX_RECONCILE_INTERVAL_SECONDS)
+
+
+def _pool(pool: asyncpg.Pool | None) -> asyncpg.Pool:
+    if pool is not None:
+        return pool
+    import app.database as _db_mod
+    return _db_mod.pool
+
+
+def _completion(channel: str, result) -> str:
+    """Status to store for a transport result."""
+    if result.status == "deferred":
+        return "unsent"  # the governor held it back; nothing reached the provider
+    if channel == "sms" and result.status == "failed" and getattr(result, "http_status", None) is None:
+        return "sending"  # no response: Twilio may have accepted it, reconcile decides
+    return result.status
+
+
+async def deliver_once(
+    key: str,
+    send: Callable[[], Awaitable[object]],
+    *,
+    channel: str,
+    purpose: str,
+    org_id: str | None = None,
+    lead_id: str | None = None,
+    step_id: str | None = None,
+    recipient: str | None = None,
+    sender: str | None = None,
+    body: str | None = None,
+    pool: asyncpg.Pool | None = None,
+) -> Delivery:
+    """
+    Call `send()` unless `key` has been sent (or attempted) before.
+
+    The claim row is committed before `send()` runs and no connection is
+    held during it. `recipient`, `sender` and `body` are what reconcile
+    matches SMS against, so pass them exactly as the provider will see them.
+    """
+    async with _pool(pool).acquire() as conn:
+        row_id = await conn.fetchval(
+            CLAIM_SQL, key, channel, purpose, org_id, lead_id, step_id,
+            recipient, sender, body_hash(body),
+        )
+        if row_id is None:
+            existing = await conn.fetchrow(EXISTING_SQL, key)
+    if row_id is None:
+        status = _REPLAYED.get(existing["status"], existing["status"])
+        logger.info("Outbox %s already %s, not resending", key, existing["status"])
+        return Delivery(status, provider_ref=existing["provider_ref"], error=existing["error"])
+
+    # If send() raises, the row stays 'sending' and reconcile settles it
+    result = await send()
+
+    stored = _completion(channel, result)
+    ref = getattr(result, "sid", None)
+    error = (result.error or "")[:500] or None
+    async with _pool(pool).acquire() as conn:
+        await conn.execute(COMPLETE_SQL, row_id, stored, ref, error)
+    status = "in_flight" if stored == "sending" else result.status
+    return Delivery(status, result=result, provider_ref=ref, error=result.error)
+
+
+async def _settle(row) -> tuple[str, str | None]:
+    """Decide what became of one in-flight row: (status, provider_ref)."""
+    from app.services import twilio_transport
+
+    if row["channel"] != "sms":
+        return "unknown", None
+    transport = twilio_transport.get_transport()
+    if transport is None or not (row["recipient"] and row["sender"] and row["body_sha256"]):
+        return "unknown", None
+    # Twilio filters DateSent by day; allow for a send that crossed midnight.
+    since = row["started_at"] - timedelta(minutes=5)
+    sid = await transport.find_sent_message(row["recipient"], row["sender"], row["body_sha256"], since)
+    return ("sent", sid) if sid else ("unsent", None)
+
+
+async def reconcile_in_flight(pool: asyncpg.Pool | None = None) -> dict:
+    """
+    Settle rows left 'sending' for OUTBOX_RECONCILE_AFTER_SECONDS. A row
+    Twilio cannot be asked about right now stays 'sending' for the next
+    sweep. Returns counts by resulting status.
+    """
+    summary = {"checked": 0, "sent": 0, "unsent": 0, "unknown": 0, "pending": 0}
+    async with _pool(pool).acquire() as conn:
+        rows = await conn.fetch(
+            IN_FLIGHT_SQL, float(settings.OUTBOX_RECONCILE_AFTER_SECONDS), RECONCILE_BATCH_SIZE,
+        )
+    for row in rows:
+        summary["checked"] += 1
+        try:
+            status, ref = await _settle(row)
+        except Exception as exc:
+            logger.warning("Outbox reconcile could not check %s: %s", row["id"], exc)
+            summary["pending"] += 1
+            continue
+        async with _pool(pool).acquire() as conn:
+            await conn.execute(COMPLETE_SQL, row["id"], status, ref, _RECONCILED_NOTE.get(status))
+        summary[status] += 1
+    if summary["checked"]:
+        logger.info("Outbox reconcile: %s", summary)
+    return summary
+
+
+async def purge_completed(pool: asyncpg.Pool | None = None) -> int:
+    """Delete settled rows older than OUTBOX_RETENTION_DAYS. Returns the count."""
+    async with _pool(pool).acquire() as conn:
+        result = await conn.execute(
+            """
+            DELETE FROM outbound_messages
+             WHERE status <> 'sending'
+               AND started_at < now() - make_interval(days => $1)
+            """,
+            settings.OUTBOX_RETENTION_DAYS,
+        )
+    try:
+        return int(result.split()[-1])
+    except (ValueError, IndexError):
+        return 0
+
+
+async def outbox_stats(org_id: str, pool: asyncpg.Pool | None = None) -> dict:
+    """`org_id`'s row counts by status over the last day, for /admin/ops/delivery."""
+    async with _pool(pool).acquire() as conn:
+        rows = await conn.fetch(
+            """
+            SELECT status, count(*) AS n
+              FROM outbound_messages
+             WHERE org_id = $1
+               AND started_at > now() - interval '1 day'
+             GROUP BY status
+            """,
+            org_id,
+        )
+    return {r["status"]: r["n"] for r in rows}
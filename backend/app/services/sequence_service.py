@@ -1,5 +1,4 @@
 """SMS follow-up sequence engine."""
-import json
 import logging
 from datetime import datetime, timedelta, timezone
 
@@ -15,9 +14,6 @@ async def schedule_sequences(lead_id: str, funnel: dict, conn):
     if not config:
         return
 
-    if isinstance(config, str):
-        config = json.loads(config)
-
     steps = config.get("steps", [])
     if not steps:
         return
@@ -1,5 +1,4 @@
 """Processes due SMS sequences."""
-import json
 import logging
 from datetime import datetime, timezone
 
@@ -30,8 +29,6 @@ async def process_due_sequences(pool):
 
         for row in rows:
             answers = row["answers_json"]
-            if isinstance(answers, str):
-                answers = json.loads(answers)
 
             phone = answers.get("phone", "")
             if not phone:
@@ -58,30 +55,12 @@ async def process_due_sequences(pool):
 
 async def _send_sequence_sms(phone: str, message: str, from_number: str | None) -> str:
     """Send a single SMS with custom message body."""
-    import os
+    from app.services import twilio_transport
 
-    account_sid = os.getenv("TWILIO_ACCOUNT_SID", "")
-    auth_token = os.getenv("TWILIO_AUTH_TOKEN", "")
-
-    if not account_sid or not auth_token or not from_number or not phone:
+    if not from_number or not phone:
         return "skipped_missing_config"
 
-    # Format phone
-    if phone.isdigit() and len(phone) == 10:
-        phone = f"+1{phone}"
-    elif not phone.startswith("+"):
-        phone = f"+{phone}"
-
-    try:
-        import httpx
-        async with httpx.AsyncClient(timeout=15.0) as client:
-            resp = await client.post(
-                f"https://api.twilio.com/2010-04-01/Accounts/{account_sid}/Messages.json",
-                auth=(account_sid, auth_token),
-                data={"From": from_number, "To": phone, "Body": message},
-            )
-            resp.raise_for_status()
-            return "sent"
-    except Exception as e:
-        logger.error("Sequence SMS failed: %s", e)
-        return "failed"
+    result = await twilio_transport.send_sms(phone, message, from_number)
+    if result.status == "failed":
+        logger.error("Sequence SMS failed: %s", result.error)
+    return result.status
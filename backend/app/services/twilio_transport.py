@@ -0,0 +1,212 @@
+"""
+Shared async Twilio REST transport.
+
+One application-scoped httpx.AsyncClient with keep-alive pooling (and HTTP/2
+when the optional `h2` package is installed), so every outbound SMS and call
+placement reuses a warm TLS connection instead of paying for a fresh
+handshake — and never blocks the event loop.
+
+Lifecycle mirrors app.database: `init_transport()` in lifespan startup,
+`close_transport()` on shutdown. `get_transport()` lazily creates one for
+code paths that run outside the app (scripts, tests) and returns None when
+Twilio credentials are not configured.
+"""
+
+import hashlib
+import logging
+import os
+from dataclasses import dataclass
+from datetime import datetime
+
+import httpx
+
+from app.core.phone import normalize_phone
+
+logger = logging.getLogger(__name__)
+
+TWILIO_API_BASE = "https://api.twilio.com/2010-04-01"
+
+try:  # HTTP/2 is optional — httpx needs the h2 package for it
+    import h2  # noqa: F401
+    _HTTP2_AVAILABLE = True
+except ImportError:
+    _HTTP2_AVAILABLE = False
+
+
+@dataclass
+class SmsResult:
+    """Outcome of a single send. `status` is "sent" | "failed" | "skipped_missing_config"."""
+    status: str
+    to: str | None = None
+    sid: str | None = None
+    http_status: int | None = None
+    error: str | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.status == "sent"
+
+
+@dataclass
+class CallResult:
+    """Outcome of placing a call. `status` is "initiated" | "failed" | "skipped_missing_config"."""
+    status: str
+    sid: str | None = None
+    http_status: int | None = None
+    error: str | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.status == "initiated"
+
+
+class TwilioTransport:
+    def __init__(
+        self,
+        account_sid: str,
+        auth_token: str,
+        timeout: float = 15.0,
+        max_connections: int = 50,
+        max_keepalive: int = 20,
+        http_transport: httpx.AsyncBaseTransport | None = None,
+    ):
+        self.account_sid = account_sid
+        self._client = httpx.AsyncClient(
+            transport=http_transport,
+            base_url=f"{TWILIO_API_BASE}/Accounts/{account_sid}",
+            auth=(account_sid, auth_token),
+            timeout=timeout,
+            http2=_HTTP2_AVAILABLE,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive,
+            ),
+        )
+
+    async def send_sms(self, to: str, body: str, from_number: str | None) -> SmsResult:
+        """Send one SMS. Never throws."""
+        to_phone = normalize_phone(to) or to
+        if not from_number or not to_phone or not body:
+            return SmsResult(status="skipped_missing_config", to=to_phone)
+
+        try:
+            resp = await self._client.post(
+                "/Messages.json",
+                data={"From": from_number, "To": to_phone, "Body": body},
+            )
+        except httpx.HTTPError as exc:
+            logger.warning("Twilio SMS to %s failed: %s", to_phone, exc)
+            return SmsResult(status="failed", to=to_phone, error=str(exc))
+
+        if resp.is_success:
+            try:
+                sid = resp.json().get("sid")
+            except ValueError:
+                sid = None
+            return SmsResult(status="sent", to=to_phone, sid=sid, http_status=resp.status_code)
+
+        logger.warning("Twilio SMS to %s rejected: %s %s", to_phone, resp.status_code, resp.text[:200])
+        return SmsResult(
+            status="failed",
+            to=to_phone,
+            http_status=resp.status_code,
+            error=resp.text[:500],
+        )
+
+    async def place_call(
+        self,
+        to: str,
+        from_number: str,
+        url: str,
+        status_callback: str | None = None,
+        status_callback_events: list[str] | None = None,
+        timeout: float | None = None,
+    ) -> CallResult:
+        """Create one outbound call; Twilio fetches TwiML from `url` when it connects. Never throws."""
+        data: dict = {"To": to, "From": from_number, "Url": url}
+        if status_callback:
+            data["StatusCallback"] = status_callback
+            data["StatusCallbackEvent"] = status_callback_events or []  # repeated field
+
+        try:
+            resp = await self._client.post(
+                "/Calls.json",
+                data=data,
+                timeout=timeout if timeout is not None else httpx.USE_CLIENT_DEFAULT,
+            )
+        except httpx.HTTPError as exc:
+            logger.warning("Twilio call to %s failed: %s", to, exc)
+            return CallResult(status="failed", error=str(exc) or type(exc).__name__)
+
+        if resp.is_success:
+            try:
+                sid = resp.json().get("sid")
+            except ValueError:
+                sid = None
+            return CallResult(status="initiated", sid=sid, http_status=resp.status_code)
+
+        logger.warning("Twilio call to %s rejected: %s %s", to, resp.status_code, resp.text[:200])
+        return CallResult(status="failed", http_status=resp.status_code, error=resp.text[:500])
+
+    async def find_sent_message(
+        self, to: str, from_number: str, body_sha256: str, since: datetime
+    ) -> str | None:
+        """
+        Look up a message Twilio accepted from `from_number` to `to` on or
+        after `since` whose body hashes to `body_sha256`. Returns its SID, or
+        None if there is none. Raises httpx.HTTPError if Twilio cannot be
+        asked, so callers can tell "not sent" from "don't know".
+        """
+        resp = await self._client.get(
+            "/Messages.json",
+            params={"To": to, "From": from_number, "DateSent>": since.date().isoformat(), "PageSize": 50},
+        )
+        resp.raise_for_status()
+        for message in resp.json().get("messages", []):
+            if hashlib.sha256((message.get("body") or "").encode()).hexdigest() == body_sha256:
+                return message.get("sid")
+        return None
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+
+_transport: TwilioTransport | None = None
+
+
+def _credentials() -> tuple[str, str]:
+    return os.getenv("TWILIO_ACCOUNT_SID", ""), os.getenv("TWILIO_AUTH_TOKEN", "")
+
+
+async def init_transport() -> TwilioTransport | None:
+    global _transport
+    account_sid, auth_token = _credentials()
+    if account_sid and auth_token and _transport is None:
+        _transport = TwilioTransport(account_sid, auth_token)
+        logger.info("Twilio transport ready (http2=%s)", _HTTP2_AVAILABLE)
+    return _transport
+
+
+async def close_transport() -> None:
+    global _transport
+    if _transport:
+        await _transport.aclose()
+        _transport = None
+
+
+def get_transport() -> TwilioTransport | None:
+    """Return the shared transport, or None if Twilio is not configured."""
+    global _transport
+    if _transport is None:
+        account_sid, auth_token = _credentials()
+        if account_sid and auth_token:
+            _transport = TwilioTransport(account_sid, auth_token)
+    return _transport
+
+
+async def send_sms(to: str, body: str, from_number: str | None) -> SmsResult:
+    """Convenience wrapper: send via the shared transport, or skip if unconfigured."""
+    transport = get_transport()
+    if transport is None:
+        return SmsResult(status="skipped_missing_config", to=to)
+    return await transport.send_sms(to, body, from_number)
@@ -0,0 +1,95 @@
+"""
+Funnel working hours in the funnel's own timezone.
+
+A funnel is open from working_hours_start to working_hours_end (whole hours,
+local time) every day in its IANA `timezone` (funnels.timezone, falling back
+to WORKING_HOURS_DEFAULT_TIMEZONE). start > end is an overnight window
+(22 -> 6); start == end is open around the clock.
+
+Each local day's window is computed once, as UTC instants, and cached per
+(timezone, start, end, date), so the engagement worker and call paths can
+ask "open now? if not, when?" on every send without redoing DST arithmetic.
+
+Out-of-hours SMS/call steps and calls are not skipped: they are parked as
+'held' until next_open() and released at a capped rate by
+release_held_work() (see app/background.py), so a night's backlog does not
+all hit Twilio the moment the window opens.
+"""
+
+import logging
+import math
+from datetime import date, datetime, time, timedelta, timezone
+from functools import lru_cache
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+import asyncpg
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# How often the leader releases held work; each pass releases a slice of the
+# per-minute budget.
+RELEASE_INTERVAL_SECONDS = 10
+
+
+def funnel_zone(funnel: dict) -> ZoneInfo:
+    name = funnel.get("timezone") or settings.WORKING_HOURS_DEFAULT_TIMEZONE
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        logger.warning("Unknown funnel timezone %r, using UTC", name)
+        return ZoneInfo("UTC")
+
+
+@lru_cache(maxsize=4096)
+def _window(zone: ZoneInfo, start_hour: int, end_hour: int, day: date) -> tuple[datetime, datetime]:
+    """The window opening on local `day`, as UTC (opens_at, closes_at)."""
+    opens = datetime.combine(day, time(start_hour), zone)
+    close_day = day if end_hour > start_hour else day + timedelta(days=1)
+    closes = datetime.combine(close_day, time(end_hour), zone)
+    return opens.astimezone(timezone.utc), closes.astimezone(timezone.utc)
+
+
+def next_open(funnel: dict, now: datetime | None = None) -> datetime | None:
+    """
+    None if the funnel is open at `now` (or has no working hours), else the
+    UTC instant its next window opens.
+    """
+    start_hour = funnel.get("working_hours_start")
+    end_hour = funnel.get("working_hours_end")
+    if start_hour is None or end_hour is None or start_hour == end_hour:
+        return None
+    now = now or datetime.now(timezone.utc)
+    zone = funnel_zone(funnel)
+    today = now.astimezone(zone).date()
+    # Yesterday's window may still be open (overnight hours)
+    for offset in range(-1, 3):
+        opens, closes = _window(zone, start_hour % 24, end_hour % 24, today + timedelta(days=offset))
+        if opens <= now < closes:
+            return None
+        if now < opens:
+            return opens
+    return None  # unreachable for valid hours
+
+
+def _per_pass(per_minute: int) -> int:
+    return max(1, math.ceil(per_minute * RELEASE_INTERVAL_SECONDS / 60))
+
+
+async def release_held_work(pool: asyncpg.Pool) -> dict:
+    """
+    One release pass: held engagement steps and jobs whose window has opened
+    go back to 'pending', oldest hold first, at most
+    WORKING_HOURS_RELEASE_STEPS_PER_MINUTE / _JOBS_PER_MINUTE per minute.
+    Leader-only; run every RELEASE_INTERVAL_SECONDS.
+    """
+    from app.services import engagement_worker, job_queue
+
+    steps = await engagement_worker.release_held_steps(
+        pool, _per_pass(settings.WORKING_HOURS_RELEASE_STEPS_PER_MINUTE)
+    )
+    jobs = await job_queue.release_held(pool, _per_pass(settings.WORKING_HOURS_RELEASE_JOBS_PER_MINUTE))
+    if steps or jobs:
+        logger.info("Released held work: steps=%s jobs=%s", steps, jobs)
+    return {"steps": steps, "jobs": jobs}
@@ -0,0 +1,70 @@
+"""
+Standalone background worker: engagement ticks and the durable job queue,
+without the HTTP server.
+
+    python -m app.worker
+
+Run one or more of these next to API processes started with
+RUN_BACKGROUND_WORKERS=false, so a heavy send wave no longer shares an event
+loop and connection pool with public funnel pages. The worker opens its own
+pool (WORKER_DB_POOL_MIN_SIZE / WORKER_DB_POOL_MAX_SIZE); concurrency comes
+from the same ENGAGEMENT_* and JOBS_* settings, applied per process.
+
+On SIGTERM/SIGINT it stops claiming work, waits up to
+WORKER_DRAIN_TIMEOUT_SECONDS for in-flight ticks, then flushes buffered
+events and closes transports and the pool. Work cut off at the deadline
+stays 'in_progress' and is recovered by the next worker to start.
+"""
+
+import asyncio
+import logging
+import signal
+
+import app.database as _db_mod
+from app import background
+from app.config import settings
+from app.database import close_pool, create_pool
+from app.services import email_transport, twilio_transport
+from app.services.event_sink import event_sink
+
+logger = logging.getLogger("signalforge.worker")
+
+
+async def run() -> None:
+    await create_pool(
+        min_size=settings.WORKER_DB_POOL_MIN_SIZE,
+        max_size=settings.WORKER_DB_POOL_MAX_SIZE,
+    )
+    await twilio_transport.init_transport()
+    await email_transport.init_transport()
+    event_sink.start(_db_mod.pool)
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, stop.set)
+
+    scheduler = await background.start()
+    logger.info("Worker running (pool max=%s); waiting for SIGTERM", settings.WORKER_DB_POOL_MAX_SIZE)
+    try:
+        await stop.wait()
+        logger.info("Shutdown requested; draining")
+        await background.drain(scheduler)
+    finally:
+        await event_sink.stop()
+        await twilio_transport.close_transport()
+        await email_transport.close_transport()
+        await close_pool()
+    logger.info("Worker stopped")
+
+
+def main() -> None:
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s %(levelname)s %(name)s: %(message)s",
+    )
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
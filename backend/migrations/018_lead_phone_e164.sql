@@ -0,0 +1,42 @@
+-- 018_lead_phone_e164.sql
+-- Normalised E.164 phone key on leads so inbound SMS and Twilio callbacks can
+-- resolve a lead with an index lookup instead of a regexp scan over every
+-- answers_json document.
+--
+-- The backfill mirrors app/core/phone.py::normalize_phone — keep them in sync.
+--
+-- The index is NOT unique: the same person can legitimately submit more than
+-- once per org (repeat enquiries, multiple funnels). Lookups take the most
+-- recent lead via ORDER BY created_at DESC LIMIT 1, which the trailing
+-- created_at column serves directly.
+-- Idempotent.
+
+ALTER TABLE leads ADD COLUMN IF NOT EXISTS phone_e164 TEXT NULL;
+
+-- Backfill existing rows
+UPDATE leads l
+   SET phone_e164 = CASE
+           WHEN s.raw LIKE '+%' AND length(s.digits) BETWEEN 8 AND 15 THEN '+' || s.digits
+           WHEN length(s.digits) = 10 THEN '+1' || s.digits
+           WHEN length(s.digits) = 11 AND left(s.digits, 1) = '1' THEN '+' || s.digits
+           ELSE NULL
+       END
+  FROM (
+        SELECT id,
+               btrim(answers_json->>'phone')                              AS raw,
+               regexp_replace(answers_json->>'phone', '[^0-9]', '', 'g')  AS digits
+          FROM leads
+         WHERE phone_e164 IS NULL
+           AND answers_json ? 'phone'
+       ) s
+ WHERE l.id = s.id;
+
+-- Lead lookup by phone, scoped to the org(s) owning the Twilio number
+CREATE INDEX IF NOT EXISTS idx_leads_org_phone_e164
+    ON leads (org_id, phone_e164, created_at DESC)
+    WHERE phone_e164 IS NOT NULL;
+
+-- Inbound org resolution: Twilio "To" number → funnel → org
+CREATE INDEX IF NOT EXISTS idx_funnels_twilio_from_number
+    ON funnels (twilio_from_number)
+    WHERE twilio_from_number IS NOT NULL;
@@ -0,0 +1,23 @@
+-- 019_engagement_step_claiming.sql
+-- Atomic claiming for engagement steps so several worker processes (uvicorn
+-- workers, replicas, the inline drain in process_automation) can run
+-- process_due_engagement_steps concurrently without double-sending.
+--
+-- Claim pattern mirrors call_retry_jobs: SELECT ... FOR UPDATE SKIP LOCKED
+-- inside a CTE, flipping status 'pending' -> 'in_progress' and stamping
+-- locked_by / locked_at. Rows a dead worker leaves 'in_progress' are reset by
+-- engagement_worker.recover_stuck_steps.
+-- Idempotent.
+
+ALTER TABLE engagement_steps ADD COLUMN IF NOT EXISTS locked_by TEXT        NULL;
+ALTER TABLE engagement_steps ADD COLUMN IF NOT EXISTS locked_at TIMESTAMPTZ NULL;
+
+-- Claim index: pending rows whose scheduled_for is due, ordered by time.
+CREATE INDEX IF NOT EXISTS idx_engagement_steps_due
+    ON engagement_steps (scheduled_for)
+    WHERE status = 'pending';
+
+-- Recovery index: rows a dead worker left 'in_progress'.
+CREATE INDEX IF NOT EXISTS idx_engagement_steps_stuck
+    ON engagement_steps (locked_at)
+    WHERE status = 'in_progress';
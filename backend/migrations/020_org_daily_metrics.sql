@@ -0,0 +1,229 @@
+-- 020_org_daily_metrics.sql
+-- Per-org daily rollup of lead metrics so dashboards read a few hundred
+-- pre-aggregated rows instead of scanning every lead on each request.
+--
+-- Rows are keyed by (org, lead creation day in UTC, utm_campaign). Each lead
+-- is counted once, in the bucket of the day it was created, with its *current*
+-- stage / score / contact / call state. Summing all rows of an org therefore
+-- reproduces the live aggregates over leads.
+--
+-- Maintained incrementally by AFTER triggers on leads: every insert, delete,
+-- or update of a tracked column subtracts the old row's contribution and adds
+-- the new one. rebuild_org_daily_metrics() recomputes from scratch; run it
+-- via `python -m app.services.metrics_rollup [--org <uuid>]`.
+--
+-- org_daily_metrics_apply() and rebuild_org_daily_metrics() encode the same
+-- bucket rules — keep them in sync. They also share the per-org advisory
+-- lock key (hashtext('org_daily_metrics'), hashtext(org_id::text)).
+-- Idempotent.
+
+CREATE TABLE IF NOT EXISTS org_daily_metrics (
+    org_id               UUID NOT NULL REFERENCES orgs(id) ON DELETE CASCADE,
+    day                  DATE NOT NULL,
+    utm_campaign         TEXT NOT NULL DEFAULT '',
+    leads                INT NOT NULL DEFAULT 0,
+    stage_new            INT NOT NULL DEFAULT 0,
+    stage_contacted      INT NOT NULL DEFAULT 0,
+    stage_qualified      INT NOT NULL DEFAULT 0,
+    stage_proposal       INT NOT NULL DEFAULT 0,
+    stage_won            INT NOT NULL DEFAULT 0,
+    stage_lost           INT NOT NULL DEFAULT 0,
+    ai_hot               INT NOT NULL DEFAULT 0,
+    ai_warm              INT NOT NULL DEFAULT 0,
+    ai_cold              INT NOT NULL DEFAULT 0,
+    ai_scored            INT NOT NULL DEFAULT 0,
+    ai_score_sum         BIGINT NOT NULL DEFAULT 0,
+    contacted            INT NOT NULL DEFAULT 0,
+    responded            INT NOT NULL DEFAULT 0,
+    response_seconds_sum DOUBLE PRECISION NOT NULL DEFAULT 0,
+    calls                INT NOT NULL DEFAULT 0,
+    calls_connected      INT NOT NULL DEFAULT 0,
+    won_value            NUMERIC(14,2) NOT NULL DEFAULT 0,
+    won_with_amount      INT NOT NULL DEFAULT 0,
+    qualified_value      NUMERIC(14,2) NOT NULL DEFAULT 0,
+    proposal_value       NUMERIC(14,2) NOT NULL DEFAULT 0,
+    updated_at           TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (org_id, day, utm_campaign)
+);
+
+-- Exact rolling 7-day lead count stays on leads; serve it from an index.
+-- The trailing id also gives the admin lead list its keyset ordering.
+CREATE INDEX IF NOT EXISTS idx_leads_org_created_id
+    ON leads (org_id, created_at DESC, id DESC);
+
+
+-- Add (p_sign = 1) or remove (p_sign = -1) one lead's contribution.
+CREATE OR REPLACE FUNCTION org_daily_metrics_apply(l leads, p_sign INT) RETURNS VOID AS $$
+DECLARE
+    st TEXT := COALESCE(l.stage, 'new');
+BEGIN
+    -- Shared per-org lock: deltas for one org never block each other, but
+    -- wait while rebuild_org_daily_metrics() holds that org exclusively.
+    PERFORM pg_advisory_xact_lock_shared(hashtext('org_daily_metrics'), hashtext(l.org_id::text));
+
+    INSERT INTO org_daily_metrics AS m (
+        org_id, day, utm_campaign, leads,
+        stage_new, stage_contacted, stage_qualified, stage_proposal, stage_won, stage_lost,
+        ai_hot, ai_warm, ai_cold, ai_scored, ai_score_sum,
+        contacted, responded, response_seconds_sum,
+        calls, calls_connected,
+        won_value, won_with_amount, qualified_value, proposal_value
+    ) VALUES (
+        l.org_id,
+        (COALESCE(l.created_at, NOW()) AT TIME ZONE 'UTC')::date,
+        COALESCE(l.source_json->>'utm_campaign', ''),
+        p_sign,
+        CASE WHEN st = 'new'       THEN p_sign ELSE 0 END,
+        CASE WHEN st = 'contacted' THEN p_sign ELSE 0 END,
+        CASE WHEN st = 'qualified' THEN p_sign ELSE 0 END,
+        CASE WHEN st = 'proposal'  THEN p_sign ELSE 0 END,
+        CASE WHEN st = 'won'       THEN p_sign ELSE 0 END,
+        CASE WHEN st = 'lost'      THEN p_sign ELSE 0 END,
+        CASE WHEN l.ai_score >= 70                    THEN p_sign ELSE 0 END,
+        CASE WHEN l.ai_score >= 40 AND l.ai_score < 70 THEN p_sign ELSE 0 END,
+        CASE WHEN l.ai_score < 40                     THEN p_sign ELSE 0 END,
+        CASE WHEN l.ai_score IS NOT NULL              THEN p_sign ELSE 0 END,
+        p_sign * COALESCE(l.ai_score, 0),
+        CASE WHEN COALESCE(l.contact_status, '') != '' THEN p_sign ELSE 0 END,
+        CASE WHEN l.last_contacted_at IS NOT NULL     THEN p_sign ELSE 0 END,
+        p_sign * COALESCE(EXTRACT(EPOCH FROM (l.last_contacted_at - l.created_at)), 0),
+        CASE WHEN COALESCE(l.call_status, '') != ''   THEN p_sign ELSE 0 END,
+        CASE WHEN l.call_status = 'completed'         THEN p_sign ELSE 0 END,
+        CASE WHEN st = 'won' THEN p_sign * COALESCE(l.deal_amount, 0) ELSE 0 END,
+        CASE WHEN st = 'won' AND l.deal_amount IS NOT NULL THEN p_sign ELSE 0 END,
+        CASE WHEN st = 'qualified' THEN p_sign * COALESCE(l.deal_amount, 0) ELSE 0 END,
+        CASE WHEN st = 'proposal'  THEN p_sign * COALESCE(l.deal_amount, 0) ELSE 0 END
+    )
+    ON CONFLICT (org_id, day, utm_campaign) DO UPDATE SET
+        leads                = m.leads                + EXCLUDED.leads,
+        stage_new            = m.stage_new            + EXCLUDED.stage_new,
+        stage_contacted      = m.stage_contacted      + EXCLUDED.stage_contacted,
+        stage_qualified      = m.stage_qualified      + EXCLUDED.stage_qualified,
+        stage_proposal       = m.stage_proposal       + EXCLUDED.stage_proposal,
+        stage_won            = m.stage_won            + EXCLUDED.stage_won,
+        stage_lost           = m.stage_lost           + EXCLUDED.stage_lost,
+        ai_hot               = m.ai_hot               + EXCLUDED.ai_hot,
+        ai_warm              = m.ai_warm              + EXCLUDED.ai_warm,
+        ai_cold              = m.ai_cold              + EXCLUDED.ai_cold,
+        ai_scored            = m.ai_scored            + EXCLUDED.ai_scored,
+        ai_score_sum         = m.ai_score_sum         + EXCLUDED.ai_score_sum,
+        contacted            = m.contacted            + EXCLUDED.contacted,
+        responded            = m.responded            + EXCLUDED.responded,
+        response_seconds_sum = m.response_seconds_sum + EXCLUDED.response_seconds_sum,
+        calls                = m.calls                + EXCLUDED.calls,
+        calls_connected      = m.calls_connected      + EXCLUDED.calls_connected,
+        won_value            = m.won_value            + EXCLUDED.won_value,
+        won_with_amount      = m.won_with_amount      + EXCLUDED.won_with_amount,
+        qualified_value      = m.qualified_value      + EXCLUDED.qualified_value,
+        proposal_value       = m.proposal_value       + EXCLUDED.proposal_value,
+        updated_at           = NOW();
+END;
+$$ LANGUAGE plpgsql;
+
+
+CREATE OR REPLACE FUNCTION org_daily_metrics_trg() RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM org_daily_metrics_apply(OLD, -1);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM org_daily_metrics_apply(NEW, 1);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS leads_org_daily_metrics_ins_del ON leads;
+CREATE TRIGGER leads_org_daily_metrics_ins_del
+    AFTER INSERT OR DELETE ON leads
+    FOR EACH ROW EXECUTE FUNCTION org_daily_metrics_trg();
+
+-- Only fire on updates that move a lead between buckets; the many
+-- tags / summary / owner updates do not touch the rollup.
+DROP TRIGGER IF EXISTS leads_org_daily_metrics_upd ON leads;
+CREATE TRIGGER leads_org_daily_metrics_upd
+    AFTER UPDATE OF org_id, created_at, source_json, stage, deal_amount, ai_score,
+                    contact_status, last_contacted_at, call_status
+    ON leads
+    FOR EACH ROW
+    WHEN (
+        OLD.org_id            IS DISTINCT FROM NEW.org_id OR
+        OLD.created_at        IS DISTINCT FROM NEW.created_at OR
+        OLD.source_json->>'utm_campaign' IS DISTINCT FROM NEW.source_json->>'utm_campaign' OR
+        OLD.stage             IS DISTINCT FROM NEW.stage OR
+        OLD.deal_amount       IS DISTINCT FROM NEW.deal_amount OR
+        OLD.ai_score          IS DISTINCT FROM NEW.ai_score OR
+        OLD.contact_status    IS DISTINCT FROM NEW.contact_status OR
+        OLD.last_contacted_at IS DISTINCT FROM NEW.last_contacted_at OR
+        OLD.call_status       IS DISTINCT FROM NEW.call_status
+    )
+    EXECUTE FUNCTION org_daily_metrics_trg();
+
+
+-- Recompute rollup rows from leads for one org (or all when NULL).
+-- Concurrent trigger deltas must queue behind the rebuild instead of being
+-- lost or double-counted, for the rest of the caller's transaction:
+--   one org   exclusive advisory lock on that org; other orgs keep writing
+--   all orgs  EXCLUSIVE lock on the rollup table
+CREATE OR REPLACE FUNCTION rebuild_org_daily_metrics(p_org_id UUID DEFAULT NULL) RETURNS INT AS $$
+DECLARE
+    n INT;
+BEGIN
+    IF p_org_id IS NULL THEN
+        LOCK TABLE org_daily_metrics IN EXCLUSIVE MODE;
+    ELSE
+        PERFORM pg_advisory_xact_lock(hashtext('org_daily_metrics'), hashtext(p_org_id::text));
+    END IF;
+
+    DELETE FROM org_daily_metrics WHERE p_org_id IS NULL OR org_id = p_org_id;
+
+    INSERT INTO org_daily_metrics (
+        org_id, day, utm_campaign, leads,
+        stage_new, stage_contacted, stage_qualified, stage_proposal, stage_won, stage_lost,
+        ai_hot, ai_warm, ai_cold, ai_scored, ai_score_sum,
+        contacted, responded, response_seconds_sum,
+        calls, calls_connected,
+        won_value, won_with_amount, qualified_value, proposal_value
+    )
+    SELECT
+        org_id,
+        (COALESCE(created_at, NOW()) AT TIME ZONE 'UTC')::date,
+        COALESCE(source_json->>'utm_campaign', ''),
+        COUNT(*),
+        COUNT(*) FILTER (WHERE COALESCE(stage, 'new') = 'new'),
+        COUNT(*) FILTER (WHERE stage = 'contacted'),
+        COUNT(*) FILTER (WHERE stage = 'qualified'),
+        COUNT(*) FILTER (WHERE stage = 'proposal'),
+        COUNT(*) FILTER (WHERE stage = 'won'),
+        COUNT(*) FILTER (WHERE stage = 'lost'),
+        COUNT(*) FILTER (WHERE ai_score >= 70),
+        COUNT(*) FILTER (WHERE ai_score >= 40 AND ai_score < 70),
+        COUNT(*) FILTER (WHERE ai_score < 40),
+        COUNT(ai_score),
+        COALESCE(SUM(ai_score), 0),
+        COUNT(*) FILTER (WHERE COALESCE(contact_status, '') != ''),
+        COUNT(last_contacted_at),
+        COALESCE(SUM(EXTRACT(EPOCH FROM (last_contacted_at - created_at))), 0),
+        COUNT(*) FILTER (WHERE COALESCE(call_status, '') != ''),
+        COUNT(*) FILTER (WHERE call_status = 'completed'),
+        COALESCE(SUM(deal_amount) FILTER (WHERE stage = 'won'), 0),
+        COUNT(deal_amount) FILTER (WHERE stage = 'won'),
+        COALESCE(SUM(deal_amount) FILTER (WHERE stage = 'qualified'), 0),
+        COALESCE(SUM(deal_amount) FILTER (WHERE stage = 'proposal'), 0)
+    FROM leads
+    WHERE p_org_id IS NULL OR org_id = p_org_id
+    GROUP BY 1, 2, 3;
+
+    GET DIAGNOSTICS n = ROW_COUNT;
+    RETURN n;
+END;
+$$ LANGUAGE plpgsql;
+
+
+-- Initial backfill (no-op once the rollup has been populated)
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM org_daily_metrics) THEN
+        PERFORM rebuild_org_daily_metrics(NULL);
+    END IF;
+END $$;
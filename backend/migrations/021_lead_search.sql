@@ -0,0 +1,27 @@
+-- 021_lead_search.sql
+-- Indexed admin lead search.
+--
+-- search_text is a lowercase blob of name, email, company and phone digits
+-- extracted from answers_json. It is a STORED generated column, so Postgres
+-- keeps it current on every insert/update and the ADD COLUMN backfills
+-- existing rows. A pg_trgm GIN index serves substring matches
+-- (LIKE '%term%') and similarity ranking without de-TOASTing answers_json.
+--
+-- app/services/lead_service.py::normalize_search_term maps user input onto
+-- this format — keep them in sync.
+-- Idempotent.
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+ALTER TABLE leads ADD COLUMN IF NOT EXISTS search_text TEXT
+    GENERATED ALWAYS AS (
+        lower(
+            COALESCE(answers_json->>'name', '')    || ' ' ||
+            COALESCE(answers_json->>'email', '')   || ' ' ||
+            COALESCE(answers_json->>'company', '') || ' ' ||
+            regexp_replace(COALESCE(answers_json->>'phone', ''), '[^0-9]', '', 'g')
+        )
+    ) STORED;
+
+CREATE INDEX IF NOT EXISTS idx_leads_search_text_trgm
+    ON leads USING gin (search_text gin_trgm_ops);
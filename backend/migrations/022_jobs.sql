@@ -0,0 +1,48 @@
+-- 022_jobs.sql
+-- Durable job queue for work that must survive a process restart: lead
+-- automation after a submission, delayed call retries, and future kinds.
+--
+-- Generalizes the call_retry_jobs design from the warderai fork: one table,
+-- rows typed by `kind` with a JSONB payload. Claiming uses SELECT ... FOR
+-- UPDATE SKIP LOCKED, so any number of worker processes can drain it.
+--
+-- Lifecycle:
+--   pending -> in_progress -> done
+--                          -> pending (failed, attempts left; run_at pushed back)
+--                          -> dead    (failed, attempts exhausted — dead letter)
+-- `attempts` counts claims, so a job that crashed its worker still burns an
+-- attempt once recovered.
+
+CREATE EXTENSION IF NOT EXISTS "uuid-ossp";
+
+CREATE TABLE IF NOT EXISTS jobs (
+    id              UUID        PRIMARY KEY DEFAULT uuid_generate_v4(),
+    kind            TEXT        NOT NULL,
+    payload         JSONB       NOT NULL DEFAULT '{}'::jsonb,
+    priority        SMALLINT    NOT NULL DEFAULT 100,   -- lower runs first
+    run_at          TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    status          TEXT        NOT NULL DEFAULT 'pending'
+        CHECK (status IN ('pending', 'in_progress', 'done', 'dead', 'cancelled')),
+    attempts        INT         NOT NULL DEFAULT 0,
+    max_attempts    INT         NOT NULL DEFAULT 5,
+    locked_by       TEXT        NULL,
+    locked_at       TIMESTAMPTZ NULL,
+    last_error      TEXT        NULL,
+    created_at      TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    updated_at      TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+-- Claim index: due pending rows, highest priority (lowest number) first.
+CREATE INDEX IF NOT EXISTS idx_jobs_due
+    ON jobs (priority, run_at)
+    WHERE status = 'pending';
+
+-- Recovery index: rows a dead worker left 'in_progress'.
+CREATE INDEX IF NOT EXISTS idx_jobs_stuck
+    ON jobs (locked_at)
+    WHERE status = 'in_progress';
+
+-- Dead-letter inspection from /admin/ops/jobs.
+CREATE INDEX IF NOT EXISTS idx_jobs_dead
+    ON jobs (kind, updated_at DESC)
+    WHERE status = 'dead';
@@ -0,0 +1,41 @@
+-- 023_engagement_step_notify.sql
+-- Wake the in-process engagement scheduler (services/engagement_scheduler.py)
+-- instead of polling. Whenever a step becomes pending — inserted by
+-- create_engagement_plan, rescheduled by reply branching, reset by stuck
+-- recovery — NOTIFY engagement_steps_due with its due time as epoch seconds.
+-- Resuming or re-activating a plan notifies with now() so its overdue steps
+-- run immediately.
+--
+-- NOTIFY is delivered on commit, so listeners never see rolled-back steps.
+-- A slow safety-net reload in the scheduler covers anything missed while no
+-- listener was connected.
+-- Idempotent.
+
+CREATE OR REPLACE FUNCTION engagement_steps_notify_trg() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify('engagement_steps_due', EXTRACT(EPOCH FROM NEW.scheduled_for)::text);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS engagement_steps_notify ON engagement_steps;
+CREATE TRIGGER engagement_steps_notify
+    AFTER INSERT OR UPDATE OF scheduled_for, status ON engagement_steps
+    FOR EACH ROW
+    WHEN (NEW.status = 'pending')
+    EXECUTE FUNCTION engagement_steps_notify_trg();
+
+CREATE OR REPLACE FUNCTION engagement_plans_notify_trg() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify('engagement_steps_due', EXTRACT(EPOCH FROM now())::text);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS engagement_plans_notify ON engagement_plans;
+CREATE TRIGGER engagement_plans_notify
+    AFTER UPDATE OF paused, status ON engagement_plans
+    FOR EACH ROW
+    WHEN (NEW.status = 'active' AND NEW.paused = false
+          AND (OLD.paused OR OLD.status <> 'active'))
+    EXECUTE FUNCTION engagement_plans_notify_trg();
@@ -0,0 +1,33 @@
+-- 024_engagement_plan_unique_active.sql
+-- At most one active engagement plan per lead, enforced by the database
+-- instead of create_engagement_plan's old check-then-insert (which two
+-- concurrent automation attempts could both pass). Plan creation now does
+-- INSERT ... ON CONFLICT (lead_id) WHERE status = 'active' DO NOTHING.
+--
+-- Existing duplicates are resolved first: the oldest active plan per lead is
+-- kept, later ones become 'superseded' and their unsent steps 'cancelled'.
+-- Idempotent.
+
+WITH ranked AS (
+    SELECT id,
+           row_number() OVER (PARTITION BY lead_id ORDER BY created_at, id) AS rn
+      FROM engagement_plans
+     WHERE status = 'active'
+),
+superseded AS (
+    UPDATE engagement_plans ep
+       SET status = 'superseded', updated_at = now()
+      FROM ranked
+     WHERE ep.id = ranked.id
+       AND ranked.rn > 1
+ RETURNING ep.id
+)
+UPDATE engagement_steps es
+   SET status = 'cancelled'
+  FROM superseded
+ WHERE es.plan_id = superseded.id
+   AND es.status IN ('pending', 'in_progress');
+
+CREATE UNIQUE INDEX IF NOT EXISTS uq_engagement_plans_active_lead
+    ON engagement_plans (lead_id)
+    WHERE status = 'active';
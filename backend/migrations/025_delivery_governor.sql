@@ -0,0 +1,93 @@
+-- 025_delivery_governor.sql
+-- Shared send limits for outbound providers (services/delivery_governor.py).
+--
+-- provider_limits holds one row per key — a Twilio account, a Twilio
+-- from-number, Twilio call placement, an SMTP host. Each row carries:
+--   * a token bucket (tokens, refilled by elapsed time at the caller's rate),
+--     so every replica draws from the same budget;
+--   * a circuit breaker (consecutive_failures, open_until): once a provider
+--     fails repeatedly, sends are deferred until open_until instead of each
+--     one waiting out a timeout.
+--
+-- governor_admit() checks and takes one token from every key in a single
+-- round trip: either all buckets pay or none do. It returns wait_seconds = 0
+-- when admitted, otherwise how long to defer and why. probing is true when
+-- an admitted send is the half-open probe of a tripped breaker, so the
+-- caller knows to report its outcome (healthy sends skip that write).
+--
+-- engagement_steps.send_attempts counts provider-side failures (timeouts,
+-- 5xx, 429) that deferred a step, so a persistently failing step eventually
+-- becomes 'failed'.
+-- Idempotent.
+
+CREATE TABLE IF NOT EXISTS provider_limits (
+    key                  TEXT             PRIMARY KEY,
+    tokens               DOUBLE PRECISION NOT NULL,
+    refilled_at          TIMESTAMPTZ      NOT NULL DEFAULT now(),
+    consecutive_failures INTEGER          NOT NULL DEFAULT 0,
+    open_until           TIMESTAMPTZ      NULL,
+    last_error           TEXT             NULL,
+    updated_at           TIMESTAMPTZ      NOT NULL DEFAULT now()
+);
+
+ALTER TABLE engagement_steps ADD COLUMN IF NOT EXISTS send_attempts INTEGER NOT NULL DEFAULT 0;
+
+CREATE OR REPLACE FUNCTION governor_admit(
+    p_keys       TEXT[],
+    p_capacities DOUBLE PRECISION[],
+    p_rates      DOUBLE PRECISION[],
+    p_probe_secs DOUBLE PRECISION
+) RETURNS TABLE (wait_seconds DOUBLE PRECISION, reason TEXT, probing BOOLEAN) AS $$
+DECLARE
+    i         INTEGER;
+    r         provider_limits%ROWTYPE;
+    available DOUBLE PRECISION;
+    wait      DOUBLE PRECISION := 0;
+    why       TEXT := NULL;
+    probe     BOOLEAN := false;
+    now_ts    TIMESTAMPTZ := clock_timestamp();
+BEGIN
+    INSERT INTO provider_limits (key, tokens)
+    SELECT k, c FROM unnest(p_keys, p_capacities) AS t(k, c)
+    ON CONFLICT (key) DO NOTHING;
+
+    -- Lock in key order so concurrent callers never deadlock
+    PERFORM 1 FROM provider_limits WHERE key = ANY (p_keys) ORDER BY key FOR UPDATE;
+
+    FOR i IN 1 .. array_length(p_keys, 1) LOOP
+        SELECT * INTO r FROM provider_limits WHERE key = p_keys[i];
+        IF r.open_until IS NOT NULL AND r.open_until > now_ts THEN
+            wait := GREATEST(wait, EXTRACT(EPOCH FROM r.open_until - now_ts));
+            why := 'circuit_open';
+        END IF;
+        probe := probe OR r.consecutive_failures > 0;
+        available := LEAST(p_capacities[i],
+                           r.tokens + EXTRACT(EPOCH FROM now_ts - r.refilled_at) * p_rates[i]);
+        IF available < 1 THEN
+            wait := GREATEST(wait, (1 - available) / p_rates[i]);
+            why := COALESCE(why, 'rate_limited');
+        END IF;
+    END LOOP;
+
+    IF wait > 0 THEN
+        RETURN QUERY SELECT wait, why, false;
+        RETURN;
+    END IF;
+
+    FOR i IN 1 .. array_length(p_keys, 1) LOOP
+        UPDATE provider_limits
+           SET tokens = LEAST(p_capacities[i],
+                              tokens + EXTRACT(EPOCH FROM now_ts - refilled_at) * p_rates[i]) - 1,
+               refilled_at = now_ts,
+               -- Half-open: a breaker past its cooldown lets this one send
+               -- through as a probe and holds the rest back until it reports.
+               open_until = CASE WHEN consecutive_failures > 0 AND open_until IS NOT NULL
+                                 THEN now_ts + make_interval(secs => p_probe_secs)
+                                 ELSE open_until END,
+               updated_at = now_ts
+         WHERE key = p_keys[i];
+    END LOOP;
+
+    RETURN QUERY SELECT 0::DOUBLE PRECISION, NULL::TEXT, probe;
+END;
+$$ LANGUAGE plpgsql;
@@ -0,0 +1,46 @@
+-- 026_outbound_messages.sql
+-- Outbox for outbound SMS/email (services/outbox.py).
+--
+-- A row is committed under a deterministic idempotency_key BEFORE the
+-- provider is called, and completed (status, provider_ref) right after it
+-- answers:
+--   engagement steps   step:<step_id>:<send_attempt>
+--   lead automation    lead:<lead_id>:auto_sms | auto_email
+--
+-- A second send under the same key — a retried job, a recovered step, a
+-- second worker — finds the row instead of calling the provider again:
+--   sending                  a send is (or was, before a crash) in flight
+--   sent / failed /          final; replayed to the caller
+--   skipped_missing_config
+--   unsent                   reconciled as never delivered; may be reclaimed
+--   unknown                  could not be verified; never resent
+--
+-- Rows left 'sending' past OUTBOX_RECONCILE_AFTER_SECONDS are reconciled
+-- by outbox.reconcile_in_flight: SMS against Twilio's message log
+-- (recipient, sender, body hash, time), email and calls marked unknown.
+-- Idempotent.
+
+CREATE TABLE IF NOT EXISTS outbound_messages (
+    id              UUID        PRIMARY KEY DEFAULT uuid_generate_v4(),
+    idempotency_key TEXT        NOT NULL UNIQUE,
+    channel         TEXT        NOT NULL,  -- sms | email
+    purpose         TEXT        NOT NULL,  -- engagement_step | auto_sms | auto_email
+    org_id          UUID        NULL REFERENCES orgs(id) ON DELETE CASCADE,
+    lead_id         UUID        NULL REFERENCES leads(id) ON DELETE CASCADE,
+    step_id         UUID        NULL REFERENCES engagement_steps(id) ON DELETE SET NULL,
+    recipient       TEXT        NULL,
+    sender          TEXT        NULL,
+    body_sha256     TEXT        NULL,
+    status          TEXT        NOT NULL DEFAULT 'sending',
+    provider_ref    TEXT        NULL,      -- Twilio message SID
+    error           TEXT        NULL,
+    started_at      TIMESTAMPTZ NOT NULL DEFAULT now(),
+    completed_at    TIMESTAMPTZ NULL
+);
+
+-- Reconcile sweep: rows still in flight, oldest first.
+CREATE INDEX IF NOT EXISTS idx_outbound_messages_in_flight
+    ON outbound_messages (started_at)
+    WHERE status = 'sending';
+
+CREATE INDEX IF NOT EXISTS idx_outbound_messages_lead_id ON outbound_messages (lead_id);
@@ -0,0 +1,28 @@
+-- 027_working_hours_holds.sql
+-- Timezone-aware working hours (services/working_hours.py).
+--
+-- funnels.timezone is an IANA name ('America/Chicago'); working_hours_start
+-- and working_hours_end are read in that zone. NULL falls back to
+-- WORKING_HOURS_DEFAULT_TIMEZONE.
+--
+-- Out-of-hours work is held, not skipped:
+--   engagement_steps  status 'held', scheduled_for = when the window opens
+--   jobs              status 'held', run_at        = when the window opens
+-- Held rows are invisible to the claim queries. The leader's release sweep
+-- returns due ones to 'pending' at a capped rate, oldest first, using the
+-- partial indexes below.
+-- Idempotent.
+
+ALTER TABLE funnels ADD COLUMN IF NOT EXISTS timezone TEXT NULL;
+
+ALTER TABLE jobs DROP CONSTRAINT IF EXISTS jobs_status_check;
+ALTER TABLE jobs ADD CONSTRAINT jobs_status_check
+    CHECK (status IN ('pending', 'in_progress', 'done', 'dead', 'cancelled', 'held'));
+
+CREATE INDEX IF NOT EXISTS idx_jobs_held
+    ON jobs (run_at)
+    WHERE status = 'held';
+
+CREATE INDEX IF NOT EXISTS idx_engagement_steps_held
+    ON engagement_steps (scheduled_for)
+    WHERE status = 'held';
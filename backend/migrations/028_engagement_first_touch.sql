@@ -0,0 +1,28 @@
+-- 028_engagement_first_touch.sql
+-- Keep a new lead's step 1 away from the engagement scheduler while the
+-- first-touch fast path (engagement_worker.schedule_first_touch) owns it.
+--
+-- Plans created by lead automation get step 1 with first_touch_until =
+-- scheduled_for + ENGAGEMENT_FIRST_TOUCH_GRACE_SECONDS. Until then the step
+-- sends no NOTIFY, is not loaded into the scheduler's window and is skipped
+-- by claim_due_steps, so its due time costs the leader no queue scan. The
+-- fast path claims it by plan id instead.
+--
+-- The fast path clears first_touch_until when it can't send the step (plan
+-- paused, shutdown); the column is in the trigger's UPDATE OF list, so that
+-- hands the step straight back to the scheduler. If the process dies
+-- without clearing it, the scheduler's window reload picks the step up
+-- once the grace period has passed.
+--
+-- Replaces the engagement_steps_notify trigger from 023.
+-- Idempotent.
+
+ALTER TABLE engagement_steps ADD COLUMN IF NOT EXISTS first_touch_until TIMESTAMPTZ NULL;
+
+DROP TRIGGER IF EXISTS engagement_steps_notify ON engagement_steps;
+CREATE TRIGGER engagement_steps_notify
+    AFTER INSERT OR UPDATE OF scheduled_for, status, first_touch_until ON engagement_steps
+    FOR EACH ROW
+    WHEN (NEW.status = 'pending'
+          AND (NEW.first_touch_until IS NULL OR NEW.first_touch_until <= now()))
+    EXECUTE FUNCTION engagement_steps_notify_trg();
@@ -13,6 +13,7 @@ import asyncpg
 # Allow importing from app
 sys.path.insert(0, os.path.dirname(__file__))
 
+from app.core.phone import normalize_phone
 from app.core.security import hash_password
 
 
@@ -578,14 +579,15 @@ async def main():
         for i, lead in enumerate(SAMPLE_LEADS):
             await conn.execute(
                 """
-                INSERT INTO leads (org_id, funnel_id, language, answers_json, source_json)
-                VALUES ($1, $2, $3, $4::jsonb, $5::jsonb)
+                INSERT INTO leads (org_id, funnel_id, language, answers_json, source_json, phone_e164)
+                VALUES ($1, $2, $3, $4::jsonb, $5::jsonb, $6)
                 """,
                 org_id,
                 funnel_id,
                 lead["language"],
                 json.dumps(lead["answers"]),
                 json.dumps(lead["source"]),
+                normalize_phone(lead["answers"].get("phone")),
             )
             print(f"  Lead {i + 1} created: {lead['answers']['name']}")
 
@@ -0,0 +1,42 @@
+"""
+Shared asyncpg stand-ins for the unit tests.
+
+fake_conn is an AsyncMock connection whose transaction() is synchronous and
+returns an async context manager, as asyncpg's does. fake_pool is a
+(pool, conn) pair whose pool.acquire() always hands back that connection.
+"""
+
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+
+class _FakePool:
+    """Minimal stand-in for an asyncpg pool whose acquire() returns one conn."""
+
+    def __init__(self, conn):
+        self._conn = conn
+
+    def acquire(self):
+        pool = self
+
+        class _Ctx:
+            async def __aenter__(self_inner):
+                return pool._conn
+
+            async def __aexit__(self_inner, *args):
+                return False
+
+        return _Ctx()
+
+
+@pytest.fixture
+def fake_conn():
+    conn = AsyncMock()
+    conn.transaction = MagicMock()
+    return conn
+
+
+@pytest.fixture
+def fake_pool(fake_conn):
+    return _FakePool(fake_conn), fake_conn
@@ -0,0 +1,124 @@
+"""Tests for dashboard metrics served from the org_daily_metrics rollup.
+
+Mocks asyncpg so they run without Postgres. They check that the dashboard
+costs one round trip against the rollup and that derived rates are computed
+from the aggregate row exactly as before. The trigger maintenance in
+migrations/020_org_daily_metrics.sql needs a live DB and is not covered;
+benchmarks/dashboard_metrics.py measures latency against a seeded database.
+"""
+
+from decimal import Decimal
+from unittest.mock import AsyncMock
+from uuid import uuid4
+
+import pytest
+
+from app.services.analytics_service import get_org_dashboard_metrics, get_pipeline_metrics
+from app.services.metrics_rollup import rebuild_org_daily_metrics
+
+
+def _row(**overrides) -> dict:
+    row = {
+        "total_leads": 200,
+        "leads_7d": 12,
+        "contacted": 50,
+        "ai_hot": 30,
+        "ai_warm": 60,
+        "ai_cold": 40,
+        "avg_resp": Decimal("93.456"),
+        "total_calls": 40,
+        "connected_calls": 10,
+        "actual_revenue": Decimal("12500.499"),
+        "won_deals": 3,
+        "lost_deals": 1,
+        "pipeline_value": Decimal("4000"),
+        "avg_deal_value": Decimal("5000"),
+        "close_rate_percent": Decimal("10"),
+    }
+    row.update(overrides)
+    return row
+
+
+@pytest.mark.asyncio
+async def test_dashboard_metrics_single_round_trip():
+    conn = AsyncMock()
+    conn.fetchrow = AsyncMock(return_value=_row())
+    org_id = str(uuid4())
+
+    metrics = await get_org_dashboard_metrics(conn, org_id)
+
+    conn.fetchrow.assert_awaited_once()
+    conn.fetchval.assert_not_called()
+    sql, arg = conn.fetchrow.await_args.args
+    assert "FROM org_daily_metrics" in sql
+    assert arg == org_id
+
+    assert metrics == {
+        "total_leads": 200,
+        "leads_last_7_days": 12,
+        "avg_response_seconds": 93.5,
+        "contacted_percent": 25.0,
+        "ai_hot_count": 30,
+        "ai_warm_count": 60,
+        "ai_cold_count": 40,
+        "call_connect_rate": 25.0,
+        "estimated_revenue": 100000.0,
+        "avg_deal_value": 5000.0,
+        "close_rate_percent": 10.0,
+        "actual_revenue": 12500.5,
+        "actual_close_rate": 75.0,
+        "won_deals": 3,
+        "lost_deals": 1,
+        "pipeline_value": 4000.0,
+    }
+
+
+@pytest.mark.asyncio
+async def test_dashboard_metrics_empty_org_has_no_division_by_zero():
+    conn = AsyncMock()
+    conn.fetchrow = AsyncMock(return_value=_row(
+        total_leads=0, leads_7d=0, contacted=0, ai_hot=0, ai_warm=0, ai_cold=0,
+        avg_resp=None, total_calls=0, connected_calls=0, actual_revenue=0,
+        won_deals=0, lost_deals=0, pipeline_value=0,
+        avg_deal_value=None, close_rate_percent=None,
+    ))
+
+    metrics = await get_org_dashboard_metrics(conn, str(uuid4()))
+
+    assert metrics["contacted_percent"] == 0
+    assert metrics["call_connect_rate"] == 0
+    assert metrics["actual_close_rate"] == 0
+    assert metrics["avg_response_seconds"] is None
+    assert metrics["estimated_revenue"] == 0
+
+
+@pytest.mark.asyncio
+async def test_pipeline_stage_totals_come_from_rollup():
+    conn = AsyncMock()
+    conn.fetchrow = AsyncMock(return_value={
+        "stage_new": 5, "stage_contacted": 3, "stage_qualified": 2,
+        "stage_proposal": 1, "stage_won": 3, "stage_lost": 1,
+        "qualified_value": Decimal("2000"), "proposal_value": Decimal("500"),
+        "won_value": Decimal("9000"), "won_with_amount": 2,
+    })
+    conn.fetchval = AsyncMock(side_effect=[None, 0, 0])
+    conn.fetch = AsyncMock(return_value=[])
+
+    metrics = await get_pipeline_metrics(conn, str(uuid4()))
+
+    assert "FROM org_daily_metrics" in conn.fetchrow.await_args.args[0]
+    assert metrics["totals"] == {"leads": 15, "won": 3, "lost": 1, "conversion_rate": 20.0}
+    assert metrics["pipeline"] == {"total_value": 2500.0, "won_value": 9000.0, "avg_deal_value": 4500.0}
+
+
+@pytest.mark.asyncio
+async def test_rebuild_calls_sql_function_in_transaction(fake_conn):
+    conn = fake_conn
+    conn.fetchval.return_value = 42
+    org_id = str(uuid4())
+
+    assert await rebuild_org_daily_metrics(conn, org_id) == 42
+    conn.transaction.assert_called_once()
+    sql, arg = conn.fetchval.await_args.args
+    assert "rebuild_org_daily_metrics($1::uuid)" in sql
+    assert arg == org_id
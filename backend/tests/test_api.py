@@ -5,7 +5,6 @@ These tests mock the database layer so they can run without a live Postgres inst
 Run with: pytest tests/test_api.py -v
 """
 
-import json
 from datetime import datetime, timezone
 from unittest.mock import AsyncMock, MagicMock, patch
 from uuid import uuid4
@@ -20,6 +19,8 @@ from app.main import app
 def mock_conn():
     """Create a mock asyncpg connection."""
     conn = AsyncMock()
+    # conn.transaction() is synchronous and returns an async context manager
+    conn.transaction = MagicMock()
     return conn
 
 
@@ -27,7 +28,8 @@ def mock_conn():
 def sample_funnel_row():
     org_id = uuid4()
     funnel_id = uuid4()
-    schema_json = json.dumps({
+    # JSONB columns arrive decoded via the pool's orjson codecs
+    schema_json = {
         "slug": "solar-prime",
         "languages": ["en", "es"],
         "steps": [
@@ -64,8 +66,8 @@ def sample_funnel_row():
                 ],
             },
         ],
-    })
-    branding = json.dumps({"primary_color": "#f59e0b"})
+    }
+    branding = {"primary_color": "#f59e0b"}
     return {
         "id": funnel_id,
         "org_id": org_id,
@@ -162,6 +164,12 @@ async def test_submit_lead_valid(override_db, sample_funnel_row_for_submit):
     body = resp.json()
     assert body["success"] is True
 
+    # Automation is enqueued in the lead insert's transaction
+    override_db.transaction.assert_called_once()
+    job_sql, kind, job_payload = override_db.fetchval.await_args_list[-1].args[:3]
+    assert "INSERT INTO jobs" in job_sql
+    assert (kind, job_payload) == ("lead_automation", {"lead_id": str(lead_id)})
+
 
 @pytest.mark.asyncio
 async def test_submit_lead_honeypot_rejected(override_db):
@@ -214,7 +222,7 @@ async def test_login_and_get_leads(override_db):
     lead_row = make_mock_record({
         "id": lead_id,
         "created_at": now,
-        "answers_json": json.dumps({"name": "Test", "phone": "1234567890", "service": "solar"}),
+        "answers_json": {"name": "Test", "phone": "1234567890", "service": "solar"},
         "language": "en",
         "score": None,
     })
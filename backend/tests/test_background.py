@@ -0,0 +1,77 @@
+"""Tests for background scheduling and graceful drain.
+
+The scheduler is a stub and ticks are plain coroutines, so these cover the
+drain contract: stop scheduling, let running ticks finish, cancel at the
+deadline, and make tick loops stop claiming new batches.
+"""
+
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from app import background
+from app.services import job_queue
+
+
+@pytest.fixture(autouse=True)
+def _reset_drain_state(monkeypatch):
+    monkeypatch.setattr(background, "_draining", False)
+    monkeypatch.setattr(background, "_inflight", set())
+
+
+@pytest.mark.asyncio
+async def test_drain_waits_for_running_tick():
+    finished = []
+    release = asyncio.Event()
+
+    async def tick():
+        await release.wait()
+        finished.append(True)
+
+    task = asyncio.create_task(background._tracked(tick)())
+    await asyncio.sleep(0)
+    scheduler = MagicMock()
+
+    drain = asyncio.create_task(background.drain(scheduler, timeout=5))
+    await asyncio.sleep(0)
+    assert background.draining()
+    scheduler.shutdown.assert_called_once_with(wait=False)
+    assert not drain.done()
+
+    release.set()
+    await drain
+    assert finished == [True] and task.done()
+
+
+@pytest.mark.asyncio
+async def test_drain_cancels_ticks_past_deadline():
+    async def stuck():
+        await asyncio.Event().wait()
+
+    task = asyncio.create_task(background._tracked(stuck)())
+    await asyncio.sleep(0)
+
+    await background.drain(MagicMock(), timeout=0.01)
+    await asyncio.sleep(0)
+
+    assert task.cancelled()
+
+
+@pytest.mark.asyncio
+async def test_job_loop_stops_claiming_while_draining(monkeypatch):
+    monkeypatch.setattr(background, "_draining", True)
+    claim = AsyncMock()
+    monkeypatch.setattr(job_queue, "claim_due", claim)
+
+    summary = await job_queue.run_due_jobs(MagicMock())
+
+    claim.assert_not_awaited()
+    assert summary["processed"] == 0
+
+
+def test_scheduler_registers_all_ticks():
+    scheduler = background.build_scheduler()
+    assert {job.id for job in scheduler.get_jobs()} == {
+        "leader_lease", "maintenance", "outbox_reconcile", "held_release", "job_worker",
+    }
@@ -0,0 +1,129 @@
+"""Tests for bridge call placement.
+
+Twilio is replaced by a transport whose place_call blocks until released;
+the governor is patched to admit everything. Working-hours holds are
+checked against a patched next_open().
+"""
+
+import asyncio
+from datetime import datetime, timezone
+from unittest.mock import AsyncMock
+from uuid import uuid4
+
+import pytest
+
+from app.services import call_service, delivery_governor, twilio_transport
+from app.services.delivery_governor import Admission
+from app.services.twilio_transport import CallResult
+
+_FUNNEL = {"rep_phone_number": "+15550001111", "twilio_from_number": "+15550000000"}
+
+
+class _SlowCalls:
+    def __init__(self):
+        self.release = asyncio.Event()
+        self.in_flight = 0
+        self.peak = 0
+
+    async def place_call(self, **kwargs):
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        await self.release.wait()
+        self.in_flight -= 1
+        return CallResult(status="initiated", sid="CA1")
+
+
+@pytest.mark.asyncio
+async def test_placements_are_bounded_and_do_not_block_the_loop(monkeypatch):
+    calls = _SlowCalls()
+    monkeypatch.setattr(twilio_transport, "get_transport", lambda: calls)
+    monkeypatch.setattr(delivery_governor, "admit_inline", AsyncMock(return_value=Admission()))
+    monkeypatch.setattr(delivery_governor, "record", AsyncMock())
+    monkeypatch.setattr(call_service.settings, "CALL_PLACEMENT_CONCURRENCY", 2)
+    monkeypatch.setattr(call_service, "_placement_slots", None)
+
+    tasks = [
+        asyncio.create_task(call_service.start_rep_call({"id": uuid4()}, dict(_FUNNEL), pool=None))
+        for _ in range(5)
+    ]
+    async with asyncio.timeout(1):
+        while calls.in_flight < 2:
+            await asyncio.sleep(0)  # the loop keeps running while calls are placed
+    assert call_service.call_stats["waiting"] == 3
+
+    calls.release.set()
+    assert await asyncio.gather(*tasks) == ["initiated"] * 5
+    assert calls.peak == 2
+    stats = call_service.placement_stats()
+    assert (stats["waiting"], stats["in_flight"]) == (0, 0)
+    assert stats["latency_ms"]["samples"] >= 5
+
+
+@pytest.mark.asyncio
+async def test_failed_placement_feeds_the_breaker(monkeypatch):
+    transport = AsyncMock()
+    transport.place_call.return_value = CallResult(status="failed", http_status=503, error="unavailable")
+    monkeypatch.setattr(twilio_transport, "get_transport", lambda: transport)
+    monkeypatch.setattr(delivery_governor, "admit_inline", AsyncMock(return_value=Admission()))
+    record = AsyncMock()
+    monkeypatch.setattr(delivery_governor, "record", record)
+
+    assert await call_service.start_rep_call({"id": uuid4()}, dict(_FUNNEL), pool=None) == "failed"
+    assert record.await_args.args[1] == "unavailable"
+    assert transport.place_call.await_args.kwargs["timeout"] == call_service.settings.CALL_PLACEMENT_TIMEOUT_SECONDS
+
+
+@pytest.mark.asyncio
+async def test_retry_outside_working_hours_is_held_not_dialled(monkeypatch, fake_pool):
+    opens_at = datetime(2026, 7, 2, 13, tzinfo=timezone.utc)
+    monkeypatch.setattr(call_service.working_hours, "next_open", lambda funnel, now=None: opens_at)
+    hold = AsyncMock()
+    monkeypatch.setattr(call_service.job_queue, "hold", hold)
+    start = AsyncMock()
+    monkeypatch.setattr(call_service, "start_rep_call", start)
+    pool, conn = fake_pool
+    conn.fetchrow.side_effect = [{"call_attempts": 1, "funnel_id": uuid4()}, dict(_FUNNEL)]
+
+    await call_service.run_call_retry_job(pool, {"lead_id": "lead-1"})
+
+    start.assert_not_awaited()
+    conn.execute.assert_not_awaited()  # the attempt is not spent
+    assert hold.await_args.args[1:] == ("call_retry", {"lead_id": "lead-1"}, opens_at)
+
+
+@pytest.mark.asyncio
+async def test_retry_held_back_by_governor_defers_the_same_job(monkeypatch, fake_pool):
+    monkeypatch.setattr(call_service.working_hours, "next_open", lambda funnel, now=None: None)
+    monkeypatch.setattr(call_service.delivery_governor, "denied_wait", lambda: 45.0)
+    monkeypatch.setattr(call_service, "start_rep_call", AsyncMock(return_value="deferred"))
+    enqueue = AsyncMock()
+    monkeypatch.setattr(call_service.job_queue, "enqueue", enqueue)
+    pool, conn = fake_pool
+    conn.fetchrow.side_effect = [{"id": "lead-1", "call_attempts": 1, "funnel_id": uuid4()}, dict(_FUNNEL)]
+
+    with pytest.raises(delivery_governor.DeliveryDeferred) as deferred:
+        await call_service.run_call_retry_job(pool, {"lead_id": "lead-1"})
+
+    assert deferred.value.wait_seconds == 45.0
+    enqueue.assert_not_awaited()  # no duplicate job
+    conn.execute.assert_not_awaited()  # not dialled, so no attempt spent
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("attempts_after, requeued", [(1, True), (2, False)])
+async def test_failed_retry_placement_enqueues_the_next_attempt(monkeypatch, fake_pool, attempts_after, requeued):
+    monkeypatch.setattr(call_service.working_hours, "next_open", lambda funnel, now=None: None)
+    monkeypatch.setattr(call_service, "start_rep_call", AsyncMock(return_value="failed"))
+    enqueue = AsyncMock()
+    monkeypatch.setattr(call_service.job_queue, "enqueue", enqueue)
+    pool, conn = fake_pool
+    conn.fetchrow.side_effect = [{"id": "lead-1", "call_attempts": 0, "funnel_id": uuid4()}, dict(_FUNNEL)]
+    conn.fetchval.return_value = attempts_after
+
+    await call_service.run_call_retry_job(pool, {"lead_id": "lead-1"})
+
+    assert "call_attempts = call_attempts + 1" in conn.fetchval.await_args.args[0]
+    assert enqueue.await_count == (1 if requeued else 0)
+    if requeued:
+        assert enqueue.await_args.args[1:] == ("call_retry", {"lead_id": "lead-1"})
+        assert enqueue.await_args.kwargs["delay_seconds"] == call_service.CALL_RETRY_DELAY_SECONDS
@@ -0,0 +1,44 @@
+"""Tests for the orjson json/jsonb codecs installed on every pool connection.
+
+The codecs are exercised directly; registering them on a real connection
+needs a live Postgres and is not covered here.
+"""
+
+from decimal import Decimal
+from unittest.mock import AsyncMock
+from uuid import uuid4
+
+import pytest
+
+from app.database import init_connection
+
+
+async def _codecs() -> dict:
+    conn = AsyncMock()
+    await init_connection(conn)
+    return {call.args[0]: call.kwargs for call in conn.set_type_codec.await_args_list}
+
+
+@pytest.mark.asyncio
+async def test_registers_binary_json_and_jsonb():
+    codecs = await _codecs()
+    assert set(codecs) == {"json", "jsonb"}
+    assert all(c["format"] == "binary" and c["schema"] == "pg_catalog" for c in codecs.values())
+
+
+@pytest.mark.asyncio
+async def test_jsonb_round_trip_with_version_byte():
+    jsonb = (await _codecs())["jsonb"]
+    lead_id = uuid4()
+    encoded = jsonb["encoder"]({"name": "Ana", "id": lead_id, "amount": Decimal("12.50")})
+
+    assert encoded[:1] == b"\x01"
+    assert jsonb["decoder"](encoded) == {"name": "Ana", "id": str(lead_id), "amount": 12.5}
+
+
+@pytest.mark.asyncio
+async def test_json_round_trip():
+    json_codec = (await _codecs())["json"]
+    assert json_codec["decoder"](json_codec["encoder"]([{"Plan": {"Plan Rows": 3}}])) == [
+        {"Plan": {"Plan Rows": 3}}
+    ]
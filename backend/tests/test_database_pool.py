@@ -0,0 +1,113 @@
+"""Tests for pool configuration, statement warmup and per-route connection accounting.
+
+No live Postgres: asyncpg.create_pool and the pool itself are replaced with
+mocks, so these cover what we pass to asyncpg and what get_db records, not
+asyncpg's own statement cache behaviour.
+"""
+
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+import asyncpg
+import pytest
+
+from app import database
+from app.services.engagement_worker import CLAIM_DUE_STEPS_SQL
+from app.services.lead_service import FUNNEL_BY_SLUG_SQL, LEAD_BY_ID_SQL
+
+
+def _request(method="GET", route_path="/admin/leads/{lead_id}", url_path="/admin/leads/42"):
+    return SimpleNamespace(
+        method=method,
+        scope={"route": SimpleNamespace(path=route_path)} if route_path else {},
+        url=SimpleNamespace(path=url_path),
+    )
+
+
+@pytest.mark.asyncio
+async def test_create_pool_uses_settings(monkeypatch):
+    create = AsyncMock(return_value="pool")
+    monkeypatch.setattr(database.asyncpg, "create_pool", create)
+    monkeypatch.setattr(database.settings, "DB_POOL_MAX_SIZE", 25)
+    monkeypatch.setattr(database.settings, "DB_STATEMENT_CACHE_SIZE", 0)
+    monkeypatch.setattr(database.settings, "DB_COMMAND_TIMEOUT", 0)
+
+    await database.create_pool()
+
+    kwargs = create.await_args.kwargs
+    assert kwargs["max_size"] == 25
+    assert kwargs["statement_cache_size"] == 0
+    assert kwargs["command_timeout"] is None
+    assert kwargs["init"] is database.init_connection
+    monkeypatch.setattr(database, "pool", None)
+
+
+@pytest.mark.asyncio
+async def test_init_connection_warms_hot_statements():
+    conn = AsyncMock()
+    await database.init_connection(conn)
+
+    warmed = [call.args[0] for call in conn.fetch.await_args_list]
+    assert warmed == [FUNNEL_BY_SLUG_SQL, LEAD_BY_ID_SQL, CLAIM_DUE_STEPS_SQL]
+    # The claim runs with LIMIT 0 so warmup never takes a step.
+    assert conn.fetch.await_args_list[2].args[2] == 0
+
+
+@pytest.mark.asyncio
+async def test_warmup_failure_does_not_fail_connection():
+    conn = AsyncMock()
+    conn.fetch.side_effect = asyncpg.UndefinedTableError("relation \"funnels\" does not exist")
+
+    await database.init_connection(conn)
+
+    assert conn.fetch.await_count == 3
+
+
+@pytest.mark.asyncio
+async def test_warmup_skipped_without_statement_cache(monkeypatch):
+    monkeypatch.setattr(database.settings, "DB_STATEMENT_CACHE_SIZE", 0)
+    conn = AsyncMock()
+    await database.init_connection(conn)
+    conn.fetch.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_get_db_records_wait_and_hold_per_route(monkeypatch, fake_pool):
+    pool, conn = fake_pool
+    usage = database.PoolUsage()
+    monkeypatch.setattr(database, "pool", pool)
+    monkeypatch.setattr(database, "pool_usage", usage)
+
+    gen = database.get_db(_request())
+    assert await gen.__anext__() is conn
+    assert usage.snapshot()[0]["in_use"] == 1
+    await gen.aclose()
+
+    [row] = usage.snapshot()
+    assert row["route"] == "GET /admin/leads/{lead_id}"
+    assert (row["requests"], row["in_use"]) == (1, 0)
+
+
+@pytest.mark.asyncio
+async def test_get_db_falls_back_to_url_path(monkeypatch, fake_pool):
+    usage = database.PoolUsage()
+    monkeypatch.setattr(database, "pool", fake_pool[0])
+    monkeypatch.setattr(database, "pool_usage", usage)
+
+    gen = database.get_db(_request(method="POST", route_path=None, url_path="/public/leads"))
+    await gen.__anext__()
+    await gen.aclose()
+
+    assert usage.snapshot()[0]["route"] == "POST /public/leads"
+
+
+def test_snapshot_orders_by_total_hold_time():
+    usage = database.PoolUsage()
+    for route, hold in [("GET /fast", 0.01), ("POST /slow", 4.0), ("GET /fast", 0.02)]:
+        usage.checkout(route, 0.0)
+        usage.checkin(route, hold)
+
+    rows = usage.snapshot()
+    assert [r["route"] for r in rows] == ["POST /slow", "GET /fast"]
+    assert rows[1]["requests"] == 2
+    assert rows[1]["hold_max_ms"] == 20.0
@@ -0,0 +1,145 @@
+"""Tests for the delivery governor and how the engagement worker obeys it.
+
+governor_admit() is a plpgsql function and the pool is a mock, so these
+cover the Python side — outcome classification, admission parsing, breaker
+bookkeeping and step deferral — not the bucket arithmetic in Postgres.
+"""
+
+from datetime import datetime, timezone
+from unittest.mock import AsyncMock
+from uuid import uuid4
+
+import pytest
+
+from app.services import delivery_governor, engagement_worker, twilio_transport
+from app.services.delivery_governor import Admission, classify
+from app.services.twilio_transport import SmsResult
+
+
+def test_classify_separates_retryable_from_permanent_failures():
+    assert classify(SmsResult(status="sent")) == "ok"
+    assert classify(SmsResult(status="failed", http_status=429)) == "throttled"
+    assert classify(SmsResult(status="failed", http_status=503)) == "unavailable"
+    assert classify(SmsResult(status="failed", error="timed out")) == "unavailable"
+    assert classify(SmsResult(status="failed", http_status=400)) == "rejected"
+    assert classify(SmsResult(status="skipped_missing_config")) == "skipped"
+
+
+def test_sms_buckets_cover_account_and_from_number(monkeypatch):
+    monkeypatch.setenv("TWILIO_ACCOUNT_SID", "AC1")
+
+    keys = [b.key for b in delivery_governor.sms_buckets("+15550000000")]
+
+    assert keys == ["twilio:AC1", "twilio:AC1:+15550000000"]
+
+
+@pytest.mark.asyncio
+async def test_admit_reads_wait_and_reason(fake_pool):
+    pool, conn = fake_pool
+    conn.fetchrow.return_value = {"wait_seconds": 12.5, "reason": "circuit_open", "probing": False}
+
+    admission = await delivery_governor.admit(delivery_governor.email_buckets(), pool)
+
+    assert not admission.admitted
+    assert (admission.wait_seconds, admission.reason) == (12.5, "circuit_open")
+    assert "governor_admit" in conn.fetchrow.await_args.args[0]
+
+
+@pytest.mark.asyncio
+async def test_admit_fails_open_when_governor_query_fails(fake_pool):
+    pool, conn = fake_pool
+    conn.fetchrow.side_effect = ConnectionError("db down")
+
+    assert (await delivery_governor.admit(delivery_governor.email_buckets(), pool)).admitted
+
+
+@pytest.mark.asyncio
+async def test_failure_counts_toward_breaker_and_probe_success_closes_it(fake_pool):
+    pool, conn = fake_pool
+
+    await delivery_governor.record("twilio:AC1", "unavailable", error="503", pool=pool)
+    assert "consecutive_failures + 1" in conn.execute.await_args.args[0]
+
+    conn.execute.reset_mock()
+    await delivery_governor.record("twilio:AC1", "ok", Admission(), pool=pool)
+    conn.execute.assert_not_awaited()  # healthy sends cost no write
+
+    await delivery_governor.record("twilio:AC1", "ok", Admission(probing=True), pool=pool)
+    assert "consecutive_failures = 0" in conn.execute.await_args.args[0]
+
+
+def _step(**overrides) -> dict:
+    step = {
+        "step_id": uuid4(), "plan_id": uuid4(), "step_order": 1, "channel": "sms",
+        "action_type": "send", "scheduled_for": datetime.now(timezone.utc),
+        "generated_content_json": {"sms_body": "hi"}, "send_attempts": 0,
+        "lead_id": uuid4(), "org_id": uuid4(), "funnel_id": uuid4(),
+        "paused": False, "plan_status": "active",
+    }
+    step.update(overrides)
+    return step
+
+
+def _worker_env(monkeypatch, fake_pool, admission: Admission, result: SmsResult | None = None):
+    pool, conn = fake_pool
+    conn.fetchrow.return_value = {"id": uuid4(), "twilio_from_number": "+15550000000",
+                                  "answers_json": {"phone": "+15551234567"}}
+    send = AsyncMock(return_value=result or SmsResult(status="sent"))
+    monkeypatch.setattr(twilio_transport, "get_transport", lambda: object())
+    monkeypatch.setattr(engagement_worker, "_send_sms", send)
+    monkeypatch.setattr(delivery_governor, "admit", AsyncMock(return_value=admission))
+    record = AsyncMock()
+    monkeypatch.setattr(delivery_governor, "record", record)
+    return pool, conn, send, record
+
+
+def _defer_calls(conn):
+    return [c for c in conn.execute.await_args_list if "scheduled_for = now() +" in c.args[0]]
+
+
+@pytest.mark.asyncio
+async def test_step_is_deferred_not_failed_when_governor_denies(monkeypatch, fake_pool):
+    pool, conn, send, _ = _worker_env(monkeypatch, fake_pool, Admission(wait_seconds=30, reason="circuit_open"))
+
+    status = await engagement_worker._execute_step(pool, _step())
+
+    assert status == "deferred"
+    send.assert_not_awaited()
+    (call,) = _defer_calls(conn)
+    assert call.args[2:] == (30.0, 0)  # own throttling does not use up attempts
+
+
+@pytest.mark.asyncio
+async def test_provider_outage_defers_with_backoff_until_attempts_run_out(monkeypatch, fake_pool):
+    pool, conn, _, record = _worker_env(
+        monkeypatch, fake_pool, Admission(), SmsResult(status="failed", http_status=503, error="unavailable"),
+    )
+
+    assert await engagement_worker._execute_step(pool, _step(send_attempts=1)) == "deferred"
+    (call,) = _defer_calls(conn)
+    assert call.args[2:] == (60.0, 1)
+    assert record.await_args.args[1] == "unavailable"
+
+    conn.execute.reset_mock()
+    last = engagement_worker.settings.GOVERNOR_MAX_SEND_ATTEMPTS - 1
+    assert await engagement_worker._execute_step(pool, _step(send_attempts=last)) == "failed"
+    assert not _defer_calls(conn)
+
+
+@pytest.mark.asyncio
+async def test_provider_states_hide_account_ids_errors_and_other_orgs_numbers(fake_pool):
+    pool, conn = fake_pool
+    row = {"tokens": 1.0, "consecutive_failures": 0, "open_until": None, "breaker": "closed"}
+    conn.fetch.side_effect = [
+        [{"twilio_from_number": "+15550000000"}],
+        [{**row, "key": k} for k in (
+            "smtp:smtp.example.com", "twilio:AC1", "twilio:AC1:+15550000000",
+            "twilio:AC1:+15559999999", "twilio-calls:AC1",
+        )],
+    ]
+
+    states = await delivery_governor.provider_states("org-1", pool)
+
+    assert [s["key"] for s in states] == ["smtp", "twilio", "twilio:+15550000000", "twilio-calls"]
+    assert all("last_error" not in s for s in states)
+    assert conn.fetch.await_args_list[0].args[1] == "org-1"
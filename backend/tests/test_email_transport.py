@@ -0,0 +1,89 @@
+"""Tests for the pooled SMTP transport.
+
+smtplib.SMTP is replaced with an in-memory fake so no socket is opened.
+"""
+
+import smtplib
+
+import pytest
+
+from app.services import email_transport
+from app.services.email_transport import SmtpTransport
+
+
+class _FakeSMTP:
+    instances: list["_FakeSMTP"] = []
+
+    def __init__(self, host, port, timeout=None):
+        self.sent = []
+        self.logged_in = False
+        _FakeSMTP.instances.append(self)
+
+    def starttls(self):
+        pass
+
+    def login(self, user, password):
+        self.logged_in = True
+
+    def noop(self):
+        return (250, b"OK")
+
+    def sendmail(self, from_addr, recipients, payload):
+        if "bounce@example.com" in recipients:
+            raise smtplib.SMTPRecipientsRefused({"bounce@example.com": (550, b"no")})
+        self.sent.append((from_addr, recipients))
+        return {}
+
+    def quit(self):
+        pass
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def fake_smtp(monkeypatch):
+    _FakeSMTP.instances = []
+    monkeypatch.setattr(email_transport.smtplib, "SMTP", _FakeSMTP)
+    return _FakeSMTP
+
+
+def _transport(pool_size=1) -> SmtpTransport:
+    return SmtpTransport("smtp.test", 587, "user", "pass", "team@example.com", pool_size=pool_size)
+
+
+@pytest.mark.asyncio
+async def test_consecutive_sends_reuse_one_authenticated_session(fake_smtp):
+    transport = _transport(pool_size=1)
+    results = await transport.send_many([
+        {"recipients": [f"lead{i}@example.com"], "subject": "Hi", "body": "Body"}
+        for i in range(5)
+    ])
+    await transport.aclose()
+
+    assert [r.status for r in results] == ["sent"] * 5
+    assert len(fake_smtp.instances) == 1
+    assert fake_smtp.instances[0].logged_in
+    assert len(fake_smtp.instances[0].sent) == 5
+
+
+@pytest.mark.asyncio
+async def test_failed_send_reports_status_and_discards_session(fake_smtp):
+    transport = _transport()
+    bad = await transport.send(["bounce@example.com"], "Hi", "Body")
+    good = await transport.send(["lead@example.com"], "Hi", "Body")
+    await transport.aclose()
+
+    assert bad.status == "failed" and "bounce@example.com" in bad.error
+    assert good.ok
+    # The session that raised is not returned to the pool
+    assert len(fake_smtp.instances) == 2
+
+
+@pytest.mark.asyncio
+async def test_module_send_skips_without_config(monkeypatch):
+    monkeypatch.setattr(email_transport, "_transport", None)
+    monkeypatch.delenv("SMTP_HOST", raising=False)
+
+    result = await email_transport.send_email(["lead@example.com"], "Hi", "Body")
+    assert result.status == "skipped_missing_config"
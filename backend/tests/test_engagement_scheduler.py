@@ -0,0 +1,118 @@
+"""Tests for the event-driven engagement scheduler.
+
+The pool, LISTEN connection and engagement tick are mocks, so these cover
+the scheduling decisions — window load, NOTIFY wakeups, firing due times,
+leader gating — not trigger delivery from Postgres.
+"""
+
+import asyncio
+import time
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from app.services.engagement_scheduler import CHANNEL, EngagementScheduler
+
+
+def _scheduler(fake_pool, due_times, leader=True, tick_result=None):
+    pool, db = fake_pool
+    db.fetch.return_value = [{"due": d} for d in due_times]
+    listener = AsyncMock()
+    listener.add_listener = AsyncMock()
+    listener.add_termination_listener = MagicMock()
+    listener.is_closed = MagicMock(return_value=False)
+
+    sched = EngagementScheduler()
+    sched._pool = lambda: pool
+    sched._is_leader = lambda: leader
+    sched._connect = AsyncMock(return_value=listener)
+    sched._tick = AsyncMock(return_value=tick_result or {"processed": 0})
+    return sched, db, listener
+
+
+@pytest.mark.asyncio
+async def test_leader_listens_and_loads_window(fake_pool):
+    future = time.time() + 120
+    sched, db, listener = _scheduler(fake_pool, [future])
+    sched._sleep = AsyncMock()
+
+    await sched.step()
+
+    listener.add_listener.assert_awaited_once()
+    assert listener.add_listener.await_args.args[0] == CHANNEL
+    db.fetch.assert_awaited_once()
+    assert sched._heap == [future]
+    sched._tick.assert_not_awaited()
+    slept = sched._sleep.await_args.args[0]
+    assert 110 < slept <= 120
+
+
+@pytest.mark.asyncio
+async def test_due_time_fires_engagement_tick(fake_pool):
+    sched, _, _ = _scheduler(fake_pool, [time.time() - 1, time.time() - 0.5, time.time() + 60])
+
+    await sched.step()
+
+    sched._tick.assert_awaited_once()
+    assert len(sched._heap) == 1  # both due entries collapsed into one tick
+
+
+@pytest.mark.asyncio
+async def test_tick_with_more_due_fires_again_immediately(fake_pool):
+    sched, _, _ = _scheduler(
+        fake_pool, [time.time() - 1], tick_result={"processed": 100, "batches": 1, "more_due": True}
+    )
+
+    await sched.step()
+    await sched.step()
+
+    assert sched._tick.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_drained_tick_does_not_fire_again_on_a_round_count(fake_pool):
+    sched, _, _ = _scheduler(
+        fake_pool, [time.time() - 1], tick_result={"processed": 100, "batches": 1, "more_due": False}
+    )
+
+    await sched.step()
+
+    assert sched._heap == []
+
+
+@pytest.mark.asyncio
+async def test_notify_wakes_sleeping_scheduler(fake_pool):
+    sched, _, _ = _scheduler(fake_pool, [])
+    await sched._attach()
+    await sched._load_window()
+    sleeping = asyncio.create_task(sched._sleep(60))
+    await asyncio.sleep(0)
+
+    due = time.time() + 30
+    sched._on_notify(None, 1, CHANNEL, str(due))
+    await asyncio.wait_for(sleeping, timeout=1)
+
+    assert sched._heap == [due]
+    assert sched.notifications == 1
+
+
+@pytest.mark.asyncio
+async def test_notify_beyond_window_is_left_to_reload(fake_pool):
+    sched, _, _ = _scheduler(fake_pool, [])
+    await sched._load_window()
+
+    sched._on_notify(None, 1, CHANNEL, str(time.time() + 3600))
+
+    assert sched._heap == []
+
+
+@pytest.mark.asyncio
+async def test_follower_holds_no_listener_and_makes_no_queries(fake_pool):
+    sched, db, _ = _scheduler(fake_pool, [time.time() - 1], leader=False)
+    sched._sleep = AsyncMock()
+
+    await sched.step()
+
+    sched._connect.assert_not_awaited()
+    db.fetch.assert_not_awaited()
+    sched._tick.assert_not_awaited()
@@ -0,0 +1,101 @@
+"""Tests for engagement plan creation.
+
+asyncpg is mocked, so these cover the statement shape — one plan INSERT,
+one COPY of steps, one batched event insert, all inside a transaction —
+and how conflicts on the active-plan unique index are reported. The index
+itself needs a live Postgres and is not covered here.
+"""
+
+from uuid import uuid4
+
+import pytest
+
+from app.services import engagement_service
+
+
+def _lead(**overrides) -> dict:
+    lead = {"id": uuid4(), "org_id": uuid4(), "funnel_id": None,
+            "answers_json": {"name": "Ana", "service": "solar"}}
+    lead.update(overrides)
+    return lead
+
+
+@pytest.mark.asyncio
+async def test_batch_creates_plans_steps_and_events_in_three_statements(fake_conn):
+    leads = [_lead(), _lead()]
+    rows = [{"id": uuid4(), "lead_id": lead["id"]} for lead in leads]
+    conn = fake_conn
+    conn.fetch.return_value = rows
+
+    plans = await engagement_service.create_engagement_plans(conn, leads)
+
+    conn.transaction.assert_called_once()
+    sql, lead_ids, _, _ = conn.fetch.await_args.args
+    assert "ON CONFLICT (lead_id) WHERE status = 'active' DO NOTHING" in sql
+    assert lead_ids == [str(lead["id"]) for lead in leads]
+
+    table = conn.copy_records_to_table.await_args
+    assert table.args == ("engagement_steps",)
+    assert len(table.kwargs["records"]) == 2 * len(engagement_service.DEFAULT_STEP_SCHEDULE)
+    assert conn.executemany.await_count == 1
+    assert len(conn.executemany.await_args.args[1]) == 2
+    conn.execute.assert_not_awaited()
+
+    assert set(plans) == {str(lead["id"]) for lead in leads}
+    assert all(p["existing"] is False and p["first_step_at"] for p in plans.values())
+
+
+@pytest.mark.asyncio
+async def test_batch_skips_leads_that_already_have_an_active_plan(fake_conn):
+    leads = [_lead(), _lead()]
+    conn = fake_conn
+    conn.fetch.return_value = [{"id": uuid4(), "lead_id": leads[0]["id"]}]
+
+    plans = await engagement_service.create_engagement_plans(conn, leads)
+
+    assert list(plans) == [str(leads[0]["id"])]
+    assert len(conn.copy_records_to_table.await_args.kwargs["records"]) == 4
+
+
+@pytest.mark.asyncio
+async def test_single_plan_returns_existing_on_conflict(fake_conn):
+    lead = _lead()
+    existing_id = uuid4()
+    conn = fake_conn
+    conn.fetch.return_value = []
+    conn.fetchval.return_value = existing_id
+
+    plan = await engagement_service.create_engagement_plan(
+        conn, lead_id=str(lead["id"]), org_id=str(lead["org_id"]), funnel_id=None, lead_data=lead,
+    )
+
+    assert plan == {"id": str(existing_id), "existing": True}
+    conn.copy_records_to_table.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_single_plan_failure_returns_none(fake_conn):
+    lead = _lead()
+    conn = fake_conn
+    conn.fetch.return_value = [{"id": uuid4(), "lead_id": lead["id"]}]
+    conn.copy_records_to_table.side_effect = RuntimeError("copy failed")
+
+    plan = await engagement_service.create_engagement_plan(
+        conn, lead_id=str(lead["id"]), org_id=str(lead["org_id"]), funnel_id=None, lead_data=lead,
+    )
+
+    assert plan is None
+
+
+@pytest.mark.asyncio
+async def test_first_touch_plan_reserves_only_step_one(fake_conn):
+    lead = _lead()
+    fake_conn.fetch.return_value = [{"id": uuid4(), "lead_id": lead["id"]}]
+
+    await engagement_service.create_engagement_plans(fake_conn, [lead], first_touch=True)
+
+    records = fake_conn.copy_records_to_table.await_args.kwargs["records"]
+    reserved = {r[1]: r[-1] for r in records}
+    grace = engagement_service.settings.ENGAGEMENT_FIRST_TOUCH_GRACE_SECONDS
+    assert (reserved[1] - records[0][4]).total_seconds() == grace
+    assert all(reserved[order] is None for order in (2, 3, 4))
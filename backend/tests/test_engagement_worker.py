@@ -0,0 +1,210 @@
+"""Tests for engagement step claiming and execution.
+
+These tests mock asyncpg so they can run without a live Postgres. They
+cover the properties we rely on for multi-worker safety:
+
+  1. Steps are claimed with FOR UPDATE SKIP LOCKED and stamped in_progress.
+  2. process_due_engagement_steps only executes what it claimed.
+  3. Claimed steps run concurrently under the per-channel limit.
+  4. The first-touch fast path claims one plan's step 1 by key, without
+     scanning the due queue.
+
+The actual SKIP LOCKED contention behaviour needs a live DB and is not
+covered here.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+from unittest.mock import AsyncMock, patch
+from uuid import uuid4
+
+import pytest
+
+from app.services import engagement_worker
+
+
+def _step(**overrides) -> dict:
+    step = {
+        "step_id": uuid4(),
+        "plan_id": uuid4(),
+        "step_order": 1,
+        "channel": "sms",
+        "action_type": "send",
+        "scheduled_for": datetime.now(timezone.utc),
+        "generated_content_json": {"sms_body": "hi"},
+        "lead_id": uuid4(),
+        "org_id": uuid4(),
+        "funnel_id": None,
+        "paused": False,
+        "plan_status": "active",
+    }
+    step.update(overrides)
+    return step
+
+
+@pytest.mark.asyncio
+async def test_claim_uses_skip_locked_and_marks_in_progress(fake_pool):
+    pool, conn = fake_pool
+    now = datetime.now(timezone.utc)
+    later, earlier = _step(scheduled_for=now), _step(scheduled_for=now - timedelta(seconds=5))
+    conn.fetch = AsyncMock(return_value=[later, earlier])
+
+    rows = await engagement_worker.claim_due_steps(pool, worker_id="w-1", limit=7)
+
+    sql, worker_id, limit = conn.fetch.await_args.args
+    assert "FOR UPDATE OF es SKIP LOCKED" in sql
+    assert "status    = 'in_progress'" in sql
+    assert (worker_id, limit) == ("w-1", 7)
+    # Returned in schedule order regardless of UPDATE ... RETURNING order
+    assert rows == [earlier, later]
+
+
+@pytest.mark.asyncio
+async def test_process_executes_only_claimed_steps(fake_pool):
+    pool, _ = fake_pool
+    claimed = [_step(), _step()]
+    execute = AsyncMock(side_effect=["sent", "failed"])
+
+    with patch.object(engagement_worker, "claim_due_steps", new=AsyncMock(return_value=claimed)), \
+         patch.object(engagement_worker, "_execute_step", new=execute):
+        summary = await engagement_worker.process_due_engagement_steps(pool)
+
+    assert execute.await_count == 2
+    assert {k: summary[k] for k in ("processed", "sent", "skipped_missing_config", "failed")} == {
+        "processed": 2, "sent": 1, "skipped_missing_config": 0, "failed": 1,
+    }
+    assert summary["batches"] == 1
+    assert summary["max_lag_seconds"] is not None
+
+
+@pytest.mark.asyncio
+async def test_process_runs_steps_concurrently_within_channel_limit(fake_pool, monkeypatch):
+    """Steps overlap in time, but never beyond the per-channel limit."""
+    pool, _ = fake_pool
+    monkeypatch.setattr(engagement_worker, "_global_limit", None)
+    monkeypatch.setattr(engagement_worker, "_channel_limits", {})
+    monkeypatch.setattr(engagement_worker, "_provider_limits", {})
+    monkeypatch.setattr(engagement_worker.settings, "ENGAGEMENT_SMS_CONCURRENCY", 3)
+
+    in_flight = peak = 0
+
+    async def slow_execute(p, step):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return "sent"
+
+    claimed = [_step() for _ in range(10)]
+    with patch.object(engagement_worker, "claim_due_steps", new=AsyncMock(return_value=claimed)), \
+         patch.object(engagement_worker, "_execute_step", new=slow_execute):
+        summary = await engagement_worker.process_due_engagement_steps(pool)
+
+    assert summary["sent"] == 10
+    assert peak == 3
+
+
+@pytest.mark.asyncio
+async def test_more_due_only_when_budget_runs_out_after_a_full_batch(fake_pool, monkeypatch):
+    pool, _ = fake_pool
+    full = [_step() for _ in range(engagement_worker.CLAIM_BATCH_SIZE)]
+    execute = AsyncMock(return_value="sent")
+
+    with patch.object(engagement_worker, "claim_due_steps", new=AsyncMock(side_effect=[full, []])), \
+         patch.object(engagement_worker, "_execute_step", new=execute):
+        drained = await engagement_worker.process_due_engagement_steps(pool)
+    assert drained["processed"] == engagement_worker.CLAIM_BATCH_SIZE
+    assert drained["more_due"] is False
+
+    monkeypatch.setattr(engagement_worker.settings, "ENGAGEMENT_TICK_BUDGET_SECONDS", 0)
+    claim = AsyncMock(return_value=full)
+    with patch.object(engagement_worker, "claim_due_steps", new=claim), \
+         patch.object(engagement_worker, "_execute_step", new=execute):
+        assert (await engagement_worker.process_due_engagement_steps(pool))["more_due"] is True
+    claim.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_process_noop_when_nothing_claimed(fake_pool):
+    pool, conn = fake_pool
+    with patch.object(engagement_worker, "claim_due_steps", new=AsyncMock(return_value=[])):
+        summary = await engagement_worker.process_due_engagement_steps(pool)
+
+    assert summary["processed"] == 0
+    conn.execute.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_recover_stuck_steps_parses_update_count(fake_pool):
+    pool, conn = fake_pool
+    conn.execute = AsyncMock(return_value="UPDATE 3")
+
+    assert await engagement_worker.recover_stuck_steps(pool, older_than_seconds=60) == 3
+    sql, secs = conn.execute.await_args.args
+    assert "status    = 'pending'" in sql
+    assert secs == 60
+
+
+@pytest.mark.asyncio
+async def test_first_touch_claims_by_plan_without_queue_scan(fake_pool, monkeypatch):
+    pool, conn = fake_pool
+    step = _step()
+    conn.fetchrow = AsyncMock(return_value=step)
+    execute = AsyncMock(return_value="sent")
+    monkeypatch.setattr(engagement_worker, "_execute_step", execute)
+    monkeypatch.setattr(engagement_worker, "dispatch_stats", dict.fromkeys(engagement_worker.dispatch_stats, 0))
+    scan = AsyncMock()
+    monkeypatch.setattr(engagement_worker, "claim_due_steps", scan)
+
+    engagement_worker.schedule_first_touch(pool, "plan-1", datetime.now(timezone.utc))
+    await asyncio.gather(*engagement_worker._first_touch_tasks)
+
+    sql, _, plan_id = conn.fetchrow.await_args.args
+    assert "es.step_order = 1" in sql and plan_id == "plan-1"
+    execute.assert_awaited_once_with(pool, step)
+    scan.assert_not_awaited()
+    assert engagement_worker.dispatch_stats["first_touch_dispatched"] == 1
+
+
+@pytest.mark.asyncio
+async def test_first_touch_preempted_when_step_already_claimed(fake_pool, monkeypatch):
+    pool, conn = fake_pool
+    conn.fetchrow = AsyncMock(return_value=None)
+    execute = AsyncMock()
+    monkeypatch.setattr(engagement_worker, "_execute_step", execute)
+    monkeypatch.setattr(engagement_worker, "dispatch_stats", dict.fromkeys(engagement_worker.dispatch_stats, 0))
+
+    engagement_worker.schedule_first_touch(pool, "plan-1", datetime.now(timezone.utc) - timedelta(seconds=5))
+    await asyncio.gather(*engagement_worker._first_touch_tasks)
+
+    execute.assert_not_awaited()
+    assert engagement_worker.dispatch_stats["first_touch_preempted"] == 1
+    # The reservation is dropped so the scheduler is notified for the step
+    sql, plan_ids = conn.execute.await_args.args
+    assert "first_touch_until = NULL" in sql and plan_ids == ["plan-1"]
+
+
+@pytest.mark.asyncio
+async def test_waiting_first_touch_is_cancelled_and_released_on_shutdown(fake_pool):
+    pool, conn = fake_pool
+    engagement_worker.schedule_first_touch(pool, "plan-1", datetime.now(timezone.utc) + timedelta(seconds=30))
+    tasks = list(engagement_worker._first_touch_tasks)
+
+    assert await engagement_worker.cancel_first_touches(pool) == 1
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+    assert all(t.cancelled() for t in tasks)
+    conn.fetchrow.assert_not_called()
+    sql, plan_ids = conn.execute.await_args.args
+    assert "first_touch_until = NULL" in sql and plan_ids == ["plan-1"]
+
+
+def test_scheduler_never_sees_a_reserved_first_step():
+    from app.services.engagement_scheduler import WINDOW_SQL
+
+    assert "es.first_touch_until <= now()" in engagement_worker.CLAIM_DUE_STEPS_SQL
+    assert "COALESCE(es.first_touch_until, es.scheduled_for)" in WINDOW_SQL
+    assert "first_touch_until = NULL" in engagement_worker.CLAIM_FIRST_STEP_SQL
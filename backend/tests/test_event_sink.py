@@ -0,0 +1,118 @@
+"""Tests for the buffered event writer.
+
+The pool is a mock, so these cover batching, flush triggers, backpressure,
+failure handling and the direct-write fallbacks — not COPY itself.
+"""
+
+import asyncio
+from unittest.mock import AsyncMock
+
+import asyncpg
+import pytest
+
+from app.services import engagement_service, event_service
+from app.services.event_sink import EventSink
+
+
+def _sink(monkeypatch, fake_pool, batch=200, max_buffer=5000, interval=60):
+    from app.services import event_sink as mod
+    monkeypatch.setattr(mod.settings, "EVENT_SINK_ENABLED", True)
+    monkeypatch.setattr(mod.settings, "EVENT_SINK_BATCH_SIZE", batch)
+    monkeypatch.setattr(mod.settings, "EVENT_SINK_MAX_BUFFER", max_buffer)
+    monkeypatch.setattr(mod.settings, "EVENT_SINK_FLUSH_INTERVAL_SECONDS", interval)
+    pool, conn = fake_pool
+    sink = EventSink()
+    sink.start(pool)
+    monkeypatch.setattr(event_service, "event_sink", sink)
+    monkeypatch.setattr(engagement_service, "event_sink", sink)
+    return sink, conn
+
+
+@pytest.mark.asyncio
+async def test_events_are_buffered_and_copied_in_one_batch(monkeypatch, fake_pool):
+    sink, conn = _sink(monkeypatch, fake_pool)
+
+    for event_type in ("routed", "ai_scored", "email_sent"):
+        await event_service.log_event(conn, "org", "lead", event_type, "success")
+    await engagement_service.log_engagement_event(conn, "lead", "org", "sms", "sent", "outbound")
+    conn.execute.assert_not_awaited()
+
+    await sink.stop()
+
+    calls = {c.args[0]: c.kwargs["records"] for c in conn.copy_records_to_table.await_args_list}
+    assert [r[2] for r in calls["automation_events"]] == ["routed", "ai_scored", "email_sent"]
+    assert len(calls["engagement_events"]) == 1
+    assert sink.written == 4
+
+
+@pytest.mark.asyncio
+async def test_batch_size_triggers_flush(monkeypatch, fake_pool):
+    sink, conn = _sink(monkeypatch, fake_pool, batch=2)
+
+    await event_service.log_event(conn, "org", "lead", "a", "success")
+    await event_service.log_event(conn, "org", "lead", "b", "success")
+    await asyncio.sleep(0.01)
+
+    conn.copy_records_to_table.assert_awaited_once()
+    await sink.stop()
+
+
+@pytest.mark.asyncio
+async def test_sync_write_bypasses_buffer(monkeypatch, fake_pool):
+    sink, conn = _sink(monkeypatch, fake_pool)
+
+    await engagement_service.log_engagement_event(
+        conn, "lead", "org", "system", "handoff_resolved", "system", sync=True,
+    )
+
+    conn.execute.assert_awaited_once()
+    assert sink.stats()["buffered"] == 0
+    await sink.stop()
+
+
+@pytest.mark.asyncio
+async def test_full_buffer_makes_emitter_wait_for_flush(monkeypatch, fake_pool):
+    sink, conn = _sink(monkeypatch, fake_pool, max_buffer=2)
+
+    for event_type in ("a", "b", "c"):
+        await event_service.log_event(conn, "org", "lead", event_type, "success")
+
+    assert sink.backpressure_waits == 1
+    assert sink.stats()["buffered"] == 1
+    await sink.stop()
+
+
+@pytest.mark.asyncio
+async def test_connection_failure_keeps_rows_for_next_flush(monkeypatch, fake_pool):
+    sink, conn = _sink(monkeypatch, fake_pool)
+    conn.copy_records_to_table.side_effect = [ConnectionError("db down"), None]
+
+    await event_service.log_event(conn, "org", "lead", "routed", "success")
+    assert await sink.flush() == 0
+    assert sink.stats()["buffered"] == 1
+
+    assert await sink.flush() == 1
+    await sink.stop()
+
+
+@pytest.mark.asyncio
+async def test_rejected_batch_is_retried_row_by_row(monkeypatch, fake_pool):
+    sink, conn = _sink(monkeypatch, fake_pool)
+    conn.copy_records_to_table.side_effect = asyncpg.ForeignKeyViolationError("lead deleted")
+    conn.execute.side_effect = [None, asyncpg.ForeignKeyViolationError("lead deleted")]
+
+    await event_service.log_event(conn, "org", "lead-1", "routed", "success")
+    await event_service.log_event(conn, "org", "gone", "routed", "success")
+
+    assert await sink.flush() == 1
+    assert sink.dropped == 1
+    await sink.stop()
+
+
+@pytest.mark.asyncio
+async def test_writes_directly_when_sink_not_running():
+    conn = AsyncMock()
+
+    await event_service.log_event(conn, "org", "lead", "routed", "success")
+
+    assert "INSERT INTO automation_events" in conn.execute.await_args.args[0]
@@ -0,0 +1,179 @@
+"""Tests for the durable job queue.
+
+asyncpg is mocked, so these cover the worker's control flow — handler
+dispatch, retry-with-backoff vs dead-lettering, deferral, batch draining —
+and the parameters we send. SKIP LOCKED behaviour under concurrent workers needs a
+live Postgres and is not covered here.
+"""
+
+from unittest.mock import AsyncMock
+from uuid import uuid4
+
+import pytest
+
+from app.services import job_queue
+from app.services.job_queue import JobKind
+
+
+def _job(kind="lead_automation", attempts=1, max_attempts=5, **payload) -> dict:
+    return {
+        "id": uuid4(),
+        "kind": kind,
+        "payload": payload or {"lead_id": str(uuid4())},
+        "attempts": attempts,
+        "max_attempts": max_attempts,
+    }
+
+
+def test_backoff_doubles_and_caps():
+    kind = JobKind("x", backoff_base_seconds=30, backoff_max_seconds=100)
+    assert [kind.backoff_seconds(n) for n in (1, 2, 3, 4)] == [30, 60, 100, 100]
+
+
+@pytest.mark.asyncio
+async def test_enqueue_uses_kind_defaults():
+    conn = AsyncMock()
+    conn.fetchval.return_value = uuid4()
+
+    await job_queue.enqueue(conn, "call_retry", {"lead_id": "L1"}, delay_seconds=120)
+
+    sql, kind, payload, priority, max_attempts, delay = conn.fetchval.await_args.args
+    assert "INSERT INTO jobs" in sql
+    assert (kind, payload, delay) == ("call_retry", {"lead_id": "L1"}, 120.0)
+    assert (priority, max_attempts) == (20, 1)
+
+
+@pytest.mark.asyncio
+async def test_enqueue_rejects_unknown_kind():
+    with pytest.raises(ValueError):
+        await job_queue.enqueue(AsyncMock(), "nope", {})
+
+
+@pytest.mark.asyncio
+async def test_failed_job_is_rescheduled_with_backoff(fake_pool):
+    pool, conn = fake_pool
+    job = _job(attempts=2)
+
+    assert await job_queue.mark_failed(pool, job, "boom") == "pending"
+
+    _, job_id, status, error, delay = conn.execute.await_args.args
+    assert (job_id, status, error) == (job["id"], "pending", "boom")
+    assert delay == job_queue.KINDS["lead_automation"].backoff_seconds(2)
+
+
+@pytest.mark.asyncio
+async def test_exhausted_job_is_dead_lettered(fake_pool):
+    pool, conn = fake_pool
+    assert await job_queue.mark_failed(pool, _job(attempts=5, max_attempts=5), "boom") == "dead"
+    assert conn.execute.await_args.args[2] == "dead"
+
+
+@pytest.mark.asyncio
+async def test_execute_job_dispatches_and_marks_done(fake_pool, monkeypatch):
+    pool, conn = fake_pool
+    handler = AsyncMock()
+    monkeypatch.setitem(job_queue._handlers, "lead_automation", handler)
+    job = _job(lead_id="L1")
+
+    assert await job_queue._execute_job(pool, job) == "done"
+
+    handler.assert_awaited_once_with(pool, {"lead_id": "L1"})
+    assert "status     = 'done'" in conn.execute.await_args.args[0]
+
+
+@pytest.mark.asyncio
+async def test_execute_job_handler_error_retries(fake_pool, monkeypatch):
+    pool, conn = fake_pool
+    monkeypatch.setitem(job_queue._handlers, "lead_automation", AsyncMock(side_effect=RuntimeError("claude down")))
+
+    assert await job_queue._execute_job(pool, _job(attempts=1)) == "retry"
+    assert conn.execute.await_args.args[3] == "RuntimeError: claude down"
+
+
+@pytest.mark.asyncio
+async def test_deferred_job_is_rescheduled_without_using_an_attempt(fake_pool, monkeypatch):
+    pool, conn = fake_pool
+    monkeypatch.setitem(
+        job_queue._handlers, "lead_automation",
+        AsyncMock(side_effect=job_queue.JobDeferred("held", wait_seconds=42)),
+    )
+
+    assert await job_queue._execute_job(pool, _job(attempts=5, max_attempts=5)) == "deferred"
+
+    sql, _, reason, wait = conn.execute.await_args.args
+    assert "attempts   = GREATEST(attempts - 1, 0)" in sql
+    assert "status     = 'pending'" in sql
+    assert (reason, wait) == ("held", 42.0)
+
+
+@pytest.mark.asyncio
+async def test_call_behind_open_breaker_is_deferred_not_dead_lettered(fake_pool, monkeypatch):
+    """An open breaker that outlasts max_attempts claims keeps deferring the
+    rep_call job to when the breaker reopens; it is never dead-lettered."""
+    from app.services import automation_service, delivery_governor, twilio_transport
+    from app.services.delivery_governor import Admission
+
+    pool, conn = fake_pool
+    lead = {"id": uuid4(), "org_id": uuid4(), "funnel_id": uuid4(), "call_status": "scheduled"}
+    funnel = {"id": lead["funnel_id"], "rep_phone_number": "+15550000001", "twilio_from_number": "+15550000002"}
+    conn.fetchrow = AsyncMock(side_effect=lambda sql, *args: funnel if "FROM funnels" in sql else lead)
+    monkeypatch.setattr(twilio_transport, "get_transport", lambda: object())
+    monkeypatch.setattr(
+        delivery_governor, "admit", AsyncMock(return_value=Admission(wait_seconds=90, reason="circuit_open")),
+    )
+    monkeypatch.setitem(job_queue._handlers, "rep_call", automation_service.run_rep_call_job)
+
+    spec = job_queue.KINDS["rep_call"]
+    for _ in range(spec.max_attempts + 2):
+        job = _job(kind="rep_call", attempts=spec.max_attempts, max_attempts=spec.max_attempts,
+                   lead_id=str(lead["id"]))
+        assert await job_queue._execute_job(pool, job) == "deferred"
+        assert conn.execute.await_args.args[3] == 90.0
+
+
+@pytest.mark.asyncio
+async def test_execute_job_without_handler_fails(fake_pool, monkeypatch):
+    pool, conn = fake_pool
+    monkeypatch.delitem(job_queue._handlers, "call_retry", raising=False)
+    assert await job_queue._execute_job(pool, _job(kind="call_retry", max_attempts=1)) == "dead"
+
+
+@pytest.mark.asyncio
+async def test_run_due_jobs_drains_full_batches(fake_pool, monkeypatch):
+    pool, _ = fake_pool
+    monkeypatch.setattr(job_queue.settings, "JOBS_CONCURRENCY", 2)
+    batches = [[_job(), _job()], [_job()]]
+    monkeypatch.setattr(job_queue, "claim_due", AsyncMock(side_effect=batches))
+    monkeypatch.setattr(job_queue, "_execute_job", AsyncMock(side_effect=["done", "retry", "dead"]))
+
+    summary = await job_queue.run_due_jobs(pool)
+
+    assert job_queue.claim_due.await_count == 2
+    assert {k: summary[k] for k in ("processed", "done", "retry", "dead")} == {
+        "processed": 3, "done": 1, "retry": 1, "dead": 1,
+    }
+
+
+def test_handlers_register_for_declared_kinds():
+    job_queue._load_handlers()
+    assert set(job_queue._handlers) == set(job_queue.KINDS)
+
+
+@pytest.mark.asyncio
+async def test_requeue_and_stats_only_reach_the_callers_org(fake_pool):
+    pool, conn = fake_pool
+    conn.execute.return_value = "UPDATE 0"  # another org's dead job
+    job_id, org_id = uuid4(), str(uuid4())
+
+    assert await job_queue.requeue(pool, job_id, org_id) is False
+    sql, *args = conn.execute.await_args.args
+    assert "l.org_id = $1" in sql and "payload->>'lead_id'" in sql
+    assert args == [org_id, job_id]
+
+    conn.fetch.return_value = [{"kind": "call_retry", "status": "dead", "n": 2}]
+    conn.fetchval.return_value = None
+    assert await job_queue.queue_stats(pool, org_id) == {
+        "kinds": {"call_retry": {"dead": 2}}, "oldest_due_lag_seconds": None,
+    }
+    for call in (conn.fetch.await_args, conn.fetchval.await_args):
+        assert "l.org_id = $1" in call.args[0] and call.args[1] == org_id
@@ -0,0 +1,134 @@
+"""Tests for keyset pagination, count modes and search of the admin lead list.
+
+Mocks asyncpg so they run without Postgres; index usage on a large org is
+not exercised here.
+"""
+
+from datetime import datetime, timedelta, timezone
+from unittest.mock import AsyncMock
+from uuid import uuid4
+
+import pytest
+from fastapi import HTTPException
+
+from app.services.lead_service import decode_lead_cursor, encode_lead_cursor, get_leads, normalize_search_term
+
+
+def _rows(n: int) -> list[dict]:
+    now = datetime.now(timezone.utc)
+    return [
+        {
+            "id": uuid4(),
+            "created_at": now - timedelta(minutes=i),
+            "answers_json": {"name": f"Lead {i}"},
+            "language": "en",
+            "score": None,
+            "tags": None,
+            "priority": None,
+            "ai_score": None,
+        }
+        for i in range(n)
+    ]
+
+
+def test_cursor_round_trip():
+    created_at, lead_id = datetime.now(timezone.utc), uuid4()
+    assert decode_lead_cursor(encode_lead_cursor(created_at, lead_id)) == (created_at, lead_id)
+
+
+def test_invalid_cursor_is_400():
+    with pytest.raises(HTTPException) as exc:
+        decode_lead_cursor("not-a-cursor")
+    assert exc.value.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_cursor_page_uses_keyset_and_skips_count():
+    conn = AsyncMock()
+    rows = _rows(3)
+    conn.fetch = AsyncMock(return_value=rows)
+    cursor = encode_lead_cursor(datetime.now(timezone.utc), uuid4())
+
+    items, total, next_cursor = await get_leads(
+        conn, str(uuid4()), per_page=2, cursor=cursor, count="none",
+    )
+
+    sql, *params = conn.fetch.await_args.args
+    assert "(l.created_at, l.id) < ($2, $3)" in sql
+    assert "ORDER BY l.created_at DESC, l.id DESC" in sql
+    assert params[-2:] == [3, 0]  # per_page + 1, no offset
+    conn.fetchval.assert_not_called()
+    assert total is None
+    assert len(items) == 2
+    assert next_cursor == encode_lead_cursor(rows[1]["created_at"], rows[1]["id"])
+
+
+@pytest.mark.asyncio
+async def test_last_page_has_no_next_cursor():
+    conn = AsyncMock()
+    conn.fetch = AsyncMock(return_value=_rows(2))
+
+    _, _, next_cursor = await get_leads(conn, str(uuid4()), per_page=5, count="none")
+
+    assert next_cursor is None
+
+
+@pytest.mark.asyncio
+async def test_estimated_count_reads_planner_rows():
+    conn = AsyncMock()
+    conn.fetch = AsyncMock(return_value=[])
+    conn.fetchval = AsyncMock(return_value=[{"Plan": {"Plan Rows": 2000000}}])
+
+    _, total, _ = await get_leads(conn, str(uuid4()), count="estimated", language="en")
+
+    assert total == 2000000
+    assert conn.fetchval.await_args.args[0].startswith("EXPLAIN (FORMAT JSON)")
+
+
+@pytest.mark.asyncio
+async def test_exact_count_is_cached_per_filter_set():
+    conn = AsyncMock()
+    conn.fetch = AsyncMock(return_value=[])
+    conn.fetchval = AsyncMock(return_value=42)
+    org_id = str(uuid4())
+
+    for page in (1, 2, 3):
+        _, total, _ = await get_leads(conn, org_id, page=page, funnel_id="f1")
+        assert total == 42
+    await get_leads(conn, org_id, funnel_id="f2")
+
+    assert conn.fetchval.await_count == 2
+
+
+@pytest.mark.parametrize(
+    "raw,expected",
+    [
+        ("  Jane DOE ", "jane doe"),
+        ("(310) 555-12", "31055512"),
+        ("+1 310", "1310"),
+        ("acme.io", "acme.io"),
+        ("", None),
+        (None, None),
+    ],
+)
+def test_normalize_search_term(raw, expected):
+    assert normalize_search_term(raw) == expected
+
+
+@pytest.mark.asyncio
+async def test_search_uses_trigram_column_and_ranks():
+    conn = AsyncMock()
+    conn.fetch = AsyncMock(return_value=_rows(3))
+
+    items, _, next_cursor = await get_leads(
+        conn, str(uuid4()), per_page=2, search="50%_off", count="none",
+    )
+
+    sql, *params = conn.fetch.await_args.args
+    assert "l.search_text LIKE $2" in sql
+    assert "answers_json->>'name' ILIKE" not in sql
+    assert "ORDER BY word_similarity($3, l.search_text) DESC" in sql
+    assert params[1] == "%50\\%\\_off%"
+    assert params[2] == "50%_off"
+    # Ranked results page by offset, never by cursor
+    assert len(items) == 2 and next_cursor is None
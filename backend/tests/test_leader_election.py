@@ -0,0 +1,84 @@
+"""Tests for advisory-lock leader election.
+
+The lock connection is an AsyncMock, so these cover the lease state
+machine — acquire, hold, step down on a failed ping, release — not
+Postgres' advisory lock semantics themselves.
+"""
+
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from app import background
+from app.services import leader_election
+from app.services.leader_election import LeaderLease, lock_key
+
+
+def _lease(conn) -> LeaderLease:
+    lease = LeaderLease("test:scheduler")
+    conn.is_closed = MagicMock(return_value=False)
+    conn.terminate = MagicMock()
+    lease._connect = AsyncMock(return_value=conn)
+    return lease
+
+
+def test_lock_key_is_stable_signed_64_bit():
+    assert lock_key("signalforge:scheduler") == lock_key("signalforge:scheduler")
+    assert lock_key("a") != lock_key("b")
+    assert -(2 ** 63) <= lock_key("a") < 2 ** 63
+
+
+@pytest.mark.asyncio
+async def test_follower_becomes_leader_when_lock_is_free():
+    conn = AsyncMock()
+    conn.fetchval.side_effect = [False, True]
+    lease = _lease(conn)
+
+    assert await lease.renew() is False
+    assert await lease.renew() is True
+
+    sql, key = conn.fetchval.await_args.args
+    assert "pg_try_advisory_lock" in sql and key == lease.key
+    lease._connect.assert_awaited_once()  # follower keeps its connection between tries
+
+
+@pytest.mark.asyncio
+async def test_leader_steps_down_when_ping_fails():
+    conn = AsyncMock()
+    conn.fetchval.side_effect = [True, ConnectionError("connection lost")]
+    lease = _lease(conn)
+
+    assert await lease.renew() is True
+    assert await lease.renew() is False
+
+    conn.close.assert_awaited_once()
+    assert lease._conn is None
+
+
+@pytest.mark.asyncio
+async def test_release_unlocks_and_closes():
+    conn = AsyncMock()
+    conn.fetchval.return_value = True
+    lease = _lease(conn)
+    await lease.renew()
+
+    await lease.release()
+
+    assert "pg_advisory_unlock" in conn.fetchval.await_args.args[0]
+    conn.close.assert_awaited_once()
+    assert lease.is_leader is False
+
+
+@pytest.mark.asyncio
+async def test_singleton_tick_runs_only_on_leader(monkeypatch):
+    lease = LeaderLease("test:scheduler")
+    monkeypatch.setattr(leader_election, "scheduler_lease", lease)
+    tick = AsyncMock()
+    guarded = background._leader_only(tick)
+
+    await guarded()
+    tick.assert_not_awaited()
+
+    lease.is_leader = True
+    await guarded()
+    tick.assert_awaited_once()
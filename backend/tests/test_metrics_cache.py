@@ -0,0 +1,99 @@
+"""Tests for the per-org dashboard metrics cache.
+
+Pure asyncio — no database involved. Covers TTL hits, singleflight
+coalescing of concurrent misses, and write-driven invalidation.
+"""
+
+import asyncio
+
+import pytest
+
+from app.services.metrics_cache import MetricsCache
+
+
+@pytest.mark.asyncio
+async def test_second_lookup_is_a_hit():
+    cache = MetricsCache(ttl_seconds=30)
+    calls = 0
+
+    async def compute():
+        nonlocal calls
+        calls += 1
+        return {"total_leads": 5}
+
+    assert await cache.get_or_compute("org-1", "dashboard", compute) == {"total_leads": 5}
+    assert await cache.get_or_compute("org-1", "dashboard", compute) == {"total_leads": 5}
+
+    assert calls == 1
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_share_one_computation():
+    cache = MetricsCache(ttl_seconds=30)
+    calls = 0
+    release = asyncio.Event()
+
+    async def compute():
+        nonlocal calls
+        calls += 1
+        await release.wait()
+        return calls
+
+    waiters = [asyncio.create_task(cache.get_or_compute("org-1", "pipeline", compute)) for _ in range(10)]
+    await asyncio.sleep(0)
+    release.set()
+    results = await asyncio.gather(*waiters)
+
+    assert calls == 1
+    assert results == [1] * 10
+    assert (cache.misses, cache.coalesced) == (1, 9)
+
+
+@pytest.mark.asyncio
+async def test_invalidate_drops_entry_and_discards_stale_computation():
+    cache = MetricsCache(ttl_seconds=30)
+    values = iter([1, 2, 3])
+    started, release = asyncio.Event(), asyncio.Event()
+
+    async def slow():
+        started.set()
+        await release.wait()
+        return next(values)
+
+    task = asyncio.create_task(cache.get_or_compute("org-1", "dashboard", slow))
+    await started.wait()
+    cache.invalidate("org-1")  # a lead write lands mid-computation
+    release.set()
+    assert await task == 1
+
+    # The pre-invalidation result was not stored
+    async def fast():
+        return next(values)
+
+    assert await cache.get_or_compute("org-1", "dashboard", fast) == 2
+    assert await cache.get_or_compute("org-1", "dashboard", fast) == 2
+    cache.invalidate("org-1")
+    assert await cache.get_or_compute("org-1", "dashboard", fast) == 3
+    assert cache.stats()["invalidations"] == 2
+
+
+@pytest.mark.asyncio
+async def test_errors_propagate_to_waiters_and_are_not_cached():
+    cache = MetricsCache(ttl_seconds=30)
+    release = asyncio.Event()
+
+    async def boom():
+        await release.wait()
+        raise RuntimeError("db down")
+
+    waiters = [asyncio.create_task(cache.get_or_compute("org-1", "dashboard", boom)) for _ in range(3)]
+    await asyncio.sleep(0)
+    release.set()
+    results = await asyncio.gather(*waiters, return_exceptions=True)
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+    async def ok():
+        return "fresh"
+
+    assert await cache.get_or_compute("org-1", "dashboard", ok) == "fresh"
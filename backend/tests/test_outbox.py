@@ -0,0 +1,123 @@
+"""Tests for the outbound message outbox.
+
+The pool is a mock, so these cover deliver_once's claim/replay/complete
+decisions and reconcile's verdicts — not the ON CONFLICT reclaim in SQL.
+"""
+
+from datetime import datetime, timezone
+from unittest.mock import AsyncMock
+from uuid import uuid4
+
+import pytest
+
+from app.services import engagement_worker, outbox, twilio_transport
+from app.services.delivery_governor import Admission
+from app.services.twilio_transport import SmsResult
+
+
+def _completed_status(conn):
+    (call,) = [c for c in conn.execute.await_args_list if "completed_at" in c.args[0]]
+    return call.args[2]
+
+
+@pytest.mark.asyncio
+async def test_first_send_claims_then_completes(fake_pool):
+    pool, conn = fake_pool
+    conn.fetchval.return_value = uuid4()
+    send = AsyncMock(return_value=SmsResult(status="sent", sid="SM1"))
+
+    delivery = await outbox.deliver_once(
+        "step:s1:0", send, channel="sms", purpose="engagement_step",
+        recipient="+15551234567", sender="+15550000000", body="hi", pool=pool,
+    )
+
+    assert (delivery.status, delivery.provider_ref, delivery.replayed) == ("sent", "SM1", False)
+    send.assert_awaited_once()
+    assert conn.fetchval.await_args.args[1] == "step:s1:0"
+    assert _completed_status(conn) == "sent"
+
+
+@pytest.mark.asyncio
+async def test_existing_key_replays_without_sending(fake_pool):
+    pool, conn = fake_pool
+    conn.fetchval.return_value = None  # key already claimed
+    conn.fetchrow.return_value = {"status": "sent", "provider_ref": "SM1", "error": None}
+    send = AsyncMock()
+
+    delivery = await outbox.deliver_once("step:s1:0", send, channel="sms", purpose="engagement_step", pool=pool)
+
+    assert (delivery.status, delivery.provider_ref, delivery.replayed) == ("sent", "SM1", True)
+    send.assert_not_awaited()
+
+    conn.fetchrow.return_value = {"status": "sending", "provider_ref": None, "error": None}
+    assert (await outbox.deliver_once("step:s1:0", send, channel="sms", purpose="engagement_step",
+                                      pool=pool)).status == "in_flight"
+    send.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_sms_without_provider_response_stays_in_flight(fake_pool):
+    pool, conn = fake_pool
+    conn.fetchval.return_value = uuid4()
+    send = AsyncMock(return_value=SmsResult(status="failed", error="read timeout"))
+
+    delivery = await outbox.deliver_once("lead:l1:auto_sms", send, channel="sms", purpose="auto_sms", pool=pool)
+
+    assert delivery.status == "in_flight"
+    assert _completed_status(conn) == "sending"
+
+
+@pytest.mark.asyncio
+async def test_reconcile_marks_found_sms_sent_and_missing_sms_unsent(monkeypatch, fake_pool):
+    started = datetime.now(timezone.utc)
+    found, missing, email = uuid4(), uuid4(), uuid4()
+    pool, conn = fake_pool
+    conn.fetch.return_value = [
+        {"id": found, "channel": "sms", "recipient": "+1555", "sender": "+1556",
+         "body_sha256": outbox.body_hash("hi"), "started_at": started},
+        {"id": missing, "channel": "sms", "recipient": "+1555", "sender": "+1556",
+         "body_sha256": outbox.body_hash("bye"), "started_at": started},
+        {"id": email, "channel": "email", "recipient": "a@example.com", "sender": None,
+         "body_sha256": None, "started_at": started},
+    ]
+    transport = AsyncMock()
+    transport.find_sent_message.side_effect = lambda to, frm, digest, since: (
+        "SM9" if digest == outbox.body_hash("hi") else None
+    )
+    monkeypatch.setattr(twilio_transport, "get_transport", lambda: transport)
+
+    summary = await outbox.reconcile_in_flight(pool)
+
+    assert (summary["sent"], summary["unsent"], summary["unknown"]) == (1, 1, 1)
+    settled = {c.args[1]: c.args[2:4] for c in conn.execute.await_args_list}
+    assert settled[found] == ("sent", "SM9")
+    assert settled[missing] == ("unsent", None)
+    assert settled[email] == ("unknown", None)
+
+
+@pytest.mark.asyncio
+async def test_step_whose_send_is_in_flight_is_deferred_without_using_an_attempt(monkeypatch, fake_pool):
+    pool, conn = fake_pool
+    conn.fetchrow.side_effect = [
+        {"id": uuid4(), "twilio_from_number": "+15550000000"},
+        {"id": uuid4(), "answers_json": {"phone": "+15551234567"}},
+        {"status": "sending", "provider_ref": None, "error": None},
+    ]
+    conn.fetchval.return_value = None
+    send = AsyncMock()
+    monkeypatch.setattr(twilio_transport, "get_transport", lambda: object())
+    monkeypatch.setattr(engagement_worker, "_send_sms", send)
+    monkeypatch.setattr(engagement_worker.delivery_governor, "admit", AsyncMock(return_value=Admission()))
+    step = {
+        "step_id": uuid4(), "plan_id": uuid4(), "step_order": 1, "channel": "sms",
+        "action_type": "send", "scheduled_for": datetime.now(timezone.utc),
+        "generated_content_json": {"sms_body": "hi"}, "send_attempts": 2,
+        "lead_id": uuid4(), "org_id": uuid4(), "funnel_id": uuid4(),
+        "paused": False, "plan_status": "active",
+    }
+
+    assert await engagement_worker._execute_step(pool, step) == "deferred"
+    send.assert_not_awaited()
+    assert conn.fetchval.await_args.args[1] == f"step:{step['step_id']}:2"
+    (defer,) = [c for c in conn.execute.await_args_list if "scheduled_for = now() +" in c.args[0]]
+    assert defer.args[2:] == (outbox.recheck_delay(), 0)
@@ -0,0 +1,102 @@
+"""Tests for E.164 phone normalisation and indexed lead lookup.
+
+Mocks asyncpg so they run without Postgres. The backfill SQL in
+migrations/018_lead_phone_e164.sql is not exercised here.
+"""
+
+from unittest.mock import AsyncMock
+from uuid import uuid4
+
+import pytest
+
+from app.core.phone import normalize_phone
+from app.services.lead_service import find_lead_by_phone
+
+
+@pytest.mark.parametrize(
+    "raw,expected",
+    [
+        ("3105551234", "+13105551234"),
+        ("(310) 555-1234", "+13105551234"),
+        ("1-310-555-1234", "+13105551234"),
+        ("+1 310 555 1234", "+13105551234"),
+        ("+44 20 7946 0958", "+442079460958"),
+        ("555-1234", None),
+        ("", None),
+        (None, None),
+    ],
+)
+def test_normalize_phone(raw, expected):
+    assert normalize_phone(raw) == expected
+
+
+@pytest.mark.asyncio
+async def test_find_lead_by_phone_scopes_to_destination_org():
+    org_id = uuid4()
+    conn = AsyncMock()
+    conn.fetchval = AsyncMock(return_value=[org_id])
+    conn.fetchrow = AsyncMock(return_value={"id": uuid4(), "org_id": org_id})
+
+    row = await find_lead_by_phone(conn, "(310) 555-1234", "+15550001111")
+
+    assert row["org_id"] == org_id
+    # Org resolved from the Twilio destination number, not all orgs
+    org_sql = conn.fetchval.await_args.args[0]
+    assert "FROM funnels" in org_sql
+    # Lead lookup uses the normalised key, never a regexp over answers_json
+    args = conn.fetchrow.await_args.args
+    assert "phone_e164 = $2" in args[0]
+    assert "regexp_replace" not in args[0]
+    assert args[1] == [org_id]
+    assert args[2] == "+13105551234"
+
+
+@pytest.mark.asyncio
+async def test_find_lead_by_phone_rejects_unnormalisable_number():
+    conn = AsyncMock()
+    assert await find_lead_by_phone(conn, "12345") is None
+    conn.fetchrow.assert_not_called()
+
+
+class _TwoOrgConn:
+    """Two orgs, each with a lead on the same phone, resolved by destination number."""
+
+    def __init__(self):
+        self.org_a, self.org_b = uuid4(), uuid4()
+        self.numbers = {"+15550001111": self.org_a, "+15550002222": self.org_b}
+        self.leads = [
+            {"id": uuid4(), "org_id": self.org_a, "funnel_id": uuid4(), "phone_e164": "+13105551234"},
+            {"id": uuid4(), "org_id": self.org_b, "funnel_id": uuid4(), "phone_e164": "+13105551234"},
+        ]
+        self.lead_queries = 0
+
+    async def fetchval(self, sql, numbers):
+        orgs = [self.numbers[n] for n in numbers if n in self.numbers]
+        return orgs or None
+
+    async def fetchrow(self, sql, org_ids, phone_e164):
+        self.lead_queries += 1
+        return next(
+            (l for l in self.leads if l["org_id"] in org_ids and l["phone_e164"] == phone_e164),
+            None,
+        )
+
+
+@pytest.mark.asyncio
+async def test_same_phone_in_two_orgs_matches_only_the_receiving_org():
+    conn = _TwoOrgConn()
+
+    row_a = await find_lead_by_phone(conn, "3105551234", "+15550001111")
+    row_b = await find_lead_by_phone(conn, "3105551234", "+15550002222")
+
+    assert row_a["org_id"] == conn.org_a
+    assert row_b["org_id"] == conn.org_b
+
+
+@pytest.mark.asyncio
+async def test_unresolved_destination_matches_no_org():
+    conn = _TwoOrgConn()
+
+    assert await find_lead_by_phone(conn, "3105551234") is None
+    assert await find_lead_by_phone(conn, "3105551234", "+15559999999") is None
+    assert conn.lead_queries == 0
@@ -0,0 +1,149 @@
+"""Regression tests: provider I/O must not hold pooled DB connections.
+
+A bounded fake pool stands in for asyncpg's (max_size connections, acquire
+waits when all are out). Providers are made to block until released, and
+while they are blocked we assert no connection is checked out and an
+unrelated "admin request" can still acquire one immediately.
+"""
+
+import asyncio
+from unittest.mock import AsyncMock
+from uuid import uuid4
+
+import pytest
+
+from app.api.public import inbound_sms
+from app.services import automation_service, twilio_transport
+from app.services.twilio_transport import SmsResult
+
+
+class _BoundedPool:
+    """Fake pool with asyncpg's blocking acquire() semantics."""
+
+    def __init__(self, conn, max_size: int):
+        self._conn = conn
+        self._slots = asyncio.Semaphore(max_size)
+        self.in_use = 0
+
+    def acquire(self):
+        pool = self
+
+        class _Ctx:
+            async def __aenter__(self_inner):
+                await pool._slots.acquire()
+                pool.in_use += 1
+                return pool._conn
+
+            async def __aexit__(self_inner, *args):
+                pool.in_use -= 1
+                pool._slots.release()
+                return False
+
+        return _Ctx()
+
+
+class _SlowProvider:
+    """Blocks every call until `release` is set; counts calls in flight."""
+
+    def __init__(self, result=None):
+        self.release = asyncio.Event()
+        self.waiting = 0
+        self._result = result
+
+    async def __call__(self, *args, **kwargs):
+        self.waiting += 1
+        await self.release.wait()
+        return self._result
+
+    async def all_waiting(self, n: int):
+        while self.waiting < n:
+            await asyncio.sleep(0)
+
+
+async def _assert_pool_available(pool: _BoundedPool):
+    assert pool.in_use == 0
+    async with asyncio.timeout(1):
+        async with pool.acquire():
+            pass
+
+
+@pytest.mark.asyncio
+async def test_slow_twilio_auto_replies_do_not_exhaust_pool(monkeypatch):
+    conn = AsyncMock()
+    conn.fetchrow.return_value = {
+        "id": uuid4(),
+        "org_id": uuid4(),
+        "twilio_from_number": "+15550000000",
+    }
+    conn.fetchval.return_value = uuid4()
+    pool = _BoundedPool(conn, max_size=2)
+
+    send_sms = _SlowProvider(SmsResult(status="sent", to="+15551234567", sid="SM1"))
+    monkeypatch.setattr(twilio_transport, "get_transport", lambda: AsyncMock(send_sms=send_sms))
+
+    payload = inbound_sms.InboundSmsPayload(From="+15551234567", To="+15550000000", Body="yes sounds good")
+    requests = [asyncio.create_task(inbound_sms.inbound_sms(payload, db_pool=pool)) for _ in range(10)]
+
+    async with asyncio.timeout(2):
+        await send_sms.all_waiting(10)
+    await _assert_pool_available(pool)
+
+    send_sms.release.set()
+    results = await asyncio.gather(*requests)
+    assert all(r["auto_reply_sent"] for r in results)
+
+
+@pytest.mark.asyncio
+async def test_handoff_notification_sent_without_connection(monkeypatch):
+    conn = AsyncMock()
+    conn.fetchrow.return_value = {"id": uuid4(), "org_id": uuid4(), "answers_json": {}}
+    conn.fetchval.return_value = "rep@example.com"
+    pool = _BoundedPool(conn, max_size=1)
+
+    notify = _SlowProvider()
+    monkeypatch.setattr(inbound_sms, "notify_handoff_required", notify)
+
+    payload = inbound_sms.InboundSmsPayload(From="+15551234567", To="+15550001111", Body="can I talk to a real person")
+    request = asyncio.create_task(inbound_sms.inbound_sms(payload, db_pool=pool))
+
+    async with asyncio.timeout(2):
+        await notify.all_waiting(1)
+    await _assert_pool_available(pool)
+
+    notify.release.set()
+    assert (await request)["classification"] == "human_needed"
+
+
+@pytest.mark.asyncio
+async def test_slow_ai_scoring_does_not_hold_connection(monkeypatch, fake_conn):
+    conn = fake_conn
+    conn.fetch.return_value = []  # lead already has an engagement plan
+    conn.fetchrow.return_value = {
+        "id": uuid4(),
+        "org_id": uuid4(),
+        "funnel_id": uuid4(),
+        "answers_json": {"name": "Ana"},
+        "routing_rules": None,
+        "ai_score": None,
+        "ai_summary": None,
+        "email_status": None,
+        "sms_status": None,
+        "call_status": None,
+        "auto_email_enabled": False,
+        "auto_sms_enabled": False,
+        "auto_call_enabled": False,
+    }
+    pool = _BoundedPool(conn, max_size=2)
+
+    claude = _SlowProvider((80, "Hot lead"))
+    monkeypatch.setattr(automation_service, "generate_ai_summary", claude)
+
+    runs = [asyncio.create_task(automation_service.process_automation(str(uuid4()), pool)) for _ in range(5)]
+
+    async with asyncio.timeout(2):
+        await claude.all_waiting(5)
+    await _assert_pool_available(pool)
+
+    claude.release.set()
+    await asyncio.gather(*runs)
+    assert pool.in_use == 0
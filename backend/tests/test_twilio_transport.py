@@ -0,0 +1,81 @@
+"""Tests for the shared Twilio transport.
+
+Uses httpx.MockTransport so no request leaves the process.
+"""
+
+import httpx
+import pytest
+
+from app.services import twilio_transport
+from app.services.twilio_transport import TwilioTransport
+
+
+def _transport(handler) -> TwilioTransport:
+    return TwilioTransport("AC123", "secret", http_transport=httpx.MockTransport(handler))
+
+
+@pytest.mark.asyncio
+async def test_send_sms_normalises_and_reuses_one_client():
+    seen = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(request)
+        return httpx.Response(201, json={"sid": f"SM{len(seen)}"})
+
+    transport = _transport(handler)
+    first = await transport.send_sms("(310) 555-1234", "hi", "+15550001111")
+    second = await transport.send_sms("3105551234", "again", "+15550001111")
+    await transport.aclose()
+
+    assert first.ok and first.sid == "SM1" and first.to == "+13105551234"
+    assert second.sid == "SM2"
+    assert seen[0].url.path == "/2010-04-01/Accounts/AC123/Messages.json"
+    assert b"To=%2B13105551234" in seen[0].content
+
+
+@pytest.mark.asyncio
+async def test_send_sms_reports_provider_rejection():
+    transport = _transport(lambda request: httpx.Response(429, text="Too Many Requests"))
+    result = await transport.send_sms("3105551234", "hi", "+15550001111")
+    await transport.aclose()
+
+    assert result.status == "failed"
+    assert result.http_status == 429
+
+
+@pytest.mark.asyncio
+async def test_module_send_skips_without_credentials(monkeypatch):
+    monkeypatch.setattr(twilio_transport, "_transport", None)
+    monkeypatch.delenv("TWILIO_ACCOUNT_SID", raising=False)
+    monkeypatch.delenv("TWILIO_AUTH_TOKEN", raising=False)
+
+    result = await twilio_transport.send_sms("3105551234", "hi", "+15550001111")
+    assert result.status == "skipped_missing_config"
+
+
+@pytest.mark.asyncio
+async def test_place_call_posts_status_events_and_reports_failures():
+    seen = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(request)
+        return httpx.Response(201, json={"sid": "CA1"})
+
+    transport = _transport(handler)
+    result = await transport.place_call(
+        "+15551234567", "+15550000000", "https://example.com/twiml",
+        status_callback="https://example.com/status", status_callback_events=["completed", "busy"],
+    )
+    await transport.aclose()
+
+    assert result.ok and result.sid == "CA1"
+    assert seen[0].url.path == "/2010-04-01/Accounts/AC123/Calls.json"
+    assert b"StatusCallbackEvent=completed&StatusCallbackEvent=busy" in seen[0].content
+
+    def timeout(request):
+        raise httpx.ReadTimeout("timed out", request=request)
+
+    transport = _transport(timeout)
+    result = await transport.place_call("+15551234567", "+15550000000", "https://example.com/twiml", timeout=0.1)
+    await transport.aclose()
+    assert result.status == "failed" and result.http_status is None
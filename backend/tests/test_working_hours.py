@@ -0,0 +1,75 @@
+"""Tests for timezone-aware working hours and holding out-of-hours work.
+
+Window arithmetic is pure; the hold/release paths run against mocked
+connections, so the SQL itself (SKIP LOCKED, partial indexes) is not covered.
+"""
+
+from datetime import datetime, timezone
+from unittest.mock import AsyncMock
+from uuid import uuid4
+
+import pytest
+
+from app.services import engagement_worker, twilio_transport, working_hours
+
+
+def _utc(*args) -> datetime:
+    return datetime(*args, tzinfo=timezone.utc)
+
+
+_NY = {"timezone": "America/New_York", "working_hours_start": 9, "working_hours_end": 19}
+
+
+def test_next_open_uses_the_funnel_timezone_across_dst():
+    # 12:00 UTC is 08:00 EDT in July and 07:00 EST in January
+    assert working_hours.next_open(_NY, _utc(2026, 7, 1, 12)) == _utc(2026, 7, 1, 13)
+    assert working_hours.next_open(_NY, _utc(2026, 1, 15, 12)) == _utc(2026, 1, 15, 14)
+    assert working_hours.next_open(_NY, _utc(2026, 7, 1, 14)) is None
+    # 23:30 UTC is 19:30 EDT: closed until 09:00 tomorrow
+    assert working_hours.next_open(_NY, _utc(2026, 7, 1, 23, 30)) == _utc(2026, 7, 2, 13)
+
+
+def test_overnight_and_unrestricted_hours():
+    night = {"timezone": "UTC", "working_hours_start": 22, "working_hours_end": 6}
+    assert working_hours.next_open(night, _utc(2026, 7, 2, 3)) is None  # inside yesterday's window
+    assert working_hours.next_open(night, _utc(2026, 7, 2, 12)) == _utc(2026, 7, 2, 22)
+    assert working_hours.next_open({"working_hours_start": 9, "working_hours_end": 9}, _utc(2026, 7, 2, 3)) is None
+    assert working_hours.next_open({}, _utc(2026, 7, 2, 3)) is None
+
+
+@pytest.mark.asyncio
+async def test_out_of_hours_sms_step_is_held_until_the_window_opens(monkeypatch, fake_pool):
+    opens_at = _utc(2026, 7, 2, 13)
+    monkeypatch.setattr(working_hours, "next_open", lambda funnel, now=None: opens_at)
+    send = AsyncMock()
+    monkeypatch.setattr(engagement_worker, "_send_sms", send)
+    monkeypatch.setattr(twilio_transport, "get_transport", lambda: object())
+    pool, conn = fake_pool
+    conn.fetchrow.return_value = {"id": uuid4(), **_NY, "answers_json": {"phone": "+15551234567"}}
+    step = {
+        "step_id": uuid4(), "plan_id": uuid4(), "step_order": 2, "channel": "sms",
+        "action_type": "send", "scheduled_for": _utc(2026, 7, 2, 3),
+        "generated_content_json": {"sms_body": "hi"}, "send_attempts": 0,
+        "lead_id": uuid4(), "org_id": uuid4(), "funnel_id": uuid4(),
+        "paused": False, "plan_status": "active",
+    }
+
+    assert await engagement_worker._execute_step(pool, step) == "held"
+    send.assert_not_awaited()
+    (hold,) = [c for c in conn.execute.await_args_list if "status = 'held'" in c.args[0]]
+    assert hold.args[1:] == (str(step["step_id"]), opens_at)
+
+
+@pytest.mark.asyncio
+async def test_release_pass_is_a_slice_of_the_per_minute_budget(monkeypatch, fake_pool):
+    pool, conn = fake_pool
+    conn.execute.return_value = "UPDATE 7"
+    monkeypatch.setattr(working_hours.settings, "WORKING_HOURS_RELEASE_STEPS_PER_MINUTE", 300)
+    monkeypatch.setattr(working_hours.settings, "WORKING_HOURS_RELEASE_JOBS_PER_MINUTE", 3)
+
+    released = await working_hours.release_held_work(pool)
+
+    assert released == {"steps": 7, "jobs": 7}
+    steps_call, jobs_call = conn.execute.await_args_list
+    assert "engagement_steps" in steps_call.args[0] and steps_call.args[1] == 50
+    assert "FROM jobs" in jobs_call.args[0] and jobs_call.args[1] == 1
@@ -12,6 +12,7 @@ from fastapi import APIRouter, Depends
 from app.core.auth import resolve_active_org_id
 from app.database import get_db, pool as db_pool
 from app.models.schemas import HandoffQueueItem, HandoffQueueResponse
+from app.services import call_service
 from app.services.engagement_worker import process_due_engagement_steps
 
 logger = logging.getLogger(__name__)
@@ -34,6 +35,14 @@ async def run_engagement_worker(
     return {"status": "ok", **summary}
 
 
+@router.get("/ops/calls")
+async def get_call_placement_stats(
+    org_id: str = Depends(resolve_active_org_id),
+):
+    """Bridge call placement counters and latency (this process)."""
+    return call_service.placement_stats()
+
+
 @router.get("/ops/handoffs", response_model=HandoffQueueResponse)
 async def get_handoff_queue(
     org_id: str = Depends(resolve_active_org_id),
@@ -138,17 +138,26 @@ async def status_callback(
             # The actual retry fires on the next APScheduler tick (main.py).
             if mapped_status in ("failed", "no-answer", "busy"):
                 row = await conn.fetchrow(
-                    "SELECT id, funnel_id, call_attempts FROM leads WHERE id = $1",
+                    """
+                    SELECT l.id, l.funnel_id, l.call_attempts,
+                           f.call_retry_max_attempts, f.call_retry_base_delay_seconds,
+                           f.call_retry_max_delay_seconds
+                      FROM leads l
+                      LEFT JOIN funnels f ON f.id = l.funnel_id
+                     WHERE l.id = $1
+                    """,
                     lead_id,
                 )
-                if row and (row["call_attempts"] or 0) < 2:
-                    from app.services.call_service import schedule_retry
+                if row:
+                    from app.services.call_service import retry_policy, schedule_retry
 
+                    # schedule_retry enforces the funnel's attempt cap
                     await schedule_retry(
                         lead_id=str(row["id"]),
                         funnel_id=str(row["funnel_id"]),
                         current_attempts=row["call_attempts"] or 0,
                         pool=pool,
+                        policy=retry_policy(dict(row)),
                     )
 
             # Auto text-back for missed calls
@@ -0,0 +1,177 @@
+"""
+Background work: the engagement worker, call retries and their
+recovery/compaction cadence.
+
+Shared by the API process (when RUN_BACKGROUND_WORKERS is on) and the
+standalone worker (`python -m app.worker`). Ticks are tracked so shutdown
+can stop scheduling and wait for in-flight ticks to finish.
+
+Every tick is a cluster-wide singleton and runs only in the process holding
+the scheduler leader lease (services/leader_election.py). The engagement
+worker does not claim its rows, and one retry poller keeps call_retry_jobs
+at one claim query per tick however many processes run; retry throughput
+comes from CALL_RETRY_CONCURRENCY instead.
+"""
+
+import asyncio
+import logging
+import os
+import socket
+
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+
+import app.database as _db_mod
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+_inflight: set[asyncio.Task] = set()
+_draining = False
+
+
+def draining() -> bool:
+    """True once shutdown has begun."""
+    return _draining
+
+
+def set_worker_id() -> str:
+    """Identify this process in call_retry_jobs.locked_by.
+
+    Uniqueness only matters with more than one process; pid+host is enough
+    to tell restarts apart in logs.
+    """
+    from app.services import call_retry_queue
+
+    worker_id = f"{socket.gethostname()}-{os.getpid()}"
+    call_retry_queue.WORKER_ID = worker_id
+    return worker_id
+
+
+async def recover_stuck_work() -> None:
+    """Reset call_retry rows left 'in_progress' by a crashed process."""
+    from app.services import call_retry_queue
+
+    try:
+        await call_retry_queue.recover_stuck(_db_mod.pool)
+    except Exception as exc:
+        logger.error("call_retry startup recovery failed: %s", exc)
+
+
+def _leader_only(fn):
+    from app.services.leader_election import scheduler_lease
+
+    async def run():
+        if scheduler_lease.is_leader:
+            await fn()
+
+    run.__name__ = fn.__name__
+    return run
+
+
+async def _renew_lease():
+    from app.services.leader_election import scheduler_lease
+    await scheduler_lease.renew()
+
+
+def _tracked(fn):
+    async def run():
+        task = asyncio.current_task()
+        _inflight.add(task)
+        try:
+            await fn()
+        finally:
+            _inflight.discard(task)
+
+    run.__name__ = fn.__name__
+    return run
+
+
+async def _run_engagement_worker():
+    try:
+        from app.services.engagement_worker import process_due_engagement_steps
+        result = await process_due_engagement_steps(_db_mod.pool)
+        if result.get("processed", 0) > 0:
+            logger.info("Engagement worker: %s", result)
+    except Exception as exc:
+        logger.error("Engagement scheduler error: %s", exc)
+
+
+async def _run_call_retry_worker():
+    try:
+        from app.services.call_service import run_due_retries
+        result = await run_due_retries(_db_mod.pool)
+        if result.get("processed", 0) > 0:
+            logger.info("Call retry worker: %s", result)
+    except Exception as exc:
+        logger.error("Call retry worker error: %s", exc)
+
+
+async def _run_call_retry_maintenance():
+    try:
+        from app.services.call_service import run_retry_maintenance
+        result = await run_retry_maintenance(_db_mod.pool)
+        if result.get("recovered", 0) > 0 or result.get("purged", 0) > 0:
+            logger.info("Call retry maintenance: %s", result)
+    except Exception as exc:
+        logger.error("Call retry maintenance error: %s", exc)
+
+
+def build_scheduler() -> AsyncIOScheduler:
+    scheduler = AsyncIOScheduler()
+    scheduler.add_job(_renew_lease, "interval", seconds=settings.LEADER_RENEW_SECONDS, id="leader_lease")
+    scheduler.add_job(
+        _tracked(_leader_only(_run_engagement_worker)), "interval", seconds=60, id="engagement_worker",
+    )
+    scheduler.add_job(
+        _tracked(_leader_only(_run_call_retry_worker)), "interval", seconds=30, id="call_retry_worker",
+    )
+    scheduler.add_job(
+        _tracked(_leader_only(_run_call_retry_maintenance)), "interval",
+        seconds=settings.CALL_RETRY_MAINTENANCE_INTERVAL_SECONDS, id="call_retry_maintenance",
+    )
+    return scheduler
+
+
+async def start() -> AsyncIOScheduler:
+    """Recover stuck retries, then start the schedulers. Returns the running scheduler."""
+    from app.services.leader_election import scheduler_lease
+
+    global _draining
+    _draining = False
+    set_worker_id()
+    # The leader resets rows left 'in_progress' by a prior crashed process
+    # before it starts ticking, so they re-enter the pending pool.
+    if await scheduler_lease.renew():
+        await recover_stuck_work()
+    scheduler = build_scheduler()
+    scheduler.start()
+    logger.info(
+        "Schedulers started: engagement=60s, call_retry=30s, call_retry_maintenance=%ss (leader=%s)",
+        settings.CALL_RETRY_MAINTENANCE_INTERVAL_SECONDS, scheduler_lease.is_leader,
+    )
+    return scheduler
+
+
+async def drain(scheduler: AsyncIOScheduler, timeout: float | None = None) -> None:
+    """
+    Stop scheduling ticks and wait up to `timeout` seconds for running ones.
+    A retry cut off at the deadline stays 'in_progress' and is recovered by
+    the maintenance tick or the next process to start.
+    """
+    from app.services.leader_election import scheduler_lease
+
+    global _draining
+    _draining = True
+    scheduler.shutdown(wait=False)
+    if timeout is None:
+        timeout = settings.WORKER_DRAIN_TIMEOUT_SECONDS
+    pending = {t for t in _inflight if not t.done()}
+    if pending:
+        logger.info("Draining %d background tick(s), up to %ss", len(pending), timeout)
+        _, still_running = await asyncio.wait(pending, timeout=timeout)
+        for task in still_running:
+            task.cancel()
+        if still_running:
+            logger.warning("Cancelled %d background tick(s) at drain deadline", len(still_running))
+    # Hand the lease over only once our singleton ticks have stopped
+    await scheduler_lease.release()
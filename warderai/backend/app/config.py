@@ -26,6 +26,37 @@ class Settings(BaseSettings):
     # App
     BASE_URL: str = "http://localhost:8000"
 
+    # Bridge call placement (services/call_service.py): concurrent Twilio
+    # Calls API requests per process, and the timeout for each.
+    CALL_PLACEMENT_CONCURRENCY: int = 5
+    CALL_PLACEMENT_TIMEOUT_SECONDS: float = 10.0
+
+    # Call retries (services/call_service.py). Funnels can override the
+    # attempt cap and delays; see migrations/019_call_retry_policy.sql.
+    CALL_RETRY_MAX_ATTEMPTS: int = 2
+    CALL_RETRY_BASE_DELAY_SECONDS: int = 120
+    CALL_RETRY_MAX_DELAY_SECONDS: int = 1800
+    CALL_RETRY_JITTER: float = 0.2
+    CALL_RETRY_BATCH_SIZE: int = 20
+    CALL_RETRY_CONCURRENCY: int = 5
+    CALL_RETRY_MAINTENANCE_INTERVAL_SECONDS: int = 300
+    CALL_RETRY_RETENTION_DAYS: int = 7
+
+    # Working hours (services/working_hours.py): funnels without a timezone
+    # read working_hours_start/end in this IANA zone.
+    WORKING_HOURS_DEFAULT_TIMEZONE: str = "UTC"
+
+    # Background work. API replicas can set RUN_BACKGROUND_WORKERS=false and
+    # leave the schedulers to `python -m app.worker`, which opens its own
+    # pool sized by WORKER_DB_POOL_*.
+    RUN_BACKGROUND_WORKERS: bool = True
+    WORKER_DB_POOL_MIN_SIZE: int = 2
+    WORKER_DB_POOL_MAX_SIZE: int = 20
+    WORKER_DRAIN_TIMEOUT_SECONDS: int = 30
+
+    # Leader election for singleton ticks (services/leader_election.py)
+    LEADER_RENEW_SECONDS: int = 10
+
     @property
     def asyncpg_url(self) -> str:
         """Convert SQLAlchemy-style URL to plain postgres URL for asyncpg."""
@@ -4,9 +4,10 @@ from app.config import settings
 pool: asyncpg.Pool | None = None
 
 
-async def create_pool():
+async def create_pool(min_size: int = 2, max_size: int = 10):
+    """Open the global pool. The standalone worker passes its own sizes."""
     global pool
-    pool = await asyncpg.create_pool(settings.asyncpg_url, min_size=2, max_size=10)
+    pool = await asyncpg.create_pool(settings.asyncpg_url, min_size=min_size, max_size=max_size)
 
 
 async def close_pool():
@@ -1,13 +1,14 @@
 import logging
 from contextlib import asynccontextmanager
 
-from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
+from app import background
 from app.config import settings
 from app.database import close_pool, create_pool, pool as _pool_ref
 import app.database as _db_mod
+from app.services import twilio_transport
 
 logger = logging.getLogger("warderai")
 
@@ -56,6 +57,7 @@ def _log_env_summary(db_ok: bool):
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     await create_pool()
+    await twilio_transport.init_transport()
     db_ok = False
     try:
         async with _db_mod.pool.acquire() as conn:
@@ -65,49 +67,19 @@ async def lifespan(app: FastAPI):
         logger.error(f"Database connectivity check failed: {exc}")
     _log_env_summary(db_ok)
 
-    # Identify this worker for call_retry_jobs.locked_by. Uniqueness only
-    # matters if we ever run >1 replica; for now pid+host is enough to tell
-    # restarts apart in logs.
-    import os as _os
-    import socket as _socket
-    from app.services import call_retry_queue as _crq
-    _crq.WORKER_ID = f"{_socket.gethostname()}-{_os.getpid()}"
-
-    # Reset any call_retry rows left 'in_progress' by a prior crashed process
-    # before we start ticking so they re-enter the pending pool.
-    try:
-        if db_ok:
-            await _crq.recover_stuck(_db_mod.pool)
-    except Exception as exc:
-        logger.error("call_retry startup recovery failed: %s", exc)
-
-    async def _run_engagement_worker():
-        try:
-            from app.services.engagement_worker import process_due_engagement_steps
-            result = await process_due_engagement_steps(_db_mod.pool)
-            if result.get("processed", 0) > 0:
-                logger.info("Engagement worker: %s", result)
-        except Exception as exc:
-            logger.error("Engagement scheduler error: %s", exc)
-
-    async def _run_call_retry_worker():
-        try:
-            from app.services.call_service import run_due_retries
-            result = await run_due_retries(_db_mod.pool)
-            if result.get("processed", 0) > 0 or result.get("recovered", 0) > 0:
-                logger.info("Call retry worker: %s", result)
-        except Exception as exc:
-            logger.error("Call retry worker error: %s", exc)
-
-    scheduler = AsyncIOScheduler()
-    scheduler.add_job(_run_engagement_worker, "interval", seconds=60, id="engagement_worker")
-    scheduler.add_job(_run_call_retry_worker, "interval", seconds=30, id="call_retry_worker")
-    scheduler.start()
-    logger.info("Schedulers started: engagement=60s, call_retry=30s")
+    # Schedulers run here unless a standalone worker (`python -m app.worker`)
+    # owns them; set RUN_BACKGROUND_WORKERS=false on API replicas then.
+    scheduler = None
+    if settings.RUN_BACKGROUND_WORKERS:
+        scheduler = await background.start()
+    else:
+        logger.info("Background workers disabled in this process (RUN_BACKGROUND_WORKERS=false)")
 
     yield
 
-    scheduler.shutdown(wait=False)
+    if scheduler is not None:
+        await background.drain(scheduler)
+    await twilio_transport.close_transport()
     await close_pool()
 
 
@@ -1,8 +1,9 @@
 from datetime import datetime
 from typing import Optional
 from uuid import UUID
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator
 
 
 # --- Funnel Schema (describes the schema_json structure) ---
@@ -209,8 +210,13 @@ class FunnelDetail(BaseModel):
     twilio_from_number: str | None = None
     working_hours_start: int = 9
     working_hours_end: int = 19
+    timezone: str | None = None
     sequence_enabled: bool = False
     sequence_config: dict | None = None
+    # NULL = use the CALL_RETRY_* defaults
+    call_retry_max_attempts: int | None = None
+    call_retry_base_delay_seconds: int | None = None
+    call_retry_max_delay_seconds: int | None = None
 
 
 class FunnelUpdateRequest(BaseModel):
@@ -224,8 +230,22 @@ class FunnelUpdateRequest(BaseModel):
     twilio_from_number: str | None = None
     working_hours_start: int | None = None
     working_hours_end: int | None = None
+    timezone: str | None = None
     sequence_enabled: bool | None = None
     sequence_config: dict | None = None
+    call_retry_max_attempts: int | None = Field(default=None, ge=0, le=10)
+    call_retry_base_delay_seconds: int | None = Field(default=None, ge=30)
+    call_retry_max_delay_seconds: int | None = Field(default=None, ge=30)
+
+    @field_validator("timezone")
+    @classmethod
+    def _iana_timezone(cls, value: str | None) -> str | None:
+        if value is not None:
+            try:
+                ZoneInfo(value)
+            except (ZoneInfoNotFoundError, ValueError):
+                raise ValueError(f"unknown IANA timezone: {value}")
+        return value
 
 
 # --- Paginated response ---
@@ -126,9 +126,13 @@ async def process_automation(lead_id: str, pool: asyncpg.Pool):
             # f) Auto-call (call_service is created by Agent B)
             if funnel["auto_call_enabled"]:
                 try:
-                    from app.services.call_service import start_rep_call
+                    from app.services.call_service import hold_call, start_rep_call
 
                     call_status = await start_rep_call(lead_dict, funnel_dict, pool)
+                    if call_status == "outside_hours":
+                        # Held until the funnel's window opens, not skipped
+                        await hold_call(lead_id, str(lead["funnel_id"]), funnel_dict, pool)
+                        call_status = "scheduled"
                     await conn.execute(
                         "UPDATE leads SET call_status = $1 WHERE id = $2",
                         call_status,
@@ -9,7 +9,9 @@ API:
     claim_due(pool, worker_id, limit)   -> list[dict]
     mark_done(pool, job_id)
     mark_failed(pool, job_id, error)
+    hold(pool, job_id, run_at)
     recover_stuck(pool, older_than_seconds)
+    purge_finished(pool, older_than_days)  -> int
 
 The claim uses FOR UPDATE SKIP LOCKED inside a CTE so concurrent workers
 can't double-execute a job. We only run one worker today, but this keeps us
@@ -129,12 +131,34 @@ async def mark_failed(pool, job_id: str, error: str) -> None:
         )
 
 
+async def hold(pool, job_id: str, run_at) -> None:
+    """Put a claimed job back to 'pending' until `run_at` (out of working hours).
+
+    The attempt is not consumed; the job runs again as the same attempt.
+    """
+    async with pool.acquire() as conn:
+        await conn.execute(
+            """
+            UPDATE call_retry_jobs
+               SET status     = 'pending',
+                   run_at     = $2,
+                   updated_at = NOW(),
+                   locked_by  = NULL,
+                   locked_at  = NULL
+             WHERE id = $1
+            """,
+            job_id,
+            run_at,
+        )
+
+
 async def recover_stuck(pool, older_than_seconds: int = 300) -> int:
     """Reset rows left 'in_progress' by a crashed worker back to 'pending'.
 
-    Called on app startup. A row that's been 'in_progress' for longer than
-    the longest plausible call (~5 min with Twilio ringing/connecting)
-    almost certainly belongs to a dead process.
+    Called on app startup and on the retry maintenance tick (not every
+    claim tick). A row that's been 'in_progress' for longer than the longest
+    plausible call (~5 min with Twilio ringing/connecting) almost certainly
+    belongs to a dead process.
     """
     async with pool.acquire() as conn:
         result = await conn.execute(
@@ -155,5 +179,40 @@ async def recover_stuck(pool, older_than_seconds: int = 300) -> int:
     except (ValueError, IndexError):
         count = 0
     if count:
-        logger.warning("call_retry recovered %s stuck job(s) on startup", count)
+        logger.warning("call_retry recovered %s stuck job(s)", count)
     return count
+
+
+async def purge_finished(pool, older_than_days: int = 7, batch_size: int = 1000) -> int:
+    """Delete done/failed rows older than `older_than_days`. Returns the count.
+
+    Deletes in batches so a large backlog never holds long row locks or one
+    huge transaction against the claim path.
+    """
+    total = 0
+    while True:
+        async with pool.acquire() as conn:
+            result = await conn.execute(
+                """
+                DELETE FROM call_retry_jobs
+                 WHERE id IN (
+                       SELECT id
+                         FROM call_retry_jobs
+                        WHERE status IN ('done', 'failed')
+                          AND updated_at < NOW() - make_interval(days => $1)
+                        LIMIT $2
+                 )
+                """,
+                older_than_days,
+                batch_size,
+            )
+        try:
+            count = int(result.split()[-1])
+        except (ValueError, IndexError):
+            count = 0
+        total += count
+        if count < batch_size:
+            break
+    if total:
+        logger.info("call_retry compacted %s finished job(s)", total)
+    return total
@@ -1,31 +1,129 @@
-"""Twilio bridge call service - connects rep to lead via phone bridge."""
+"""Twilio bridge call service - connects rep to lead via phone bridge.
+
+Calls are placed through the shared async Twilio transport
+(services/twilio_transport.py), so dialling never blocks the event loop.
+At most CALL_PLACEMENT_CONCURRENCY placements are in flight per process,
+each bounded by CALL_PLACEMENT_TIMEOUT_SECONDS; placement counts and
+latency are kept in call_stats for /admin/ops/calls.
+
+Calls respect the funnel's working hours in its own timezone
+(services/working_hours.py). Out of hours nothing is dialled: the call is
+held in call_retry_queue until the window opens, as the same attempt.
+
+Failed calls are retried through call_retry_queue. Each funnel may set its
+own retry policy (funnels.call_retry_*, migration 019); unset columns fall
+back to the CALL_RETRY_* settings. Delays back off exponentially with
+jitter so a burst of failures doesn't come back as a burst of retries.
+"""
+import asyncio
 import json
 import logging
 import os
-from datetime import datetime
+import random
+import time
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime, timezone
 
-from app.services import call_retry_queue
+from app.config import settings
+from app.services import call_retry_queue, twilio_transport, working_hours
 
 logger = logging.getLogger(__name__)
 
+CALL_STATUS_EVENTS = ["completed", "busy", "no-answer", "failed"]
+
+# Per-process placement counters. `waiting` is queued for a placement slot,
+# `in_flight` is waiting on Twilio.
+call_stats = {"initiated": 0, "failed": 0, "waiting": 0, "in_flight": 0}
+_latencies_ms: deque[float] = deque(maxlen=500)
+_placement_slots: asyncio.Semaphore | None = None
+
+
+@dataclass
+class RetryPolicy:
+    max_attempts: int
+    base_delay_seconds: int
+    max_delay_seconds: int
+    jitter: float = 0.0
+
+    def delay_for(self, attempt_number: int) -> int:
+        """Seconds to wait before retry `attempt_number` (1-based)."""
+        delay = min(self.base_delay_seconds * 2 ** max(attempt_number - 1, 0), self.max_delay_seconds)
+        if self.jitter:
+            delay *= random.uniform(1 - self.jitter, 1 + self.jitter)
+        return max(1, round(delay))
+
+
+def retry_policy(funnel: dict | None = None) -> RetryPolicy:
+    """The funnel's retry policy, with CALL_RETRY_* filling unset columns."""
+    funnel = funnel or {}
+
+    def _pick(column, default):
+        value = funnel.get(column)
+        return default if value is None else value
+
+    return RetryPolicy(
+        max_attempts=_pick("call_retry_max_attempts", settings.CALL_RETRY_MAX_ATTEMPTS),
+        base_delay_seconds=_pick("call_retry_base_delay_seconds", settings.CALL_RETRY_BASE_DELAY_SECONDS),
+        max_delay_seconds=_pick("call_retry_max_delay_seconds", settings.CALL_RETRY_MAX_DELAY_SECONDS),
+        jitter=settings.CALL_RETRY_JITTER,
+    )
+
+
+def _placement_semaphore() -> asyncio.Semaphore:
+    global _placement_slots
+    if _placement_slots is None:
+        _placement_slots = asyncio.Semaphore(max(1, settings.CALL_PLACEMENT_CONCURRENCY))
+    return _placement_slots
+
+
+def placement_stats() -> dict:
+    """call_stats plus placement latency over the last 500 calls, for /admin/ops/calls."""
+    latencies = sorted(_latencies_ms)
+    latency = None
+    if latencies:
+        latency = {
+            "samples": len(latencies),
+            "p50": round(latencies[len(latencies) // 2], 1),
+            "p95": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 1),
+            "max": round(latencies[-1], 1),
+        }
+    return {**call_stats, "latency_ms": latency}
+
+
+async def _place_call(transport, **kwargs) -> twilio_transport.CallResult:
+    call_stats["waiting"] += 1
+    acquired = False
+    try:
+        async with _placement_semaphore():
+            acquired = True
+            call_stats["waiting"] -= 1
+            call_stats["in_flight"] += 1
+            started = time.monotonic()
+            try:
+                return await transport.place_call(timeout=settings.CALL_PLACEMENT_TIMEOUT_SECONDS, **kwargs)
+            finally:
+                _latencies_ms.append((time.monotonic() - started) * 1000)
+                call_stats["in_flight"] -= 1
+    finally:
+        if not acquired:
+            call_stats["waiting"] -= 1
+
 
 async def start_rep_call(lead: dict, funnel: dict, pool) -> str:
     """Initiate a bridge call: call the rep first, then bridge to lead.
 
-    Returns: "initiated", "skipped_missing_config", "skipped_outside_hours", or "failed"
+    Returns: "initiated", "skipped_missing_config", "outside_hours", or "failed".
+    On "outside_hours" nothing was dialled; the caller holds the call with
+    hold_call().
     """
-    current_hour = datetime.now().hour
-    start_hour = funnel.get("working_hours_start")
-    end_hour = funnel.get("working_hours_end")
-    if start_hour is not None and end_hour is not None:
-        if not (start_hour <= current_hour < end_hour):
-            logger.info("Outside working hours (%s-%s), current=%s",
-                        start_hour, end_hour, current_hour)
-            return "skipped_outside_hours"
-
-    account_sid = os.getenv("TWILIO_ACCOUNT_SID")
-    auth_token = os.getenv("TWILIO_AUTH_TOKEN")
-    if not account_sid or not auth_token:
+    opens_at = working_hours.next_open(funnel)
+    if opens_at is not None:
+        logger.info("Outside working hours for lead %s; opens at %s", lead["id"], opens_at.isoformat())
+        return "outside_hours"
+
+    transport = twilio_transport.get_transport()
+    if transport is None:
         logger.warning("Twilio credentials not configured")
         return "skipped_missing_config"
 
@@ -44,36 +142,41 @@ async def start_rep_call(lead: dict, funnel: dict, pool) -> str:
     status_url = (f"{base_url}/public/twilio/status"
                   f"?lead_id={lead_id}&type=call&secret={webhook_secret}")
 
-    try:
-        from twilio.rest import Client
-        client = Client(account_sid, auth_token)
-        call = client.calls.create(
-            to=rep_phone,
-            from_=from_number,
-            url=webhook_url,
-            status_callback=status_url,
-            status_callback_event=["completed", "busy", "no-answer", "failed"],
-        )
-        logger.info("Twilio call initiated: sid=%s lead_id=%s", call.sid, lead_id)
-        return "initiated"
-    except Exception:
-        logger.exception("Failed to initiate Twilio call for lead %s", lead_id)
+    result = await _place_call(
+        transport,
+        to=rep_phone,
+        from_number=from_number,
+        url=webhook_url,
+        status_callback=status_url,
+        status_callback_events=CALL_STATUS_EVENTS,
+    )
+    if not result.ok:
+        logger.error("Failed to initiate Twilio call for lead %s: %s", lead_id, result.error)
+        call_stats["failed"] += 1
         return "failed"
+    logger.info("Twilio call initiated: sid=%s lead_id=%s", result.sid, lead_id)
+    call_stats["initiated"] += 1
+    return "initiated"
 
 
-async def schedule_retry(lead_id, funnel_id, current_attempts, pool, delay_seconds=120):
+async def schedule_retry(lead_id, funnel_id, current_attempts, pool, delay_seconds=None, policy=None):
     """Persist a retry intent so it survives server restarts.
 
     Replaces the prior asyncio.sleep(120) in-process retry. The actual
     retry is executed by run_due_retries() on the APScheduler tick.
+    `policy` defaults to the CALL_RETRY_* settings; `delay_seconds`
+    overrides the policy's backoff.
 
     Returns the job id (str), or None if max attempts already reached.
     """
-    if current_attempts >= 2:
+    policy = policy or retry_policy()
+    if current_attempts >= policy.max_attempts:
         logger.info("Max retry attempts reached for lead %s; not enqueuing", lead_id)
         return None
 
     next_attempt = current_attempts + 1
+    if delay_seconds is None:
+        delay_seconds = policy.delay_for(next_attempt)
     job_id = await call_retry_queue.enqueue(
         pool=pool,
         lead_id=lead_id,
@@ -89,66 +192,145 @@ async def schedule_retry(lead_id, funnel_id, current_attempts, pool, delay_secon
     return job_id
 
 
-async def _execute_retry(job, pool):
+async def hold_call(lead_id, funnel_id, funnel, pool, attempt_number=0):
+    """Queue an out-of-hours call to run when the funnel's window next opens.
+
+    attempt_number 0 is a held first call; it does not count against the
+    retry cap when it fires. Returns the job id, or None if the funnel is
+    open now.
+    """
+    opens_at = working_hours.next_open(funnel)
+    if opens_at is None:
+        return None
+    delay = (opens_at - datetime.now(timezone.utc)).total_seconds()
+    return await call_retry_queue.enqueue(
+        pool=pool,
+        lead_id=lead_id,
+        funnel_id=funnel_id,
+        attempt_number=attempt_number,
+        delay_seconds=max(1, round(delay)),
+    )
+
+
+async def _prefetch(pool, jobs):
+    """Load the leads and funnels for a claimed batch: ({lead_id: row}, {funnel_id: row})."""
+    lead_ids = list({str(j["lead_id"]) for j in jobs})
+    funnel_ids = list({str(j["funnel_id"]) for j in jobs})
+    async with pool.acquire() as conn:
+        leads = await conn.fetch("SELECT * FROM leads WHERE id = ANY($1::uuid[])", lead_ids)
+        funnels = await conn.fetch("SELECT * FROM funnels WHERE id = ANY($1::uuid[])", funnel_ids)
+    return (
+        {str(r["id"]): r for r in leads},
+        {str(r["id"]): r for r in funnels},
+    )
+
+
+async def _execute_retry(job, pool, rows=None):
     """Execute a single claimed retry job.
 
-    Called by run_due_retries. Assumes the row is already 'in_progress'.
+    Called by run_due_retries with the batch's prefetched (leads, funnels)
+    in `rows`; fetches its own when called alone. Assumes the row is
+    already 'in_progress'.
     """
     job_id = str(job["id"])
     lead_id = str(job["lead_id"])
     funnel_id = str(job["funnel_id"])
 
     try:
+        leads, funnels = rows if rows is not None else await _prefetch(pool, [job])
+        lead_row = leads.get(lead_id)
+        if not lead_row:
+            logger.warning("call_retry lead %s disappeared; marking done", lead_id)
+            await call_retry_queue.mark_done(pool, job_id)
+            return
+
+        funnel_row = funnels.get(funnel_id)
+        if not funnel_row:
+            logger.warning("call_retry funnel %s disappeared; marking failed", funnel_id)
+            await call_retry_queue.mark_failed(pool, job_id, "funnel_missing")
+            return
+
+        funnel_dict = dict(funnel_row)
+        opens_at = working_hours.next_open(funnel_dict)
+        if opens_at is not None:
+            # Hold, don't drop: the same attempt runs when the window opens.
+            await call_retry_queue.hold(pool, job_id, opens_at)
+            logger.info("call_retry held: job=%s lead=%s until=%s", job_id, lead_id, opens_at.isoformat())
+            return
+
+        # A held first call (attempt 0) is not a retry.
         async with pool.acquire() as conn:
-            lead_row = await conn.fetchrow("SELECT * FROM leads WHERE id = $1", lead_id)
-            if not lead_row:
-                logger.warning("call_retry lead %s disappeared; marking done", lead_id)
-                await call_retry_queue.mark_done(pool, job_id)
-                return
-
-            funnel_row = await conn.fetchrow(
-                "SELECT * FROM funnels WHERE id = $1", funnel_id
-            )
-            if not funnel_row:
-                logger.warning("call_retry funnel %s disappeared; marking failed", funnel_id)
-                await call_retry_queue.mark_failed(pool, job_id, "funnel_missing")
-                return
-
-            await conn.execute(
-                "UPDATE leads SET call_attempts = call_attempts + 1, "
-                "call_status = 'retrying' WHERE id = $1",
+            attempts = await conn.fetchval(
+                "UPDATE leads SET call_attempts = COALESCE(call_attempts, 0) + $2, "
+                "call_status = 'retrying' WHERE id = $1 RETURNING call_attempts",
                 lead_id,
+                1 if job["attempt_number"] else 0,
             )
-            lead_dict = dict(lead_row)
-            lead_dict["call_attempts"] = (lead_row["call_attempts"] or 0) + 1
-            if isinstance(lead_dict.get("answers_json"), str):
-                lead_dict["answers_json"] = json.loads(lead_dict["answers_json"])
-            funnel_dict = dict(funnel_row)
+        lead_dict = dict(lead_row)
+        lead_dict["call_attempts"] = attempts
+        if isinstance(lead_dict.get("answers_json"), str):
+            lead_dict["answers_json"] = json.loads(lead_dict["answers_json"])
 
         status = await start_rep_call(lead_dict, funnel_dict, pool)
         logger.info("call_retry fired: job=%s lead=%s result=%s", job_id, lead_id, status)
 
-        if status in ("initiated", "skipped_outside_hours", "skipped_missing_config"):
+        if status in ("initiated", "skipped_missing_config"):
             await call_retry_queue.mark_done(pool, job_id)
+        elif status == "outside_hours":
+            # The window closed between the check above and dialling.
+            opens_at = working_hours.next_open(funnel_dict) or datetime.now(timezone.utc)
+            await call_retry_queue.hold(pool, job_id, opens_at)
         else:
             await call_retry_queue.mark_failed(pool, job_id, "start_rep_call=" + status)
+            # No status callback comes for a call that was never placed,
+            # so back off and try again here while the policy allows.
+            await schedule_retry(
+                lead_id=lead_id,
+                funnel_id=funnel_id,
+                current_attempts=attempts or 0,
+                pool=pool,
+                policy=retry_policy(funnel_dict),
+            )
     except Exception as exc:
         logger.exception("call_retry job %s crashed", job_id)
         await call_retry_queue.mark_failed(pool, job_id, repr(exc))
 
 
 async def run_due_retries(pool):
-    """Claim and execute any due retries. Called on the APScheduler tick."""
-    recovered = await call_retry_queue.recover_stuck(pool)
+    """Claim and execute due retries concurrently. Called on the APScheduler tick.
 
-    jobs = await call_retry_queue.claim_due(pool, limit=10)
+    Claims up to CALL_RETRY_BATCH_SIZE jobs, loads their leads and funnels
+    in one round trip, and runs at most CALL_RETRY_CONCURRENCY at a time.
+    Stuck-job recovery runs on the slower run_retry_maintenance tick.
+    """
+    jobs = await call_retry_queue.claim_due(pool, limit=settings.CALL_RETRY_BATCH_SIZE)
     if not jobs:
-        return {"recovered": recovered, "processed": 0}
+        return {"processed": 0}
+
+    try:
+        rows = await _prefetch(pool, jobs)
+    except Exception:
+        logger.exception("call_retry prefetch failed; jobs will fetch their own rows")
+        rows = None
 
-    for job in jobs:
-        await _execute_retry(job, pool)
+    semaphore = asyncio.Semaphore(max(1, settings.CALL_RETRY_CONCURRENCY))
 
-    return {"recovered": recovered, "processed": len(jobs)}
+    async def _run(job):
+        async with semaphore:
+            await _execute_retry(job, pool, rows)
+
+    await asyncio.gather(*(_run(job) for job in jobs))
+    return {"processed": len(jobs)}
+
+
+async def run_retry_maintenance(pool):
+    """Recover stuck jobs and compact finished ones.
+
+    Runs every CALL_RETRY_MAINTENANCE_INTERVAL_SECONDS, not on the claim tick.
+    """
+    recovered = await call_retry_queue.recover_stuck(pool)
+    purged = await call_retry_queue.purge_finished(pool, settings.CALL_RETRY_RETENTION_DAYS)
+    return {"recovered": recovered, "purged": purged}
 
 
 # Backwards-compat shim; remove once every callsite is on schedule_retry.
@@ -160,4 +342,5 @@ async def retry_call(lead_id, lead, funnel, pool):
         funnel_id=funnel_id,
         current_attempts=current_attempts,
         pool=pool,
+        policy=retry_policy(funnel),
     )
@@ -366,8 +366,10 @@ async def get_funnel_detail(
         SELECT id, org_id, slug, name, schema_json, languages, is_active, created_at,
                routing_rules, auto_email_enabled, auto_sms_enabled, auto_call_enabled,
                notification_emails, webhook_url, rep_phone_number, twilio_from_number,
-               working_hours_start, working_hours_end,
-               sequence_enabled, sequence_config
+               working_hours_start, working_hours_end, timezone,
+               sequence_enabled, sequence_config,
+               call_retry_max_attempts, call_retry_base_delay_seconds,
+               call_retry_max_delay_seconds
         FROM funnels
         WHERE id = $1 AND org_id = $2
         """,
@@ -403,12 +405,16 @@ async def get_funnel_detail(
         "twilio_from_number": row["twilio_from_number"],
         "working_hours_start": row["working_hours_start"] or 9,
         "working_hours_end": row["working_hours_end"] or 19,
+        "timezone": row["timezone"],
         "sequence_enabled": row["sequence_enabled"] or False,
         "sequence_config": (
             json.loads(row["sequence_config"])
             if isinstance(row["sequence_config"], str)
             else row["sequence_config"]
         ) if row["sequence_config"] else None,
+        "call_retry_max_attempts": row["call_retry_max_attempts"],
+        "call_retry_base_delay_seconds": row["call_retry_base_delay_seconds"],
+        "call_retry_max_delay_seconds": row["call_retry_max_delay_seconds"],
     }
 
 
@@ -440,8 +446,12 @@ async def update_funnel_settings(
         "twilio_from_number": "twilio_from_number",
         "working_hours_start": "working_hours_start",
         "working_hours_end": "working_hours_end",
+        "timezone": "timezone",
         "sequence_enabled": "sequence_enabled",
         "sequence_config": "sequence_config",
+        "call_retry_max_attempts": "call_retry_max_attempts",
+        "call_retry_base_delay_seconds": "call_retry_base_delay_seconds",
+        "call_retry_max_delay_seconds": "call_retry_max_delay_seconds",
     }
 
     for field, column in column_map.items():
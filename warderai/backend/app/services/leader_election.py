@@ -0,0 +1,86 @@
+"""
+Leader election for singleton periodic jobs via Postgres advisory locks.
+
+Every API/worker process runs the same scheduler, but polls that should
+happen once per cluster — the engagement worker, call-retry ticks, stuck-job
+recovery and compaction — only run in the process holding the lease.
+
+The lease is a session-level pg_try_advisory_lock held on a dedicated
+connection (outside the pool, so it never costs a request a connection).
+Postgres releases it when that session ends, so a crashed or partitioned
+leader loses the lease without any cleanup on our side.
+
+renew() is called every LEADER_RENEW_SECONDS by every process:
+  - the leader pings its lock connection; if the ping fails or times out it
+    steps down and drops the connection, releasing the lock server-side
+  - followers try to take the lock, so failover happens within one interval
+    of the old leader's session ending
+"""
+
+import asyncio
+import hashlib
+import logging
+
+import asyncpg
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def lock_key(name: str) -> int:
+    """Stable signed 64-bit advisory lock key for a lease name."""
+    return int.from_bytes(hashlib.blake2b(name.encode(), digest_size=8).digest(), "big", signed=True)
+
+
+class LeaderLease:
+    def __init__(self, name: str):
+        self.name = name
+        self.key = lock_key(name)
+        self._conn: asyncpg.Connection | None = None
+        self.is_leader = False
+
+    async def _connect(self) -> asyncpg.Connection:
+        return await asyncpg.connect(settings.asyncpg_url, timeout=settings.LEADER_RENEW_SECONDS)
+
+    async def renew(self) -> bool:
+        """Keep or try to take the lease. Returns whether this process leads."""
+        try:
+            if self.is_leader:
+                await asyncio.wait_for(
+                    self._conn.fetchval("SELECT 1"), timeout=settings.LEADER_RENEW_SECONDS
+                )
+            else:
+                if self._conn is None or self._conn.is_closed():
+                    self._conn = await self._connect()
+                if await self._conn.fetchval("SELECT pg_try_advisory_lock($1)", self.key):
+                    self.is_leader = True
+                    logger.info("Acquired leader lease '%s'", self.name)
+        except Exception as exc:
+            if self.is_leader:
+                logger.warning("Lost leader lease '%s': %s", self.name, exc)
+            await self._drop()
+        return self.is_leader
+
+    async def release(self) -> None:
+        """Give up the lease on shutdown so a follower takes over immediately."""
+        if self._conn is not None and self.is_leader and not self._conn.is_closed():
+            try:
+                await self._conn.fetchval("SELECT pg_advisory_unlock($1)", self.key)
+                logger.info("Released leader lease '%s'", self.name)
+            except Exception as exc:
+                logger.warning("Leader lease '%s' unlock failed: %s", self.name, exc)
+        await self._drop()
+
+    async def _drop(self) -> None:
+        self.is_leader = False
+        conn, self._conn = self._conn, None
+        if conn is not None:
+            # Closing the session releases the advisory lock server-side.
+            try:
+                await asyncio.wait_for(conn.close(), timeout=5)
+            except Exception:
+                conn.terminate()
+
+
+scheduler_lease = LeaderLease("warderai:scheduler")
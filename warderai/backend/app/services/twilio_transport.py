@@ -0,0 +1,129 @@
+"""
+Shared async Twilio REST transport for bridge call placement.
+
+One process-wide httpx.AsyncClient with keep-alive pooling, so every call
+placement reuses a warm TLS connection instead of building a twilio.rest
+Client per call — and never blocks the event loop.
+
+`init_transport()` in startup (API lifespan, app.worker), `close_transport()`
+on shutdown. `get_transport()` lazily creates one for code paths that run
+outside the app (scripts, tests) and returns None when Twilio credentials
+are not configured.
+"""
+
+import logging
+import os
+from dataclasses import dataclass
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+TWILIO_API_BASE = "https://api.twilio.com/2010-04-01"
+
+
+@dataclass
+class CallResult:
+    """Outcome of placing a call. `status` is "initiated" | "failed"."""
+    status: str
+    sid: str | None = None
+    http_status: int | None = None
+    error: str | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.status == "initiated"
+
+
+class TwilioTransport:
+    def __init__(
+        self,
+        account_sid: str,
+        auth_token: str,
+        timeout: float = 15.0,
+        max_connections: int = 20,
+        max_keepalive: int = 10,
+        http_transport: httpx.AsyncBaseTransport | None = None,
+    ):
+        self.account_sid = account_sid
+        self._client = httpx.AsyncClient(
+            transport=http_transport,
+            base_url=f"{TWILIO_API_BASE}/Accounts/{account_sid}",
+            auth=(account_sid, auth_token),
+            timeout=timeout,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive,
+            ),
+        )
+
+    async def place_call(
+        self,
+        to: str,
+        from_number: str,
+        url: str,
+        status_callback: str | None = None,
+        status_callback_events: list[str] | None = None,
+        timeout: float | None = None,
+    ) -> CallResult:
+        """Create one outbound call; Twilio fetches TwiML from `url` when it connects. Never throws."""
+        data: dict = {"To": to, "From": from_number, "Url": url}
+        if status_callback:
+            data["StatusCallback"] = status_callback
+            data["StatusCallbackEvent"] = status_callback_events or []  # repeated field
+
+        try:
+            resp = await self._client.post(
+                "/Calls.json",
+                data=data,
+                timeout=timeout if timeout is not None else httpx.USE_CLIENT_DEFAULT,
+            )
+        except httpx.HTTPError as exc:
+            logger.warning("Twilio call to %s failed: %s", to, exc)
+            return CallResult(status="failed", error=str(exc) or type(exc).__name__)
+
+        if resp.is_success:
+            try:
+                sid = resp.json().get("sid")
+            except ValueError:
+                sid = None
+            return CallResult(status="initiated", sid=sid, http_status=resp.status_code)
+
+        logger.warning("Twilio call to %s rejected: %s %s", to, resp.status_code, resp.text[:200])
+        return CallResult(status="failed", http_status=resp.status_code, error=resp.text[:500])
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+
+_transport: TwilioTransport | None = None
+
+
+def _credentials() -> tuple[str, str]:
+    return os.getenv("TWILIO_ACCOUNT_SID", ""), os.getenv("TWILIO_AUTH_TOKEN", "")
+
+
+async def init_transport() -> TwilioTransport | None:
+    global _transport
+    account_sid, auth_token = _credentials()
+    if account_sid and auth_token and _transport is None:
+        _transport = TwilioTransport(account_sid, auth_token)
+        logger.info("Twilio transport ready")
+    return _transport
+
+
+async def close_transport() -> None:
+    global _transport
+    if _transport:
+        await _transport.aclose()
+        _transport = None
+
+
+def get_transport() -> TwilioTransport | None:
+    """Return the shared transport, or None if Twilio is not configured."""
+    global _transport
+    if _transport is None:
+        account_sid, auth_token = _credentials()
+        if account_sid and auth_token:
+            _transport = TwilioTransport(account_sid, auth_token)
+    return _transport
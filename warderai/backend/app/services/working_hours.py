@@ -0,0 +1,61 @@
+"""
+Funnel working hours in the funnel's own timezone.
+
+A funnel is open from working_hours_start to working_hours_end (whole hours,
+local time) every day in its IANA `timezone` (funnels.timezone, migration
+020, falling back to WORKING_HOURS_DEFAULT_TIMEZONE). start > end is an
+overnight window (22 -> 6); start == end is open around the clock.
+
+Each local day's window is computed once, as UTC instants, and cached per
+(timezone, start, end, date). Out-of-hours bridge calls are held in
+call_retry_jobs until next_open() rather than skipped (see call_service).
+"""
+
+import logging
+from datetime import date, datetime, time, timedelta, timezone
+from functools import lru_cache
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def funnel_zone(funnel: dict) -> ZoneInfo:
+    name = funnel.get("timezone") or settings.WORKING_HOURS_DEFAULT_TIMEZONE
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        logger.warning("Unknown funnel timezone %r, using UTC", name)
+        return ZoneInfo("UTC")
+
+
+@lru_cache(maxsize=4096)
+def _window(zone: ZoneInfo, start_hour: int, end_hour: int, day: date) -> tuple[datetime, datetime]:
+    """The window opening on local `day`, as UTC (opens_at, closes_at)."""
+    opens = datetime.combine(day, time(start_hour), zone)
+    close_day = day if end_hour > start_hour else day + timedelta(days=1)
+    closes = datetime.combine(close_day, time(end_hour), zone)
+    return opens.astimezone(timezone.utc), closes.astimezone(timezone.utc)
+
+
+def next_open(funnel: dict, now: datetime | None = None) -> datetime | None:
+    """
+    None if the funnel is open at `now` (or has no working hours), else the
+    UTC instant its next window opens.
+    """
+    start_hour = funnel.get("working_hours_start")
+    end_hour = funnel.get("working_hours_end")
+    if start_hour is None or end_hour is None or start_hour == end_hour:
+        return None
+    now = now or datetime.now(timezone.utc)
+    zone = funnel_zone(funnel)
+    today = now.astimezone(zone).date()
+    # Yesterday's window may still be open (overnight hours)
+    for offset in range(-1, 3):
+        opens, closes = _window(zone, start_hour % 24, end_hour % 24, today + timedelta(days=offset))
+        if opens <= now < closes:
+            return None
+        if now < opens:
+            return opens
+    return None  # unreachable for valid hours
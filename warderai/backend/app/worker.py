@@ -0,0 +1,63 @@
+"""
+Standalone background worker: engagement steps and call retries, without
+the HTTP server.
+
+    python -m app.worker
+
+Run one or more of these next to API processes started with
+RUN_BACKGROUND_WORKERS=false, so retry and send waves no longer share an
+event loop and connection pool with public funnel pages. The worker opens
+its own pool (WORKER_DB_POOL_MIN_SIZE / WORKER_DB_POOL_MAX_SIZE); retry
+concurrency comes from the CALL_RETRY_* settings, applied per process.
+
+On SIGTERM/SIGINT it stops scheduling, waits up to
+WORKER_DRAIN_TIMEOUT_SECONDS for in-flight ticks, then closes the Twilio
+transport and the pool.
+"""
+
+import asyncio
+import logging
+import signal
+
+from app import background
+from app.config import settings
+from app.database import close_pool, create_pool
+from app.services import twilio_transport
+
+logger = logging.getLogger("warderai.worker")
+
+
+async def run() -> None:
+    await create_pool(
+        min_size=settings.WORKER_DB_POOL_MIN_SIZE,
+        max_size=settings.WORKER_DB_POOL_MAX_SIZE,
+    )
+    await twilio_transport.init_transport()
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, stop.set)
+
+    scheduler = await background.start()
+    logger.info("Worker running (pool max=%s); waiting for SIGTERM", settings.WORKER_DB_POOL_MAX_SIZE)
+    try:
+        await stop.wait()
+        logger.info("Shutdown requested; draining")
+        await background.drain(scheduler)
+    finally:
+        await twilio_transport.close_transport()
+        await close_pool()
+    logger.info("Worker stopped")
+
+
+def main() -> None:
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s %(levelname)s %(name)s: %(message)s",
+    )
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,19 @@
+-- 019_call_retry_policy.sql
+-- Per-funnel call retry policy, plus compaction support for call_retry_jobs.
+--
+-- Retry delay is exponential with jitter (services/call_service.py
+-- RetryPolicy): base * 2^(attempt-1), capped at max, +/- CALL_RETRY_JITTER.
+-- NULL columns fall back to the CALL_RETRY_* settings.
+--
+-- call_retry_jobs only needs pending/in_progress rows to do its job; done and
+-- failed rows are kept CALL_RETRY_RETENTION_DAYS for debugging, then deleted
+-- by the retry maintenance tick so the table and its indexes stay small.
+
+ALTER TABLE funnels ADD COLUMN IF NOT EXISTS call_retry_max_attempts       INT NULL;
+ALTER TABLE funnels ADD COLUMN IF NOT EXISTS call_retry_base_delay_seconds INT NULL;
+ALTER TABLE funnels ADD COLUMN IF NOT EXISTS call_retry_max_delay_seconds  INT NULL;
+
+-- Compaction index: finished rows by age.
+CREATE INDEX IF NOT EXISTS idx_call_retry_jobs_finished
+    ON call_retry_jobs (updated_at)
+    WHERE status IN ('done', 'failed');
@@ -0,0 +1,12 @@
+-- 020_funnel_timezone.sql
+-- Timezone-aware working hours for bridge calls (services/working_hours.py).
+--
+-- funnels.timezone is an IANA name ('America/Chicago'); working_hours_start
+-- and working_hours_end are read in that zone. NULL falls back to
+-- WORKING_HOURS_DEFAULT_TIMEZONE.
+--
+-- Out-of-hours calls are held, not skipped: they go into call_retry_jobs as
+-- 'pending' with run_at = when the window opens.
+-- Idempotent.
+
+ALTER TABLE funnels ADD COLUMN IF NOT EXISTS timezone TEXT NULL;
@@ -0,0 +1,96 @@
+"""Tests for background scheduling and graceful drain.
+
+The scheduler is a stub and ticks are plain coroutines, so these cover the
+drain contract — stop scheduling, let running ticks finish, cancel at the
+deadline — and the leader lease state machine, not APScheduler or
+Postgres advisory locks themselves.
+"""
+
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from app import background
+from app.services import leader_election
+from app.services.leader_election import LeaderLease
+
+
+@pytest.fixture(autouse=True)
+def _reset_drain_state(monkeypatch):
+    monkeypatch.setattr(background, "_draining", False)
+    monkeypatch.setattr(background, "_inflight", set())
+    monkeypatch.setattr(leader_election, "scheduler_lease", LeaderLease("test:scheduler"))
+
+
+@pytest.mark.asyncio
+async def test_drain_waits_for_running_tick():
+    finished = []
+    release = asyncio.Event()
+
+    async def tick():
+        await release.wait()
+        finished.append(True)
+
+    task = asyncio.create_task(background._tracked(tick)())
+    await asyncio.sleep(0)
+    scheduler = MagicMock()
+
+    drain = asyncio.create_task(background.drain(scheduler, timeout=5))
+    await asyncio.sleep(0)
+    assert background.draining()
+    scheduler.shutdown.assert_called_once_with(wait=False)
+    assert not drain.done()
+
+    release.set()
+    await drain
+    assert finished == [True] and task.done()
+
+
+@pytest.mark.asyncio
+async def test_drain_cancels_ticks_past_deadline():
+    async def stuck():
+        await asyncio.Event().wait()
+
+    task = asyncio.create_task(background._tracked(stuck)())
+    await asyncio.sleep(0)
+
+    await background.drain(MagicMock(), timeout=0.01)
+    await asyncio.sleep(0)
+
+    assert task.cancelled()
+
+
+def test_scheduler_registers_all_ticks():
+    scheduler = background.build_scheduler()
+    assert {job.id for job in scheduler.get_jobs()} == {
+        "leader_lease", "engagement_worker", "call_retry_worker", "call_retry_maintenance",
+    }
+
+
+@pytest.mark.asyncio
+async def test_ticks_run_only_on_leader():
+    lease = leader_election.scheduler_lease
+    tick = AsyncMock()
+    guarded = background._leader_only(tick)
+
+    await guarded()
+    tick.assert_not_awaited()
+
+    lease.is_leader = True
+    await guarded()
+    tick.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_leader_steps_down_when_ping_fails():
+    conn = AsyncMock()
+    conn.fetchval.side_effect = [True, ConnectionError("connection lost")]
+    conn.is_closed = MagicMock(return_value=False)
+    lease = LeaderLease("test:scheduler")
+    lease._connect = AsyncMock(return_value=conn)
+
+    assert await lease.renew() is True
+    assert "pg_try_advisory_lock" in conn.fetchval.await_args.args[0]
+    assert await lease.renew() is False
+    conn.close.assert_awaited_once()
@@ -3,10 +3,15 @@
 These tests mock asyncpg so they can run without a live Postgres. They
 prove the correctness properties we care about:
 
-  1. schedule_retry respects the max-attempts cap.
+  1. schedule_retry respects the max-attempts cap, including a funnel's own.
   2. schedule_retry writes a pending row and marks the lead as retry_scheduled.
-  3. run_due_retries calls recover_stuck before claiming.
+  3. Stuck-job recovery runs on the maintenance tick, not on every claim.
   4. A crash mid-execute leaves the job marked failed (not silently dropped).
+  5. Retry delays back off exponentially, capped, within the jitter band.
+  6. A claimed batch is prefetched once and run under the concurrency limit.
+  7. Compaction deletes finished rows in batches until a short batch.
+  8. A retry due out of hours (in the funnel's timezone) is held until the
+     window opens, without spending an attempt.
 
 What these tests do NOT cover (intentionally — needs a live DB):
 
@@ -19,13 +24,15 @@ rely on the single-worker invariant plus the dry-run in QA-02.
 
 from __future__ import annotations
 
+import asyncio
+from datetime import datetime, timedelta, timezone
 from types import SimpleNamespace
 from unittest.mock import AsyncMock, MagicMock, patch
 from uuid import uuid4
 
 import pytest
 
-from app.services import call_service
+from app.services import call_service, working_hours
 
 
 class _FakePool:
@@ -95,7 +102,8 @@ async def test_schedule_retry_enqueues_and_marks_lead(fake_pool):
     # attempt_number passed in is current + 1
     _, kwargs = mock_enqueue.await_args
     assert kwargs["attempt_number"] == 1
-    assert kwargs["delay_seconds"] == 120
+    # First retry is the base delay (120s) within the default +/-20% jitter.
+    assert 96 <= kwargs["delay_seconds"] <= 144
 
     # Lead marked as scheduled so the admin UI shows the right state.
     conn.execute.assert_awaited()
@@ -105,27 +113,127 @@ async def test_schedule_retry_enqueues_and_marks_lead(fake_pool):
 
 
 @pytest.mark.asyncio
-async def test_run_due_retries_recovers_before_claiming(fake_pool):
-    """Startup recovery MUST run before claim so a crashed-worker row
-    gets back into the pending pool on the same tick."""
+async def test_schedule_retry_uses_funnel_attempt_cap(fake_pool):
+    """A funnel's call_retry_max_attempts overrides the default cap of 2."""
     pool, _ = fake_pool
+    funnel = {"call_retry_max_attempts": 4}
 
+    with patch(
+        "app.services.call_service.call_retry_queue.enqueue",
+        new=AsyncMock(return_value="job-123"),
+    ) as mock_enqueue:
+        assert await call_service.schedule_retry(
+            lead_id=str(uuid4()), funnel_id=str(uuid4()), current_attempts=3,
+            pool=pool, policy=call_service.retry_policy(funnel),
+        ) == "job-123"
+        assert await call_service.schedule_retry(
+            lead_id=str(uuid4()), funnel_id=str(uuid4()), current_attempts=4,
+            pool=pool, policy=call_service.retry_policy(funnel),
+        ) is None
+
+    assert mock_enqueue.await_count == 1
+
+
+def test_retry_policy_backs_off_exponentially_with_cap():
+    policy = call_service.RetryPolicy(max_attempts=5, base_delay_seconds=60, max_delay_seconds=300)
+    assert [policy.delay_for(n) for n in range(1, 5)] == [60, 120, 240, 300]
+
+    jittered = call_service.RetryPolicy(
+        max_attempts=5, base_delay_seconds=100, max_delay_seconds=1000, jitter=0.5
+    )
+    delays = {jittered.delay_for(2) for _ in range(50)}
+    assert all(100 <= d <= 300 for d in delays)
+    assert len(delays) > 1
+
+
+@pytest.mark.asyncio
+async def test_run_due_retries_does_not_recover_on_claim_tick(fake_pool):
+    """Recovery moved to run_retry_maintenance; the 30s tick only claims."""
+    pool, _ = fake_pool
+    recover = AsyncMock(return_value=0)
+    claim = AsyncMock(return_value=[])
+
+    with patch("app.services.call_service.call_retry_queue.recover_stuck", new=recover), \
+         patch("app.services.call_service.call_retry_queue.claim_due", new=claim):
+        result = await call_service.run_due_retries(pool)
+
+    recover.assert_not_awaited()
+    assert claim.await_args.kwargs["limit"] == call_service.settings.CALL_RETRY_BATCH_SIZE
+    assert result == {"processed": 0}
+
+
+@pytest.mark.asyncio
+async def test_retry_maintenance_recovers_then_compacts(fake_pool):
+    pool, _ = fake_pool
     call_order: list[str] = []
 
     async def fake_recover(p, **kwargs):
         call_order.append("recover")
-        return 0
+        return 1
 
-    async def fake_claim(p, worker_id=None, limit=10):
-        call_order.append("claim")
-        return []  # nothing due on this tick
+    async def fake_purge(p, older_than_days, **kwargs):
+        call_order.append("purge")
+        return 3
 
     with patch("app.services.call_service.call_retry_queue.recover_stuck", new=fake_recover), \
-         patch("app.services.call_service.call_retry_queue.claim_due", new=fake_claim):
+         patch("app.services.call_service.call_retry_queue.purge_finished", new=fake_purge):
+        result = await call_service.run_retry_maintenance(pool)
+
+    assert call_order == ["recover", "purge"]
+    assert result == {"recovered": 1, "purged": 3}
+
+
+@pytest.mark.asyncio
+async def test_run_due_retries_prefetches_once_and_runs_concurrently(fake_pool, monkeypatch):
+    """One prefetch query per table for the whole batch, and no more than
+    CALL_RETRY_CONCURRENCY calls in flight at once."""
+    pool, conn = fake_pool
+    funnel_id = uuid4()
+    jobs = [
+        {"id": uuid4(), "lead_id": uuid4(), "funnel_id": funnel_id, "attempt_number": 1, "run_at": None}
+        for _ in range(6)
+    ]
+    conn.fetch = AsyncMock(side_effect=[
+        [{"id": j["lead_id"], "call_attempts": 1, "answers_json": "{}"} for j in jobs],
+        [{"id": funnel_id}],
+    ])
+    conn.fetchval = AsyncMock(return_value=2)
+
+    in_flight = peak = 0
+
+    async def fake_call(lead, funnel, p):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return "initiated"
+
+    monkeypatch.setattr(call_service.settings, "CALL_RETRY_CONCURRENCY", 3)
+    mark_done = AsyncMock()
+    with patch("app.services.call_service.call_retry_queue.claim_due", new=AsyncMock(return_value=jobs)), \
+         patch("app.services.call_service.call_retry_queue.mark_done", new=mark_done), \
+         patch("app.services.call_service.start_rep_call", new=fake_call):
         result = await call_service.run_due_retries(pool)
 
-    assert call_order == ["recover", "claim"]
-    assert result == {"recovered": 0, "processed": 0}
+    assert result == {"processed": 6}
+    assert conn.fetch.await_count == 2
+    assert "ANY" in conn.fetch.await_args_list[0].args[0]
+    assert conn.fetchrow.await_count == 0
+    assert mark_done.await_count == 6
+    assert 1 < peak <= 3
+
+
+@pytest.mark.asyncio
+async def test_purge_finished_deletes_in_batches(fake_pool):
+    from app.services import call_retry_queue
+
+    pool, conn = fake_pool
+    conn.execute = AsyncMock(side_effect=["DELETE 2", "DELETE 2", "DELETE 1"])
+
+    assert await call_retry_queue.purge_finished(pool, older_than_days=7, batch_size=2) == 5
+    assert conn.execute.await_count == 3
+    assert "status IN ('done', 'failed')" in conn.execute.await_args.args[0]
 
 
 @pytest.mark.asyncio
@@ -135,8 +243,8 @@ async def test_execute_retry_marks_failed_on_crash(fake_pool):
     the only way out is startup recovery."""
     pool, conn = fake_pool
 
-    # fetchrow raises on first call — simulates a DB hiccup mid-execute.
-    conn.fetchrow = AsyncMock(side_effect=RuntimeError("db hiccup"))
+    # The lead/funnel fetch raises — simulates a DB hiccup mid-execute.
+    conn.fetch = AsyncMock(side_effect=RuntimeError("db hiccup"))
 
     mark_failed = AsyncMock()
     with patch("app.services.call_service.call_retry_queue.mark_failed", new=mark_failed):
@@ -153,3 +261,58 @@ async def test_execute_retry_marks_failed_on_crash(fake_pool):
     args, _ = mark_failed.await_args
     # (pool, job_id, error_string)
     assert "db hiccup" in args[2]
+
+
+_NY = {"timezone": "America/New_York", "working_hours_start": 9, "working_hours_end": 19}
+
+
+def test_next_open_uses_the_funnel_timezone():
+    # 23:30 UTC is 19:30 in New York (EDT): closed until 09:00 EDT = 13:00 UTC.
+    now = datetime(2026, 7, 1, 23, 30, tzinfo=timezone.utc)
+    assert working_hours.next_open(_NY, now) == datetime(2026, 7, 2, 13, 0, tzinfo=timezone.utc)
+    # 14:00 UTC is 10:00 EDT: open.
+    assert working_hours.next_open(_NY, datetime(2026, 7, 1, 14, 0, tzinfo=timezone.utc)) is None
+    # Overnight hours, and start == end meaning always open.
+    night = {"working_hours_start": 22, "working_hours_end": 6}
+    assert working_hours.next_open(night, datetime(2026, 7, 1, 3, 0, tzinfo=timezone.utc)) is None
+    assert working_hours.next_open({"working_hours_start": 9, "working_hours_end": 9}, now) is None
+
+
+@pytest.mark.asyncio
+async def test_retry_due_overnight_is_held_not_dropped(fake_pool):
+    pool, conn = fake_pool
+    job = {"id": uuid4(), "lead_id": uuid4(), "funnel_id": uuid4(), "attempt_number": 1, "run_at": None}
+    opens_at = datetime(2026, 7, 2, 13, 0, tzinfo=timezone.utc)
+    rows = ({str(job["lead_id"]): {"id": job["lead_id"]}}, {str(job["funnel_id"]): dict(_NY)})
+    conn.fetchval = AsyncMock()
+
+    hold, mark_done, start = AsyncMock(), AsyncMock(), AsyncMock()
+    with patch("app.services.call_service.working_hours.next_open", return_value=opens_at), \
+         patch("app.services.call_service.call_retry_queue.hold", new=hold), \
+         patch("app.services.call_service.call_retry_queue.mark_done", new=mark_done), \
+         patch("app.services.call_service.start_rep_call", new=start):
+        await call_service._execute_retry(job, pool, rows)
+
+    hold.assert_awaited_once_with(pool, str(job["id"]), opens_at)
+    mark_done.assert_not_awaited()
+    start.assert_not_awaited()
+    # The attempt is not spent.
+    conn.fetchval.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_hold_call_enqueues_for_the_window_opening(fake_pool):
+    pool, _ = fake_pool
+    enqueue = AsyncMock(return_value="job-1")
+    opens_at = datetime.now(timezone.utc) + timedelta(hours=1)
+    with patch("app.services.call_service.call_retry_queue.enqueue", new=enqueue):
+        with patch("app.services.call_service.working_hours.next_open", return_value=None):
+            assert await call_service.hold_call("lead-1", "funnel-1", _NY, pool) is None
+        with patch("app.services.call_service.working_hours.next_open", return_value=opens_at):
+            assert await call_service.hold_call("lead-1", "funnel-1", _NY, pool) == "job-1"
+
+    enqueue.assert_awaited_once()
+    kwargs = enqueue.await_args.kwargs
+    # A held first call is attempt 0, so it doesn't count against the retry cap.
+    assert kwargs["attempt_number"] == 0
+    assert 3590 <= kwargs["delay_seconds"] <= 3600
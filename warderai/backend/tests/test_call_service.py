@@ -0,0 +1,91 @@
+"""Tests for bridge call placement over the shared async Twilio transport.
+
+Twilio is replaced by httpx.MockTransport, or by a transport whose
+place_call blocks until released, so no request leaves the process.
+"""
+
+import asyncio
+from uuid import uuid4
+
+import httpx
+import pytest
+
+from app.services import call_service, twilio_transport
+from app.services.twilio_transport import CallResult, TwilioTransport
+
+_FUNNEL = {"rep_phone_number": "+15550001111", "twilio_from_number": "+15550000000"}
+
+
+class _SlowCalls:
+    def __init__(self):
+        self.release = asyncio.Event()
+        self.in_flight = 0
+        self.peak = 0
+
+    async def place_call(self, **kwargs):
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        await self.release.wait()
+        self.in_flight -= 1
+        return CallResult(status="initiated", sid="CA1")
+
+
+@pytest.mark.asyncio
+async def test_place_call_posts_status_events_and_reports_failures():
+    seen = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(request)
+        return httpx.Response(201, json={"sid": "CA1"})
+
+    transport = TwilioTransport("AC123", "secret", http_transport=httpx.MockTransport(handler))
+    result = await transport.place_call(
+        "+15551234567", "+15550000000", "https://example.com/twiml",
+        status_callback="https://example.com/status", status_callback_events=["completed", "busy"],
+    )
+    await transport.aclose()
+
+    assert result.ok and result.sid == "CA1"
+    assert seen[0].url.path == "/2010-04-01/Accounts/AC123/Calls.json"
+    assert b"StatusCallbackEvent=completed&StatusCallbackEvent=busy" in seen[0].content
+
+    def timeout(request):
+        raise httpx.ReadTimeout("timed out", request=request)
+
+    transport = TwilioTransport("AC123", "secret", http_transport=httpx.MockTransport(timeout))
+    result = await transport.place_call("+15551234567", "+15550000000", "https://example.com/twiml", timeout=0.1)
+    await transport.aclose()
+    assert result.status == "failed" and result.http_status is None
+
+
+@pytest.mark.asyncio
+async def test_placements_are_bounded_and_do_not_block_the_loop(monkeypatch):
+    calls = _SlowCalls()
+    monkeypatch.setattr(twilio_transport, "get_transport", lambda: calls)
+    monkeypatch.setattr(call_service.settings, "CALL_PLACEMENT_CONCURRENCY", 2)
+    monkeypatch.setattr(call_service, "_placement_slots", None)
+
+    tasks = [
+        asyncio.create_task(call_service.start_rep_call({"id": uuid4()}, dict(_FUNNEL), pool=None))
+        for _ in range(5)
+    ]
+    async with asyncio.timeout(1):
+        while calls.in_flight < 2:
+            await asyncio.sleep(0)  # the loop keeps running while calls are placed
+    assert call_service.call_stats["waiting"] == 3
+
+    calls.release.set()
+    assert await asyncio.gather(*tasks) == ["initiated"] * 5
+    assert calls.peak == 2
+    stats = call_service.placement_stats()
+    assert (stats["waiting"], stats["in_flight"]) == (0, 0)
+    assert stats["latency_ms"]["samples"] >= 5
+
+
+@pytest.mark.asyncio
+async def test_start_rep_call_skips_without_credentials(monkeypatch):
+    monkeypatch.setattr(twilio_transport, "_transport", None)
+    monkeypatch.delenv("TWILIO_ACCOUNT_SID", raising=False)
+    monkeypatch.delenv("TWILIO_AUTH_TOKEN", raising=False)
+
+    assert await call_service.start_rep_call({"id": uuid4()}, dict(_FUNNEL), pool=None) == "skipped_missing_config"